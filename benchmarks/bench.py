@@ -0,0 +1,370 @@
+import argparse
+import inspect
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+HDIR = os.path.dirname(os.path.abspath(
+            inspect.getfile(inspect.currentframe())))
+PARENTDIR = os.path.dirname(HDIR)
+sys.path.insert(0, PARENTDIR)
+import numpy as np      # type: ignore # noqa
+import pandas as pd     # type: ignore # noqa
+import datawhistle as dw  # noqa
+import datawhistle.pandaschecks as dwpc  # noqa
+import datagen  # noqa
+
+# Benchmarks of the pandas check functions, of full command line runs and
+# of rules parsing, over synthetic data of different shapes and sizes.
+#
+#   python benchmarks/bench.py run --output results.json
+#   python benchmarks/bench.py compare baseline.json results.json
+#
+# Each result records the best wall time over a number of repeats, the
+# throughput (rows, or rules file columns, per second) and peak memory.
+# Peak memory of in process benchmarks is measured with tracemalloc in a
+# separate untimed run, and of command line runs as the peak resident set
+# size of the child process.
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+DEFAULT_RULES_COLUMNS = [10, 100, 1000]
+DEFAULT_REPEAT = 3
+SUITES = ['kernels', 'cli', 'rules']
+DEFAULT_TOLERANCE = 0.25
+# results faster than this are too noisy to compare
+DEFAULT_MIN_SECONDS = 0.005
+
+# check function name -> (column types it applies to, function calling it)
+# 'table' checks are run once per DataFrame rather than per column.
+_KernelCall = Callable[[pd.DataFrame, str],
+                       Union[Tuple[bool, str], List[Tuple[bool, str]]]]
+KERNELS: Dict[str, Tuple[List[str], _KernelCall]] = {
+    'dfcheck_row_count': (
+        ['table'], lambda df, col: dwpc.dfcheck_row_count(df, 1, '>=')),
+    'dfcheck_no_duplicate_rows': (
+        ['table'], lambda df, col: dwpc.dfcheck_no_duplicate_rows(df)),
+    'colcheck_exists': (
+        ['numeric', 'string', 'datetime'],
+        lambda df, col: dwpc.colcheck_exists(df, col)),
+    'colcheck_count_distinct': (
+        ['numeric', 'string', 'datetime'],
+        lambda df, col: dwpc.colcheck_count_distinct(df, col, 1, '>=')),
+    'colcheck_is_numeric': (
+        ['numeric'], lambda df, col: dwpc.colcheck_is_numeric(df, col)),
+    'colcheck_is_str': (
+        ['string'], lambda df, col: dwpc.colcheck_is_str(df, col)),
+    'colcheck_is_datetime': (
+        ['datetime'], lambda df, col: dwpc.colcheck_is_datetime(df, col)),
+    'colcheck_no_blanks': (
+        ['string'], lambda df, col: dwpc.colcheck_no_blanks(df, col)),
+    'colcheck_no_duplicates': (
+        ['numeric', 'string', 'datetime'],
+        lambda df, col: dwpc.colcheck_no_duplicates(df, col)),
+    'colcheck_no_nulls': (
+        ['numeric', 'string', 'datetime'],
+        lambda df, col: dwpc.colcheck_no_nulls(df, col)),
+    'colcheck_regex': (
+        ['string'],
+        lambda df, col: dwpc.colcheck_regex(df, col, r'\s', 'exclude')),
+    'colcheck_regex_rules': (
+        ['string'],
+        lambda df, col: dwpc.colcheck_regex_rules(
+            df, col, [(r'\s', 'exclude'), (r'^[A-Za-z0-9]*$', 'mandatory'),
+                      (r'^[0-9]+$', 'exclude')])),
+    'colcheck_val': (
+        ['numeric'], lambda df, col: dwpc.colcheck_val(df, col, -1e9, '>=')),
+    'colcheck_iqr': (
+        ['numeric'], lambda df, col: dwpc.colcheck_iqr(df, col)),
+    'colcheck_iqr_sketch': (
+        ['numeric'],
+        lambda df, col: dwpc.colcheck_iqr(df, col, method='sketch')),
+}
+
+
+def _result(name: str, seconds: float, items: int, unit: str,
+            peak_bytes: int) -> Dict[str, Any]:
+    return {'name': name, 'seconds': seconds,
+            'throughput': items / seconds if seconds > 0 else None,
+            'unit': unit, 'peak_bytes': peak_bytes}
+
+
+def _time_kernel(call: _KernelCall, df: pd.DataFrame, columns: List[str],
+                 repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        elapsed = 0.0
+        for col in columns:
+            start = time.perf_counter()
+            call(df, col)
+            elapsed += time.perf_counter() - start
+        best = min(best, elapsed)
+    return best
+
+
+def _peak_kernel(call: _KernelCall, df: pd.DataFrame,
+                 columns: List[str]) -> int:
+    peak = 0
+    for col in columns:
+        tracemalloc.start()
+        call(df, col)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return peak
+
+
+def bench_kernels(shapes: List[str], sizes: List[int], repeat: int,
+                  seed: int) -> List[Dict[str, Any]]:
+    '''Time every check function on every applicable column.'''
+    results = []
+    for shape in shapes:
+        types = datagen.column_types(shape)
+        for rows in sizes:
+            df = datagen.make_frame(shape, rows, seed)
+            for kernel, (kinds, call) in KERNELS.items():
+                if kinds == ['table']:
+                    columns = ['']
+                else:
+                    columns = [c for c, t in types.items() if t in kinds]
+                if not columns:
+                    continue
+                seconds = _time_kernel(call, df, columns, repeat)
+                peak = _peak_kernel(call, df, columns)
+                results.append(_result(f'kernel/{shape}/{rows}/{kernel}',
+                                       seconds, rows * len(columns), 'rows/s',
+                                       peak))
+                print(_format_result(results[-1]), flush=True)
+    return results
+
+
+# Runs the command line in a child process, writing its peak resident set
+# size to a file on exit. The high water mark is read from /proc where
+# available, as ru_maxrss of a child includes the memory of the parent it
+# was forked from.
+_CHILD_CODE = '''
+import atexit, resource, runpy, sys
+def _write_peak(filename=sys.argv.pop(1)):
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak *= 1 if sys.platform == 'darwin' else 1024
+    try:
+        with open('/proc/self/status') as stream:
+            for line in stream:
+                if line.startswith('VmHWM:'):
+                    peak = int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    with open(filename, 'w') as stream:
+        stream.write(str(peak))
+atexit.register(_write_peak)
+runpy.run_module('datawhistle', run_name='__main__', alter_sys=True)
+'''
+
+
+def _run_child(args: List[str], workdir: str) -> Tuple[float, int]:
+    # wall time and peak resident set size (bytes) of a command line run
+    peakfile = os.path.join(workdir, 'peak_rss')
+    command = [sys.executable, '-c', _CHILD_CODE, peakfile] + args
+    start = time.perf_counter()
+    returncode = subprocess.call(command, cwd=PARENTDIR,
+                                 stdout=subprocess.DEVNULL)
+    seconds = time.perf_counter() - start
+    if returncode not in [0, 1]:
+        raise RuntimeError(f'datawhistle {" ".join(args)} exited with '
+                           f'{returncode}')
+    with open(peakfile) as stream:
+        return seconds, int(stream.read())
+
+
+def bench_cli(shapes: List[str], sizes: List[int], repeat: int, seed: int,
+              workdir: str) -> List[Dict[str, Any]]:
+    '''Time command line runs checking CSV files against rules files.'''
+    results = []
+    for shape in shapes:
+        rulesfile = os.path.join(workdir, f'{shape}.yaml')
+        with open(rulesfile, 'w') as stream:
+            stream.write(datagen.rules_yaml(shape))
+        for rows in sizes:
+            csvfile = os.path.join(workdir, f'{shape}_{rows}_{seed}.csv')
+            if not os.path.exists(csvfile):
+                datagen.write_csv(csvfile, shape, rows, seed)
+            args = ['--source', 'CSV', '--file', csvfile, '--rules',
+                    rulesfile]
+            runs = [_run_child(args, workdir) for _ in range(repeat)]
+            seconds = min(run[0] for run in runs)
+            peak = max(run[1] for run in runs)
+            results.append(_result(f'cli/{shape}/{rows}', seconds, rows,
+                                   'rows/s', peak))
+            print(_format_result(results[-1]), flush=True)
+    return results
+
+
+def bench_rules(num_columns: List[int], repeat: int,
+                workdir: str) -> List[Dict[str, Any]]:
+    '''Time parsing and compiling rules files with many columns.'''
+    results = []
+    for count in num_columns:
+        rulesfile = os.path.join(workdir, f'rules_{count}.yaml')
+        with open(rulesfile, 'w') as stream:
+            stream.write(datagen.wide_rules_yaml(count))
+        # the first load also imports yaml
+        dw.load_rule_plan(rulesfile)
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            dw.load_rule_plan(rulesfile)
+            best = min(best, time.perf_counter() - start)
+        tracemalloc.start()
+        dw.load_rule_plan(rulesfile)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results.append(_result(f'rules/{count}', best, count, 'columns/s',
+                               peak))
+        print(_format_result(results[-1]), flush=True)
+    return results
+
+
+def _environment() -> Dict[str, str]:
+    return {'datawhistle': dw.__version__,
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z')}
+
+
+def _format_result(result: Dict[str, Any]) -> str:
+    throughput = result['throughput'] or 0
+    return (f'{result["name"]:<50} {result["seconds"] * 1000:10.2f} ms '
+            f'{throughput:14,.0f} {result["unit"]:<10} '
+            f'{result["peak_bytes"] / 2**20:9.1f} MiB')
+
+
+def run(args: argparse.Namespace) -> None:
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        workdir = args.data_dir or tmpdir
+        os.makedirs(workdir, exist_ok=True)
+        if 'kernels' in args.suites:
+            results += bench_kernels(args.shapes, args.sizes, args.repeat,
+                                     args.seed)
+        if 'cli' in args.suites:
+            results += bench_cli(args.shapes, args.sizes, args.repeat,
+                                 args.seed, workdir)
+        if 'rules' in args.suites:
+            results += bench_rules(args.rules_columns, args.repeat, workdir)
+    report = {'environment': _environment(), 'seed': args.seed,
+              'results': results}
+    if args.output is not None:
+        with open(args.output, 'w') as stream:
+            json.dump(report, stream, indent=2)
+        print(f'Results written to {args.output}')
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any],
+                    tolerance: float, min_seconds: float
+                    ) -> Tuple[List[str], List[str]]:
+    '''
+    Compare benchmark results with a baseline, returning report lines and
+    the names of results that regressed by more than the tolerance in
+    time or peak memory.
+    '''
+    base = {result['name']: result for result in baseline['results']}
+    lines = []
+    regressions = []
+    for result in current['results']:
+        name = result['name']
+        if name not in base:
+            lines.append(f'{name:<50} new')
+            continue
+        old = base[name]
+        time_ratio = result['seconds'] / old['seconds']
+        mem_ratio = (result['peak_bytes'] / old['peak_bytes']
+                     if old['peak_bytes'] > 0 else 1.0)
+        flags = []
+        if time_ratio > 1 + tolerance and result['seconds'] > min_seconds:
+            flags.append('SLOWER')
+        if mem_ratio > 1 + tolerance and \
+                result['peak_bytes'] - old['peak_bytes'] > 2**20:
+            flags.append('MORE MEMORY')
+        if flags:
+            regressions.append(name)
+        lines.append(f'{name:<50} time x{time_ratio:5.2f}  '
+                     f'memory x{mem_ratio:5.2f}  {" ".join(flags)}')
+    return lines, regressions
+
+
+def compare(args: argparse.Namespace) -> None:
+    with open(args.baseline) as stream:
+        baseline = json.load(stream)
+    with open(args.current) as stream:
+        current = json.load(stream)
+    lines, regressions = compare_reports(baseline, current, args.tolerance,
+                                         args.min_seconds)
+    for line in lines:
+        print(line)
+    if regressions:
+        print(f'Regressions ({len(regressions)}):')
+        for name in regressions:
+            print(f'  {name}')
+        sys.exit(1)
+    print('No regressions.')
+
+
+def _int_list(text: str) -> List[int]:
+    return [int(float(item)) for item in text.split(',')]
+
+
+def _str_list(text: str) -> List[str]:
+    return text.split(',')
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='DataWhistle benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='run benchmarks')
+    run_parser.add_argument('--suites', type=_str_list, default=SUITES,
+                            help=f'comma separated, of {",".join(SUITES)}')
+    run_parser.add_argument('--shapes', type=_str_list,
+                            default=datagen.SHAPES,
+                            help=(f'comma separated, of '
+                                  f'{",".join(datagen.SHAPES)}'))
+    run_parser.add_argument('--sizes', type=_int_list, default=DEFAULT_SIZES,
+                            help='comma separated row counts, e.g. 1e3,1e8')
+    run_parser.add_argument('--rules-columns', type=_int_list,
+                            default=DEFAULT_RULES_COLUMNS,
+                            help='comma separated rules file column counts')
+    run_parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    run_parser.add_argument('--seed', type=int, default=datagen.DEFAULT_SEED)
+    run_parser.add_argument('--data-dir',
+                            help='keep generated CSV files for reuse here')
+    run_parser.add_argument('--output', help='write results to a JSON file')
+    compare_parser = commands.add_parser(
+        'compare', help='flag regressions against a baseline')
+    compare_parser.add_argument('baseline', help='baseline results file')
+    compare_parser.add_argument('current', help='results file to check')
+    compare_parser.add_argument('--tolerance', type=float,
+                                default=DEFAULT_TOLERANCE,
+                                help='allowed fractional slowdown')
+    compare_parser.add_argument('--min-seconds', type=float,
+                                default=DEFAULT_MIN_SECONDS,
+                                help='ignore slowdowns of faster results')
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        for shape in args.shapes:
+            if shape not in datagen.SHAPES:
+                parser.error(f'shape {shape} not recognised')
+        for suite in args.suites:
+            if suite not in SUITES:
+                parser.error(f'suite {suite} not recognised')
+        run(args)
+    else:
+        compare(args)
+
+
+if __name__ == '__main__':
+    main()
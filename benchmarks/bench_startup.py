@@ -0,0 +1,76 @@
+import argparse
+import inspect
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import List
+HDIR = os.path.dirname(os.path.abspath(
+            inspect.getfile(inspect.currentframe())))
+PARENTDIR = os.path.dirname(HDIR)
+
+# Command line startup time benchmark. Each command runs in a fresh
+# interpreter; the median wall time over a number of runs is compared to
+# a target so that heavy imports creeping back into the startup path are
+# caught.
+
+DEFAULT_TARGET_MS = 150.0
+DEFAULT_RUNS = 10
+
+STARTUP_COMMANDS = {
+    'import': [sys.executable, '-c', 'import datawhistle'],
+    'help': [sys.executable, '-m', 'datawhistle', '--help'],
+}
+
+# Modules that must not be loaded just by importing datawhistle.
+HEAVY_MODULES = ['pandas.core', 'numpy.core', 'numpy._core', 'yaml.loader']
+
+
+def time_command(command: List[str], runs: int) -> List[float]:
+    '''Run a command a number of times returning wall times in ms.'''
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=PARENTDIR, check=True,
+                       stdout=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def heavy_modules_loaded() -> List[str]:
+    '''List heavy modules loaded by importing datawhistle.'''
+    code = ('import sys, datawhistle; '
+            f'print(",".join(m for m in {HEAVY_MODULES!r} '
+            'if m in sys.modules))')
+    result = subprocess.run([sys.executable, '-c', code], cwd=PARENTDIR,
+                            check=True, capture_output=True, text=True)
+    return [name for name in result.stdout.strip().split(',') if name]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='DataWhistle startup time')
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS)
+    parser.add_argument('--target-ms', type=float, default=DEFAULT_TARGET_MS,
+                        help='maximum median startup time')
+    args = parser.parse_args()
+    failed = False
+    baseline = statistics.median(
+            time_command([sys.executable, '-c', 'pass'], args.runs))
+    print(f'{"interpreter":<12} {baseline:8.1f} ms')
+    for name, command in STARTUP_COMMANDS.items():
+        median = statistics.median(time_command(command, args.runs))
+        status = 'ok'
+        if median > args.target_ms:
+            status = f'SLOW (target {args.target_ms:.0f} ms)'
+            failed = True
+        print(f'{name:<12} {median:8.1f} ms  {status}')
+    loaded = heavy_modules_loaded()
+    if loaded:
+        print(f'heavy modules loaded at import: {", ".join(loaded)}')
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+import os
+from typing import Dict, Iterator, List
+import numpy as np      # type: ignore
+import pandas as pd     # type: ignore
+
+# Deterministic synthetic data for benchmarks. Data is generated in
+# chunks, each from its own random generator seeded by the seed and the
+# chunk number, so the same shape, row count and seed always give the
+# same rows whether they are generated in memory or written to a CSV file
+# chunk by chunk (which is how files too large for memory are made).
+
+SHAPES = ['numeric', 'string', 'datetime', 'wide', 'tall']
+DEFAULT_SEED = 20200101
+GENERATE_CHUNKSIZE = 1000000
+WIDE_COLUMNS = 100
+_WORDS = ['alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot', 'golf',
+          'hotel', 'india', 'juliet', 'kilo', 'lima', 'mike', 'november',
+          'oscar', 'papa', 'quebec', 'romeo', 'sierra', 'tango']
+_EPOCH = np.datetime64('2000-01-01')
+
+
+def _words(rng: np.random.Generator, rows: int) -> np.ndarray:
+    return np.array(_WORDS)[rng.integers(0, len(_WORDS), rows)]
+
+
+def _numeric(rng: np.random.Generator, start: int, rows: int) -> Dict:
+    ids = np.arange(start, start + rows)
+    floats_nulls = rng.normal(100.0, 15.0, rows)
+    floats_nulls[rng.random(rows) < 0.01] = np.nan
+    return {'int_id': rng.permutation(ids),
+            'int_small': rng.integers(0, 100, rows),
+            'float_normal': rng.normal(0.0, 1.0, rows),
+            'float_nulls': floats_nulls}
+
+
+def _string(rng: np.random.Generator, start: int, rows: int) -> Dict:
+    ids = np.arange(start, start + rows)
+    codes = rng.integers(0, 10000, rows)
+    letters = np.array(list('ABCDEFGHIJKLMNOPQRSTUVWXYZ'))
+    return {'str_id': np.char.add('id', rng.permutation(ids).astype(str)),
+            'str_category': _words(rng, rows),
+            'str_code': np.char.add(np.char.add(
+                letters[rng.integers(0, 26, rows)], '-'),
+                np.char.zfill(codes.astype(str), 4))}
+
+
+def _datetime(rng: np.random.Generator, start: int, rows: int) -> Dict:
+    days = _EPOCH + rng.integers(0, 7300, rows).astype('timedelta64[D]')
+    seconds = rng.integers(0, 86400, rows).astype('timedelta64[s]')
+    return {'date_day': np.datetime_as_string(days, unit='D'),
+            'date_time': np.datetime_as_string(days + seconds, unit='s'),
+            'float_value': rng.normal(0.0, 1.0, rows)}
+
+
+def _wide(rng: np.random.Generator, start: int, rows: int) -> Dict:
+    values = rng.normal(0.0, 1.0, (rows, WIDE_COLUMNS))
+    return {f'float_{i:03d}': values[:, i] for i in range(WIDE_COLUMNS)}
+
+
+def _tall(rng: np.random.Generator, start: int, rows: int) -> Dict:
+    return {'int_id': np.arange(start, start + rows),
+            'str_category': _words(rng, rows)}
+
+
+_GENERATORS = {'numeric': _numeric, 'string': _string,
+               'datetime': _datetime, 'wide': _wide, 'tall': _tall}
+
+
+def iter_frames(shape: str, rows: int, seed: int = DEFAULT_SEED,
+                chunksize: int = GENERATE_CHUNKSIZE
+                ) -> Iterator[pd.DataFrame]:
+    '''Generate the rows of a synthetic dataset in chunks.'''
+    if shape not in _GENERATORS:
+        raise ValueError(f'shape {shape} not recognised, want one of '
+                         f'{", ".join(SHAPES)}')
+    generator = _GENERATORS[shape]
+    for number, start in enumerate(range(0, rows, GENERATE_CHUNKSIZE)):
+        rng = np.random.default_rng([seed, number])
+        num_rows = min(GENERATE_CHUNKSIZE, rows - start)
+        frame = pd.DataFrame(generator(rng, start, num_rows))
+        frame.index = pd.RangeIndex(start, start + num_rows)
+        # re-chunk to the requested size
+        for offset in range(0, num_rows, chunksize):
+            yield frame.iloc[offset:offset + chunksize]
+
+
+def make_frame(shape: str, rows: int,
+               seed: int = DEFAULT_SEED) -> pd.DataFrame:
+    '''Generate a synthetic dataset in memory.'''
+    return pd.concat(list(iter_frames(shape, rows, seed)))
+
+
+def write_csv(filename: str, shape: str, rows: int,
+              seed: int = DEFAULT_SEED) -> None:
+    '''Write a synthetic dataset to a CSV file without holding it all.'''
+    tmpfile = f'{filename}.tmp'
+    header = True
+    with open(tmpfile, 'w', newline='') as stream:
+        for frame in iter_frames(shape, rows, seed):
+            frame.to_csv(stream, header=header, index=False)
+            header = False
+    os.replace(tmpfile, filename)
+
+
+def column_types(shape: str) -> Dict[str, str]:
+    '''Rules file column types of the columns of a shape.'''
+    frame = make_frame(shape, 1)
+    types = {}
+    for name in frame.columns:
+        if name.startswith('date'):
+            types[name] = 'datetime'
+        elif name.startswith('str'):
+            types[name] = 'string'
+        else:
+            types[name] = 'numeric'
+    return types
+
+
+def rules_yaml(shape: str) -> str:
+    '''Rules file text checking every column of a shape.'''
+    lines: List[str] = ['table:', '  stop_on_fail: false',
+                        '  allow_duplicate_rows: false', 'columns:']
+    for name, coltype in column_types(shape).items():
+        lines.append(f'  - name: {name}')
+        lines.append(f'    type: {coltype}')
+        if coltype == 'numeric' and not name.endswith('nulls'):
+            lines.append('    allow_nulls: false')
+            lines.append('    allow_outliers: false')
+        if name.endswith('_id'):
+            lines.append('    allow_duplicates: false')
+        if coltype == 'string':
+            lines.append('    allow_blanks: false')
+    return '\n'.join(lines) + '\n'
+
+
+def wide_rules_yaml(num_columns: int) -> str:
+    '''Rules file text with many columns, to time rules parsing.'''
+    lines: List[str] = ['table:', '  row_count_min: 1', 'columns:']
+    for i in range(num_columns):
+        lines.append(f'  - name: column_{i}')
+        lines.append('    type: numeric')
+        lines.append('    allow_nulls: false')
+        lines.append('    min: 0')
+        lines.append(f'    max: {i + 100}')
+    return '\n'.join(lines) + '\n'
@@ -1,3 +1,5 @@
+__version__ = '0.1.dev'
+
 from datawhistle.checksuites import *
 from datawhistle.yamlparsing import *
 from datawhistle.commandline import *
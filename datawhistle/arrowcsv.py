@@ -0,0 +1,67 @@
+from typing import Dict, Optional
+import pandas as pd     # type: ignore
+import datawhistle.compressed as dwcz
+try:
+    import pyarrow as pa            # type: ignore
+    import pyarrow.csv as pacsv     # type: ignore
+except ImportError:
+    pa = None
+    pacsv = None
+
+# Reading CSV files with the multithreaded Arrow CSV reader, an optional
+# alternative to the single threaded pandas C parser (install with
+# pip install datawhistle[arrow]). Files are memory mapped and parsed in
+# blocks by a pool of threads. Columns the rules declare as strings or
+# datetimes are read as text, as pandas reads them, rather than converted
+# to numbers or timestamps by Arrow's type inference. Values pandas reads
+# as nulls by default are read as nulls. Compressed files are decompressed
+# as they are read (see datawhistle.compressed).
+
+# pandas.read_csv default null values
+NULL_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN',
+               '-nan', '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN',
+               'None', 'n/a', 'nan', 'null']
+_TEXT_TYPES = ['string', 'datetime']
+
+
+def arrow_available() -> bool:
+    '''Check if pyarrow is installed.'''
+    return pacsv is not None
+
+
+def read_csv_arrow(csvfile: str,
+                   column_types: Optional[Dict[str, str]] = None,
+                   block_size: Optional[int] = None,
+                   threads: Optional[int] = None,
+                   progress: Optional[dwcz.Progress] = None) -> pd.DataFrame:
+    '''
+    Read a CSV file into a Pandas DataFrame with the Arrow CSV reader.
+
+    The column_types parameter maps column names to rules file column types
+    ('numeric', 'string' or 'datetime'). The block_size parameter is the
+    number of bytes each thread parses at a time and threads the number of
+    threads used to parse and convert the data (by default Arrow's). If
+    given, progress is called with the number of bytes of the file read.
+    '''
+    if pacsv is None:
+        raise ImportError('the arrow CSV engine needs pyarrow '
+                          '(pip install datawhistle[arrow])')
+    if threads is not None:
+        pa.set_cpu_count(threads)
+    read_options = pacsv.ReadOptions(use_threads=threads != 1)
+    if block_size is not None:
+        read_options.block_size = block_size
+    text_columns = {name: pa.string()
+                    for name, coltype in (column_types or {}).items()
+                    if coltype in _TEXT_TYPES}
+    convert_options = pacsv.ConvertOptions(
+            column_types=text_columns, null_values=NULL_VALUES,
+            strings_can_be_null=True, quoted_strings_can_be_null=True)
+    if progress is None and dwcz.detect_compression(csvfile) is None:
+        source = pa.memory_map(csvfile, 'r')
+    else:
+        source = dwcz.open_data_file(csvfile, threads, progress)
+    with source:
+        table = pacsv.read_csv(source, read_options=read_options,
+                               convert_options=convert_options)
+    return table.to_pandas(use_threads=threads != 1)
@@ -1,12 +1,21 @@
 import subprocess
 import json
-from typing import Tuple, Union, Optional
+import uuid
+from typing import Dict, List, Tuple, Union, Optional
 
 
 # Note this is defined as a list because that is how the subprocess.run
 # command wants it.
 BQ_QUERY = ['bq', 'query', '--nouse_legacy_sql', '--format=json',
             '--quiet=true']
+BQ_SHOW_JOB = ['bq', 'show', '--format=json', '-j']
+
+# Totals over the bq queries run by this process. Bytes billed are only
+# looked up (with an extra bq show command per query) when job statistics
+# collection is turned on, e.g. when profiling checks.
+query_stats: Dict[str, int] = {'queries': 0, 'bytes_billed': 0,
+                               'bytes_processed': 0}
+_collect_job_stats = False
 
 # Check if a column exists in the dataset schema, without returning an
 # empty result if the column doesn't exist.
@@ -20,26 +29,38 @@ SELECT "False" AS bool FROM (SELECT 1)
 LEFT JOIN query1 ON FALSE WHERE NOT EXISTS (SELECT 1 FROM query1);
 '''
 
+# Get the names and types of the columns of a table, in order.
+SQL_TABLE_SCHEMA = '''SELECT column_name AS name, data_type AS type
+FROM {datasetname}.INFORMATION_SCHEMA.COLUMNS
+WHERE table_name = "{tablename}"
+ORDER BY ordinal_position;
+'''
+
+# Column data types by the column type whose type check they pass.
+BQ_COLUMN_TYPES = {'numeric': ['INT64', 'NUMERIC', 'FLOAT64'],
+                   'string': ['STRING'],
+                   'datetime': ['DATE', 'DATETIME']}
+
 # Count the distinct values in a column.
 SQL_COUNTDISTINCT = '''SELECT COUNT(DISTINCT {columnname}) AS number
-FROM {datasetname}.{tablename};
+FROM {datasetname}.{tablename}{tablesample};
 '''
 
 # Count instances where column value is not equal to a specified
 # value.
 SQL_COUNTNOT_EQ = '''SELECT SUM(flags) AS number
 FROM (SELECT CASE WHEN {columnname} = {value} THEN 0 ELSE 1 END AS flags
-      FROM {datasetname}.{tablename});
+      FROM {datasetname}.{tablename}{tablesample});
 '''
 
 # Get the maximum value in a column.
 SQL_COL_MAX = '''SELECT MAX({columnname}) AS number
-FROM {datasetname}.{tablename};
+FROM {datasetname}.{tablename}{tablesample};
 '''
 
 # Get the minimum value in a column.
 SQL_COL_MIN = '''SELECT MIN({columnname}) AS number
-FROM {datasetname}.{tablename};
+FROM {datasetname}.{tablename}{tablesample};
 '''
 
 # Get column's type, without returning an empty result if the column does
@@ -63,13 +84,13 @@ SET (q25, q75) = (
   SELECT AS STRUCT percentiles[offset(25)] AS q25,
                    percentiles[offset(75)] AS q75
   FROM (SELECT APPROX_QUANTILES({columnname}, 100) percentiles
-        FROM {datasetname}.{tablename}));
+        FROM {datasetname}.{tablename}{tablesample}));
 SET IQRX = 1.5 * (q75 - q25);
 WITH query1 AS
   (SELECT CASE WHEN {columnname} < (q25 - IQRX) THEN 1
                WHEN {columnname} > (q75 + IQRX) THEN 1
                ELSE 0 END AS flag
-   FROM {datasetname}.{tablename})
+   FROM {datasetname}.{tablename}{tablesample})
 SELECT sum(flag) AS number FROM query1;
 '''
 
@@ -78,20 +99,20 @@ SQL_COUNTBLANKS = '''SELECT SUM(flag) as number
 FROM (SELECT CASE WHEN TRIM({columnname}) = ""
                   THEN 1 ELSE 0
              END AS flag
-      FROM {datasetname}.{tablename});
+      FROM {datasetname}.{tablename}{tablesample});
 '''
 
 # Count the number of duplicate values in a column.
 SQL_COUNTDUPLICATES = '''SELECT SUM(count) AS number
 FROM (SELECT {columnname} AS rowvalue,
       CASE WHEN COUNT(*) > 1 THEN 1 ELSE 0 END AS count
-      FROM {datasetname}.{tablename} GROUP BY {columnname});
+      FROM {datasetname}.{tablename}{tablesample} GROUP BY {columnname});
 '''
 
 # Count the number of null values in a column.
 SQL_COUNTNULLS = '''SELECT SUM(number) AS number
 FROM (SELECT CASE WHEN {columnname} IS NULL THEN 1 ELSE 0 END AS number
-      FROM {datasetname}.{tablename});
+      FROM {datasetname}.{tablename}{tablesample});
 '''
 
 # Check a specific regex match on a column
@@ -100,7 +121,19 @@ FROM (SELECT
   SUM(CASE WHEN REGEXP_CONTAINS({columnname}, r"{regex_rule}")
            THEN 1 ELSE 0 END) AS MATCHES,
   COUNT({columnname}) AS COL_COUNT
-FROM {datasetname}.{tablename});
+FROM {datasetname}.{tablename}{tablesample});
+'''
+
+# Count the matches of each of several regexes on a column, and its
+# non null values, in one query. SQL_REGEX_COUNTER is repeated for each
+# regex, numbered by index.
+SQL_COUNTREGEXES = '''SELECT
+{counters}  COUNT({columnname}) AS col_count
+FROM {datasetname}.{tablename}{tablesample};
+'''
+SQL_REGEX_COUNTER = '''  SUM(CASE WHEN REGEXP_CONTAINS({columnname},
+                                r"{regex_rule}")
+           THEN 1 ELSE 0 END) AS matches_{index},
 '''
 
 # Count the number of rows in a table.
@@ -142,6 +175,22 @@ def _bqquery_get_number(query: str) -> float:
         raise BqError('Could not convert bq command output')
 
 
+def _bqquery_get_numbers(query: str, names: List[str]) -> List[float]:
+    # the named numbers of the one row a query returns, 0 for nulls
+    jsontxt = _bqquery_run(query)
+    jsondict = json.loads(jsontxt)
+    if len(jsondict) == 0:
+        raise BqError('Could not convert bq command output')
+    jsondict = jsondict[0]
+    if not isinstance(jsondict, dict):
+        raise BqError('Could not convert bq command output')
+    try:
+        return [0.0 if jsondict[name] is None else float(jsondict[name])
+                for name in names]
+    except (KeyError, ValueError):
+        raise BqError('Could not convert bq command output')
+
+
 def _bqquery_get_string(query: str) -> str:
     jsontxt = _bqquery_run(query)
     jsondict = json.loads(jsontxt)
@@ -168,13 +217,51 @@ def _bqquery_get_bool(query: str) -> bool:
     return jsondict['bool'] == 'True'
 
 
+def _tablesample(sample_percent: Optional[float]) -> str:
+    # TABLESAMPLE reads a random subset of the table's storage blocks, so
+    # the bytes scanned (and billed) drop with the sample percentage.
+    if sample_percent is None:
+        return ''
+    return f' TABLESAMPLE SYSTEM ({sample_percent} PERCENT)'
+
+
+def collect_job_stats(enabled: bool = True) -> None:
+    '''Turn looking up bytes billed for each bq query on or off.'''
+    global _collect_job_stats
+    _collect_job_stats = enabled
+
+
+def _job_bytes(jsontxt: str) -> Tuple[int, int]:
+    # bytes billed and processed from bq show job output
+    try:
+        statistics = json.loads(jsontxt)['statistics']
+        billed = statistics.get('query', {}).get('totalBytesBilled', 0)
+        processed = statistics.get('totalBytesProcessed', 0)
+        return int(billed), int(processed)
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return 0, 0
+
+
 def _bqquery_run(query: str) -> str:
     bqcommand = BQ_QUERY.copy()
+    job_id: Optional[str] = None
+    if _collect_job_stats:
+        job_id = f'datawhistle_{uuid.uuid4().hex}'
+        # --job_id is a global flag so goes before the query command
+        bqcommand.insert(1, f'--job_id={job_id}')
     bqcommand.append(query)
     result = subprocess.run(bqcommand, capture_output=True, text=True)
     if result.returncode != 0:
         raise BqError((f'Error executing bq command: {result.stdout} '
                        f'{result.stderr}'))
+    query_stats['queries'] += 1
+    if job_id is not None:
+        job = subprocess.run(BQ_SHOW_JOB + [job_id], capture_output=True,
+                             text=True)
+        if job.returncode == 0:
+            billed, processed = _job_bytes(job.stdout)
+            query_stats['bytes_billed'] += billed
+            query_stats['bytes_processed'] += processed
     return result.stdout
 
 
@@ -220,6 +307,31 @@ def dscheck_table_exists(datasetname: str, tablename: str) -> Tuple[bool, str]:
     return False, f'table {tablename} not found in dataset {datasetname}'
 
 
+def inferred_type(data_type: str) -> Optional[str]:
+    '''The column type (numeric, string or datetime) of a BigQuery type.'''
+    for coltype, data_types in BQ_COLUMN_TYPES.items():
+        if data_type in data_types:
+            return coltype
+    return None
+
+
+def table_schema(datasetname: str,
+                 tablename: str) -> List[Tuple[str, Optional[str]]]:
+    '''
+    The names and inferred types of the columns of a table, from one
+    INFORMATION_SCHEMA query (no columns if the table does not exist).
+    '''
+    sql = SQL_TABLE_SCHEMA.format(datasetname=datasetname,
+                                  tablename=tablename)
+    rows = json.loads(_bqquery_run(sql) or '[]')
+    if not isinstance(rows, list):
+        raise BqError('Could not convert bq command output')
+    try:
+        return [(row['name'], inferred_type(row['type'])) for row in rows]
+    except (KeyError, TypeError):
+        raise BqError('Could not convert bq command output')
+
+
 # Table column level checks are described in functions using
 # the naming convention
 # colcheck_[some name](datasetname: str, tablename: str,
@@ -244,7 +356,9 @@ def colcheck_exists(datasetname: str, tablename: str,
 
 def colcheck_count_distinct(datasetname: str, tablename: str,
                             columnname: str, count: int,
-                            operator: str = '==') -> Tuple[bool, str]:
+                            operator: str = '==',
+                            sample_percent: Optional[float] = None
+                            ) -> Tuple[bool, str]:
     '''
     Check if the count of distinct values in a column is equal to, greater
     than or less than a specified count.
@@ -253,7 +367,8 @@ def colcheck_count_distinct(datasetname: str, tablename: str,
     '''
     sql = SQL_COUNTDISTINCT.format(datasetname=datasetname,
                                    tablename=tablename,
-                                   columnname=columnname)
+                                   columnname=columnname,
+                                   tablesample=_tablesample(sample_percent))
     count_val = _bqquery_get_number(sql)
     if operator == '==' and count_val == count:
         return True, ''
@@ -274,7 +389,7 @@ def colcheck_is_numeric(datasetname: str, tablename: str,
     sql = SQL_COL_TYPE.format(datasetname=datasetname, tablename=tablename,
                               columnname=columnname)
     coltype = _bqquery_get_string(sql)
-    if coltype in ['INT64', 'NUMERIC', 'FLOAT64']:
+    if coltype in BQ_COLUMN_TYPES['numeric']:
         return True, ''
     return False, f'column {columnname} want numeric type, got {coltype}'
 
@@ -285,20 +400,21 @@ def colcheck_is_str(datasetname: str, tablename: str,
     sql = SQL_COL_TYPE.format(datasetname=datasetname, tablename=tablename,
                               columnname=columnname)
     coltype = _bqquery_get_string(sql)
-    if coltype == 'STRING':
+    if coltype in BQ_COLUMN_TYPES['string']:
         return True, ''
     return False, f'column {columnname} want string type, got {coltype}'
 
 
-def colcheck_iqr(datasetname: str, tablename: str,
-                 columnname: str) -> Tuple[bool, str]:
+def colcheck_iqr(datasetname: str, tablename: str, columnname: str,
+                 sample_percent: Optional[float] = None) -> Tuple[bool, str]:
     '''
     Check if the values in a column are outliers greater than or less than
     1.5 times the inter-quartile range plus Q3 or Q1 respectively
     '''
     query = SQL_COUNTOUTLIERS.format(datasetname=datasetname,
                                      tablename=tablename,
-                                     columnname=columnname)
+                                     columnname=columnname,
+                                     tablesample=_tablesample(sample_percent))
     outliercount = _bqquery_get_number(query)
     if outliercount == 0:
         return True, ''
@@ -311,16 +427,18 @@ def colcheck_is_datetime(datasetname: str, tablename: str,
     sql = SQL_COL_TYPE.format(datasetname=datasetname, tablename=tablename,
                               columnname=columnname)
     coltype = _bqquery_get_string(sql)
-    if coltype in ['DATE', 'DATETIME']:
+    if coltype in BQ_COLUMN_TYPES['datetime']:
         return True, ''
     return False, f'column {columnname} want datetime type, got {coltype}'
 
 
-def colcheck_no_blanks(datasetname: str, tablename: str,
-                       columnname: str) -> Tuple[bool, str]:
+def colcheck_no_blanks(datasetname: str, tablename: str, columnname: str,
+                       sample_percent: Optional[float] = None
+                       ) -> Tuple[bool, str]:
     '''Check if a string column contains blanks or whitespace only values.'''
     sql = SQL_COUNTBLANKS.format(datasetname=datasetname, tablename=tablename,
-                                 columnname=columnname)
+                                 columnname=columnname,
+                                 tablesample=_tablesample(sample_percent))
     count = _bqquery_get_number(sql)
     if count == 0:
         return True, ''
@@ -328,11 +446,14 @@ def colcheck_no_blanks(datasetname: str, tablename: str,
 
 
 def colcheck_no_duplicates(datasetname: str, tablename: str,
-                           columnname: str) -> Tuple[bool, str]:
+                           columnname: str,
+                           sample_percent: Optional[float] = None
+                           ) -> Tuple[bool, str]:
     '''Check that a column doesn't contain any duplicates.'''
     sql = SQL_COUNTDUPLICATES.format(datasetname=datasetname,
                                      tablename=tablename,
-                                     columnname=columnname)
+                                     columnname=columnname,
+                                     tablesample=_tablesample(sample_percent))
     num_duplicates = _bqquery_get_number(sql)
     if num_duplicates == 0:
         return True, ''
@@ -340,12 +461,14 @@ def colcheck_no_duplicates(datasetname: str, tablename: str,
                    f'got {num_duplicates}')
 
 
-def colcheck_no_nulls(datasetname: str, tablename: str,
-                      columnname: str) -> Tuple[bool, str]:
+def colcheck_no_nulls(datasetname: str, tablename: str, columnname: str,
+                      sample_percent: Optional[float] = None
+                      ) -> Tuple[bool, str]:
     '''Check if a column contains null values.'''
     sql = SQL_COUNTNULLS.format(datasetname=datasetname,
                                 tablename=tablename,
-                                columnname=columnname)
+                                columnname=columnname,
+                                tablesample=_tablesample(sample_percent))
     countnull = _bqquery_get_number(sql)
     if countnull == 0:
         return True, ''
@@ -356,7 +479,9 @@ def colcheck_regex(datasetname: str,
                    tablename: str,
                    columnname: str,
                    regex_rule: Optional[str],
-                   regex_type: Optional[str]) -> Tuple[bool, str]:
+                   regex_type: Optional[str],
+                   sample_percent: Optional[float] = None
+                   ) -> Tuple[bool, str]:
     '''
     Check to see if a column contains all the same regex type, or if the
     column does not contain a regex type.
@@ -372,7 +497,8 @@ def colcheck_regex(datasetname: str,
         sql = SQL_COUNTREGEX.format(datasetname=datasetname,
                                     tablename=tablename,
                                     columnname=columnname,
-                                    regex_rule=regex_rule)
+                                    regex_rule=regex_rule,
+                                    tablesample=_tablesample(sample_percent))
         row_fraction_match = _bqquery_get_number(sql)
     except BqError:
         return False, f'column {columnname} BqError with rule {regex_rule}'
@@ -385,9 +511,74 @@ def colcheck_regex(datasetname: str,
     return True, ''
 
 
+def _sql_count_regexes(datasetname: str, tablename: str, columnname: str,
+                       regex_rules: List[str],
+                       sample_percent: Optional[float] = None) -> str:
+    counters = ''.join(
+            SQL_REGEX_COUNTER.format(columnname=columnname,
+                                     regex_rule=regex_rule, index=index)
+            for index, regex_rule in enumerate(regex_rules))
+    return SQL_COUNTREGEXES.format(datasetname=datasetname,
+                                   tablename=tablename,
+                                   columnname=columnname,
+                                   counters=counters,
+                                   tablesample=_tablesample(sample_percent))
+
+
+def colcheck_regex_rules(datasetname: str, tablename: str, columnname: str,
+                         rules: List[Tuple[str, str]],
+                         sample_percent: Optional[float] = None
+                         ) -> List[Tuple[bool, str]]:
+    '''
+    Check a column against a list of (regex_rule, regex_type) pairs, as
+    colcheck_regex checks each, counting the matches of all rules in one
+    query. If the query fails (e.g. for an invalid rule), all rules fail.
+    '''
+    results: List[Optional[Tuple[bool, str]]] = []
+    valid = []
+    for regex_rule, regex_type in rules:
+        if regex_rule == '':
+            results.append((False, f'column {columnname} blank regex_rule'))
+        elif regex_type not in ['mandatory', 'exclude']:
+            results.append((False, (f'column {columnname} regex_type expect '
+                                    'mandatory or exclude, got '
+                                    f'{regex_type}')))
+        else:
+            results.append(None)
+            valid.append((regex_rule, regex_type))
+    numbers: Optional[List[float]] = None
+    if valid:
+        sql = _sql_count_regexes(datasetname, tablename, columnname,
+                                 [regex_rule for regex_rule, _ in valid],
+                                 sample_percent)
+        names = [f'matches_{index}' for index in range(len(valid))]
+        try:
+            numbers = _bqquery_get_numbers(sql, names + ['col_count'])
+        except BqError:
+            pass
+    checked: List[Tuple[bool, str]] = []
+    for index, (regex_rule, regex_type) in enumerate(valid):
+        if numbers is None:
+            checked.append((False, (f'column {columnname} BqError with rule '
+                                    f'{regex_rule}')))
+        elif regex_type == 'mandatory' and numbers[index] < numbers[-1]:
+            checked.append((False, (f'column {columnname} found a non '
+                                    'matching regex record with rule '
+                                    f'{regex_rule}')))
+        elif regex_type == 'exclude' and numbers[index] > 0:
+            checked.append((False, (f'column {columnname} found invalid regex '
+                                    f'with rule {regex_rule}')))
+        else:
+            checked.append((True, ''))
+    remaining = iter(checked)
+    return [next(remaining) if result is None else result
+            for result in results]
+
+
 def colcheck_val(datasetname: str, tablename: str,
                  columnname: str, val: Union[int, float],
-                 operator: str = '==') -> Tuple[bool, str]:
+                 operator: str = '==',
+                 sample_percent: Optional[float] = None) -> Tuple[bool, str]:
     '''
     Check if the values in a column are equal to, greater than or less than
     a specified value.
@@ -397,15 +588,18 @@ def colcheck_val(datasetname: str, tablename: str,
     if operator not in ['==', '<=', '>=']:
         return False, (f'column {columnname} value check '
                        f'operator {operator} not recognised')
+    tablesample = _tablesample(sample_percent)
     if operator == '<=':
         sql = SQL_COL_MAX.format(datasetname=datasetname, tablename=tablename,
-                                 columnname=columnname)
+                                 columnname=columnname,
+                                 tablesample=tablesample)
         actual_val = _bqquery_get_number(sql)
         if actual_val <= val:
             return True, ''
     if operator == '>=':
         sql = SQL_COL_MIN.format(datasetname=datasetname, tablename=tablename,
-                                 columnname=columnname)
+                                 columnname=columnname,
+                                 tablesample=tablesample)
         actual_val = _bqquery_get_number(sql)
         if actual_val >= val:
             return True, ''
@@ -413,7 +607,8 @@ def colcheck_val(datasetname: str, tablename: str,
         sql = SQL_COUNTNOT_EQ.format(datasetname=datasetname,
                                      tablename=tablename,
                                      columnname=columnname,
-                                     value=val)
+                                     value=val,
+                                     tablesample=tablesample)
         count = _bqquery_get_number(sql)
         if count == 0:
             return True, ''
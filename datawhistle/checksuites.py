@@ -1,9 +1,30 @@
 # Avoid forward decalaration type check errors. See PEP563.
 from __future__ import annotations
-from typing import Callable, Optional, List, Tuple, Union
-import pandas as pd  # type: ignore
-import datawhistle.pandaschecks as dwpc
+from typing import (TYPE_CHECKING, Any, Callable, Dict, Iterable, Optional,
+                    List, Tuple, Union)
+from datawhistle.lazyimport import lazy_import
 import datawhistle.bqchecks as dwbc
+# type checkers see the modules imported lazily at run time
+if TYPE_CHECKING:
+    import pandas as pd  # type: ignore
+    import datawhistle.pandaschecks as dwpc
+    import datawhistle.processpool as dwpp
+    import datawhistle.profiling as dwpr
+    import datawhistle.rowcount as dwrn
+    import datawhistle.sampling as dwsa
+    import datawhistle.scheduling as dwsc
+    import datawhistle.streamchecks as dwst
+    import datawhistle.yamlparsing as dwyp
+else:
+    pd = lazy_import('pandas')
+    dwpc = lazy_import('datawhistle.pandaschecks')
+    dwpp = lazy_import('datawhistle.processpool')
+    dwpr = lazy_import('datawhistle.profiling')
+    dwrn = lazy_import('datawhistle.rowcount')
+    dwsa = lazy_import('datawhistle.sampling')
+    dwsc = lazy_import('datawhistle.scheduling')
+    dwst = lazy_import('datawhistle.streamchecks')
+    dwyp = lazy_import('datawhistle.yamlparsing')
 
 
 class TableCheckSuite:
@@ -20,10 +41,20 @@ class TableCheckSuite:
         self.row_count_min: Optional[int] = None
         self.row_count: Optional[int] = None
         self.stop_on_fail: bool = False
+        # 'declared' keeps the order checks are assembled in, 'cost' runs
+        # the cheapest checks first when stopping on fail
+        self.check_order: str = 'declared'
         # other properties
+        self.profiler: Optional[dwpr.CheckProfiler] = None
+        self.timing_history: Optional[dwsc.TimingHistory] = None
         self.error_messages: [str] = []
         self.columns: List[Union[PandasColumnCheckSuite,
-                                 BqColumnCheckSuite]] = []
+                                 PandasColumnGroupCheckSuite,
+                                 BqColumnCheckSuite,
+                                 StreamingColumnCheckSuite]] = []
+        # column pattern rules (yamlparsing.PatternPlan) not yet resolved
+        # against the schema of the data
+        self.column_patterns: tuple = ()
         self._checks: List[Callable] = []
 
     def _assemble_checks(self) -> None:
@@ -43,9 +74,19 @@ class TableCheckSuite:
         '''
         self.error_messages = []
         self._assemble_checks()
+        if self.stop_on_fail and self.check_order == 'cost':
+            self._runchecks_by_cost(verbose)
+        else:
+            self._runchecks_declared(verbose)
+        label = self.sample_label()
+        if label:
+            self.error_messages = [f'{msg} ({label})'
+                                   for msg in self.error_messages]
+
+    def _runchecks_declared(self, verbose: bool) -> None:
         checks_failed: bool = False
         for check in self._checks:
-            passed, message = check()
+            passed, message = self._run_check(check)
             if not passed:
                 if verbose:
                     print('F', end='', flush=True)
@@ -58,21 +99,109 @@ class TableCheckSuite:
                     print('.', end='', flush=True)
         if not checks_failed:
             for column in self.columns:
+                column.profiler = self.profiler
                 error_messages = column.runchecks(self.stop_on_fail,
                                                   verbose=verbose)
                 self.error_messages += error_messages
                 if len(error_messages) > 0 and self.stop_on_fail:
                     break
 
+    def _runchecks_by_cost(self, verbose: bool) -> None:
+        # Run table and column checks together, cheapest first, stopping
+        # at the first failed check.
+        scheduled: List[dwsc.ScheduledCheck] = [
+            (self, None, check) for check in self._checks]
+        for column in self.columns:
+            column.profiler = self.profiler
+            column.error_messages = []
+            column._assemble_checks()
+            scheduled.append((column, column.columnname,
+                              column.check_col_exists))
+            scheduled += [(column, column.columnname, check)
+                          for check in column._checks]
+        ordered = dwsc.order_checks(scheduled, self.rows_scanned(),
+                                    self.timing_history)
+        for suite, _, check in ordered:
+            passed, message = suite._run_check(check)
+            if not passed:
+                if verbose:
+                    print('F', end='', flush=True)
+                self.error_messages.append(message)
+                if suite is not self:
+                    suite.error_messages.append(message)
+                break
+            if verbose:
+                print('.', end='', flush=True)
+
+    def _run_check(self, check: Callable) -> Tuple[bool, str]:
+        if self.profiler is None:
+            return check()
+        return self.profiler.run(check, None, self.rows_scanned())
+
+    def rows_scanned(self) -> Optional[int]:
+        '''Number of rows checks run over, None if not known.'''
+        return None
+
+    def sample_label(self) -> str:
+        '''Describe the sample of data checked, blank if checking all data.'''
+        return ''
+
+    def sample_statement(self) -> str:
+        '''
+        Describe the confidence that can be placed in checks run on a sample
+        of data, blank if checking all data.
+        '''
+        return ''
+
     def clearcolumns(self) -> None:
         '''Clear column rules to add new rules.'''
         self.columns = []
 
+    def schema(self) -> Optional[List[Tuple[str, Optional[str]]]]:
+        '''
+        The (name, inferred type) pairs of the columns of the data, the type
+        numeric, string, datetime or None, or None if not known yet.
+        '''
+        return None
+
+    def resolve_column_patterns(
+            self, schema: Optional[List[Tuple[str, Optional[str]]]] = None
+            ) -> None:
+        '''
+        Add the columns of a schema (by default the schema of the data)
+        matching column pattern rules, with the rules of the pattern they
+        match. Patterns are resolved once, when the schema is known.
+        '''
+        if not self.column_patterns:
+            return
+        if schema is None:
+            schema = self.schema()
+        if schema is None:
+            return
+        named = [column.columnname for column in self.columns]
+        for pattern, colnames in dwyp.match_column_patterns(
+                self.column_patterns, schema, named):
+            for column in self.addpatterncolumns(pattern.description(),
+                                                 colnames, pattern.type):
+                for attribute, val in pattern.settings:
+                    setattr(column, attribute, val)
+        self.column_patterns = ()
+
     def addcolumn(self, colname: str,
                   coltype: str) -> Union[PandasColumnCheckSuite,
-                                         BqColumnCheckSuite]:
+                                         BqColumnCheckSuite,
+                                         StreamingColumnCheckSuite]:
         raise NotImplementedError
 
+    def addpatterncolumns(self, description: str, colnames: List[str],
+                          coltype: str) -> List[Any]:
+        '''
+        Add the columns matching a column pattern (described for messages),
+        returning the suites to set the pattern's rules on: a suite per
+        column unless overridden to check the columns as a group.
+        '''
+        return [self.addcolumn(colname, coltype) for colname in colnames]
+
     def check_row_count_max(self) -> Tuple[bool, str]:
         raise NotImplementedError
 
@@ -101,6 +230,7 @@ class ColumnCheckSuite:
         self.allow_duplicates: bool = True
         self.allow_nulls: bool = True
         self.allow_outliers: bool = True
+        self.outlier_method: str = 'exact'
         self.count_distinct_max: Optional[int] = None
         self.count_distinct_min: Optional[int] = None
         self.count_distinct: Optional[int] = None
@@ -110,9 +240,14 @@ class ColumnCheckSuite:
         self.dateformat: Optional[str] = None
         self.regex_rule: Optional[str] = None
         self.regex_type: Optional[str] = None
+        # more (regex_rule, regex_type) pairs, all checked in one pass
+        self.regex_rules: Tuple[Tuple[str, str], ...] = ()
         # other properties
+        self.profiler: Optional[dwpr.CheckProfiler] = None
         self.error_messages: List[str] = []
         self._checks: List[Callable] = []
+        # results of check_col_regex_rules, once a regex_rules check ran
+        self._regex_results: Optional[List[Tuple[bool, str]]] = None
 
     def _assemble_checks(self) -> None:
         self._checks = []
@@ -139,6 +274,9 @@ class ColumnCheckSuite:
             self._checks.append(self.check_col_val)
         if self.regex_rule is not None:
             self._checks.append(self.check_col_regex)
+        self._regex_results = None
+        for index in range(len(self.regex_rules)):
+            self._checks.append(self._regex_rule_check(index))
 
     def runchecks(self, stop_on_fail: bool,
                   verbose: bool = False) -> List[str]:
@@ -147,7 +285,7 @@ class ColumnCheckSuite:
         '''
         # have to always check if a column exists otherwise all
         # other column checks will fail anyway
-        passed, message = self.check_col_exists()
+        passed, message = self._run_check(self.check_col_exists)
         if not passed:
             if verbose:
                 print('F', end='')
@@ -160,7 +298,7 @@ class ColumnCheckSuite:
         self.error_messages = []
         self._assemble_checks()
         for check in self._checks:
-            passed, message = check()
+            passed, message = self._run_check(check)
             if not passed:
                 if verbose:
                     print('F', end='', flush=True)
@@ -172,6 +310,25 @@ class ColumnCheckSuite:
                     print('.', end='', flush=True)
         return self.error_messages
 
+    def _run_check(self, check: Callable) -> Tuple[bool, str]:
+        if self.profiler is None:
+            return check()
+        return self.profiler.run(check, self.columnname, self.rows_scanned())
+
+    def _regex_rule_check(self, index: int) -> Callable[[], Tuple[bool, str]]:
+        # the check of one of the regex_rules, the first of which to run
+        # checks them all in one pass
+        def check_col_regex_rule() -> Tuple[bool, str]:
+            if self._regex_results is None:
+                self._regex_results = self.check_col_regex_rules()
+            return self._regex_results[index]
+
+        return check_col_regex_rule
+
+    def rows_scanned(self) -> Optional[int]:
+        '''Number of rows checks run over, None if not known.'''
+        return None
+
     def check_col_count_distinct_max(self) -> Tuple[bool, str]:
         raise NotImplementedError
 
@@ -202,6 +359,10 @@ class ColumnCheckSuite:
     def check_col_regex(self) -> Tuple[bool, str]:
         raise NotImplementedError
 
+    def check_col_regex_rules(self) -> List[Tuple[bool, str]]:
+        '''Check all regex_rules, returning the result of each.'''
+        raise NotImplementedError
+
     def check_col_iqr(self) -> Tuple[bool, str]:
         raise NotImplementedError
 
@@ -218,33 +379,165 @@ class PandasDatsetCheckSuite(TableCheckSuite):
     overriden to implement Pandas specific functionality.
     '''
 
-    def __init__(self, dataframe: pd.DataFrame):
+    # column rules from which a table is checked as a wide table
+    WIDE_COLUMNS = 100
+
+    def __init__(self, dataframe: pd.DataFrame,
+                 population_size: Optional[int] = None):
         self.dataframe: pd.DataFrame = dataframe
+        # the number of rows in the full data when dataframe is a sample
+        self.population_size: Optional[int] = population_size
+        self.confidence: float = 0.95
+        # columns derived from the dataframe by checks (e.g. parsed
+        # datetimes) by column name, kept here as checks never modify the
+        # dataframe and reused when checks are run again
+        self.derived: Dict[str, pd.Series] = {}
+        # worker processes checking the values of string columns
+        self.processes: int = 1
+        # check as a wide table, computing the statistics of null, range
+        # and value checks of all columns with a call per dtype rather than
+        # per column; None to do so if there are WIDE_COLUMNS column rules
+        self.wide: Optional[bool] = None
+        # statistics of wide table checks, by statistic and column name,
+        # computed when checks are run
+        self.batched: Dict[str, Dict[str, Any]] = {}
         super().__init__()
 
+    def runchecks(self, verbose: bool = False) -> None:
+        '''
+        Run all checks based on object properties capturing test settings,
+        checking string values in a pool of processes if processes > 1.
+        A wide table is checked a statistic across all columns at a time,
+        unless stopping at the first failure.
+        '''
+        wide = self.wide
+        if wide is None:
+            wide = len(self.columns) >= self.WIDE_COLUMNS
+        if wide and not self.stop_on_fail:
+            self._batch_statistics()
+        try:
+            self._runchecks_pooled(verbose)
+        finally:
+            self.batched.clear()
+
+    def _batch_statistics(self) -> None:
+        # compute the statistics column checks need for all columns at once
+        # (and look up the dtypes of numeric columns, as getting a column
+        # of a wide DataFrame is slow)
+        df = self.dataframe
+        if not df.columns.is_unique:
+            return
+        dtypes = df.dtypes
+        # column groups compute their statistics themselves
+        present = [column for column in self.columns
+                   if isinstance(column, PandasColumnCheckSuite) and
+                   column.columnname in dtypes.index]
+        # parsed datetimes are checked for nulls, not the values read
+        nulls = [column.columnname for column in present
+                 if not column.allow_nulls and column.type != 'datetime']
+        self.batched['dtype'] = {column.columnname: dtypes[column.columnname]
+                                 for column in present
+                                 if column.type == 'numeric'}
+        numeric = [column for column in present
+                   if column.type == 'numeric' and
+                   pd.api.types.is_numeric_dtype(dtypes[column.columnname])]
+        mins = [column.columnname for column in numeric
+                if column.min_val is not None]
+        maxes = [column.columnname for column in numeric
+                 if column.max_val is not None]
+        vals = {column.columnname: float(column.val) for column in numeric
+                if column.val is not None}
+        if nulls:
+            self.batched['nulls'] = dwpc.dfcount_nulls(df, nulls)
+        if mins:
+            self.batched['min'] = dwpc.dfcolumn_extremes(df, mins, 'min')
+        if maxes:
+            self.batched['max'] = dwpc.dfcolumn_extremes(df, maxes, 'max')
+        if vals:
+            self.batched['differ'] = dwpc.dfcolumns_differ(df, vals)
+
+    def _runchecks_pooled(self, verbose: bool) -> None:
+        if self.processes <= 1:
+            super().runchecks(verbose)
+            return
+        with dwpp.StringCheckPool(self.processes) as pool:
+            for column in self._pandas_columns():
+                column.pool = pool
+            try:
+                super().runchecks(verbose)
+            finally:
+                for column in self._pandas_columns():
+                    column.pool = None
+
+    def _pandas_columns(self) -> List[Union[PandasColumnCheckSuite,
+                                            PandasColumnGroupCheckSuite]]:
+        # the columns, all added by addcolumn or addpatterncolumns
+        return [column for column in self.columns
+                if isinstance(column, (PandasColumnCheckSuite,
+                                       PandasColumnGroupCheckSuite))]
+
+    def rows_scanned(self) -> Optional[int]:
+        return len(self.dataframe)
+
+    def sample_label(self) -> str:
+        if self.population_size is None:
+            return ''
+        return (f'sample of {len(self.dataframe)} of {self.population_size} '
+                'rows')
+
+    def sample_statement(self) -> str:
+        if self.population_size is None:
+            return ''
+        bound = dwsa.confidence_bound(len(self.dataframe), self.confidence)
+        return (f'Checks ran on a {self.sample_label()}: with '
+                f'{self.confidence:.0%} confidence, row level rules that '
+                f'passed hold for at least {1 - bound:.2%} of rows.')
+
     def addcolumn(self, colname: str, coltype: str) -> PandasColumnCheckSuite:
         '''Add a column to set rules on.'''
-        column = PandasColumnCheckSuite(self.dataframe, colname, coltype)
+        column = PandasColumnCheckSuite(self.dataframe, colname, coltype,
+                                        self.derived, self.batched)
         self.columns.append(column)
         return column
 
+    def addpatterncolumns(self, description: str, colnames: List[str],
+                          coltype: str) -> List[Any]:
+        '''
+        Add the columns matching a column pattern as a group, whose checks
+        are each evaluated across all its columns at once.
+        '''
+        group = PandasColumnGroupCheckSuite(self.dataframe, description,
+                                            colnames, coltype, self.derived)
+        self.columns.append(group)
+        return [group]
+
+    def clearderived(self) -> None:
+        '''Clear derived columns, e.g. after the dataframe is modified.'''
+        self.derived.clear()
+
+    def schema(self) -> Optional[List[Tuple[str, Optional[str]]]]:
+        return dwpc.dfschema(self.dataframe)
+
     def check_row_count_max(self) -> Tuple[bool, str]:
         if self.row_count_max is None:
             return True, ''
         val = int(self.row_count_max)
-        return dwpc.dfcheck_row_count(self.dataframe, val, '<=')
+        return dwpc.dfcheck_row_count(self.dataframe, val, '<=',
+                                      self.population_size)
 
     def check_row_count_min(self) -> Tuple[bool, str]:
         if self.row_count_min is None:
             return True, ''
         val = int(self.row_count_min)
-        return dwpc.dfcheck_row_count(self.dataframe, val, '>=')
+        return dwpc.dfcheck_row_count(self.dataframe, val, '>=',
+                                      self.population_size)
 
     def check_row_count(self) -> Tuple[bool, str]:
         if self.row_count is None:
             return True, ''
         val = int(self.row_count)
-        return dwpc.dfcheck_row_count(self.dataframe, val, '==')
+        return dwpc.dfcheck_row_count(self.dataframe, val, '==',
+                                      self.population_size)
 
     def check_no_duplicate_rows(self) -> Tuple[bool, str]:
         return dwpc.dfcheck_no_duplicate_rows(self.dataframe)
@@ -256,29 +549,55 @@ class PandasColumnCheckSuite(ColumnCheckSuite):
     are overriden to implement Pandas specific functionality.
     '''
 
-    def __init__(self, dataframe: pd.DataFrame, colname: str, coltype: str):
+    def __init__(self, dataframe: pd.DataFrame, colname: str, coltype: str,
+                 derived: Optional[Dict[str, pd.Series]] = None,
+                 batched: Optional[Dict[str, Dict[str, Any]]] = None):
         self.dataframe: pd.DataFrame = dataframe
+        # columns derived from the dataframe, shared with the dataset suite
+        self.derived: Dict[str, pd.Series] = {} if derived is None \
+            else derived
+        # statistics of wide table checks, shared with the dataset suite
+        self.batched: Dict[str, Dict[str, Any]] = {} if batched is None \
+            else batched
+        # pool of processes checking string values while the dataset
+        # suite runs checks, if any
+        self.pool: Optional[dwpp.StringCheckPool] = None
         super().__init__(colname, coltype)
 
+    def rows_scanned(self) -> Optional[int]:
+        return len(self.dataframe)
+
+    def _batched(self, statistic: str) -> Any:
+        # the statistic of the column computed for a wide table, if any
+        return self.batched.get(statistic, {}).get(self.columnname)
+
+    def _values(self) -> pd.DataFrame:
+        # the column with derived values (e.g. parsed datetimes) in place of
+        # the values read, without copying or modifying the dataframe
+        if self.columnname not in self.derived:
+            return self.dataframe
+        return pd.DataFrame({self.columnname: self.derived[self.columnname]},
+                            copy=False)
+
     def check_col_count_distinct_max(self) -> Tuple[bool, str]:
         if self.count_distinct_max is None:
             return True, ''
         max_val = int(self.count_distinct_max)
-        return dwpc.colcheck_count_distinct(self.dataframe, self.columnname,
+        return dwpc.colcheck_count_distinct(self._values(), self.columnname,
                                             max_val, '<=')
 
     def check_col_count_distinct_min(self) -> Tuple[bool, str]:
         if self.count_distinct_min is None:
             return True, ''
         min_val = int(self.count_distinct_min)
-        return dwpc.colcheck_count_distinct(self.dataframe, self.columnname,
+        return dwpc.colcheck_count_distinct(self._values(), self.columnname,
                                             min_val, '>=')
 
     def check_col_count_distinct(self) -> Tuple[bool, str]:
         if self.count_distinct is None:
             return True, ''
         val = int(self.count_distinct)
-        return dwpc.colcheck_count_distinct(self.dataframe, self.columnname,
+        return dwpc.colcheck_count_distinct(self._values(), self.columnname,
                                             val, '==')
 
     def check_col_exists(self) -> Tuple[bool, str]:
@@ -293,7 +612,7 @@ class PandasColumnCheckSuite(ColumnCheckSuite):
                            'minimum value')
         min_val = float(self.min_val)
         return dwpc.colcheck_val(self.dataframe, self.columnname, min_val,
-                                 '>=')
+                                 '>=', self._batched('min'))
 
     def check_col_max_val(self) -> Tuple[bool, str]:
         if not self.type == 'numeric':
@@ -304,25 +623,28 @@ class PandasColumnCheckSuite(ColumnCheckSuite):
                            'maximum value')
         max_val = float(self.max_val)
         return dwpc.colcheck_val(self.dataframe, self.columnname, max_val,
-                                 '<=')
+                                 '<=', self._batched('max'))
 
     def check_col_iqr(self) -> Tuple[bool, str]:
         if not self.type == 'numeric':
-            return False, (f'column (self.columnname) cannot check '
+            return False, (f'column {self.columnname} cannot check '
                            'inter-quartile range on a non-numeric column')
-        return dwpc.colcheck_iqr(self.dataframe, self.columnname)
+        return dwpc.colcheck_iqr(self.dataframe, self.columnname,
+                                 self.outlier_method)
 
     def check_col_no_blanks(self) -> Tuple[bool, str]:
         if not self.type == 'string':
             return False, (f'column {self.columnname} cannot check for blanks '
                            'in non-string column')
-        return dwpc.colcheck_no_blanks(self.dataframe, self.columnname)
+        return dwpc.colcheck_no_blanks(self.dataframe, self.columnname,
+                                       self.pool)
 
     def check_col_no_duplicates(self) -> Tuple[bool, str]:
-        return dwpc.colcheck_no_duplicates(self.dataframe, self.columnname)
+        return dwpc.colcheck_no_duplicates(self._values(), self.columnname)
 
     def check_col_non_nulls(self) -> Tuple[bool, str]:
-        return dwpc.colcheck_no_nulls(self.dataframe, self.columnname)
+        return dwpc.colcheck_no_nulls(self._values(), self.columnname,
+                                      self._batched('nulls'))
 
     def check_col_val(self) -> Tuple[bool, str]:
         if not self.type == 'numeric':
@@ -331,30 +653,355 @@ class PandasColumnCheckSuite(ColumnCheckSuite):
         if self.val is None:
             return False, (f'column {self.columnname} could not check value')
         val = float(self.val)
-        return dwpc.colcheck_val(self.dataframe, self.columnname, val, '==')
+        return dwpc.colcheck_val(self.dataframe, self.columnname, val, '==',
+                                 differ=self._batched('differ'))
 
     def check_col_type(self) -> Tuple[bool, str]:
         if self.type == 'numeric':
-            return dwpc.colcheck_is_numeric(self.dataframe, self.columnname)
+            return dwpc.colcheck_is_numeric(self.dataframe, self.columnname,
+                                            self._batched('dtype'))
         if self.type == 'string':
             return dwpc.colcheck_is_str(self.dataframe, self.columnname)
         if self.type == 'datetime':
-            success, msg = dwpc.colcheck_is_datetime(self.dataframe,
-                                                     self.columnname,
-                                                     self.dateformat)
-            if success:
-                if self.dateformat is not None:
-                    pd.to_datetime(self.dataframe[self.columnname],
-                                   format=self.dateformat)
-                else:
-                    pd.to_datetime(self.dataframe[self.columnname])
-            return success, msg
+            return dwpc.colcheck_is_datetime(self.dataframe, self.columnname,
+                                             self.dateformat, self.derived)
         return False, (f'column {self.columnname} could not tested '
                        f'for type {self.type} (unknown type)')
 
     def check_col_regex(self) -> Tuple[bool, str]:
         return dwpc.colcheck_regex(self.dataframe, self.columnname,
-                                   self.regex_rule, self.regex_type)
+                                   self.regex_rule, self.regex_type,
+                                   self.pool)
+
+    def check_col_regex_rules(self) -> List[Tuple[bool, str]]:
+        return dwpc.colcheck_regex_rules(self.dataframe, self.columnname,
+                                         list(self.regex_rules), self.pool)
+
+
+class PandasColumnGroupCheckSuite(ColumnCheckSuite):
+    '''
+    Pandas DataFrame testing object for a group of columns with the same
+    rules (the columns matching a column pattern rule). Each check is
+    evaluated for all the columns at once, computing statistics with a
+    call across the columns where there is one, and fails with a message
+    for each column that fails it, in the order a column suite per column
+    would give them. Stopping on fail stops at the first check that fails.
+    '''
+
+    def __init__(self, dataframe: pd.DataFrame, description: str,
+                 colnames: List[str], coltype: str,
+                 derived: Optional[Dict[str, pd.Series]] = None):
+        self.dataframe: pd.DataFrame = dataframe
+        self.columnnames: List[str] = list(colnames)
+        # columns derived from the dataframe, shared with the dataset suite
+        self.derived: Dict[str, pd.Series] = {} if derived is None \
+            else derived
+        # pool of processes checking string values while the dataset
+        # suite runs checks, if any
+        self.pool: Optional[dwpp.StringCheckPool] = None
+        # (column name, message) of each column failing the last check run
+        self._failures: List[Tuple[str, str]] = []
+        # results of check_col_regex_rules by column, once a regex_rules
+        # check ran
+        self._group_regex_results: Optional[
+            Dict[str, List[Tuple[bool, str]]]] = None
+        # distinct values by column, once a count_distinct check ran
+        self._group_distinct: Optional[Dict[str, int]] = None
+        super().__init__(f'columns {description}', coltype)
+
+    def _assemble_checks(self) -> None:
+        super()._assemble_checks()
+        self._group_regex_results = None
+        self._group_distinct = None
+
+    def runchecks(self, stop_on_fail: bool,
+                  verbose: bool = False) -> List[str]:
+        '''
+        Run all checks based on object properties capturing test settings.
+        '''
+        self._assemble_checks()
+        order = {name: index for index, name in enumerate(self.columnnames)}
+        failures: List[Tuple[int, int, str]] = []
+        for number, check in enumerate([self.check_col_exists] +
+                                       self._checks):
+            passed, _ = self._run_check(check)
+            if verbose:
+                print('.' if passed else 'F', end='', flush=True)
+            failures += [(order[name], number, message)
+                         for name, message in self._failures]
+            if not passed and stop_on_fail:
+                break
+        failures.sort()
+        if stop_on_fail:
+            failures = failures[:1]
+        self.error_messages = [message for _, _, message in failures]
+        return self.error_messages
+
+    def _regex_rule_check(self, index: int) -> Callable[[], Tuple[bool, str]]:
+        # the check of one of the regex_rules across the columns, the first
+        # of which to run checks them all in one pass over each column
+        def check_col_regex_rule() -> Tuple[bool, str]:
+            if self._group_regex_results is None:
+                self._group_regex_results = {
+                    name: dwpc.colcheck_regex_rules(
+                        self.dataframe, name, list(self.regex_rules),
+                        self.pool)
+                    for name in self._present()}
+            return self._report(
+                    (name, results[index])
+                    for name, results in self._group_regex_results.items())
+
+        return check_col_regex_rule
+
+    def rows_scanned(self) -> Optional[int]:
+        return len(self.dataframe)
+
+    def _present(self) -> List[str]:
+        # the columns of the group in the data (the others fail to exist)
+        columns = set(self.dataframe.columns)
+        return [name for name in self.columnnames if name in columns]
+
+    def _values(self, colnames: List[str]) -> pd.DataFrame:
+        # the columns with derived values (e.g. parsed datetimes) in place
+        # of the values read, without copying or modifying the dataframe
+        if not any(name in self.derived for name in colnames):
+            return self.dataframe
+        return pd.DataFrame({name: self.derived.get(name,
+                                                    self.dataframe[name])
+                             for name in colnames}, copy=False)
+
+    def _numeric(self, colnames: List[str]) -> List[str]:
+        # the columns of numeric dtypes, whose statistics can be batched
+        dtypes = self.dataframe.dtypes
+        return [name for name in colnames
+                if pd.api.types.is_numeric_dtype(dtypes[name])]
+
+    def _report(self, results: Iterable[Tuple[str, Tuple[bool, str]]]
+                ) -> Tuple[bool, str]:
+        # keep the failures of the columns, passing if none failed or else
+        # failing with the message of the first column that failed
+        self._failures = [(name, message)
+                          for name, (passed, message) in results
+                          if not passed]
+        if not self._failures:
+            return True, ''
+        return False, self._failures[0][1]
+
+    def _non_numeric(self, colnames: List[str],
+                     what: str) -> Tuple[bool, str]:
+        return self._report((name, (False, f'column {name} cannot check '
+                                           f'{what}'))
+                            for name in colnames)
+
+    def _count_distinct(self, count: int,
+                        operator: str) -> Tuple[bool, str]:
+        colnames = self._present()
+        values = self._values(colnames)
+        if self._group_distinct is None:
+            self._group_distinct = dwpc.dfcount_distinct(values, colnames)
+        counts = self._group_distinct
+        return self._report(
+                (name, dwpc.colcheck_count_distinct(values, name, count,
+                                                    operator, counts[name]))
+                for name in colnames)
+
+    def _extremes(self, val: float, operator: str) -> Tuple[bool, str]:
+        colnames = self._present()
+        numeric = self._numeric(colnames)
+        extremes = dwpc.dfcolumn_extremes(self.dataframe, numeric,
+                                          'min' if operator == '>=' else
+                                          'max') if numeric else {}
+        return self._report(
+                (name, dwpc.colcheck_val(self.dataframe, name, val, operator,
+                                         extremes.get(name)))
+                for name in colnames)
+
+    def check_col_count_distinct_max(self) -> Tuple[bool, str]:
+        if self.count_distinct_max is None:
+            return True, ''
+        return self._count_distinct(int(self.count_distinct_max), '<=')
+
+    def check_col_count_distinct_min(self) -> Tuple[bool, str]:
+        if self.count_distinct_min is None:
+            return True, ''
+        return self._count_distinct(int(self.count_distinct_min), '>=')
+
+    def check_col_count_distinct(self) -> Tuple[bool, str]:
+        if self.count_distinct is None:
+            return True, ''
+        return self._count_distinct(int(self.count_distinct), '==')
+
+    def check_col_exists(self) -> Tuple[bool, str]:
+        columns = set(self.dataframe.columns)
+        return self._report(
+                (name, (True, '') if name in columns else
+                 dwpc.colcheck_exists(self.dataframe, name))
+                for name in self.columnnames)
+
+    def check_col_min_val(self) -> Tuple[bool, str]:
+        if not self.type == 'numeric':
+            return self._non_numeric(self._present(), 'minimum value on a '
+                                     'non-numeric column')
+        if self.min_val is None:
+            return True, ''
+        return self._extremes(float(self.min_val), '>=')
+
+    def check_col_max_val(self) -> Tuple[bool, str]:
+        if not self.type == 'numeric':
+            return self._non_numeric(self._present(), 'maximum value on a '
+                                     'non-numeric column')
+        if self.max_val is None:
+            return True, ''
+        return self._extremes(float(self.max_val), '<=')
+
+    def check_col_iqr(self) -> Tuple[bool, str]:
+        if not self.type == 'numeric':
+            return self._non_numeric(self._present(), 'inter-quartile range '
+                                     'on a non-numeric column')
+        return self._report(
+                (name, dwpc.colcheck_iqr(self.dataframe, name,
+                                         self.outlier_method))
+                for name in self._present())
+
+    def check_col_no_blanks(self) -> Tuple[bool, str]:
+        if not self.type == 'string':
+            return self._report(
+                    (name, (False, f'column {name} cannot check for blanks '
+                                   'in non-string column'))
+                    for name in self._present())
+        return self._report(
+                (name, dwpc.colcheck_no_blanks(self.dataframe, name,
+                                               self.pool))
+                for name in self._present())
+
+    def check_col_no_duplicates(self) -> Tuple[bool, str]:
+        colnames = self._present()
+        values = self._values(colnames)
+        counts = dwpc.dfcount_duplicates(values, colnames)
+        return self._report(
+                (name, dwpc.colcheck_no_duplicates(values, name,
+                                                   counts[name]))
+                for name in colnames)
+
+    def check_col_non_nulls(self) -> Tuple[bool, str]:
+        colnames = self._present()
+        values = self._values(colnames)
+        counts = dwpc.dfcount_nulls(values, colnames)
+        return self._report(
+                (name, dwpc.colcheck_no_nulls(values, name, counts[name]))
+                for name in colnames)
+
+    def check_col_val(self) -> Tuple[bool, str]:
+        colnames = self._present()
+        if not self.type == 'numeric':
+            return self._non_numeric(colnames, 'value of a non-numeric '
+                                     'column')
+        if self.val is None:
+            return True, ''
+        val = float(self.val)
+        numeric = self._numeric(colnames)
+        differ = dwpc.dfcolumns_differ(
+                self.dataframe, {name: val for name in numeric}) \
+            if numeric else {}
+        return self._report(
+                (name, dwpc.colcheck_val(self.dataframe, name, val, '==',
+                                         differ=differ.get(name)))
+                for name in colnames)
+
+    def check_col_type(self) -> Tuple[bool, str]:
+        colnames = self._present()
+        if self.type == 'numeric':
+            dtypes = self.dataframe.dtypes
+            return self._report(
+                    (name, dwpc.colcheck_is_numeric(self.dataframe, name,
+                                                    dtypes[name]))
+                    for name in colnames)
+        if self.type == 'string':
+            return self._report(
+                    (name, dwpc.colcheck_is_str(self.dataframe, name))
+                    for name in colnames)
+        if self.type == 'datetime':
+            return self._report(
+                    (name, dwpc.colcheck_is_datetime(self.dataframe, name,
+                                                     self.dateformat,
+                                                     self.derived))
+                    for name in colnames)
+        return self._report(
+                (name, (False, f'column {name} could not tested for type '
+                               f'{self.type} (unknown type)'))
+                for name in colnames)
+
+    def check_col_regex(self) -> Tuple[bool, str]:
+        return self._report(
+                (name, dwpc.colcheck_regex(self.dataframe, name,
+                                           self.regex_rule, self.regex_type,
+                                           self.pool))
+                for name in self._present())
+
+
+class PreflightCheckSuite(PandasDatsetCheckSuite):
+    '''
+    Checks of the structure of a data file (the columns it has and their
+    types) on a DataFrame of its first rows, to fail fast before loading
+    the whole file. Only checks that fail on all rows once they fail on
+    the first rows are run, stopping at the first failure: a missing
+    column, a numeric column with a value that is not a number or a
+    datetime column with a value that does not parse (read as text, as it
+    is when the whole column does not parse as numbers). A column of
+    numbers in the first rows can still turn out to be strings, so string
+    type checks are left to the full data.
+    '''
+
+    PREFLIGHT_TYPES = ['numeric', 'datetime']
+
+    def runchecks(self, verbose: bool = False) -> None:
+        '''Run the column exists and type checks of the first rows.'''
+        self.error_messages = []
+        for column in self.columns:
+            column.profiler = self.profiler
+            checks = [column.check_col_exists]
+            if column.type in self.PREFLIGHT_TYPES:
+                checks.append(column.check_col_type)
+            for check in checks:
+                passed, message = column._run_check(check)
+                if verbose:
+                    print('.' if passed else 'F', end='', flush=True)
+                if not passed:
+                    self.error_messages.append(message)
+                    return
+
+
+class RowCountCheckSuite(TableCheckSuite):
+    '''
+    Testing object for rules that only check the number of rows of a table,
+    given the number of rows counted without loading the data (see
+    datawhistle.rowcount). Column and duplicate row checks need the data.
+    '''
+
+    def __init__(self, num_rows: int):
+        self.num_rows: int = num_rows
+        super().__init__()
+
+    def rows_scanned(self) -> Optional[int]:
+        return self.num_rows
+
+    def check_row_count_max(self) -> Tuple[bool, str]:
+        if self.row_count_max is None:
+            return True, ''
+        val = int(self.row_count_max)
+        return dwrn.tblcheck_row_count(self.num_rows, val, '<=')
+
+    def check_row_count_min(self) -> Tuple[bool, str]:
+        if self.row_count_min is None:
+            return True, ''
+        val = int(self.row_count_min)
+        return dwrn.tblcheck_row_count(self.num_rows, val, '>=')
+
+    def check_row_count(self) -> Tuple[bool, str]:
+        if self.row_count is None:
+            return True, ''
+        val = int(self.row_count)
+        return dwrn.tblcheck_row_count(self.num_rows, val, '==')
 
 
 class BqTableCheckSuite(TableCheckSuite):
@@ -363,10 +1010,24 @@ class BqTableCheckSuite(TableCheckSuite):
     overriden to implement BigQuery specific functionality.
     '''
 
-    def __init__(self, datasetname: str, tablename: str):
+    def __init__(self, datasetname: str, tablename: str,
+                 sample_percent: Optional[float] = None):
         super().__init__()
         self.datasetname = datasetname
         self.tablename = tablename
+        # check a TABLESAMPLE of the table rather than the whole table
+        self.sample_percent: Optional[float] = sample_percent
+
+    def sample_label(self) -> str:
+        if self.sample_percent is None:
+            return ''
+        return f'{self.sample_percent}% table sample'
+
+    def sample_statement(self) -> str:
+        if self.sample_percent is None:
+            return ''
+        return (f'Checks ran on a {self.sample_label()}: rules that passed '
+                'were not checked against the rest of the table.')
 
     # Implement an extension on the parent runchecks method to add a check
     # if the table exists before proceeding.
@@ -374,8 +1035,7 @@ class BqTableCheckSuite(TableCheckSuite):
         '''
         Run all checks based on object properties capturing test settings.
         '''
-        passed, message = dwbc.dscheck_table_exists(self.datasetname,
-                                                    self.tablename)
+        passed, message = self._run_check(self.check_table_exists)
         if not passed:
             self.error_messages = []
             self.error_messages.append(message)
@@ -386,7 +1046,8 @@ class BqTableCheckSuite(TableCheckSuite):
                   columntype: str) -> BqColumnCheckSuite:
         '''Add a column to set rules on.'''
         column = BqColumnCheckSuite(self.datasetname, self.tablename,
-                                    columnname, columntype)
+                                    columnname, columntype,
+                                    self.sample_percent)
         self.columns.append(column)
         return column
 
@@ -414,6 +1075,12 @@ class BqTableCheckSuite(TableCheckSuite):
     def check_no_duplicate_rows(self) -> Tuple[bool, str]:
         return False, 'Cannot check BigQuery for duplicate rows'
 
+    def check_table_exists(self) -> Tuple[bool, str]:
+        return dwbc.dscheck_table_exists(self.datasetname, self.tablename)
+
+    def schema(self) -> Optional[List[Tuple[str, Optional[str]]]]:
+        return dwbc.table_schema(self.datasetname, self.tablename)
+
 
 class BqColumnCheckSuite(ColumnCheckSuite):
     '''
@@ -422,31 +1089,35 @@ class BqColumnCheckSuite(ColumnCheckSuite):
     '''
 
     def __init__(self, datasetname: str, tablename: str, columnname: str,
-                 columntype: str):
+                 columntype: str, sample_percent: Optional[float] = None):
         super().__init__(columnname, columntype)
         self.datasetname = datasetname
         self.tablename = tablename
+        self.sample_percent: Optional[float] = sample_percent
 
     def check_col_count_distinct_max(self) -> Tuple[bool, str]:
         if self.count_distinct_max is None:
             return True, ''
         max_val = int(self.count_distinct_max)
         return dwbc.colcheck_count_distinct(self.datasetname, self.tablename,
-                                            self.columnname, max_val, '<=')
+                                            self.columnname, max_val, '<=',
+                                            self.sample_percent)
 
     def check_col_count_distinct_min(self) -> Tuple[bool, str]:
         if self.count_distinct_min is None:
             return True, ''
         min_val = int(self.count_distinct_min)
         return dwbc.colcheck_count_distinct(self.datasetname, self.tablename,
-                                            self.columnname, min_val, '>=')
+                                            self.columnname, min_val, '>=',
+                                            self.sample_percent)
 
     def check_col_count_distinct(self) -> Tuple[bool, str]:
         if self.count_distinct is None:
             return True, ''
         val = int(self.count_distinct)
         return dwbc.colcheck_count_distinct(self.datasetname, self.tablename,
-                                            self.columnname, val, '==')
+                                            self.columnname, val, '==',
+                                            self.sample_percent)
 
     def check_col_exists(self) -> Tuple[bool, str]:
         return dwbc.colcheck_exists(self.datasetname, self.tablename,
@@ -461,7 +1132,8 @@ class BqColumnCheckSuite(ColumnCheckSuite):
                            'minimum value')
         min_val = float(self.min_val)
         return dwbc.colcheck_val(self.datasetname, self.tablename,
-                                 self.columnname, min_val, '>=')
+                                 self.columnname, min_val, '>=',
+                                 self.sample_percent)
 
     def check_col_max_val(self) -> Tuple[bool, str]:
         if not self.type == 'numeric':
@@ -472,34 +1144,42 @@ class BqColumnCheckSuite(ColumnCheckSuite):
                            'maximum value')
         max_val = float(self.max_val)
         return dwbc.colcheck_val(self.datasetname, self.tablename,
-                                 self.columnname, max_val, '<=')
+                                 self.columnname, max_val, '<=',
+                                 self.sample_percent)
 
     def check_col_iqr(self) -> Tuple[bool, str]:
         if not self.type == 'numeric':
-            return False, (f'column (self.columnname) cannot check '
+            return False, (f'column {self.columnname} cannot check '
                            'inter-quartile range on a non-numeric column')
         return dwbc.colcheck_iqr(self.datasetname, self.tablename,
-                                 self.columnname)
+                                 self.columnname, self.sample_percent)
 
     def check_col_no_blanks(self) -> Tuple[bool, str]:
         if not self.type == 'string':
             return False, (f'column {self.columnname} cannot check for blanks '
                            'in non-string column')
         return dwbc.colcheck_no_blanks(self.datasetname, self.tablename,
-                                       self.columnname)
+                                       self.columnname, self.sample_percent)
 
     def check_col_no_duplicates(self) -> Tuple[bool, str]:
         return dwbc.colcheck_no_duplicates(self.datasetname, self.tablename,
-                                           self.columnname)
+                                           self.columnname,
+                                           self.sample_percent)
 
     def check_col_non_nulls(self) -> Tuple[bool, str]:
         return dwbc.colcheck_no_nulls(self.datasetname, self.tablename,
-                                      self.columnname)
+                                      self.columnname, self.sample_percent)
 
     def check_col_regex(self) -> Tuple[bool, str]:
         return dwbc.colcheck_regex(self.datasetname, self.tablename,
                                    self.columnname, self.regex_rule,
-                                   self.regex_type)
+                                   self.regex_type, self.sample_percent)
+
+    def check_col_regex_rules(self) -> List[Tuple[bool, str]]:
+        return dwbc.colcheck_regex_rules(self.datasetname, self.tablename,
+                                         self.columnname,
+                                         list(self.regex_rules),
+                                         self.sample_percent)
 
     def check_col_val(self) -> Tuple[bool, str]:
         if not self.type == 'numeric':
@@ -509,7 +1189,8 @@ class BqColumnCheckSuite(ColumnCheckSuite):
             return False, (f'column {self.columnname} could not check value')
         val = float(self.val)
         return dwbc.colcheck_val(self.datasetname, self.tablename,
-                                 self.columnname, val, '==')
+                                 self.columnname, val, '==',
+                                 self.sample_percent)
 
     def check_col_type(self) -> Tuple[bool, str]:
         if self.type == 'numeric':
@@ -523,3 +1204,306 @@ class BqColumnCheckSuite(ColumnCheckSuite):
                                              self.columnname)
         return False, (f'column {self.columnname} could not tested '
                        f'for type {self.type} (unknown type)')
+
+
+class StreamingDatasetCheckSuite(TableCheckSuite):
+    '''
+    Testing object for data read in chunks (Pandas DataFrames). Chunks are
+    summarised into mergeable accumulators by the update method and check
+    methods from the parent class are overriden to check the accumulated
+    summaries.
+    '''
+
+    # Checks whose failure on the rows read so far cannot be undone by
+    # reading more rows (check_col_type only for non-string columns, as
+    # a column of numbers can turn out to be strings).
+    FINAL_ON_FAIL_CHECKS = frozenset([
+        'check_no_duplicate_rows', 'check_row_count_max', 'check_col_exists',
+        'check_col_type', 'check_col_no_blanks', 'check_col_no_duplicates',
+        'check_col_non_nulls', 'check_col_regex', 'check_col_regex_rule',
+        'check_col_val', 'check_col_min_val', 'check_col_max_val',
+        'check_col_count_distinct_max'])
+    # Checks counting hashes of distinct values, which once spilled to disk
+    # are only counted by runchecks (counting reads them all back).
+    HASH_COUNT_CHECKS = frozenset([
+        'check_no_duplicate_rows', 'check_col_no_duplicates',
+        'check_col_count_distinct_max'])
+
+    def __init__(self):
+        super().__init__()
+        self.accumulator: Optional[dwst.TableAccumulator] = None
+        # the failure that stopped reading data early, if any
+        self.early_failure: Optional[str] = None
+        # whether columns missing from the first chunk are missing for good
+        # (as for CSV files, whose header names the columns)
+        self.fixed_columns: bool = True
+        # bytes of hashes of distinct values (of rows or of a column) held
+        # in memory for each duplicate or distinct check before spilling
+        # them to disk, None to keep them all in memory
+        self.hash_max_bytes: Optional[int] = None
+
+    def runchecks(self, verbose: bool = False) -> None:
+        '''
+        Run all checks based on object properties capturing test settings,
+        or report the failure found by check_early if reading stopped early.
+        '''
+        if self.early_failure is None:
+            super().runchecks(verbose)
+            return
+        if verbose:
+            print('F', end='', flush=True)
+        self.error_messages = [f'{self.early_failure} '
+                               f'({self.sample_label()})']
+
+    def sample_label(self) -> str:
+        if self.early_failure is None:
+            return ''
+        return f'stopped reading after {self._table_accumulator().rows} rows'
+
+    def check_early(self) -> bool:
+        '''
+        Run the checks that fail for good once they fail on the rows added
+        so far, returning True and recording the failure if one fails. Used
+        to stop reading data at the first failure when stop_on_fail is set.
+        '''
+        self._assemble_checks()
+        accumulator = self._table_accumulator()
+        checks = [check for check in self._checks
+                  if check.__name__ in self.FINAL_ON_FAIL_CHECKS and not
+                  (check.__name__ in self.HASH_COUNT_CHECKS and
+                   accumulator.row_hashes.spilled)]
+        for column in self._streaming_columns():
+            column._assemble_checks()
+            if self.fixed_columns:
+                checks.append(column.check_col_exists)
+            spilled = column.accumulator is not None and \
+                column.accumulator.hashes is not None and \
+                column.accumulator.hashes.spilled
+            checks += [check for check in column._checks
+                       if check.__name__ in self.FINAL_ON_FAIL_CHECKS and not
+                       (check.__name__ == 'check_col_type' and
+                        column.type == 'string') and not
+                       (check.__name__ in self.HASH_COUNT_CHECKS and
+                        spilled)]
+        for check in checks:
+            passed, message = check()
+            if not passed:
+                self.early_failure = message
+                return True
+        return False
+
+    def addcolumn(self, colname: str,
+                  coltype: str) -> StreamingColumnCheckSuite:
+        '''Add a column to set rules on.'''
+        column = StreamingColumnCheckSuite(colname, coltype)
+        self.columns.append(column)
+        return column
+
+    def column_dtypes(self) -> Dict[str, type]:
+        '''
+        Types to read columns as. String and datetime columns are read as
+        strings so that every chunk of a column is read the same way.
+        '''
+        return {col.columnname: str for col in self.columns
+                if col.type in ['string', 'datetime']}
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        '''
+        Add a chunk of data to the summaries checked. Column pattern rules
+        are resolved against the first chunk with rows.
+        '''
+        if self.column_patterns and len(chunk) > 0:
+            self.resolve_column_patterns(dwpc.dfschema(chunk))
+            for column in self._streaming_columns():
+                column.hash_max_bytes = self.hash_max_bytes
+        if self.accumulator is None:
+            self.accumulator = dwst.TableAccumulator(
+                    not self.allow_duplicate_rows, self.hash_max_bytes)
+            for column in self._streaming_columns():
+                column.hash_max_bytes = self.hash_max_bytes
+        self.accumulator.update(chunk)
+        for column in self._streaming_columns():
+            column.update(chunk)
+
+    def get_accumulators(self) -> Tuple[
+            Optional[dwst.TableAccumulator],
+            List[Optional[dwst.ColumnAccumulator]]]:
+        '''Get the table and column summaries, e.g. to save them.'''
+        return self.accumulator, [col.accumulator
+                                  for col in self._streaming_columns()]
+
+    def set_accumulators(self, accumulator: dwst.TableAccumulator,
+                         column_accumulators: List[dwst.ColumnAccumulator]
+                         ) -> None:
+        '''
+        Set table and column summaries, e.g. saved from an earlier run
+        with the same rules, to add further chunks of data to.
+        '''
+        self.accumulator = accumulator
+        for column, column_acc in zip(self._streaming_columns(),
+                                      column_accumulators):
+            column.accumulator = column_acc
+
+    def _streaming_columns(self) -> List[StreamingColumnCheckSuite]:
+        # the columns, all added by addcolumn
+        return [column for column in self.columns
+                if isinstance(column, StreamingColumnCheckSuite)]
+
+    def rows_scanned(self) -> Optional[int]:
+        return self._table_accumulator().rows
+
+    def _table_accumulator(self) -> dwst.TableAccumulator:
+        if self.accumulator is None:
+            return dwst.TableAccumulator()
+        return self.accumulator
+
+    def check_row_count_max(self) -> Tuple[bool, str]:
+        if self.row_count_max is None:
+            return True, ''
+        val = int(self.row_count_max)
+        return dwst.tblcheck_row_count(self._table_accumulator(), val, '<=')
+
+    def check_row_count_min(self) -> Tuple[bool, str]:
+        if self.row_count_min is None:
+            return True, ''
+        val = int(self.row_count_min)
+        return dwst.tblcheck_row_count(self._table_accumulator(), val, '>=')
+
+    def check_row_count(self) -> Tuple[bool, str]:
+        if self.row_count is None:
+            return True, ''
+        val = int(self.row_count)
+        return dwst.tblcheck_row_count(self._table_accumulator(), val, '==')
+
+    def check_no_duplicate_rows(self) -> Tuple[bool, str]:
+        return dwst.tblcheck_no_duplicate_rows(self._table_accumulator())
+
+
+class StreamingColumnCheckSuite(ColumnCheckSuite):
+    '''
+    Column testing object for data read in chunks. Check methods from the
+    parent class are overriden to check a summary of the column's values
+    accumulated chunk by chunk.
+    '''
+
+    def __init__(self, colname: str, coltype: str):
+        super().__init__(colname, coltype)
+        self.accumulator: Optional[dwst.ColumnAccumulator] = None
+        # see StreamingDatasetCheckSuite.hash_max_bytes
+        self.hash_max_bytes: Optional[int] = None
+
+    def keeps_hashes(self) -> bool:
+        '''Whether the rules need hashes of the column's distinct values.'''
+        return (not self.allow_duplicates or
+                self.count_distinct_max is not None or
+                self.count_distinct_min is not None or
+                self.count_distinct is not None)
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        '''Add a chunk of data to the column summary.'''
+        if self.accumulator is None:
+            val = None if self.val is None else float(self.val)
+            self.accumulator = dwst.ColumnAccumulator(
+                    self.columnname, self.type, self.dateformat, val,
+                    self.regex_rule, self.regex_type, self.keeps_hashes(),
+                    not self.allow_outliers, self.hash_max_bytes,
+                    self.regex_rules)
+        self.accumulator.update(chunk)
+
+    def rows_scanned(self) -> Optional[int]:
+        if self.accumulator is None:
+            return 0
+        return self.accumulator.rows
+
+    def _column_accumulator(self) -> dwst.ColumnAccumulator:
+        if self.accumulator is None:
+            return dwst.ColumnAccumulator(self.columnname, self.type,
+                                          regex_rules=self.regex_rules)
+        return self.accumulator
+
+    def check_col_count_distinct_max(self) -> Tuple[bool, str]:
+        if self.count_distinct_max is None:
+            return True, ''
+        max_val = int(self.count_distinct_max)
+        return dwst.colcheck_count_distinct(self._column_accumulator(),
+                                            max_val, '<=')
+
+    def check_col_count_distinct_min(self) -> Tuple[bool, str]:
+        if self.count_distinct_min is None:
+            return True, ''
+        min_val = int(self.count_distinct_min)
+        return dwst.colcheck_count_distinct(self._column_accumulator(),
+                                            min_val, '>=')
+
+    def check_col_count_distinct(self) -> Tuple[bool, str]:
+        if self.count_distinct is None:
+            return True, ''
+        val = int(self.count_distinct)
+        return dwst.colcheck_count_distinct(self._column_accumulator(),
+                                            val, '==')
+
+    def check_col_exists(self) -> Tuple[bool, str]:
+        return dwst.colcheck_exists(self._column_accumulator())
+
+    def check_col_min_val(self) -> Tuple[bool, str]:
+        if not self.type == 'numeric':
+            return False, (f'column {self.columnname} cannot check minimum '
+                           'value on a non-numeric column')
+        if self.min_val is None:
+            return False, (f'column {self.columnname} could not check '
+                           'minimum value')
+        min_val = float(self.min_val)
+        return dwst.colcheck_val(self._column_accumulator(), min_val, '>=')
+
+    def check_col_max_val(self) -> Tuple[bool, str]:
+        if not self.type == 'numeric':
+            return False, (f'column {self.columnname} cannot check maximum '
+                           'value on a non-numeric column')
+        if self.max_val is None:
+            return False, (f'column {self.columnname} could not check '
+                           'maximum value')
+        max_val = float(self.max_val)
+        return dwst.colcheck_val(self._column_accumulator(), max_val, '<=')
+
+    def check_col_iqr(self) -> Tuple[bool, str]:
+        if not self.type == 'numeric':
+            return False, (f'column {self.columnname} cannot check '
+                           'inter-quartile range on a non-numeric column')
+        return dwst.colcheck_iqr(self._column_accumulator())
+
+    def check_col_no_blanks(self) -> Tuple[bool, str]:
+        if not self.type == 'string':
+            return False, (f'column {self.columnname} cannot check for blanks '
+                           'in non-string column')
+        return dwst.colcheck_no_blanks(self._column_accumulator())
+
+    def check_col_no_duplicates(self) -> Tuple[bool, str]:
+        return dwst.colcheck_no_duplicates(self._column_accumulator())
+
+    def check_col_non_nulls(self) -> Tuple[bool, str]:
+        return dwst.colcheck_no_nulls(self._column_accumulator())
+
+    def check_col_val(self) -> Tuple[bool, str]:
+        if not self.type == 'numeric':
+            return False, (f'column {self.columnname} cannot check '
+                           'value of a non-numeric column')
+        if self.val is None:
+            return False, (f'column {self.columnname} could not check value')
+        val = float(self.val)
+        return dwst.colcheck_val(self._column_accumulator(), val, '==')
+
+    def check_col_type(self) -> Tuple[bool, str]:
+        if self.type == 'numeric':
+            return dwst.colcheck_is_numeric(self._column_accumulator())
+        if self.type == 'string':
+            return dwst.colcheck_is_str(self._column_accumulator())
+        if self.type == 'datetime':
+            return dwst.colcheck_is_datetime(self._column_accumulator())
+        return False, (f'column {self.columnname} could not tested '
+                       f'for type {self.type} (unknown type)')
+
+    def check_col_regex(self) -> Tuple[bool, str]:
+        return dwst.colcheck_regex(self._column_accumulator())
+
+    def check_col_regex_rules(self) -> List[Tuple[bool, str]]:
+        return dwst.colcheck_regex_rules(self._column_accumulator())
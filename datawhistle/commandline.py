@@ -1,19 +1,64 @@
+# Avoid evaluating type annotations (pd.DataFrame) at import. See PEP563.
+from __future__ import annotations
 import argparse
+import contextlib
+import os
 import sys
-import pandas as pd  # type: ignore
+import time
+from typing import TYPE_CHECKING, BinaryIO, Callable, Optional, Tuple, Union
 import datawhistle as dw
+from datawhistle.lazyimport import lazy_import
+# type checkers see the modules imported lazily at run time
+if TYPE_CHECKING:
+    import pandas as pd  # type: ignore
+    import datawhistle.arrowcsv as dwac
+    import datawhistle.bqchecks as dwbc
+    import datawhistle.compact as dwcp
+    import datawhistle.compressed as dwcz
+    import datawhistle.incremental as dwin
+    import datawhistle.jsonlines as dwjl
+    import datawhistle.metrics as dwme
+    import datawhistle.planning as dwpl
+    import datawhistle.profiling as dwpr
+    import datawhistle.resultcache as dwrc
+    import datawhistle.rowcount as dwrn
+    import datawhistle.streaming as dwsm
+    import datawhistle.sampling as dwsa
+    import datawhistle.scheduling as dwsc
+else:
+    pd = lazy_import('pandas')
+    dwac = lazy_import('datawhistle.arrowcsv')
+    dwbc = lazy_import('datawhistle.bqchecks')
+    dwcp = lazy_import('datawhistle.compact')
+    dwcz = lazy_import('datawhistle.compressed')
+    dwin = lazy_import('datawhistle.incremental')
+    dwjl = lazy_import('datawhistle.jsonlines')
+    dwme = lazy_import('datawhistle.metrics')
+    dwpl = lazy_import('datawhistle.planning')
+    dwpr = lazy_import('datawhistle.profiling')
+    dwrc = lazy_import('datawhistle.resultcache')
+    dwrn = lazy_import('datawhistle.rowcount')
+    dwsm = lazy_import('datawhistle.streaming')
+    dwsa = lazy_import('datawhistle.sampling')
+    dwsc = lazy_import('datawhistle.scheduling')
 
 
+# rows read to check the structure of a CSV file before loading it
+PREFLIGHT_ROWS = 1000
+
 _HELP = ('A Programmatic Data Checker '
          '(see https://github.com/akeanewow/DataWhistle)')
 
 
 def commandline_main() -> None:
     parser = argparse.ArgumentParser(description=_HELP)
-    parser.add_argument('-s', '--source', type=str, choices=['CSV', 'BQ'],
-                        help='data source: CSV or BQ (BigQuery)')
+    parser.add_argument('-s', '--source', type=str,
+                        choices=['CSV', 'JSONL', 'BQ'],
+                        help=('data source: CSV, JSONL (JSON Lines) or BQ '
+                              '(BigQuery)'))
     parser.add_argument('-f', '--file', type=str,
-                        help='a comma separated value file to check')
+                        help=('a comma separated value or JSON Lines file '
+                              'to check (- for standard input)'))
     parser.add_argument('-r', '--rules', type=str,
                         help='rules to apply defined in a yaml file')
     parser.add_argument('-d', '--dataset', type=str,
@@ -22,28 +67,256 @@ def commandline_main() -> None:
                         help='table to check')
     parser.add_argument('-v', '--verbose', action='store_true',
                         help='increase output verbosity')
+    parser.add_argument('--sample', type=int, metavar='ROWS',
+                        help='check a random sample of rows from a CSV file')
+    parser.add_argument('--sample-strata', type=str, metavar='COLUMN',
+                        help='stratify the CSV sample by a column')
+    parser.add_argument('--sample-seed', type=int, metavar='SEED',
+                        help='random seed for the CSV sample')
+    parser.add_argument('--sample-percent', type=float, metavar='PERCENT',
+                        help='check a TABLESAMPLE of a BigQuery table')
+    parser.add_argument('--state', type=str, metavar='STATEFILE',
+                        help=('validate an append-only CSV file '
+                              'incrementally, saving state between runs'))
+    parser.add_argument('--chunksize', type=int, metavar='ROWS',
+                        help=('check a CSV file reading ROWS rows at a time, '
+                              'stopping at the first failure if '
+                              'stop_on_fail is set'))
+    parser.add_argument('--prefetch', type=int, metavar='CHUNKS',
+                        help=('chunks read ahead by a reader thread while '
+                              'checking (default 2, 0 to read in turn)'))
+    parser.add_argument('--tee', action='store_true',
+                        help=('pass the data read through to standard '
+                              'output (decompressed) a chunk at a time once '
+                              'checked, stopping at the first failure, and '
+                              'print messages to standard error'))
+    parser.add_argument('--csv-engine', type=str, choices=['c', 'arrow'],
+                        default='c',
+                        help=('parser used to load a whole CSV file: the '
+                              'pandas C parser or the multithreaded Arrow '
+                              'reader (needs pyarrow)'))
+    parser.add_argument('--csv-block-size', type=int, metavar='BYTES',
+                        help='bytes of CSV parsed at a time by each thread')
+    parser.add_argument('--csv-threads', type=int, metavar='N',
+                        help='threads used to parse a CSV file')
+    parser.add_argument('--compact', action='store_true',
+                        help=('store a loaded CSV file compactly in memory '
+                              '(categorical text, narrow numbers)'))
+    parser.add_argument('--processes', type=int, default=1, metavar='N',
+                        help=('check the values of large string columns of '
+                              'a loaded CSV file in N processes'))
+    parser.add_argument('--max-memory', type=commandline_memory_size,
+                        metavar='SIZE',
+                        help=('check a CSV file within SIZE bytes of memory '
+                              '(e.g. 4G), loading it whole, streaming it in '
+                              'chunks or spilling to disk as needed'))
+    parser.add_argument('--progress', action='store_true',
+                        help=('print how much of a CSV file (compressed or '
+                              'not) has been read to stderr'))
+    parser.add_argument('--cache-dir', type=str, metavar='DIR',
+                        help=('cache compiled rules and results of checking '
+                              'the same CSV file against the same rules in '
+                              'DIR'))
+    parser.add_argument('--no-cache', action='store_true',
+                        help='recheck the data even if results are cached')
+    parser.add_argument('--profile', type=str, metavar='REPORT',
+                        help=('write the time and resources used by each '
+                              'check to a JSON report'))
+    parser.add_argument('--profile-top', type=int, default=0, metavar='N',
+                        help=('include cProfile statistics of the N slowest '
+                              'checks in the profile report'))
+    parser.add_argument('--metrics-file', type=str, metavar='FILE',
+                        help=('write Prometheus metrics of the run to FILE '
+                              '(e.g. for the node exporter textfile '
+                              'collector)'))
+    parser.add_argument('--timing-history', type=str, metavar='FILE',
+                        help=('keep check timings in FILE to run the '
+                              'cheapest checks first when stopping on fail '
+                              '(default timings.json in the cache directory)'))
     args = parser.parse_args()
+    timing_history = args.timing_history
+    if timing_history is None and args.cache_dir is not None:
+        timing_history = os.path.join(args.cache_dir, 'timings.json')
+    # standard input and named pipes can only be read once, as a stream
+    stream = args.source in ['CSV', 'JSONL'] and bool(args.file) and \
+        dwcz.is_stream(args.file)
+    if (stream or args.tee) and (args.state or args.sample is not None):
+        parser.error('--state and --sample need a regular CSV file and '
+                     'cannot be used with --tee')
+    if args.source == 'JSONL' and (args.state or args.sample is not None or
+                                   args.max_memory is not None):
+        parser.error('--state, --sample and --max-memory need a CSV file')
+    # the rules are loaded once for all steps of checking a file
+    rule_plan: Optional[dw.RulePlan] = None
+    if args.source in ['CSV', 'JSONL'] and args.file and args.rules and \
+            not args.state:
+        rule_plan = commandline_rule_plan(args.rules, args.cache_dir)
+    execution: Optional[dwpl.ExecutionPlan] = None
+    if args.source == 'CSV' and args.file and args.rules and \
+            args.max_memory is not None and not args.state and \
+            args.sample is None:
+        execution = commandline_plan(args.file, args.rules, args.cache_dir,
+                                     args.max_memory, args.processes,
+                                     stream or args.tee or
+                                     bool(args.chunksize), rule_plan)
+        if execution is not None and not execution.fits:
+            parser.error(
+                    '--max-memory '
+                    f'{dwpl.format_memory_size(execution.max_memory)} is too '
+                    'small: '
+                    f'{dwpl.format_memory_size(execution.baseline)} is in '
+                    'use before loading data and the smallest plan needs '
+                    f'about {dwpl.format_memory_size(execution.memory)}')
+    try:
+        commandline_run(args, stream, timing_history, execution, rule_plan)
+    finally:
+        if execution is not None:
+            commandline_report_memory(execution)
+
+
+def commandline_run(args: argparse.Namespace, stream: bool,
+                    timing_history: Optional[str],
+                    execution: Optional[dwpl.ExecutionPlan] = None,
+                    rule_plan: Optional[dw.RulePlan] = None) -> None:
+    '''
+    Run the checks asked for by parsed command line arguments, as planned
+    by an execution plan if given, with the rules of the rules file
+    already loaded into rule_plan if given.
+    '''
     if args.source and args.rules:
+        if args.source == 'CSV' and args.file and args.state:
+            commandline_check_csv_incremental(args.file, args.rules,
+                                              args.state, args.verbose,
+                                              args.cache_dir, args.profile,
+                                              args.profile_top,
+                                              args.metrics_file,
+                                              timing_history)
+            return
+        # JSON Lines files are always checked a chunk at a time
+        if args.file and (args.source == 'JSONL' or (
+                args.source == 'CSV' and (
+                    args.chunksize or stream or args.tee or
+                    (execution is not None and execution.streaming)))):
+            chunksize = args.chunksize or dwsm.DEFAULT_CHUNKSIZE
+            prefetch = args.prefetch
+            hash_max_bytes: Optional[int] = None
+            if execution is not None:
+                chunksize = args.chunksize or execution.chunksize
+                if prefetch is None:
+                    prefetch = execution.prefetch
+                hash_max_bytes = execution.hash_max_bytes
+            tee: Optional[BinaryIO] = None
+            messages = sys.stdout
+            if args.tee:
+                tee = sys.stdout.buffer
+                messages = sys.stderr
+            with contextlib.redirect_stdout(messages):
+                commandline_check_csv_streaming(
+                        args.file, args.rules, args.verbose, chunksize,
+                        args.cache_dir, args.profile, args.profile_top,
+                        args.metrics_file, timing_history, prefetch,
+                        args.progress, tee, hash_max_bytes, args.source,
+                        rule_plan)
+            return
         if args.source == 'CSV' and args.file:
-            commandline_check_csv(args.file, args.rules, args.verbose)
+            processes = args.processes
+            if execution is not None:
+                processes = execution.processes
+            commandline_check_csv(args.file, args.rules, args.verbose,
+                                  args.sample, args.sample_strata,
+                                  args.sample_seed, args.cache_dir,
+                                  args.no_cache, args.profile,
+                                  args.profile_top, args.metrics_file,
+                                  timing_history, args.csv_engine,
+                                  args.csv_block_size, args.csv_threads,
+                                  args.compact, processes, args.progress,
+                                  rule_plan)
             return
         if args.dataset and args.table:
             commandline_check_bq(args.dataset, args.table, args.rules,
-                                 args.verbose)
+                                 args.verbose, args.sample_percent,
+                                 args.cache_dir, args.profile,
+                                 args.profile_top, args.metrics_file,
+                                 timing_history)
             return
     print(('Data source and rules file required '
            '(use -h command line argument to get help)'))
 
 
-def commandline_check_csv(csvfile: str, rulesfile: str, verbose: bool) -> None:
-    '''Run checks on a CSV file.'''
-    df = commandline_load_file_pandas(csvfile, verbose)
+def commandline_check_csv(csvfile: str, rulesfile: str, verbose: bool,
+                          sample_size: Optional[int] = None,
+                          sample_strata: Optional[str] = None,
+                          sample_seed: Optional[int] = None,
+                          cachedir: Optional[str] = None,
+                          no_cache: bool = False,
+                          profile: Optional[str] = None,
+                          profile_top: int = 0,
+                          metrics_file: Optional[str] = None,
+                          timing_history: Optional[str] = None,
+                          csv_engine: str = 'c',
+                          csv_block_size: Optional[int] = None,
+                          csv_threads: Optional[int] = None,
+                          compact: bool = False,
+                          processes: int = 1,
+                          progress: bool = False,
+                          rule_plan: Optional[dw.RulePlan] = None) -> None:
+    '''
+    Run checks on a CSV file, or a random sample of rows from it. Results
+    of checking all rows are cached if a cache directory is given.
+    Compressed files are decompressed as they are read. The rules file is
+    loaded once (unless already loaded into rule_plan) for all steps.
+    '''
+    if rule_plan is None:
+        rule_plan = commandline_rule_plan(rulesfile, cachedir)
+    cache: Optional[dwrc.ResultCache] = None
+    cachekey = ''
+    if cachedir is not None and sample_size is None:
+        cache, cachekey = commandline_cache_lookup(csvfile, rule_plan,
+                                                   cachedir, no_cache,
+                                                   verbose, metrics_file,
+                                                   csv_engine)
+    num_rows: Optional[int] = None
+    if sample_size is None:
+        num_rows = commandline_count_rows(csvfile, rule_plan, verbose)
+    if num_rows is None:
+        preflight = commandline_load_preflight(csvfile, rule_plan)
+        if preflight is not None:
+            if verbose:
+                print('Checking header and first rows ', end='')
+            seconds = commandline_runchecks(preflight, verbose, profile,
+                                            profile_top,
+                                            metrics_file is not None)
+            if preflight.error_messages:
+                commandline_report_csv(csvfile, preflight, seconds, verbose,
+                                       cache, cachekey, metrics_file)
+            if verbose:
+                print(' done.')
+    population_size: Optional[int] = None
+    if sample_size is not None:
+        df, population_size = commandline_load_sample_pandas(
+                csvfile, sample_size, sample_strata, sample_seed, verbose,
+                progress)
+    elif num_rows is None and csv_engine == 'arrow':
+        df = commandline_load_file_arrow(csvfile, rule_plan, verbose,
+                                         csv_block_size, csv_threads,
+                                         progress)
+    elif num_rows is None:
+        df = commandline_load_file_pandas(csvfile, verbose, progress)
+    if compact and num_rows is None:
+        df = dwcp.compact_dataframe(df)
     if verbose:
         print('Parsing rules file ... ', end='')
     try:
-        ymld = dw.load_yaml_file_to_dict(rulesfile)
-        checksuite = dw.PandasDatsetCheckSuite(df)
-        dw.apply_yamldict_to_checksuite(ymld, checksuite)
+        # loaded again if it failed, to report why
+        plan = rule_plan if rule_plan is not None else \
+            dw.load_rule_plan(rulesfile, cachedir)
+        checksuite: Union[dw.RowCountCheckSuite, dw.PandasDatsetCheckSuite]
+        if num_rows is not None:
+            checksuite = dw.RowCountCheckSuite(num_rows)
+        else:
+            checksuite = dw.PandasDatsetCheckSuite(df, population_size)
+            checksuite.processes = processes
+        dw.apply_rule_plan(plan, checksuite)
     except FileNotFoundError:
         print(f'File {rulesfile} not found')
         sys.exit(4)
@@ -55,7 +328,252 @@ def commandline_check_csv(csvfile: str, rulesfile: str, verbose: bool) -> None:
         sys.exit(6)
     if verbose:
         print('done.\nRunning checks ', end='')
-    checksuite.runchecks(verbose=verbose)
+    seconds = commandline_runchecks(checksuite, verbose, profile,
+                                    profile_top, metrics_file is not None,
+                                    timing_history)
+    commandline_report_csv(csvfile, checksuite, seconds, verbose, cache,
+                           cachekey, metrics_file)
+
+
+def commandline_report_csv(csvfile: str, checksuite: dw.TableCheckSuite,
+                           seconds: float, verbose: bool,
+                           cache: Optional[dwrc.ResultCache], cachekey: str,
+                           metrics_file: Optional[str]) -> None:
+    '''
+    Cache, record metrics of and print the results of checking a CSV file,
+    exiting if any checks failed.
+    '''
+    if cache is not None:
+        cache.put(cachekey, checksuite.error_messages)
+    if metrics_file is not None:
+        registry = dwme.MetricsRegistry()
+        registry.record_run('CSV', checksuite, seconds,
+                            commandline_file_size(csvfile),
+                            cache_used=cache is not None)
+        commandline_write_metrics(registry, metrics_file)
+    num_errs = len(checksuite.error_messages)
+    if num_errs > 0:
+        if verbose:
+            print(f' done.\nChecks failed ({num_errs}):')
+        for msg in checksuite.error_messages:
+            print(msg)
+        if verbose and checksuite.sample_statement():
+            print(checksuite.sample_statement())
+        sys.exit(1)
+    else:
+        if verbose:
+            print(' done.\nAll checks passed.')
+            if checksuite.sample_statement():
+                print(checksuite.sample_statement())
+
+
+def commandline_cache_lookup(csvfile: str,
+                             rule_plan: Optional[dw.RulePlan], cachedir: str,
+                             no_cache: bool, verbose: bool,
+                             metrics_file: Optional[str] = None,
+                             csv_engine: str = 'c'
+                             ) -> Tuple[Optional[dwrc.ResultCache], str]:
+    '''
+    Look up cached results of checking a CSV file against a rule plan,
+    exiting with the cached results if there are any. Returns the cache
+    and key to store results under, or no cache if there is no plan or the
+    inputs cannot be hashed (any errors are then reported by checking the
+    file as normal).
+    '''
+    if rule_plan is None:
+        return None, ''
+    try:
+        cache = dwrc.ResultCache(cachedir)
+        fingerprint = dw.rule_plan_fingerprint(rule_plan)
+        if csv_engine != 'c':
+            # engines read columns of declared types differently
+            fingerprint = f'{fingerprint}:{csv_engine}'
+        cachekey = cache.key(csvfile, fingerprint)
+    except Exception:
+        return None, ''
+    if no_cache:
+        return cache, cachekey
+    messages = cache.get(cachekey)
+    if messages is None:
+        return cache, cachekey
+    if metrics_file is not None:
+        registry = dwme.MetricsRegistry()
+        registry.record_run('CSV', bytes_processed=commandline_file_size(
+                                csvfile), cached_messages=messages)
+        commandline_write_metrics(registry, metrics_file)
+    if verbose:
+        print('Reading cached results ... done.')
+    if len(messages) > 0:
+        if verbose:
+            print(f'Checks failed ({len(messages)}):')
+        for msg in messages:
+            print(msg)
+        sys.exit(1)
+    if verbose:
+        print('All checks passed.')
+    sys.exit(0)
+
+
+def commandline_check_csv_incremental(csvfile: str, rulesfile: str,
+                                      statefile: str, verbose: bool,
+                                      cachedir: Optional[str] = None,
+                                      profile: Optional[str] = None,
+                                      profile_top: int = 0,
+                                      metrics_file: Optional[str] = None,
+                                      timing_history: Optional[str] = None
+                                      ) -> None:
+    '''
+    Run checks on an append-only CSV file, only reading rows appended since
+    the last run with the same state file.
+    '''
+    if verbose:
+        print('Parsing rules file ... ', end='')
+    try:
+        plan = dw.load_rule_plan(rulesfile, cachedir)
+        checksuite = dw.StreamingDatasetCheckSuite()
+        dw.apply_rule_plan(plan, checksuite)
+    except FileNotFoundError:
+        print(f'File {rulesfile} not found')
+        sys.exit(4)
+    except dw.YamlParsingError as e:
+        print(e)
+        sys.exit(5)
+    except Exception as ex:
+        print(f'Unexpected YAML parsing error:\n{ex}')
+        sys.exit(6)
+    if verbose:
+        print('done.\nReading data file ... ', end='')
+    try:
+        start = dwin.check_csv_incremental(csvfile, checksuite, statefile,
+                                           dw.rule_plan_fingerprint(plan))
+    except FileNotFoundError:
+        print(f'File {csvfile} not found')
+        sys.exit(2)
+    except Exception as ex:
+        print(f'Unexpected Pandas error:\n{ex}')
+        sys.exit(3)
+    if verbose:
+        if start > 0:
+            print(f'done (new rows from byte {start}).')
+        else:
+            print('done.')
+        print('Running checks ', end='')
+    seconds = commandline_runchecks(checksuite, verbose, profile,
+                                    profile_top, metrics_file is not None,
+                                    timing_history)
+    if metrics_file is not None:
+        registry = dwme.MetricsRegistry()
+        registry.record_run('CSV', checksuite, seconds,
+                            commandline_file_size(csvfile) - start)
+        commandline_write_metrics(registry, metrics_file)
+    num_errs = len(checksuite.error_messages)
+    if num_errs > 0:
+        if verbose:
+            print(f' done.\nChecks failed ({num_errs}):')
+        for msg in checksuite.error_messages:
+            print(msg)
+        sys.exit(1)
+    else:
+        if verbose:
+            print(' done.\nAll checks passed.')
+
+
+def commandline_check_csv_streaming(csvfile: str, rulesfile: str,
+                                    verbose: bool, chunksize: int,
+                                    cachedir: Optional[str] = None,
+                                    profile: Optional[str] = None,
+                                    profile_top: int = 0,
+                                    metrics_file: Optional[str] = None,
+                                    timing_history: Optional[str] = None,
+                                    prefetch: Optional[int] = None,
+                                    progress: bool = False,
+                                    tee: Optional[BinaryIO] = None,
+                                    hash_max_bytes: Optional[int] = None,
+                                    source: str = 'CSV',
+                                    rule_plan: Optional[dw.RulePlan] = None
+                                    ) -> None:
+    '''
+    Run checks on a CSV file read in chunks of rows, so that memory use is
+    bounded and, if stop_on_fail is set, reading stops at the first chunk
+    with a failure. A reader thread reads prefetch chunks ahead (by
+    default streaming.DEFAULT_PREFETCH) while chunks are checked. The file
+    can be standard input (-) or a named pipe, and the data read is written
+    to tee if given, a chunk at a time once checked. Hashes of distinct
+    values beyond hash_max_bytes for each duplicate or distinct check are
+    spilled to disk. With a source of JSONL, the file is read as JSON Lines
+    records. The rules are those of rule_plan if given, else loaded from
+    rulesfile.
+    '''
+    if verbose:
+        print('Parsing rules file ... ', end='')
+    try:
+        plan = rule_plan if rule_plan is not None else \
+            dw.load_rule_plan(rulesfile, cachedir)
+        checksuite = dw.StreamingDatasetCheckSuite()
+        checksuite.hash_max_bytes = hash_max_bytes
+        dw.apply_rule_plan(plan, checksuite)
+    except FileNotFoundError:
+        print(f'File {rulesfile} not found')
+        sys.exit(4)
+    except dw.YamlParsingError as e:
+        print(e)
+        sys.exit(5)
+    except Exception as ex:
+        print(f'Unexpected YAML parsing error:\n{ex}')
+        sys.exit(6)
+    if verbose:
+        print('done.\nReading data file ... ', end='')
+    if prefetch is None:
+        prefetch = dwsm.DEFAULT_PREFETCH
+    stats = dwsm.PipelineStats()
+    reported = commandline_progress(csvfile) if progress else None
+    # the size of standard input or a named pipe is known once it is read
+    stream = dwcz.is_stream(csvfile)
+    bytes_read = 0 if stream else commandline_file_size(csvfile)
+
+    def counted(position: int) -> None:
+        nonlocal bytes_read
+        bytes_read = position
+        if reported is not None:
+            reported(position)
+
+    check_streaming: Callable[..., bool] = dwsm.check_csv_streaming
+    if source == 'JSONL':
+        check_streaming = dwjl.check_jsonl_streaming
+    try:
+        stopped = check_streaming(csvfile, checksuite, chunksize, prefetch,
+                                  stats,
+                                  counted if stream and metrics_file
+                                  else reported, tee)
+    except FileNotFoundError:
+        print(f'File {csvfile} not found')
+        sys.exit(2)
+    except Exception as ex:
+        if source == 'JSONL':
+            print(f'Unexpected JSON Lines error:\n{ex}')
+        else:
+            print(f'Unexpected Pandas error:\n{ex}')
+        sys.exit(3)
+    finally:
+        if tee is not None:
+            tee.flush()
+        if reported is not None and stream:
+            # the end of a stream is not known to print it as 100%
+            print(file=sys.stderr)
+    if verbose:
+        print('stopped early.' if stopped else 'done.')
+        if prefetch > 0:
+            print(f'Reading ahead was {stats.summary()}.')
+        print('Running checks ', end='')
+    seconds = commandline_runchecks(checksuite, verbose, profile,
+                                    profile_top, metrics_file is not None,
+                                    timing_history)
+    if metrics_file is not None:
+        registry = dwme.MetricsRegistry()
+        registry.record_run(source, checksuite, seconds, bytes_read)
+        if prefetch > 0:
+            registry.record_pipeline(source, stats)
+        commandline_write_metrics(registry, metrics_file)
     num_errs = len(checksuite.error_messages)
     if num_errs > 0:
         if verbose:
@@ -68,12 +586,216 @@ def commandline_check_csv(csvfile: str, rulesfile: str, verbose: bool) -> None:
             print(' done.\nAll checks passed.')
 
 
-def commandline_load_file_pandas(csvfile: str, verbose: bool) -> pd.DataFrame:
+def commandline_runchecks(checksuite: dw.TableCheckSuite, verbose: bool,
+                          profile: Optional[str] = None,
+                          profile_top: int = 0,
+                          timed: bool = False,
+                          timing_history: Optional[str] = None) -> float:
+    '''
+    Run the checks of a checksuite, writing a report of the time and
+    resources used by each check if a profile report file is given. Checks
+    are also timed if timed is set (for metrics) or a timing history file
+    is given, which is used to order checks by cost and updated with the
+    timings. Returns the time taken.
+    '''
+    history: Optional[dwsc.TimingHistory] = None
+    if timing_history is not None:
+        history = dwsc.TimingHistory(timing_history)
+        checksuite.timing_history = history
+    profiler: Optional[dwpr.CheckProfiler] = None
+    if profile is not None or timed or history is not None:
+        profiler = dwpr.CheckProfiler(profile_top,
+                                      trace_memory=profile is not None)
+        checksuite.profiler = profiler
+    if profile is not None or timed:
+        dwbc.collect_job_stats(True)
+    start = time.perf_counter()
+    try:
+        checksuite.runchecks(verbose=verbose)
+    finally:
+        dwbc.collect_job_stats(False)
+    seconds = time.perf_counter() - start
+    if profile is not None and profiler is not None:
+        try:
+            profiler.write_report(profile)
+        except OSError as ex:
+            print(f'Could not write profile report {profile}: {ex}')
+    if history is not None and profiler is not None:
+        history.update(profiler.records)
+        try:
+            history.save()
+        except OSError as ex:
+            print(f'Could not write timing history {timing_history}: {ex}')
+    return seconds
+
+
+def commandline_write_metrics(registry: dwme.MetricsRegistry,
+                              metrics_file: str) -> None:
+    '''Write metrics to a file, reporting rather than failing on errors.'''
+    try:
+        registry.write_textfile(metrics_file)
+    except OSError as ex:
+        print(f'Could not write metrics file {metrics_file}: {ex}')
+
+
+def commandline_file_size(filename: str) -> int:
+    try:
+        return os.path.getsize(filename)
+    except OSError:
+        return 0
+
+
+def commandline_memory_size(text: str) -> int:
+    '''Parse a memory size command line argument, e.g. 4G.'''
+    try:
+        return dwpl.parse_memory_size(text)
+    except ValueError as ex:
+        raise argparse.ArgumentTypeError(str(ex))
+
+
+def commandline_plan(csvfile: str, rulesfile: str, cachedir: Optional[str],
+                     max_memory: int, processes: int = 1,
+                     streaming: bool = False,
+                     rule_plan: Optional[dw.RulePlan] = None
+                     ) -> Optional[dwpl.ExecutionPlan]:
+    '''
+    Plan checking a CSV file within max_memory bytes (see
+    datawhistle.planning), printing the plan to stderr. The rules are those
+    of rule_plan if given, else loaded from rulesfile. Returns None if the
+    rules or data file cannot be read (errors are then reported when they
+    are loaded).
+    '''
+    try:
+        plan = rule_plan if rule_plan is not None else \
+            dw.load_rule_plan(rulesfile, cachedir)
+        checksuite = dw.StreamingDatasetCheckSuite()
+        dw.apply_rule_plan(plan, checksuite)
+        estimate = dwpl.estimate_data(csvfile, checksuite.column_dtypes())
+    except Exception:
+        return None
+    execution = dwpl.plan_execution(estimate, checksuite, max_memory,
+                                    processes, streaming)
+    print(f'Plan: {execution.summary()}.', file=sys.stderr)
+    return execution
+
+
+def commandline_report_memory(execution: dwpl.ExecutionPlan) -> None:
+    '''Print the peak memory used to stderr, against the budget planned.'''
+    peak = dwpl.peak_memory()
+    if peak is None:
+        print('Peak memory could not be measured.', file=sys.stderr)
+        return
+    report = (f'Peak memory {dwpl.format_memory_size(peak)} of '
+              f'{dwpl.format_memory_size(execution.max_memory)}')
+    workers = dwpl.peak_memory(children=True)
+    if execution.processes > 1 and workers:
+        report += (', worker processes up to '
+                   f'{dwpl.format_memory_size(workers)} each')
+    print(f'{report}.', file=sys.stderr)
+
+
+def commandline_progress(csvfile: str) -> Callable[[int], None]:
+    '''
+    A function printing the percentage of a data file read (or the MiB read
+    of standard input or a named pipe) to stderr, when called with the
+    number of bytes read.
+    '''
+    size = commandline_file_size(csvfile)
+    printed = -1
+    if dwcz.is_stream(csvfile):
+        name = 'standard input' if csvfile == dwcz.STDIN else csvfile
+
+        def progress_stream(position: int) -> None:
+            nonlocal printed
+            mebibytes = position >> 20
+            if mebibytes > printed:
+                printed = mebibytes
+                print(f'\rRead {mebibytes} MiB of {name}', end='',
+                      file=sys.stderr, flush=True)
+
+        return progress_stream
+
+    def progress(position: int) -> None:
+        nonlocal printed
+        percent = 100 if size == 0 else min(100 * position // size, 100)
+        if percent > printed:
+            printed = percent
+            end = '\n' if percent == 100 else ''
+            print(f'\rRead {percent}% of {csvfile}', end=end,
+                  file=sys.stderr, flush=True)
+
+    return progress
+
+
+def commandline_rule_plan(rulesfile: str,
+                          cachedir: Optional[str]) -> Optional[dw.RulePlan]:
+    '''
+    Load a rules file into a plan, None if it cannot be loaded (errors are
+    reported when the rules are applied, after the data is read).
+    '''
+    try:
+        return dw.load_rule_plan(rulesfile, cachedir)
+    except Exception:
+        return None
+
+
+def commandline_count_rows(csvfile: str, rule_plan: Optional[dw.RulePlan],
+                           verbose: bool) -> Optional[int]:
+    '''
+    Count the rows of a data file without loading it if the rules only
+    check the number of rows. Returns None if the data file must be loaded.
+    '''
+    if rule_plan is None or not dw.rule_plan_counts_rows_only(rule_plan):
+        return None
+    if verbose:
+        print('Counting data file rows ... ', end='')
+    try:
+        num_rows = dwrn.count_csv_rows(csvfile)
+    except FileNotFoundError:
+        print(f'File {csvfile} not found')
+        sys.exit(2)
+    except Exception as ex:
+        print(f'Unexpected error counting rows:\n{ex}')
+        sys.exit(3)
+    if verbose:
+        print('done.' if num_rows is not None else 'parsing instead.')
+    return num_rows
+
+
+def commandline_load_preflight(csvfile: str,
+                               rule_plan: Optional[dw.RulePlan]
+                               ) -> Optional[dw.PreflightCheckSuite]:
+    '''
+    If the rules stop on the first failed check, read the header and first
+    rows of a data file to check its structure before loading it all.
+    Returns None if there is nothing to check or the rules or data cannot
+    be read (errors are then reported when they are loaded in full).
+    '''
+    if rule_plan is None or ('stop_on_fail', True) not in rule_plan.table \
+            or not rule_plan.columns:
+        return None
+    dtypes = {colplan.name: str for colplan in rule_plan.columns
+              if colplan.type == 'datetime'}
+    try:
+        with dwcz.open_data_file(csvfile) as stream:
+            df = pd.read_csv(stream, nrows=PREFLIGHT_ROWS, dtype=dtypes)
+    except Exception:
+        return None
+    checksuite = dw.PreflightCheckSuite(df)
+    dw.apply_rule_plan(rule_plan, checksuite)
+    return checksuite
+
+
+def commandline_load_file_pandas(csvfile: str, verbose: bool,
+                                 progress: bool = False) -> pd.DataFrame:
     '''Load a data file into a Pandas DataFrame.'''
     if verbose:
         print('Reading data file ... ', end='')
     try:
-        df = pd.read_csv(csvfile)
+        with dwcz.open_data_file(
+                csvfile, progress=commandline_progress(csvfile)
+                if progress else None) as stream:
+            df = pd.read_csv(stream)
     except FileNotFoundError:
         print(f'File {csvfile} not found')
         sys.exit(2)
@@ -85,15 +807,87 @@ def commandline_load_file_pandas(csvfile: str, verbose: bool) -> pd.DataFrame:
     return df
 
 
+def commandline_load_file_arrow(csvfile: str,
+                                rule_plan: Optional[dw.RulePlan],
+                                verbose: bool,
+                                block_size: Optional[int] = None,
+                                threads: Optional[int] = None,
+                                progress: bool = False) -> pd.DataFrame:
+    '''
+    Load a data file into a Pandas DataFrame with the Arrow CSV reader,
+    reading columns with the types declared in the rule plan.
+    '''
+    column_types = {}
+    if rule_plan is not None:
+        column_types = {colplan.name: colplan.type
+                        for colplan in rule_plan.columns}
+    if verbose:
+        print('Reading data file ... ', end='')
+    try:
+        df = dwac.read_csv_arrow(
+                csvfile, column_types, block_size, threads,
+                commandline_progress(csvfile) if progress else None)
+    except FileNotFoundError:
+        print(f'File {csvfile} not found')
+        sys.exit(2)
+    except ImportError as ex:
+        print(ex)
+        sys.exit(3)
+    except Exception as ex:
+        print(f'Unexpected Arrow error:\n{ex}')
+        sys.exit(3)
+    if verbose:
+        print('done.')
+    return df
+
+
+def commandline_load_sample_pandas(csvfile: str, sample_size: int,
+                                   sample_strata: Optional[str],
+                                   sample_seed: Optional[int],
+                                   verbose: bool, progress: bool = False
+                                   ) -> Tuple[pd.DataFrame, int]:
+    '''
+    Read a random sample of rows from a data file into a Pandas DataFrame,
+    also returning the number of rows in the file.
+    '''
+    if verbose:
+        print('Sampling data file ... ', end='')
+    reported = commandline_progress(csvfile) if progress else None
+    try:
+        if sample_strata is not None:
+            df, num_rows = dwsa.stratified_sample_csv(
+                    csvfile, sample_size, sample_strata, sample_seed,
+                    progress=reported)
+        else:
+            df, num_rows = dwsa.reservoir_sample_csv(
+                    csvfile, sample_size, sample_seed, progress=reported)
+    except FileNotFoundError:
+        print(f'File {csvfile} not found')
+        sys.exit(2)
+    except Exception as ex:
+        print(f'Unexpected Pandas error:\n{ex}')
+        sys.exit(3)
+    if verbose:
+        print('done.')
+    return df, num_rows
+
+
 def commandline_check_bq(datasetname: str, tablename: str, rulesfile: str,
-                         verbose: bool) -> None:
-    '''Run checks on a BigQuery table.'''
+                         verbose: bool,
+                         sample_percent: Optional[float] = None,
+                         cachedir: Optional[str] = None,
+                         profile: Optional[str] = None,
+                         profile_top: int = 0,
+                         metrics_file: Optional[str] = None,
+                         timing_history: Optional[str] = None) -> None:
+    '''Run checks on a BigQuery table, or a TABLESAMPLE of it.'''
     if verbose:
         print('Parsing rules file ... ', end='')
     try:
-        ymld = dw.load_yaml_file_to_dict(rulesfile)
-        checksuite = dw.BqTableCheckSuite(datasetname, tablename)
-        dw.apply_yamldict_to_checksuite(ymld, checksuite)
+        plan = dw.load_rule_plan(rulesfile, cachedir)
+        checksuite = dw.BqTableCheckSuite(datasetname, tablename,
+                                          sample_percent)
+        dw.apply_rule_plan(plan, checksuite)
     except FileNotFoundError:
         print(f'File {rulesfile} not found')
         sys.exit(4)
@@ -105,14 +899,27 @@ def commandline_check_bq(datasetname: str, tablename: str, rulesfile: str,
         sys.exit(6)
     if verbose:
         print('done.\nRunning checks ', end='')
-    checksuite.runchecks(verbose=verbose)
+    bytes_before = dwbc.query_stats['bytes_processed']
+    seconds = commandline_runchecks(checksuite, verbose, profile,
+                                    profile_top, metrics_file is not None,
+                                    timing_history)
+    if metrics_file is not None:
+        registry = dwme.MetricsRegistry()
+        registry.record_run('BQ', checksuite, seconds,
+                            dwbc.query_stats['bytes_processed'] -
+                            bytes_before)
+        commandline_write_metrics(registry, metrics_file)
     num_errs = len(checksuite.error_messages)
     if num_errs > 0:
         if verbose:
             print(f' done.\nChecks failed ({num_errs}):')
         for msg in checksuite.error_messages:
             print(msg)
+        if verbose and checksuite.sample_statement():
+            print(checksuite.sample_statement())
         sys.exit(1)
     else:
         if verbose:
             print(' done.\nAll checks passed.')
+            if checksuite.sample_statement():
+                print(checksuite.sample_statement())
@@ -0,0 +1,62 @@
+import numpy as np      # type: ignore
+import pandas as pd     # type: ignore
+
+# Compact in-memory representations of loaded data. Text columns with few
+# distinct values are stored as categoricals (an integer code per row and
+# each distinct value once), other text columns as Arrow strings if
+# pyarrow is installed, integers in the narrowest integer type that holds
+# them and floats as 32 bit floats if that loses no precision. Checks of
+# distinct values, duplicates, blanks and regular expressions run on the
+# codes of categorical columns (see datawhistle.pandaschecks).
+
+# text columns with at most this fraction of distinct values are stored
+# as categoricals
+CATEGORY_MAX_RATIO = 0.5
+
+
+def _arrow_strings(series: pd.Series) -> pd.Series:
+    try:
+        # strings with NaN for nulls, as they are read by pandas
+        return series.astype(pd.StringDtype('pyarrow', na_value=np.nan))
+    except (ImportError, TypeError, ValueError):
+        # pyarrow or a pandas version with Arrow strings is not installed
+        return series
+
+
+def _downcast_float(series: pd.Series) -> pd.Series:
+    narrow = series.astype(np.float32)
+    same = (narrow.astype(series.dtype) == series) | series.isna()
+    if same.all():
+        return narrow
+    return series
+
+
+def compact_column(series: pd.Series,
+                   category_max_ratio: float = CATEGORY_MAX_RATIO
+                   ) -> pd.Series:
+    '''Convert a column to a compact representation of the same values.'''
+    if pd.api.types.is_bool_dtype(series):
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast='integer')
+    if pd.api.types.is_float_dtype(series):
+        return _downcast_float(series)
+    if pd.api.types.is_string_dtype(series) and \
+            not isinstance(series.dtype, pd.CategoricalDtype):
+        # categories in order of appearance, which unlike the sorted
+        # categories of astype('category') need no sort of the values
+        codes, uniques = pd.factorize(series)
+        if len(uniques) <= category_max_ratio * len(series):
+            return pd.Series(pd.Categorical.from_codes(codes, uniques),
+                             index=series.index, name=series.name)
+        return _arrow_strings(series)
+    return series
+
+
+def compact_dataframe(df: pd.DataFrame,
+                      category_max_ratio: float = CATEGORY_MAX_RATIO
+                      ) -> pd.DataFrame:
+    '''Convert the columns of a DataFrame to compact representations.'''
+    for name in df.columns:
+        df[name] = compact_column(df[name], category_max_ratio)
+    return df
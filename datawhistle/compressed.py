@@ -0,0 +1,494 @@
+from __future__ import annotations
+import bz2
+import collections
+import concurrent.futures
+import io
+import lzma
+import os
+import stat
+import sys
+import zipfile
+import zlib
+from typing import (Any, BinaryIO, Callable, Deque, Iterator, List,
+                    Optional, Tuple)
+try:
+    import zstandard        # type: ignore
+except ImportError:
+    zstandard = None
+
+# Reading compressed data files as streams of decompressed bytes, so that
+# they are checked without being decompressed to disk or into memory
+# first. Files are recognised as gzip, zstd, bzip2, xz or zip compressed
+# by their first bytes, whatever their names. zstd needs the zstandard
+# package (install with pip install datawhistle[zstd]). A zip file must
+# hold a single file, as for pandas.read_csv, and cannot be read from
+# standard input or a named pipe.
+#
+# Files made of many independently compressed pieces are decompressed in
+# parallel by a pool of threads (zlib and zstd release the GIL): BGZF
+# files (gzip files of members of at most 64 KiB, as written by bgzip)
+# and zstd files of many frames (as written by seekable or multithreaded
+# zstd compressors). Pieces are decompressed a bounded number ahead of the
+# data being read, and passed on in file order. Other files (including
+# all bzip2, xz and zip files) are decompressed as a stream by the reading
+# thread.
+#
+# Data can also be read from standard input (file name -) or a named pipe,
+# which are read once from start to end (so zstd frames are decompressed
+# as a stream), and the bytes read can be passed on unchanged to another
+# file as they are read (tee), e.g. to pass data through a pipeline while
+# it is checked.
+
+# the file name of standard input
+STDIN = '-'
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+XZ_MAGIC = b'\xfd7zXZ\x00'
+ZIP_MAGIC = b'PK\x03\x04'
+# a bzip2 stream header is followed by a block or end-of-stream magic
+_BZ2_MAGICS = (b'1AY&SY', b'\x17rE8P\x90')
+# bytes needed to recognise any compression
+_MAGIC_BYTES = 10
+# compressed bytes read and decompressed at a time
+READ_BYTES = 1 << 20
+# zstd frames larger than this are streamed rather than decompressed whole
+# by a thread
+MAX_FRAME_BYTES = 1 << 24
+# pieces decompressed ahead of the data being read, per thread
+PIECES_AHEAD = 2
+_SKIPPABLE_MAGIC = 0x184D2A50
+_SKIPPABLE_MASK = 0xFFFFFFF0
+_BGZF_HEADER_BYTES = 18
+_TRUNCATED = ('compressed file ended before the end-of-stream marker was '
+              'reached')
+
+# called with the number of bytes of a (compressed) file read so far
+Progress = Callable[[int], None]
+# decompressed bytes and the offset in the file they were read up to
+_Piece = Tuple[bytes, int]
+
+
+def is_stream(filename: str) -> bool:
+    '''
+    Check if a data file is standard input or a named pipe (FIFO), which
+    can only be read once from start to end.
+    '''
+    if filename == STDIN:
+        return True
+    try:
+        return stat.S_ISFIFO(os.stat(filename).st_mode)
+    except OSError:
+        return False
+
+
+def detect_compression(filename: str) -> Optional[str]:
+    '''
+    The compression of a file, 'gzip', 'zstd', 'bz2', 'xz', 'zip' or None
+    if uncompressed.
+    '''
+    with open(filename, 'rb') as stream:
+        return _compression(stream.read(_MAGIC_BYTES))
+
+
+def _compression(magic: bytes) -> Optional[str]:
+    if magic[:2] == GZIP_MAGIC:
+        return 'gzip'
+    if magic[:4] == ZSTD_MAGIC or (
+            len(magic) >= 4 and int.from_bytes(magic[:4], 'little') &
+            _SKIPPABLE_MASK == _SKIPPABLE_MAGIC):
+        return 'zstd'
+    if len(magic) >= 10 and magic[:3] == b'BZh' and \
+            magic[3] in b'123456789' and magic[4:10] in _BZ2_MAGICS:
+        return 'bz2'
+    if magic[:6] == XZ_MAGIC:
+        return 'xz'
+    if magic[:4] == ZIP_MAGIC:
+        return 'zip'
+    return None
+
+
+def _in_order(pending: Deque[Tuple[concurrent.futures.Future, int]],
+              limit: int) -> Iterator[_Piece]:
+    # pieces decompressed by threads, in file order, until at most limit
+    # are left pending
+    while len(pending) > limit:
+        future, end = pending.popleft()
+        yield future.result(), end
+
+
+def _plain_pieces(fileobj: BinaryIO) -> Iterator[_Piece]:
+    position = 0
+    while True:
+        data = fileobj.read(READ_BYTES)
+        if not data:
+            return
+        position += len(data)
+        yield data, position
+
+
+def _gzip_stream(fileobj: BinaryIO) -> Iterator[_Piece]:
+    # decompress gzip members one after another
+    decompressor = zlib.decompressobj(31)
+    position = 0
+    started = False
+    while True:
+        data = fileobj.read(READ_BYTES)
+        if not data:
+            break
+        position += len(data)
+        while data:
+            if decompressor.eof:
+                if not data.strip(b'\0'):
+                    # zero padding after the last member
+                    break
+                decompressor = zlib.decompressobj(31)
+            started = True
+            piece = decompressor.decompress(data, 4 * READ_BYTES)
+            data = decompressor.unconsumed_tail or decompressor.unused_data
+            if piece:
+                yield piece, position
+    piece = decompressor.flush()
+    if piece:
+        yield piece, position
+    if started and not decompressor.eof:
+        raise EOFError(_TRUNCATED)
+
+
+def _chained_stream(fileobj: BinaryIO,
+                    decompressor_type: Callable[[], Any]) -> Iterator[_Piece]:
+    # decompress bzip2 or xz streams one after another
+    decompressor = decompressor_type()
+    position = 0
+    while True:
+        data = fileobj.read(READ_BYTES)
+        if not data:
+            break
+        position += len(data)
+        while True:
+            piece = decompressor.decompress(data, 4 * READ_BYTES)
+            data = b''
+            if piece:
+                yield piece, position
+            if decompressor.eof:
+                data = decompressor.unused_data
+                if not data.strip(b'\0'):
+                    # zero padding after the last stream
+                    break
+                decompressor = decompressor_type()
+            elif decompressor.needs_input:
+                break
+    if not decompressor.eof:
+        raise EOFError(_TRUNCATED)
+
+
+def _zip_pieces(fileobj: BinaryIO) -> Iterator[_Piece]:
+    # decompress the single file in a zip file
+    if not fileobj.seekable():
+        raise ValueError('a zip file cannot be read from standard input, '
+                         'a named pipe or while passed on to a tee')
+    with zipfile.ZipFile(fileobj) as archive:
+        names = archive.namelist()
+        if len(names) != 1:
+            raise ValueError(f'a zip file must hold a single file, not '
+                             f'{len(names)}')
+        with archive.open(names[0]) as member:
+            while True:
+                data = member.read(READ_BYTES)
+                if not data:
+                    break
+                yield data, fileobj.tell()
+    # the central directory at the end of the file is read too
+    yield b'', os.fstat(fileobj.fileno()).st_size
+
+
+def _is_bgzf(header: bytes) -> bool:
+    # a gzip member with a BC extra subfield holding the member's size
+    return len(header) >= _BGZF_HEADER_BYTES and \
+        header[:2] == GZIP_MAGIC and bool(header[3] & 4) and \
+        header[12:14] == b'BC'
+
+
+def _bgzf_batches(fileobj: BinaryIO) -> Iterator[Tuple[List[bytes], int]]:
+    # BGZF members in batches of about READ_BYTES
+    position = 0
+    batch: List[bytes] = []
+    batchsize = 0
+    while True:
+        header = fileobj.read(_BGZF_HEADER_BYTES)
+        if not header:
+            break
+        if not _is_bgzf(header):
+            raise ValueError(f'invalid BGZF block at offset {position}')
+        size = int.from_bytes(header[16:18], 'little') + 1
+        member = header + fileobj.read(size - _BGZF_HEADER_BYTES)
+        if len(member) < size:
+            raise EOFError(_TRUNCATED)
+        position += size
+        batch.append(member)
+        batchsize += size
+        if batchsize >= READ_BYTES:
+            yield batch, position
+            batch = []
+            batchsize = 0
+    if batch:
+        yield batch, position
+
+
+def _inflate_members(members: List[bytes]) -> bytes:
+    return b''.join(zlib.decompress(member, 31) for member in members)
+
+
+def _gzip_pieces(fileobj: io.BufferedReader,
+                 workers: int) -> Iterator[_Piece]:
+    if workers <= 1 or not _is_bgzf(fileobj.peek(_BGZF_HEADER_BYTES)):
+        yield from _gzip_stream(fileobj)
+        return
+    pending: Deque[Tuple[concurrent.futures.Future, int]] = \
+        collections.deque()
+    with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+        try:
+            for batch, end in _bgzf_batches(fileobj):
+                pending.append((pool.submit(_inflate_members, batch), end))
+                yield from _in_order(pending, PIECES_AHEAD * workers)
+            yield from _in_order(pending, 0)
+        finally:
+            for future, _ in pending:
+                future.cancel()
+
+
+def _zstd_decompressor() -> Any:
+    if zstandard is None:
+        raise ImportError('reading zstd compressed files needs zstandard '
+                          '(pip install datawhistle[zstd])')
+    return zstandard.ZstdDecompressor()
+
+
+def _zstd_stream(fileobj: BinaryIO, position: int = 0,
+                 end: Optional[int] = None) -> Iterator[_Piece]:
+    # decompress zstd frames one after another, up to end if given
+    context = _zstd_decompressor()
+    decompressor = context.decompressobj()
+    started = False
+    while end is None or position < end:
+        size = READ_BYTES if end is None else min(READ_BYTES, end - position)
+        data = fileobj.read(size)
+        if not data:
+            break
+        position += len(data)
+        while data:
+            if decompressor.eof:
+                decompressor = context.decompressobj()
+            started = True
+            piece = decompressor.decompress(data)
+            data = decompressor.unused_data if decompressor.eof else b''
+            if piece:
+                yield piece, position
+    if started and not decompressor.eof:
+        raise EOFError(_TRUNCATED)
+
+
+def _zstd_frame_size(fileobj: BinaryIO) -> Tuple[int, bool]:
+    # the size of the frame at the current position of a seekable file and
+    # whether it is a skippable frame, found from the frame and block
+    # headers without decompressing the frame
+    start = fileobj.tell()
+    header = fileobj.read(8)
+    if len(header) >= 8 and int.from_bytes(header[:4], 'little') & \
+            _SKIPPABLE_MASK == _SKIPPABLE_MAGIC:
+        return 8 + int.from_bytes(header[4:8], 'little'), True
+    if len(header) < 5 or header[:4] != ZSTD_MAGIC:
+        raise ValueError(f'invalid zstd frame at offset {start}')
+    descriptor = header[4]
+    single_segment = bool(descriptor & 0x20)
+    position = start + 5
+    if not single_segment:
+        # window descriptor
+        position += 1
+    position += [0, 1, 2, 4][descriptor & 3]
+    position += [int(single_segment), 2, 4, 8][descriptor >> 6]
+    last = False
+    while not last:
+        fileobj.seek(position)
+        block = fileobj.read(3)
+        if len(block) < 3:
+            raise EOFError(_TRUNCATED)
+        value = int.from_bytes(block, 'little')
+        last = bool(value & 1)
+        kind = (value >> 1) & 3
+        if kind == 3:
+            raise ValueError(f'invalid zstd block at offset {position}')
+        # RLE blocks hold a single byte repeated
+        position += 3 + (1 if kind == 1 else value >> 3)
+    if descriptor & 4:
+        # content checksum
+        position += 4
+    return position - start, False
+
+
+def _decompress_frame(frame: bytes) -> bytes:
+    decompressor = zstandard.ZstdDecompressor().decompressobj()
+    data = decompressor.decompress(frame)
+    if not decompressor.eof:
+        raise EOFError(_TRUNCATED)
+    return data
+
+
+def _zstd_pieces(fileobj: BinaryIO, workers: int) -> Iterator[_Piece]:
+    if workers <= 1 or not fileobj.seekable():
+        yield from _zstd_stream(fileobj)
+        return
+    size = os.fstat(fileobj.fileno()).st_size
+    pending: Deque[Tuple[concurrent.futures.Future, int]] = \
+        collections.deque()
+    with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+        try:
+            position = 0
+            while position < size:
+                fileobj.seek(position)
+                framesize, skippable = _zstd_frame_size(fileobj)
+                end = position + framesize
+                if end > size:
+                    raise EOFError(_TRUNCATED)
+                if skippable:
+                    # nothing to decompress, but read for progress
+                    skipped: concurrent.futures.Future = \
+                        concurrent.futures.Future()
+                    skipped.set_result(b'')
+                    pending.append((skipped, end))
+                elif framesize <= MAX_FRAME_BYTES:
+                    fileobj.seek(position)
+                    frame = fileobj.read(framesize)
+                    pending.append((pool.submit(_decompress_frame, frame),
+                                    end))
+                    yield from _in_order(pending, PIECES_AHEAD * workers)
+                else:
+                    yield from _in_order(pending, 0)
+                    fileobj.seek(position)
+                    yield from _zstd_stream(fileobj, position, end)
+                position = end
+            yield from _in_order(pending, 0)
+        finally:
+            for future, _ in pending:
+                future.cancel()
+
+
+class DecompressingReader(io.RawIOBase):
+    '''
+    Read-only file object of the decompressed bytes of a file, optionally
+    reporting the number of bytes of the (compressed) file read so far.
+    '''
+
+    def __init__(self, fileobj: BinaryIO, pieces: Iterator[_Piece],
+                 progress: Optional[Progress] = None):
+        super().__init__()
+        self._fileobj = fileobj
+        self._pieces = pieces
+        self._piece = memoryview(b'')
+        self._offset: int = 0
+        self._progress = progress
+        # bytes of the file read to give the bytes returned so far
+        self.compressed_position: int = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        while self._offset >= len(self._piece):
+            piece = next(self._pieces, None)
+            if piece is None:
+                return 0
+            data, self.compressed_position = piece
+            self._piece = memoryview(data)
+            self._offset = 0
+            if self._progress is not None:
+                self._progress(self.compressed_position)
+        size = min(len(buffer), len(self._piece) - self._offset)
+        buffer[:size] = self._piece[self._offset:self._offset + size]
+        self._offset += size
+        return size
+
+    def close(self) -> None:
+        if not self.closed:
+            close = getattr(self._pieces, 'close', None)
+            if close is not None:
+                close()
+            self._fileobj.close()
+        super().close()
+
+
+class TeeReader(io.RawIOBase):
+    '''
+    Read-only file object over a raw file object, writing the bytes read to
+    another file as they are read.
+    '''
+
+    def __init__(self, fileobj: io.RawIOBase, output: BinaryIO):
+        super().__init__()
+        self._fileobj = fileobj
+        self._output = output
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        size = self._fileobj.readinto(buffer)
+        if size:
+            with memoryview(buffer) as view:
+                self._output.write(view[:size])
+        return size or 0
+
+    def close(self) -> None:
+        if not self.closed:
+            self._fileobj.close()
+        super().close()
+
+
+def _open(filename: str, tee: Optional[BinaryIO]) -> io.BufferedReader:
+    raw: io.RawIOBase
+    if filename == STDIN:
+        raw = open(sys.stdin.fileno(), 'rb', buffering=0, closefd=False)
+    else:
+        raw = open(filename, 'rb', buffering=0)
+    if tee is not None:
+        raw = TeeReader(raw, tee)
+    return io.BufferedReader(raw)
+
+
+def open_data_file(filename: str, workers: Optional[int] = None,
+                   progress: Optional[Progress] = None,
+                   tee: Optional[BinaryIO] = None) -> BinaryIO:
+    '''
+    Open a data file (or standard input if the file name is -) for reading
+    in binary mode, decompressing gzip, zstd, bzip2, xz and zip compressed
+    files as they are read. BGZF files and zstd files of many frames are
+    decompressed by the given number of threads (by default one per CPU).
+    If given, progress is called with the number of bytes of the file read
+    so far as data is read, and the bytes of the file (compressed or not)
+    are written to tee as they are read.
+    '''
+    fileobj = _open(filename, tee)
+    try:
+        magic = fileobj.peek(_MAGIC_BYTES)[:_MAGIC_BYTES]
+        compression = _compression(magic)
+        if compression is None and progress is None:
+            return fileobj
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if compression == 'gzip':
+            pieces = _gzip_pieces(fileobj, workers)
+        elif compression == 'zstd':
+            _zstd_decompressor()
+            pieces = _zstd_pieces(fileobj, workers)
+        elif compression == 'bz2':
+            pieces = _chained_stream(fileobj, bz2.BZ2Decompressor)
+        elif compression == 'xz':
+            pieces = _chained_stream(fileobj, lzma.LZMADecompressor)
+        elif compression == 'zip':
+            pieces = _zip_pieces(fileobj)
+        else:
+            pieces = _plain_pieces(fileobj)
+    except BaseException:
+        fileobj.close()
+        raise
+    return io.BufferedReader(DecompressingReader(fileobj, pieces, progress),
+                             READ_BYTES)
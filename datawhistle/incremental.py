@@ -0,0 +1,157 @@
+import hashlib
+import io
+import json
+import os
+import zipfile
+from typing import Any, BinaryIO, List, Optional, Tuple
+import numpy as np      # type: ignore
+import pandas as pd     # type: ignore
+import datawhistle.compressed as dwcz
+import datawhistle.streamchecks as dwst
+import datawhistle.streaming as dwsm
+
+# Incremental validation of append-only CSV files. The state of a
+# validation run (how much of the file was read, a hash of the bytes read
+# and mergeable summaries of the rows read) is saved to a state file. A
+# later run checks the saved hash still matches the start of the file
+# and, if so, only reads the rows appended since. If the file was
+# rewritten rather than appended to, or the rules changed, the whole file
+# is read again.
+#
+# Each run reads and hashes the whole validated prefix again, rather than
+# resuming a saved hash state (hashlib states cannot be saved). Reading
+# the prefix is what detects that it changed, so a saved state would
+# not avoid it. Only the prefix is hashed, at disk speed, which is much
+# faster than parsing and checking its rows.
+#
+# State files are numpy .npz archives read without pickling, so a state
+# file written by someone else cannot run code. The arrays of the
+# summaries (hashes and sketch levels) are stored as arrays and
+# everything else as a JSON string that refers to them by index.
+
+STATE_VERSION = 6
+_READ_BLOCKSIZE = 1 << 20
+
+
+class IncrementalState:
+    '''Validation state of a CSV file saved between runs.'''
+
+    def __init__(self, rules_key: str, offset: int, prefix_hash: str,
+                 names: List[str], accumulators: Tuple[Any, List[Any]]):
+        self.version: int = STATE_VERSION
+        # fingerprint of the rules the accumulators were built for
+        self.rules_key: str = rules_key
+        # number of bytes of the file validated
+        self.offset: int = offset
+        # hash of the bytes of the file validated
+        self.prefix_hash: str = prefix_hash
+        self.names: List[str] = names
+        self.accumulators: Tuple[Any, List[Any]] = accumulators
+
+
+def load_state(statefile: str) -> Optional[IncrementalState]:
+    '''Load saved validation state, None if there is no usable state.'''
+    try:
+        with np.load(statefile, allow_pickle=False) as npz:
+            data = json.loads(str(npz['state']))
+            if data.get('version') != STATE_VERSION:
+                return None
+            arrays = [npz[f'arr_{index}'] for index in range(data['arrays'])]
+        table, columns = data['accumulators']
+        accumulators = (
+                dwst.TableAccumulator.from_state(table, arrays),
+                [None if column is None
+                 else dwst.ColumnAccumulator.from_state(column, arrays)
+                 for column in columns])
+        return IncrementalState(data['rules_key'], int(data['offset']),
+                                data['prefix_hash'], data['names'],
+                                accumulators)
+    except FileNotFoundError:
+        return None
+    except (ValueError, TypeError, KeyError, IndexError, AttributeError,
+            EOFError, zipfile.BadZipFile):
+        return None
+
+
+def save_state(statefile: str, state: IncrementalState) -> None:
+    '''Save validation state, replacing any earlier state atomically.'''
+    arrays: List[np.ndarray] = []
+    table, columns = state.accumulators
+    data = {'version': state.version, 'rules_key': state.rules_key,
+            'offset': state.offset, 'prefix_hash': state.prefix_hash,
+            'names': state.names,
+            'accumulators': [table.get_state(arrays),
+                             [None if column is None
+                              else column.get_state(arrays)
+                              for column in columns]]}
+    data['arrays'] = len(arrays)
+    tmpfile = f'{statefile}.tmp'
+    # a file object, as np.savez adds .npz to file names
+    with open(tmpfile, 'wb') as stream:
+        np.savez(stream, *arrays, state=np.array(json.dumps(data)))
+    os.replace(tmpfile, statefile)
+
+
+def _hash_prefix(fileobj: BinaryIO, length: int) -> Any:
+    hasher = hashlib.blake2b()
+    fileobj.seek(0)
+    remaining = length
+    while remaining > 0:
+        block = fileobj.read(min(_READ_BLOCKSIZE, remaining))
+        if not block:
+            break
+        hasher.update(block)
+        remaining -= len(block)
+    return hasher
+
+
+def check_csv_incremental(csvfile: str, suite: Any, statefile: str,
+                          rules_key: str,
+                          chunksize: int = dwsm.DEFAULT_CHUNKSIZE) -> int:
+    '''
+    Add the rows of an append-only CSV file to a StreamingDatasetCheckSuite,
+    reading only the rows appended since the state was last saved, then
+    save the updated state.
+
+    Returns the byte offset reading started from (0 for a full pass).
+    '''
+    if dwcz.detect_compression(csvfile) is not None:
+        raise ValueError('incremental validation needs an uncompressed '
+                         'file, as rows are read from byte offsets')
+    if suite.column_patterns:
+        raise ValueError('column pattern rules cannot be validated '
+                         'incrementally, as the columns they match are not '
+                         'saved with the state')
+    state = load_state(statefile)
+    start = 0
+    with open(csvfile, 'rb') as fileobj:
+        size = os.fstat(fileobj.fileno()).st_size
+        hasher = hashlib.blake2b()
+        if state is not None and state.rules_key == rules_key and \
+                state.offset <= size:
+            prefix = _hash_prefix(fileobj, state.offset)
+            if prefix.hexdigest() == state.prefix_hash:
+                hasher = prefix
+                start = state.offset
+                names = state.names
+                suite.set_accumulators(*state.accumulators)
+        if start == 0:
+            fileobj.seek(0)
+            names = dwsm.read_csv_header(fileobj, hasher)
+            # an empty chunk records the columns present in the file
+            suite.update(pd.DataFrame(columns=names))
+        data_start = fileobj.tell()
+        end = dwsm.last_line_end(fileobj, data_start, size)
+        fileobj.seek(data_start)
+        reader = dwsm.ByteRangeReader(fileobj, end, hasher)
+        chunks = dwsm.csv_chunks(io.BufferedReader(reader), names,
+                                 suite.column_dtypes(), chunksize)
+        for chunk in chunks:
+            suite.update(chunk)
+        # make sure every byte up to the end offset is hashed
+        while reader.read(_READ_BLOCKSIZE):
+            pass
+    save_state(statefile, IncrementalState(rules_key, end,
+                                           hasher.hexdigest(), names,
+                                           suite.get_accumulators()))
+    return start
@@ -0,0 +1,173 @@
+import itertools
+import json
+from typing import (Any, BinaryIO, Callable, Dict, Generator, List, Optional,
+                    Tuple)
+import pandas as pd     # type: ignore
+import datawhistle.compressed as dwcz
+import datawhistle.streaming as dwsm
+try:
+    import orjson           # type: ignore
+except ImportError:
+    orjson = None  # type: ignore
+
+# Reading newline-delimited JSON (JSON Lines) data in chunks of records for
+# checking with a StreamingDatasetCheckSuite. Records are decoded with
+# orjson if it is installed (pip install datawhistle[json]), or else the
+# json module, and only the fields the rules name are extracted into the
+# columns of a DataFrame. A field name is a key of the record or, if the
+# record has no such key, a dotted path into nested objects, e.g.
+# user.address.city. A field missing from a record is null, and a column
+# is only in a chunk if some record in the chunk has the field, so that a
+# field no record has is reported as not found. Files can be compressed,
+# standard input or a named pipe (see datawhistle.compressed).
+
+_MISSING = object()
+
+
+def _loads() -> Callable[[bytes], Any]:
+    if orjson is not None:
+        return orjson.loads
+    return json.loads
+
+
+def _getter(name: str) -> Callable[[Dict[str, Any]], Any]:
+    # a function getting a field of a record, _MISSING if it has none
+    path = name.split('.')
+    if len(path) == 1:
+        return lambda record: record.get(name, _MISSING)
+
+    def get(record: Dict[str, Any]) -> Any:
+        value = record.get(name, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = record
+        for key in path:
+            if not isinstance(value, dict):
+                return _MISSING
+            value = value.get(key, _MISSING)
+            if value is _MISSING:
+                break
+        return value
+
+    return get
+
+
+def _text(value: Any) -> Any:
+    # a value as it would be written in a CSV file: JSON text for
+    # booleans, objects and arrays
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (bool, dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+
+def _decode(lines: List[bytes], first_line: int) -> List[Any]:
+    loads = _loads()
+    records = []
+    for number, line in enumerate(lines, first_line):
+        if line.isspace() or not line:
+            continue
+        try:
+            record = loads(line)
+        except ValueError as ex:
+            raise ValueError(f'invalid JSON on line {number}: {ex}')
+        if not isinstance(record, dict):
+            raise ValueError(f'line {number} is not a JSON object')
+        records.append(record)
+    return records
+
+
+def records_to_chunk(records: List[Dict[str, Any]], names: List[str],
+                     dtypes: Optional[Dict[str, type]] = None
+                     ) -> pd.DataFrame:
+    '''
+    Extract fields of JSON records into the columns of a DataFrame, as
+    text for fields with a dtype of str. Fields no record has are left out.
+    '''
+    columns = {}
+    for name in names:
+        get = _getter(name)
+        values = [get(record) for record in records]
+        if all(value is _MISSING for value in values):
+            continue
+        values = [None if value is _MISSING else value for value in values]
+        if dtypes is not None and dtypes.get(name) is str:
+            columns[name] = pd.Series([_text(value) for value in values],
+                                      dtype=object)
+        elif any(isinstance(value, (dict, list)) for value in values):
+            columns[name] = pd.Series(values, dtype=object)
+        else:
+            columns[name] = pd.Series(values)
+    return pd.DataFrame(columns, index=pd.RangeIndex(len(records)))
+
+
+def jsonl_chunks(fileobj: BinaryIO, names: List[str],
+                 dtypes: Optional[Dict[str, type]] = None,
+                 chunksize: int = dwsm.DEFAULT_CHUNKSIZE
+                 ) -> Generator[pd.DataFrame, None, None]:
+    '''
+    Read JSON Lines data into DataFrames of the named fields of at most
+    chunksize records. Blank lines are skipped.
+    '''
+    for chunk, _ in jsonl_chunks_with_data(fileobj, names, dtypes,
+                                           chunksize):
+        if chunk is not None:
+            yield chunk
+
+
+def jsonl_chunks_with_data(fileobj: BinaryIO, names: List[str],
+                           dtypes: Optional[Dict[str, type]] = None,
+                           chunksize: int = dwsm.DEFAULT_CHUNKSIZE
+                           ) -> Generator[Tuple[Optional[pd.DataFrame],
+                                                bytes], None, None]:
+    '''
+    Read JSON Lines data as jsonl_chunks does, each DataFrame with the
+    bytes it was read from (None for bytes holding only blank lines).
+    '''
+    first_line = 1
+    while True:
+        lines = list(itertools.islice(fileobj, chunksize))
+        if not lines:
+            return
+        records = _decode(lines, first_line)
+        first_line += len(lines)
+        chunk = records_to_chunk(records, names, dtypes) if records \
+            else None
+        yield chunk, b''.join(lines)
+
+
+def check_jsonl_streaming(jsonlfile: str, suite: Any,
+                          chunksize: int = dwsm.DEFAULT_CHUNKSIZE,
+                          prefetch: int = dwsm.DEFAULT_PREFETCH,
+                          stats: Optional[dwsm.PipelineStats] = None,
+                          progress: Optional[dwcz.Progress] = None,
+                          tee: Optional[BinaryIO] = None) -> bool:
+    '''
+    Add the records of a JSON Lines file to a StreamingDatasetCheckSuite a
+    chunk at a time, extracting the fields its columns name. Reading
+    stops early, chunks are read ahead, the file is opened and the data
+    is written to tee as for streaming.check_csv_streaming.
+
+    Returns True if reading stopped early.
+    '''
+    if suite.column_patterns:
+        raise ValueError('column pattern rules need the columns of the data '
+                         'to be known, which JSON Lines data does not have')
+    names = [column.columnname for column in suite.columns]
+    # a field can first be found in any record
+    suite.fixed_columns = False
+    with dwcz.open_data_file(jsonlfile, progress=progress) as fileobj:
+        chunks: Generator[Any, None, None]
+        if tee is not None:
+            chunks = jsonl_chunks_with_data(fileobj, names,
+                                            suite.column_dtypes(), chunksize)
+        else:
+            chunks = jsonl_chunks(fileobj, names, suite.column_dtypes(),
+                                  chunksize)
+        if prefetch > 0:
+            chunks = dwsm.prefetch_chunks(chunks, prefetch, stats)
+        try:
+            return dwsm.check_chunks(chunks, suite, tee)
+        finally:
+            chunks.close()
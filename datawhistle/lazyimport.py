@@ -0,0 +1,27 @@
+import importlib.util
+import sys
+from types import ModuleType
+
+# Heavy dependencies (pandas, numpy, yaml and the modules that use them)
+# are imported lazily by modules loaded with the datawhistle package, so
+# that e.g. checking a BigQuery table or printing command line help does
+# not pay for importing pandas.
+
+
+def lazy_import(name: str) -> ModuleType:
+    '''
+    Import a module, deferring loading it until one of its attributes is
+    first used. Raises ImportError straight away if the module cannot be
+    found.
+    '''
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ImportError(f'No module named {name!r}', name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,259 @@
+import http.server
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Metrics of validation runs in the Prometheus text exposition format, to
+# be written to a file read by the node exporter textfile collector or
+# served over HTTP by a long running process. Check durations come from
+# the CheckProfiler run by a checksuite, so metrics are labelled with the
+# check method and column names used by the checksuites' _assemble_checks.
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0,
+                    60.0, 300.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, str]) -> _Labels:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels: _Labels, extra: str = '') -> str:
+    items = [f'{name}="{_escape(value)}"' for name, value in labels]
+    if extra:
+        items.append(extra)
+    if not items:
+        return ''
+    return '{' + ','.join(items) + '}'
+
+
+def _escape(value: str) -> str:
+    return (str(value).replace('\\', '\\\\').replace('\n', '\\n')
+            .replace('"', '\\"'))
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    '''A named metric with values for each combination of labels.'''
+
+    def __init__(self, name: str, helptext: str, metrictype: str):
+        self.name: str = name
+        self.helptext: str = helptext
+        self.metrictype: str = metrictype
+        self.values: Dict[_Labels, Any] = {}
+
+    def lines(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.helptext}',
+                 f'# TYPE {self.name} {self.metrictype}']
+        for labels in sorted(self.values):
+            lines += self._sample_lines(labels, self.values[labels])
+        return lines
+
+    def _sample_lines(self, labels: _Labels, value: Any) -> List[str]:
+        return [f'{self.name}{_format_labels(labels)} '
+                f'{_format_value(value)}']
+
+
+class Counter(Metric):
+
+    def __init__(self, name: str, helptext: str):
+        super().__init__(name, helptext, 'counter')
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = _labels(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+
+    def __init__(self, name: str, helptext: str):
+        super().__init__(name, helptext, 'gauge')
+
+    def set(self, value: float, **labels: str) -> None:
+        self.values[_labels(labels)] = value
+
+
+class Histogram(Metric):
+
+    def __init__(self, name: str, helptext: str,
+                 buckets: Sequence[float] = DURATION_BUCKETS):
+        super().__init__(name, helptext, 'histogram')
+        self.buckets: Tuple[float, ...] = tuple(buckets) + (math.inf,)
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _labels(labels)
+        if key not in self.values:
+            self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+        counts, _, _ = entry = self.values[key]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def _sample_lines(self, labels: _Labels, value: Any) -> List[str]:
+        counts, total, count = value
+        lines = []
+        for bound, bucket_count in zip(self.buckets, counts):
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f'{self.name}_bucket{_format_labels(labels, le)} '
+                         f'{bucket_count}')
+        lines.append(f'{self.name}_sum{_format_labels(labels)} '
+                     f'{_format_value(total)}')
+        lines.append(f'{self.name}_count{_format_labels(labels)} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    '''The metrics of validation runs, accumulated over runs.'''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.check_duration = Histogram(
+            'datawhistle_check_duration_seconds',
+            'Time taken by each check.')
+        self.checks = Counter(
+            'datawhistle_checks_total', 'Checks run, by result.')
+        self.suite_duration = Histogram(
+            'datawhistle_suite_duration_seconds',
+            'Time taken to run all checks of a rules file.')
+        self.runs = Counter(
+            'datawhistle_runs_total', 'Validation runs, by result.')
+        self.rows = Counter(
+            'datawhistle_rows_processed_total', 'Rows of data checked.')
+        self.bytes = Counter(
+            'datawhistle_bytes_processed_total',
+            'Bytes of data read or scanned.')
+        self.rows_per_second = Gauge(
+            'datawhistle_rows_per_second',
+            'Rows checked per second in the last run.')
+        self.cache_requests = Counter(
+            'datawhistle_cache_requests_total',
+            'Result cache lookups, by result (hit or miss).')
+        self.bq_queries = Counter(
+            'datawhistle_bq_queries_total', 'BigQuery queries run.')
+        self.bq_bytes_billed = Counter(
+            'datawhistle_bq_bytes_billed_total', 'BigQuery bytes billed.')
+        self.last_run = Gauge(
+            'datawhistle_last_run_timestamp_seconds',
+            'Time the last validation run finished.')
+        self.last_run_success = Gauge(
+            'datawhistle_last_run_success',
+            'Whether all checks passed in the last run (1) or not (0).')
+        self.pipeline_busy = Gauge(
+            'datawhistle_pipeline_busy_ratio',
+            'Fraction of the last run each stage of reading data ahead '
+            'was busy, by stage (read or check).')
+        self._metrics: List[Metric] = [
+            self.check_duration, self.checks, self.suite_duration,
+            self.runs, self.rows, self.bytes, self.rows_per_second,
+            self.cache_requests, self.bq_queries, self.bq_bytes_billed,
+            self.last_run, self.last_run_success, self.pipeline_busy]
+
+    def record_run(self, source: str, suite: Any = None,
+                   seconds: float = 0.0, bytes_processed: int = 0,
+                   cached_messages: Optional[List[str]] = None,
+                   cache_used: bool = False) -> None:
+        '''
+        Add the results of a validation run. The suite is a checksuite that
+        has run its checks with a CheckProfiler set, or None if the results
+        were read from the result cache (cached_messages). Set cache_used
+        if the result cache was looked up and missed.
+        '''
+        with self._lock:
+            if suite is None:
+                messages = cached_messages or []
+                self.cache_requests.inc(result='hit')
+            else:
+                if cache_used:
+                    self.cache_requests.inc(result='miss')
+                messages = suite.error_messages
+                self._record_checks(suite)
+                self.suite_duration.observe(seconds, source=source)
+                rows = suite.rows_scanned() or 0
+                self.rows.inc(rows, source=source)
+                if seconds > 0:
+                    self.rows_per_second.set(rows / seconds, source=source)
+            self.bytes.inc(bytes_processed, source=source)
+            result = 'failed' if messages else 'passed'
+            self.runs.inc(source=source, result=result)
+            self.last_run.set(time.time(), source=source)
+            self.last_run_success.set(0 if messages else 1, source=source)
+
+    def record_pipeline(self, source: str, stats: Any) -> None:
+        '''Add the utilisation of reading ahead (a PipelineStats).'''
+        with self._lock:
+            self.pipeline_busy.set(stats.read_utilisation(), source=source,
+                                   stage='read')
+            self.pipeline_busy.set(stats.check_utilisation(), source=source,
+                                   stage='check')
+
+    def _record_checks(self, suite: Any) -> None:
+        if suite.profiler is None:
+            return
+        for record in suite.profiler.records:
+            column = record['column'] or ''
+            self.check_duration.observe(record['wall_seconds'],
+                                        check=record['check'], column=column)
+            self.checks.inc(check=record['check'], column=column,
+                            result='passed' if record['passed'] else 'failed')
+            if record['bq_queries']:
+                self.bq_queries.inc(record['bq_queries'])
+            if record['bq_bytes_billed']:
+                self.bq_bytes_billed.inc(record['bq_bytes_billed'])
+
+    def render(self) -> str:
+        '''The metrics in the Prometheus text exposition format.'''
+        with self._lock:
+            lines = []
+            for metric in self._metrics:
+                if metric.values:
+                    lines += metric.lines()
+            return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, filename: str) -> None:
+        '''
+        Write the metrics to a file, replacing it atomically so that the
+        node exporter never reads a partly written file.
+        '''
+        tmpfile = f'{filename}.{os.getpid()}.tmp'
+        with open(tmpfile, 'w') as stream:
+            stream.write(self.render())
+        os.replace(tmpfile, filename)
+
+    def serve(self, port: int,
+              host: str = '127.0.0.1') -> http.server.ThreadingHTTPServer:
+        '''
+        Serve the metrics over HTTP from a background thread, for long
+        running processes. Returns the server (call shutdown to stop it).
+        '''
+        registry = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+
+            def do_GET(self) -> None:
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        server = http.server.ThreadingHTTPServer((host, port), Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        return server
@@ -1,7 +1,62 @@
-from typing import Optional, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 import pandas as pd     # type: ignore
 import numpy as np      # type: ignore
+import functools
 import re
+import datawhistle.processpool as dwpp
+import datawhistle.sketches as dwsk
+
+# Checks that can fail on any single value (e.g. a value not equal to a
+# required value) look at a column in blocks of rows, returning at the
+# first block with a failing value rather than evaluating the whole column.
+BLOCK_SIZE = 65536
+
+
+def _any_in_blocks(series: pd.Series,
+                   test: Callable[[pd.Series], pd.Series]) -> bool:
+    for start in range(0, len(series), BLOCK_SIZE):
+        if test(series.iloc[start:start + BLOCK_SIZE]).any():
+            return True
+    return False
+
+
+def _categories(series: pd.Series) -> pd.Series:
+    # distinct values of a categorical column, in the order of their codes
+    return pd.Series(series.cat.categories)
+
+
+# Tests of the values of a range of rows of a string column (None for
+# nulls), run by worker processes when a pool of processes checks string
+# columns (see datawhistle.processpool). They return the position of the
+# first failing value and details of the failure, or None if all pass.
+
+
+def _first_blank(values: List[Optional[str]]) -> Optional[Tuple[int, str]]:
+    for row, value in enumerate(values):
+        if value is not None and (value == '' or value.isspace()):
+            return row, value
+    return None
+
+
+def _regex_failed(row: Any, regex_type: str) -> bool:
+    # row is the list of matches found in a value, or NaN for a null
+    if not isinstance(row, list):
+        return False
+    not_found = row == [''] or row == []
+    return not_found if regex_type == 'mandatory' else not not_found
+
+
+def _first_regex_failure(pattern: re.Pattern, regex_type: str,
+                         values: List[Optional[str]]
+                         ) -> Optional[Tuple[int, List[Any]]]:
+    findall = pattern.findall
+    for row, value in enumerate(values):
+        if value is not None:
+            found = findall(value)
+            if _regex_failed(found, regex_type):
+                return row, found
+    return None
+
 
 # DataFrame level checks (as opposed to column level checks)
 # are described in functions using the naming convention
@@ -14,14 +69,17 @@ import re
 
 
 def dfcheck_row_count(df: pd.DataFrame, count: int,
-                      operator: str = '==') -> Tuple[bool, str]:
+                      operator: str = '==',
+                      num_rows: Optional[int] = None) -> Tuple[bool, str]:
     '''
     Check if the number of rows in a table is equal to, greater
     than or less than a specified count.
 
-    The operator parameter can be '==', '>=' or '<='.
+    The operator parameter can be '==', '>=' or '<='. The num_rows
+    parameter overrides the row count of df, e.g. when df is a sample.
     '''
-    num_rows: int = len(df)
+    if num_rows is None:
+        num_rows = len(df)
     if operator == '==' and num_rows == count:
         return True, ''
     if operator == '>=' and num_rows >= count:
@@ -36,12 +94,131 @@ def dfcheck_row_count(df: pd.DataFrame, count: int,
 
 def dfcheck_no_duplicate_rows(df: pd.DataFrame) -> Tuple[bool, str]:
     '''Check if a DataFrame has duplicate rows.'''
-    num_duplicates: int = sum(df.duplicated())
+    num_duplicates = int(df.duplicated().sum())
     if num_duplicates == 0:
         return True, ''
     return False, f'want 0 duplicate rows, got {num_duplicates}'
 
 
+def _inferred_type(dtype: Any) -> Optional[str]:
+    # the column type whose type check a column of the dtype passes
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    if pd.api.types.is_numeric_dtype(dtype):
+        return 'numeric'
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return 'datetime'
+    if pd.api.types.is_string_dtype(dtype):
+        return 'string'
+    return None
+
+
+def dfschema(df: pd.DataFrame) -> List[Tuple[str, Optional[str]]]:
+    '''
+    The names and inferred types (numeric, string, datetime or None) of
+    the columns of a DataFrame, e.g. to resolve column pattern rules.
+    '''
+    return [(name, _inferred_type(dtype)) for name, dtype in df.dtypes.items()
+            if isinstance(name, str)]
+
+
+# Statistics of many columns of a wide DataFrame are computed by one
+# vectorised call over all the columns (of the same dtype), rather than a
+# call per column, whose overhead dominates for thousands of columns. They
+# return the statistic by column name, to pass to the column level checks
+# below in place of computing it for a single column.
+
+
+def _dtype_groups(df: pd.DataFrame,
+                  columnnames: List[str]) -> List[List[str]]:
+    # the columns grouped by dtype, so that statistics keep the dtype of
+    # the values (e.g. the minimum of an integer column is an integer)
+    dtypes = df.dtypes
+    groups: Dict[Any, List[str]] = {}
+    for name in columnnames:
+        groups.setdefault(dtypes[name], []).append(name)
+    return list(groups.values())
+
+
+def dfcount_nulls(df: pd.DataFrame, columnnames: List[str]) -> Dict[str, int]:
+    '''Count the null values of each of the named columns.'''
+    counts = df[columnnames].isnull().sum()
+    return {name: int(count) for name, count in counts.items()}
+
+
+def _count_sorted_distinct(values: np.ndarray,
+                           dropna: bool) -> np.ndarray:
+    # the distinct values in each column of a 2D array of numbers, sorting
+    # the columns (which puts NaNs last) and counting changes of value
+    values = np.sort(values, axis=0)
+    if len(values) == 0:
+        return np.zeros(values.shape[1], dtype=np.int64)
+    valid = ~np.isnan(values) if values.dtype.kind == 'f' else \
+        np.ones(values.shape, dtype=bool)
+    counts = valid[0] + ((values[1:] != values[:-1]) & valid[1:]).sum(axis=0)
+    if not dropna:
+        counts += ~valid[-1]
+    return counts
+
+
+def dfcount_distinct(df: pd.DataFrame, columnnames: List[str],
+                     dropna: bool = True) -> Dict[str, int]:
+    '''
+    Count the distinct values of each of the named columns, nulls aside
+    unless dropna is False. Columns of NumPy numeric dtypes are counted by
+    sorting them together, rather than hashing each column's values.
+    '''
+    counts: Dict[str, int] = {}
+    for names in _dtype_groups(df, columnnames):
+        dtype = df.dtypes[names[0]]
+        if isinstance(dtype, np.dtype) and dtype.kind in 'iuf':
+            counted = _count_sorted_distinct(df[names].to_numpy(), dropna)
+        else:
+            counted = df[names].nunique(dropna=dropna).to_numpy()
+        counts.update(zip(names, (int(count) for count in counted)))
+    return counts
+
+
+def dfcount_duplicates(df: pd.DataFrame,
+                       columnnames: List[str]) -> Dict[str, int]:
+    '''
+    Count the values of each of the named columns that duplicate an
+    earlier value (nulls included), as colcheck_no_duplicates does.
+    '''
+    return {name: len(df) - count for name, count in
+            dfcount_distinct(df, columnnames, dropna=False).items()}
+
+
+def dfcolumn_extremes(df: pd.DataFrame, columnnames: List[str],
+                      how: str = 'min') -> Dict[str, Any]:
+    '''
+    The minimum (how='min') or maximum (how='max') value of each of the
+    named numeric columns.
+    '''
+    extremes: Dict[str, Any] = {}
+    for names in _dtype_groups(df, columnnames):
+        extremes.update(getattr(df[names], how)().items())
+    return extremes
+
+
+def dfcolumns_differ(df: pd.DataFrame,
+                     values: Dict[str, Union[int, float]]) -> Dict[str, bool]:
+    '''
+    Whether each of the named columns has a value (or null) different from
+    the value given for it, looking at the columns in blocks of rows.
+    '''
+    names = list(values)
+    expected = np.array([values[name] for name in names])
+    columns = df[names]
+    differ = np.zeros(len(names), dtype=bool)
+    for start in range(0, len(columns), BLOCK_SIZE):
+        block = columns.iloc[start:start + BLOCK_SIZE]
+        differ |= block.ne(expected).any().to_numpy()
+        if differ.all():
+            break
+    return dict(zip(names, differ.tolist()))
+
+
 # DataFrame column level checks are described in functions using
 # the naming convention colcheck_[some name](df: pd.DatFrame,
 # columnname: str, [inputs]) -> Tuple[bool, str].
@@ -60,14 +237,18 @@ def colcheck_exists(df: pd.DataFrame, columnname: str) -> Tuple[bool, str]:
 
 
 def colcheck_count_distinct(df: pd.DataFrame, columnname: str, count: int,
-                            operator: str = '==') -> Tuple[bool, str]:
+                            operator: str = '==',
+                            count_val: Optional[int] = None
+                            ) -> Tuple[bool, str]:
     '''
     Check if the count of distinct values in a column is equal to, greater
-    than or less than a specified count.
+    than or less than a specified count, given the count if already
+    counted (see dfcount_distinct).
 
     The operator parameter can be '==', '>=' or '<='.
     '''
-    count_val = df[columnname].nunique()
+    if count_val is None:
+        count_val = df[columnname].nunique()
     if operator == '==' and count_val == count:
         return True, ''
     if operator == '>=' and count_val >= count:
@@ -81,144 +262,313 @@ def colcheck_count_distinct(df: pd.DataFrame, columnname: str, count: int,
                    f'{count}, got {count_val}')
 
 
-def colcheck_is_numeric(df: pd.DataFrame, columnname: str) -> Tuple[bool, str]:
-    '''Check if a column is numeric.'''
-    if pd.api.types.is_numeric_dtype(df[columnname]):
+def colcheck_is_numeric(df: pd.DataFrame, columnname: str,
+                        dtype: Optional[Any] = None) -> Tuple[bool, str]:
+    '''Check if a column is numeric, given its dtype if already known.'''
+    if dtype is None:
+        dtype = df[columnname].dtype
+    if pd.api.types.is_numeric_dtype(dtype):
         return True, ''
     return False, f'column {columnname} expected to be numeric but is not'
 
 
 def colcheck_is_str(df: pd.DataFrame, columnname: str) -> Tuple[bool, str]:
     '''Check if a column is string type.'''
-    if pd.api.types.is_string_dtype(df[columnname]):
+    series = df[columnname]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = _categories(series)
+    if pd.api.types.is_string_dtype(series):
         return True, ''
     return False, f'column {columnname} expected to be string type but is not'
 
 
 def colcheck_is_datetime(df: pd.DataFrame, columnname: str,
-                         dateformat: Optional[str] = None) -> Tuple[bool, str]:
+                         dateformat: Optional[str] = None,
+                         derived: Optional[Dict[str, pd.Series]] = None
+                         ) -> Tuple[bool, str]:
     '''
     Check if a column is datetime, optionally using a datetime format
     format string.
+
+    The DataFrame is not modified. If a dictionary of derived columns is
+    given, the parsed datetimes are added to it under the column name, and
+    taken from it rather than parsed again if they are there already.
     '''
+    if derived is not None and columnname in derived:
+        return True, ''
     if dateformat is not None:
         try:
-            df[columnname] = pd.to_datetime(df[columnname], format=dateformat,
-                                            exact=True)
+            parsed = pd.to_datetime(df[columnname], format=dateformat,
+                                    exact=True)
         except ValueError:
             return False, (f'column {columnname} data does not match datetime '
                            f'format {dateformat}')
     else:
         try:
-            df[columnname] = pd.to_datetime(df[columnname])
+            parsed = pd.to_datetime(df[columnname])
         except Exception:
             return False, (f'column {columnname} expected to be datetime type '
                            'but is not')
+    if derived is not None:
+        derived[columnname] = parsed
     return True, ''
 
 
-def colcheck_no_blanks(df: pd.DataFrame, columnname: str) -> Tuple[bool, str]:
-    '''Check if a string column contains blanks or whitespace only values.'''
+def colcheck_no_blanks(df: pd.DataFrame, columnname: str,
+                       pool: Optional[dwpp.StringCheckPool] = None
+                       ) -> Tuple[bool, str]:
+    '''
+    Check if a string column contains blanks or whitespace only values,
+    optionally checking the values in a pool of worker processes.
+    '''
+    def blank(block: pd.Series) -> pd.Series:
+        return block.str.isspace().eq(True) | (block == '')
+
     err = f'column {columnname} has blanks or whitesplace only values'
-    if df[columnname].str.isspace().sum() > 0:
-        return False, err
-    if sum(df[columnname] == '') != 0:
+    series = df[columnname]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # check each distinct value once, then the codes of the rows
+        blank_codes = np.flatnonzero(blank(_categories(series)).to_numpy())
+        if np.isin(series.cat.codes.to_numpy(), blank_codes).any():
+            return False, err
+        return True, ''
+    if pool is not None and pool.accepts(series):
+        if pool.first_failure(columnname, series, _first_blank) is not None:
+            return False, err
+        return True, ''
+    if _any_in_blocks(series, blank):
         return False, err
     return True, ''
 
 
-def colcheck_no_duplicates(df: pd.DataFrame,
-                           columnname: str) -> Tuple[bool, str]:
-    '''Check that a column doesn't contain any duplicates.'''
-    num_duplicates: int = sum(df[columnname].duplicated())
+def colcheck_no_duplicates(df: pd.DataFrame, columnname: str,
+                           num_duplicates: Optional[int] = None
+                           ) -> Tuple[bool, str]:
+    '''
+    Check that a column doesn't contain any duplicates, given the number of
+    duplicates if already counted (see dfcount_duplicates).
+    '''
+    if num_duplicates is None:
+        num_duplicates = int(df[columnname].duplicated().sum())
     if num_duplicates == 0:
         return True, ''
     return False, (f'column {columnname} want 0 duplicate rows, '
                    f'got {num_duplicates}')
 
 
-def colcheck_no_nulls(df: pd.DataFrame, columnname: str) -> Tuple[bool, str]:
-    '''Check if a column contains null values.'''
-    countnull = pd.isnull(df[columnname]).sum()
+def colcheck_no_nulls(df: pd.DataFrame, columnname: str,
+                      countnull: Optional[int] = None) -> Tuple[bool, str]:
+    '''
+    Check if a column contains null values, given the number of nulls if
+    already counted (see dfcount_nulls).
+    '''
+    if countnull is None:
+        countnull = pd.isnull(df[columnname]).sum()
     if countnull == 0:
         return True, ''
     return False, f'column {columnname} want 0 nulls, got {countnull}'
 
 
+def _regex_rule_error(columnname: str, regex_rule: str,
+                      regex_type: str) -> Optional[str]:
+    # why a regex rule cannot be checked, None if it can
+    if regex_rule == '':
+        return f'column {columnname} blank regex_rule'
+    if regex_type not in ['mandatory', 'exclude']:
+        return (f'column {columnname} regex_type expect mandatory or '
+                f'exclude, got {regex_type}')
+    try:
+        re.compile(regex_rule)
+    except re.error:
+        return f'column {columnname} invalid regex_rule {regex_rule}'
+    return None
+
+
+def _regex_failure(columnname: str, regex_rule: str, regex_type: str,
+                   row: Any) -> Tuple[bool, str]:
+    # row is the list of matches found in the first failing value
+    if regex_type == 'mandatory':
+        return False, (f'column {columnname} found a non matching regex '
+                       f'record with rule {regex_rule}')
+    return False, (f'column {columnname} found invalid regex {row[0]} '
+                   f'with rule {regex_rule}')
+
+
 def colcheck_regex(df: pd.DataFrame,
                    columnname: str,
                    regex_rule: Optional[str],
-                   regex_type: Optional[str]) -> Tuple[bool, str]:
+                   regex_type: Optional[str],
+                   pool: Optional[dwpp.StringCheckPool] = None
+                   ) -> Tuple[bool, str]:
     '''
     Check to see if a column contains all the same regex type, or if the
-    column does not contain a regex type.
+    column does not contain a regex type, optionally matching the values in
+    a pool of worker processes.
     '''
     if regex_rule is None or regex_type is None:
         return False, f'column {columnname} None regex_rule or regex_type'
-    if regex_rule == '':
-        return False, f'column {columnname} blank regex_rule'
-    if regex_type not in ['mandatory', 'exclude']:
-        return False, (f'column {columnname} regex_type expect mandatory or '
-                       f'exclude, got {regex_type}')
-    try:
-        reg_results = df[columnname].str.findall(regex_rule)
-    except re.error:
-        return False, f'column {columnname} invalid regex_rule {regex_rule}'
-    for row in reg_results.values:
-        if row == [''] or row == []:
-            # Not found
-            if regex_type == 'mandatory':
-                return False, (f'column {columnname} found a non matching '
-                               f'regex record with rule {regex_rule}')
-        else:
-            # Found
-            if regex_type == 'exclude':
-                return False, (f'column {columnname} found invalid regex '
-                               f'{row[0]} with rule {regex_rule}')
+    error = _regex_rule_error(columnname, regex_rule, regex_type)
+    if error is not None:
+        return False, error
+
+    def failure(row: Any) -> Tuple[bool, str]:
+        return _regex_failure(columnname, regex_rule, regex_type, row)
+
+    series = df[columnname]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # match each distinct value once, then find the first row with a
+        # failing value from the codes of the rows
+        found = _categories(series).str.findall(regex_rule)
+        failing = np.flatnonzero([_regex_failed(row, regex_type)
+                                  for row in found.values])
+        codes = series.cat.codes.to_numpy()
+        rows = np.flatnonzero(np.isin(codes, failing))
+        if len(rows) > 0:
+            return failure(found.iloc[codes[rows[0]]])
+        return True, ''
+    if pool is not None and pool.accepts(series):
+        test = functools.partial(_first_regex_failure,
+                                 re.compile(regex_rule), regex_type)
+        found_row = pool.first_failure(columnname, series, test)
+        if found_row is not None:
+            return failure(found_row[1])
+        return True, ''
+    for start in range(0, len(series), BLOCK_SIZE):
+        block = series.iloc[start:start + BLOCK_SIZE]
+        for row in block.str.findall(regex_rule).values:
+            if _regex_failed(row, regex_type):
+                return failure(row)
     return True, ''
 
 
+def colregex_rule_failures(df: pd.DataFrame, columnname: str,
+                           rules: List[Tuple[str, str]]
+                           ) -> List[Tuple[int, Optional[List[Any]]]]:
+    '''
+    Match the values of a string column against a list of valid
+    (regex_rule, regex_type) pairs in one pass over its distinct values.
+    Returns, for each rule, the number of rows failing it and the matches
+    found in the first of them (None if no row fails).
+    '''
+    # distinct values are numbered in the order they first appear, so the
+    # first failing distinct value is that of the first failing row
+    codes, uniques = pd.factorize(df[columnname])
+    rows = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    patterns = [(re.compile(rule).findall, regex_type)
+                for rule, regex_type in rules]
+    counts = [0] * len(rules)
+    firsts: List[Optional[List[Any]]] = [None] * len(rules)
+    for code, value in enumerate(uniques):
+        if not isinstance(value, str):
+            continue
+        for index, (findall, regex_type) in enumerate(patterns):
+            found = findall(value)
+            if _regex_failed(found, regex_type):
+                if firsts[index] is None:
+                    firsts[index] = found
+                counts[index] += int(rows[code])
+    return list(zip(counts, firsts))
+
+
+def colcheck_regex_rules(df: pd.DataFrame, columnname: str,
+                         rules: List[Tuple[str, str]],
+                         pool: Optional[dwpp.StringCheckPool] = None
+                         ) -> List[Tuple[bool, str]]:
+    '''
+    Check a column against a list of (regex_rule, regex_type) pairs, as
+    colcheck_regex checks each, matching the distinct values of the column
+    against all rules in one pass (see colregex_rule_failures). With a pool
+    of worker processes that takes the column, each rule is matched in turn
+    by the pool.
+    '''
+    results: List[Optional[Tuple[bool, str]]] = []
+    valid = []
+    for regex_rule, regex_type in rules:
+        error = _regex_rule_error(columnname, regex_rule, regex_type)
+        results.append(None if error is None else (False, error))
+        if error is None:
+            valid.append((regex_rule, regex_type))
+    if pool is not None and pool.accepts(df[columnname]):
+        checked = [colcheck_regex(df, columnname, regex_rule, regex_type,
+                                  pool)
+                   for regex_rule, regex_type in valid]
+    else:
+        checked = []
+        for (regex_rule, regex_type), (count, first) in zip(
+                valid, colregex_rule_failures(df, columnname, valid)):
+            if count == 0:
+                checked.append((True, ''))
+            else:
+                checked.append(_regex_failure(columnname, regex_rule,
+                                              regex_type, first))
+    remaining = iter(checked)
+    return [next(remaining) if result is None else result
+            for result in results]
+
+
 def colcheck_val(df: pd.DataFrame, columnname: str, val: Union[int, float],
-                 operator: str = '==') -> Tuple[bool, str]:
+                 operator: str = '==', actual_val: Optional[Any] = None,
+                 differ: Optional[bool] = None) -> Tuple[bool, str]:
     '''
     Check if the values in a column are equal to, greater than or less than
     a specified value.
 
-    The operator parameter can be '==', '>=' or '<='.
+    The operator parameter can be '==', '>=' or '<='. The minimum (for
+    '>=') or maximum (for '<=') value of the column, or whether it has a
+    value different from val (for '=='), are used if already computed (see
+    dfcolumn_extremes and dfcolumns_differ).
     '''
     if operator not in ['==', '<=', '>=']:
         return False, (f'column {columnname} value check '
                        f'operator {operator} not recognised')
     if operator == '==':
-        if sum(df[columnname] == val) == len(df):
+        # nulls are not equal to the value
+        if differ is None:
+            differ = _any_in_blocks(df[columnname],
+                                    lambda block: block != val)
+        if not differ:
             return True, ''
         else:
             return False, (f'column {columnname} want all values = {val}, '
                            f'got different values')
+    if actual_val is None:
+        actual_val = df[columnname].min() if operator == '>=' else \
+            df[columnname].max()
     if operator == '>=':
-        actual_val = df[columnname].min()
         if actual_val >= val:
             return True, ''
     if operator == '<=':
-        actual_val = df[columnname].max()
         if actual_val <= val:
             return True, ''
     return False, (f'column {columnname} want value {operator} '
                    f'{val}, got {actual_val}')
 
 
-def colcheck_iqr(df: pd.DataFrame, columnname: str) -> Tuple[bool, str]:
+def colcheck_iqr(df: pd.DataFrame, columnname: str,
+                 method: str = 'exact') -> Tuple[bool, str]:
     '''
     Check if the values in a column are outliers greater than or less than
     1.5 times the inter-quartile range plus Q3 or Q1 respectively
+
+    The method parameter can be 'exact' to calculate quartiles from all
+    values or 'sketch' to estimate them with a bounded memory KLL sketch.
     '''
-    q25, q75 = np.percentile(df[columnname], [25, 75])
+    if method not in ['exact', 'sketch']:
+        return False, (f'column {columnname} outlier check '
+                       f'method {method} not recognised')
+    values = df[columnname].dropna()
+    if len(values) == 0:
+        return True, ''
+    if method == 'exact':
+        q25, q75 = np.percentile(values, [25, 75])
+    else:
+        sketch = dwsk.KllSketch()
+        sketch.update(values.to_numpy())
+        q25, q75 = sketch.quantile(0.25), sketch.quantile(0.75)
     upper = round(q75 + (q75 - q25) * 1.5, 2)
     lower = round(q25 - (q75 - q25) * 1.5, 2)
-    if max(df[columnname]) > upper:
-        return False, (f'column {columnname} outlier above 1.5xIQR {upper}: '
-                       f'{max(df[columnname])}')
-    if min(df[columnname]) < lower:
-        return False, (f'column {columnname} outlier below 1.5xIQR {lower}: '
-                       f' {min(df[columnname])}')
-    return True, ''
+    count = int(((values > upper) | (values < lower)).sum())
+    if count == 0:
+        return True, ''
+    return False, (f'column {columnname} want 0 outliers outside 1.5xIQR '
+                   f'{lower} to {upper}, got {count}')
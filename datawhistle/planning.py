@@ -0,0 +1,264 @@
+import io
+import os
+import re
+import sys
+from typing import Any, List, Optional, Tuple
+import pandas as pd     # type: ignore
+import datawhistle.compressed as dwcz
+import datawhistle.streaming as dwsm
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None  # type: ignore
+
+# Planning how to check a CSV file within a memory budget. The memory a
+# row takes once parsed is estimated from a sample of the first rows of
+# the file, read with the column types the rules declare, and the number
+# of rows from the size of the file (and, for compressed files, how much
+# the sample was compressed). A plan then loads the whole file if it fits,
+# or else checks it a chunk of rows at a time, choosing the chunk size and
+# the number of chunks read ahead, and spilling hashes of distinct values
+# (for duplicate and distinct count checks) to disk beyond their share of
+# the budget. Data on standard input or a named pipe cannot be sampled
+# before it is read, so it is streamed assuming rows of ASSUMED_ROW_BYTES.
+
+# bytes of data sampled to estimate the memory used by a row
+SAMPLE_BYTES = 1 << 20
+# peak memory used to parse and check a DataFrame, as a multiple of its
+# size in memory (parser buffers and temporaries made by checks)
+MEMORY_OVERHEAD = 1.5
+# peak memory of a set of value hashes (8 bytes each), as a multiple of
+# its size, while merging a chunk's hashes into it
+HASH_SET_OVERHEAD = 3
+# memory used by a row of data that could not be sampled
+ASSUMED_ROW_BYTES = 1024
+MIN_CHUNKSIZE = 1000
+MAX_CHUNKSIZE = 1000000
+_UNITS = {'': 1, 'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30, 'T': 1 << 40}
+
+
+def parse_memory_size(text: str) -> int:
+    '''
+    Parse a number of bytes with an optional binary unit, e.g. 512M, 4G or
+    1.5GiB.
+    '''
+    match = re.fullmatch(r'\s*([0-9]+(?:\.[0-9]*)?)\s*([KMGT]?)(?:i?B)?\s*',
+                         text, re.IGNORECASE)
+    if match is None:
+        raise ValueError(f'invalid memory size {text}')
+    return int(float(match.group(1)) * _UNITS[match.group(2).upper()])
+
+
+def format_memory_size(size: float) -> str:
+    '''Format a number of bytes with a binary unit, e.g. 1.5 GiB.'''
+    for unit in ['T', 'G', 'M', 'K']:
+        if size >= _UNITS[unit]:
+            return f'{size / _UNITS[unit]:.1f} {unit}iB'
+    return f'{size:.0f} B'
+
+
+def peak_memory(children: bool = False) -> Optional[int]:
+    '''
+    The peak resident memory of this process so far in bytes (or of the
+    largest of its child processes that have ended), None if it cannot be
+    measured.
+    '''
+    if resource is None:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class DataEstimate:
+    '''Estimated size of the data of a CSV file, once parsed.'''
+
+    def __init__(self, row_bytes: Optional[float] = None,
+                 rows: Optional[int] = None,
+                 string_bytes: float = 0.0,
+                 compression_ratio: float = 1.0):
+        # memory used by a parsed row, None if it could not be sampled
+        self.row_bytes: Optional[float] = row_bytes
+        # number of rows, None if unknown (e.g. data on standard input)
+        self.rows: Optional[int] = rows
+        # bytes of text in the string columns of a row
+        self.string_bytes: float = string_bytes
+        # decompressed bytes per byte of the file
+        self.compression_ratio: float = compression_ratio
+
+
+def _sample(csvfile: str) -> Tuple[bytes, int, int]:
+    # the first SAMPLE_BYTES of data, the number of bytes of the file read
+    # to give the data decompressed from its first block, and the number
+    # of bytes of that data
+    if dwcz.detect_compression(csvfile) is None:
+        with dwcz.open_data_file(csvfile) as stream:
+            sample = stream.read(SAMPLE_BYTES)
+        return sample, len(sample), len(sample)
+    positions: List[int] = []
+    with dwcz.open_data_file(csvfile, 1, positions.append) as stream:
+        sample = stream.read(SAMPLE_BYTES)
+        if not positions:
+            return sample, 0, len(sample)
+        decompressed = len(sample)
+        while positions[-1] == positions[0]:
+            block = stream.read(1 << 16)
+            if not block or positions[-1] != positions[0]:
+                # the end, or (mostly) data decompressed from the next block
+                break
+            decompressed += len(block)
+    return sample, positions[0], decompressed
+
+
+def estimate_data(csvfile: str,
+                  dtypes: Optional[dict] = None) -> DataEstimate:
+    '''
+    Estimate the size of the data of a CSV file from a sample of its first
+    rows, parsing columns with the given types (e.g. str for the string
+    and datetime columns of the rules).
+    '''
+    if dwcz.is_stream(csvfile):
+        return DataEstimate()
+    sample, read, decompressed = _sample(csvfile)
+    size = os.path.getsize(csvfile)
+    complete = read >= size and decompressed == len(sample)
+    if not complete:
+        # leave out the last, possibly partial, line
+        sample = sample[:sample.rfind(b'\n') + 1]
+    try:
+        df = pd.read_csv(io.BytesIO(sample), dtype=dtypes)
+    except pd.errors.EmptyDataError:
+        return DataEstimate(0.0, 0)
+    except pd.errors.ParserError:
+        # e.g. the sample ends within a quoted field
+        return DataEstimate()
+    ratio = decompressed / read if read > 0 else 1.0
+    if len(df) == 0:
+        return DataEstimate(0.0, 0, compression_ratio=ratio)
+    row_bytes = float(df.memory_usage(deep=True).sum()) / len(df)
+    strings = df.select_dtypes(include=['object', 'string'])
+    string_bytes = float(sum(strings[name].str.len().sum()
+                             for name in strings.columns)) / len(df)
+    if complete:
+        rows = len(df)
+    else:
+        rows = int(size * ratio * len(df) / len(sample))
+    return DataEstimate(row_bytes, rows, string_bytes, ratio)
+
+
+class ExecutionPlan:
+    '''How to check a CSV file within a memory budget.'''
+
+    def __init__(self, max_memory: int, estimate: DataEstimate):
+        self.max_memory: int = max_memory
+        self.estimate: DataEstimate = estimate
+        # memory used before loading data
+        self.baseline: int = 0
+        # load the whole file, or check it a chunk at a time
+        self.streaming: bool = False
+        self.chunksize: int = dwsm.DEFAULT_CHUNKSIZE
+        self.prefetch: int = dwsm.DEFAULT_PREFETCH
+        # processes checking string columns of a loaded file
+        self.processes: int = 1
+        # see StreamingDatasetCheckSuite.hash_max_bytes
+        self.hash_max_bytes: Optional[int] = None
+        # estimated peak memory
+        self.memory: float = 0.0
+
+    @property
+    def fits(self) -> bool:
+        '''Whether the estimated peak memory is within the budget.'''
+        return self.memory <= self.max_memory
+
+    def summary(self) -> str:
+        estimate = self.estimate
+        if estimate.rows is None:
+            data = 'rows of unknown size'
+        else:
+            data = f'about {estimate.rows} rows'
+        if not self.streaming:
+            plan = f'load the whole file ({data})'
+            if self.processes > 1:
+                plan += (f', checking string columns in {self.processes} '
+                         'processes')
+        else:
+            plan = (f'stream {data} in chunks of {self.chunksize} rows, '
+                    f'{self.prefetch} read ahead')
+            if self.hash_max_bytes is not None:
+                plan += (', spilling hashes of distinct values to disk '
+                         'beyond '
+                         f'{format_memory_size(self.hash_max_bytes)} each')
+        return (f'{plan}; estimated peak memory '
+                f'{format_memory_size(self.memory)} of '
+                f'{format_memory_size(self.max_memory)}')
+
+
+def _chunk_plan(plan: ExecutionPlan, row_bytes: float,
+                available: float) -> None:
+    # the largest chunks that fit in the memory available, reading ahead
+    # if chunks of at least MIN_CHUNKSIZE rows still fit
+    for prefetch in [dwsm.DEFAULT_PREFETCH, 0]:
+        chunks = prefetch + 2
+        chunksize = int(available /
+                        (chunks * max(row_bytes, 1.0) * MEMORY_OVERHEAD))
+        if chunksize >= MIN_CHUNKSIZE:
+            break
+    plan.prefetch = prefetch
+    plan.chunksize = max(MIN_CHUNKSIZE, min(chunksize, MAX_CHUNKSIZE))
+    plan.memory += chunks * plan.chunksize * row_bytes * MEMORY_OVERHEAD
+
+
+def plan_execution(estimate: DataEstimate, suite: Any, max_memory: int,
+                   processes: int = 1, streaming: bool = False,
+                   baseline: Optional[int] = None) -> ExecutionPlan:
+    '''
+    Plan checking data of an estimated size with the rules of a
+    StreamingDatasetCheckSuite in at most max_memory bytes, loading the
+    whole file if it fits (checking string columns in up to the given
+    number of processes if their shared copy also fits) unless streaming
+    is set. The baseline is the memory used before loading data (by
+    default the peak memory so far). If no plan fits (e.g. the baseline
+    alone is over max_memory), the plan using least memory is returned,
+    with fits False.
+    '''
+    if baseline is None:
+        baseline = peak_memory() or 0
+    plan = ExecutionPlan(max_memory, estimate)
+    plan.baseline = baseline
+    plan.memory = float(baseline)
+    available = max(max_memory - baseline, 0)
+    rows = estimate.rows
+    row_bytes = estimate.row_bytes
+    if row_bytes is None:
+        row_bytes = ASSUMED_ROW_BYTES
+    load_bytes = 0.0 if rows is None else rows * row_bytes * MEMORY_OVERHEAD
+    if not streaming and rows is not None and load_bytes <= available:
+        plan.memory += load_bytes
+        # the pool copies string columns to shared memory and each worker
+        # makes Python strings of its rows
+        pool_bytes = 2 * rows * estimate.string_bytes
+        if processes > 1 and load_bytes + pool_bytes <= available:
+            plan.processes = processes
+            plan.memory += pool_bytes
+        return plan
+    plan.streaming = True
+    hash_sets = int(not suite.allow_duplicate_rows) + \
+        sum(column.keeps_hashes() for column in suite.columns)
+    if hash_sets == 0:
+        _chunk_plan(plan, row_bytes, available)
+        return plan
+    hash_bytes = None if rows is None else \
+        rows * 8 * HASH_SET_OVERHEAD * hash_sets
+    if hash_bytes is not None and hash_bytes <= available / 2:
+        # all hashes fit in memory, leaving the rest for chunks
+        plan.memory += hash_bytes
+        _chunk_plan(plan, row_bytes, available - hash_bytes)
+        return plan
+    # half the memory for hashes, spilling the rest to disk
+    plan.hash_max_bytes = max(int(available / 2 /
+                                  (HASH_SET_OVERHEAD * hash_sets)), 8)
+    plan.memory += available / 2
+    _chunk_plan(plan, row_bytes, available / 2)
+    return plan
@@ -0,0 +1,196 @@
+from __future__ import annotations
+import concurrent.futures
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+import numpy as np      # type: ignore
+import pandas as pd     # type: ignore
+
+# Checking string values in a pool of worker processes. Checks of string
+# values (blanks, regular expressions) evaluate Python string methods value
+# by value and hold the GIL, so threads do not run them in parallel. A
+# column is copied once to a block of shared memory in the Arrow string
+# layout (a validity bitmap, the offset of each value and the UTF-8 bytes
+# of all values, each buffer aligned to 64 bytes), and workers read the
+# values of their range of rows from it, so the column is never pickled.
+# Each worker returns the first failing value in its range of rows, and the
+# first of those is the first failing value of the column, so checks give
+# the same results as checking the column in a single process.
+
+# columns with fewer rows are checked in the calling process
+PROCESS_MIN_ROWS = 100000
+# ranges of rows per worker process, so that workers finishing early
+# take over the remaining rows of slower workers
+RANGES_PER_PROCESS = 4
+_ALIGNMENT = 64
+
+# a test of the values of a range of rows (None for nulls), returning the
+# position of the first failing value in the range and details of the
+# failure, or None if all values pass
+RangeTest = Callable[[List[Optional[str]]], Optional[Tuple[int, Any]]]
+
+
+class _Layout(NamedTuple):
+    # name of the shared memory block and the number of values in it
+    name: str
+    length: int
+    # offsets of the offsets and data buffers (the bitmap is at 0)
+    offsets: int
+    data: int
+
+
+def _aligned(size: int) -> int:
+    return -(-size // _ALIGNMENT) * _ALIGNMENT
+
+
+def _buffer(block: shared_memory.SharedMemory) -> memoryview:
+    # the memory of a block, which has none once closed
+    buf = block.buf
+    if buf is None:
+        raise ValueError(f'shared memory {block.name} is closed')
+    return buf
+
+
+def _values(layout: _Layout, start: int, end: int) -> List[Optional[str]]:
+    # runs in a worker process: the values of rows from start to end
+    block = shared_memory.SharedMemory(layout.name)
+    try:
+        buf = _buffer(block)
+        bitmap = np.frombuffer(buf, np.uint8, -(-end // 8))
+        valid = np.unpackbits(bitmap, bitorder='little')[start:end]
+        del bitmap
+        offsets = np.frombuffer(buf, np.int64, end - start + 1,
+                                layout.offsets + 8 * start).tolist()
+        data = bytes(buf[layout.data + offsets[0]:
+                         layout.data + offsets[-1]])
+        del buf
+    finally:
+        block.close()
+    base = offsets[0]
+    values: List[Optional[str]]
+    if data.isascii():
+        # byte offsets are character offsets, decode all values at once
+        text = data.decode('ascii')
+        values = [text[begin - base:end - base]
+                  for begin, end in zip(offsets, offsets[1:])]
+    else:
+        values = [data[begin - base:end - base].decode()
+                  for begin, end in zip(offsets, offsets[1:])]
+    if not valid.all():
+        for row in np.flatnonzero(valid == 0).tolist():
+            values[row] = None
+    return values
+
+
+def _first_failure(layout: _Layout, start: int, end: int,
+                   test: RangeTest) -> Optional[Tuple[int, Any]]:
+    # runs in a worker process
+    found = test(_values(layout, start, end))
+    if found is None:
+        return None
+    return start + found[0], found[1]
+
+
+class SharedStrings:
+    '''A string column copied to shared memory in the Arrow string layout.'''
+
+    def __init__(self, series: pd.Series):
+        valid = series.notna().to_numpy()
+        values = series.to_numpy(dtype=object, na_value='')
+        text = ''.join(values)
+        if text.isascii():
+            # characters are bytes, encode all values at once
+            data = text.encode('ascii')
+            lengths = np.fromiter(map(len, values), np.int64, len(values))
+        else:
+            encoded = list(map(str.encode, values))
+            data = b''.join(encoded)
+            lengths = np.fromiter(map(len, encoded), np.int64, len(values))
+        del text
+        bitmap = np.packbits(valid, bitorder='little')
+        offsets_at = _aligned(len(bitmap))
+        data_at = offsets_at + _aligned(8 * (len(values) + 1))
+        size = data_at + len(data)
+        self.block = shared_memory.SharedMemory(create=True,
+                                                size=max(size, 1))
+        self.layout = _Layout(self.block.name, len(values), offsets_at,
+                              data_at)
+        buf = _buffer(self.block)
+        buffer = np.ndarray(size, np.uint8, buf)
+        buffer[:len(bitmap)] = bitmap
+        offsets = buffer[offsets_at:data_at].view(np.int64)
+        offsets[0] = 0
+        np.cumsum(lengths, out=offsets[1:len(values) + 1])
+        del buffer, offsets
+        buf[data_at:size] = data
+        del buf
+
+    def close(self) -> None:
+        '''Release the shared memory.'''
+        self.block.close()
+        self.block.unlink()
+
+
+class StringCheckPool:
+    '''
+    A pool of worker processes checking the values of string columns, to be
+    used as a context manager. Columns are copied to shared memory when
+    first checked, and released when the pool is shut down.
+    '''
+
+    def __init__(self, processes: int,
+                 min_rows: Optional[int] = None):
+        self.processes: int = processes
+        # columns with fewer rows are checked in the calling process
+        self.min_rows: int = PROCESS_MIN_ROWS if min_rows is None \
+            else min_rows
+        self._executor = concurrent.futures.ProcessPoolExecutor(processes)
+        self._columns: Dict[str, SharedStrings] = {}
+
+    def __enter__(self) -> StringCheckPool:
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        '''Stop the worker processes and release shared memory.'''
+        self._executor.shutdown(cancel_futures=True)
+        for column in self._columns.values():
+            column.close()
+        self._columns = {}
+
+    def accepts(self, series: pd.Series) -> bool:
+        '''Check if a column is worth checking in the worker processes.'''
+        if len(series) < self.min_rows:
+            return False
+        if isinstance(series.dtype, pd.StringDtype):
+            return True
+        return series.dtype == object and \
+            pd.api.types.infer_dtype(series, skipna=True) == 'string'
+
+    def first_failure(self, columnname: str, series: pd.Series,
+                      test: RangeTest) -> Optional[Tuple[int, Any]]:
+        '''
+        Find the first row of a column with a value failing a test of the
+        values of ranges of rows, returning its position and the details of
+        the failure, or None if all values pass. The test must be picklable,
+        e.g. a module level function or a functools.partial of one.
+        '''
+        if columnname not in self._columns:
+            self._columns[columnname] = SharedStrings(series)
+        layout = self._columns[columnname].layout
+        rangesize = -(-layout.length //
+                      (self.processes * RANGES_PER_PROCESS)) or 1
+        futures: List[concurrent.futures.Future] = [
+            self._executor.submit(_first_failure, layout, start,
+                                  min(start + rangesize, layout.length), test)
+            for start in range(0, layout.length, rangesize)]
+        try:
+            for future in futures:
+                found = future.result()
+                if found is not None:
+                    return found
+            return None
+        finally:
+            for future in futures:
+                future.cancel()
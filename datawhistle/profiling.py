@@ -0,0 +1,120 @@
+import cProfile
+import io
+import json
+import pstats
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import datawhistle.bqchecks as dwbc
+
+# Per check timing and resource use. A CheckProfiler set on a checksuite
+# is called by runchecks to run each check, recording wall time, CPU time,
+# peak memory allocated, rows scanned and, for BigQuery, queries run and
+# bytes billed. Optionally each check is also run under cProfile, keeping
+# the profiles of the slowest checks (cProfile slows checks that run a lot
+# of Python code, so wall and CPU times are then less accurate).
+
+CPROFILE_LINES = 25
+
+
+class CheckProfiler:
+    '''Record timing and resource use of each check run by a checksuite.'''
+
+    def __init__(self, cprofile_top: int = 0, trace_memory: bool = True):
+        # number of slowest checks to keep cProfile statistics for
+        self.cprofile_top: int = cprofile_top
+        self.trace_memory: bool = trace_memory
+        self.records: List[Dict[str, Any]] = []
+        # (wall seconds, record number, statistics) of the slowest checks
+        self._profiles: List[Tuple[float, int, pstats.Stats]] = []
+
+    def run(self, check: Callable[[], Tuple[bool, str]],
+            columnname: Optional[str] = None,
+            rows_scanned: Optional[int] = None) -> Tuple[bool, str]:
+        '''Run a check method, recording its timing and resource use.'''
+        bq_before = dict(dwbc.query_stats)
+        started_tracing = False
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+            traced_before = tracemalloc.get_traced_memory()[0]
+        profile = cProfile.Profile() if self.cprofile_top > 0 else None
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        if profile is not None:
+            profile.enable()
+        try:
+            passed, message = check()
+        finally:
+            if profile is not None:
+                profile.disable()
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            peak: Optional[int] = None
+            if self.trace_memory:
+                peak = max(0, tracemalloc.get_traced_memory()[1] -
+                           traced_before)
+                if started_tracing:
+                    tracemalloc.stop()
+        self.records.append({
+            'check': getattr(check, '__name__', str(check)),
+            'column': columnname,
+            'passed': passed,
+            'wall_seconds': wall,
+            'cpu_seconds': cpu,
+            'peak_memory_bytes': peak,
+            'rows_scanned': rows_scanned,
+            'bq_queries': dwbc.query_stats['queries'] - bq_before['queries'],
+            'bq_bytes_billed': (dwbc.query_stats['bytes_billed'] -
+                                bq_before['bytes_billed']),
+        })
+        if profile is not None:
+            self._keep_profile(wall, len(self.records) - 1, profile)
+        return passed, message
+
+    def _keep_profile(self, wall: float, number: int,
+                      profile: cProfile.Profile) -> None:
+        if len(self._profiles) == self.cprofile_top and \
+                wall <= self._profiles[-1][0]:
+            return
+        self._profiles.append((wall, number, pstats.Stats(profile)))
+        self._profiles.sort(key=lambda item: item[0], reverse=True)
+        del self._profiles[self.cprofile_top:]
+
+    def report(self) -> Dict[str, Any]:
+        '''Summarise the checks run, slowest first.'''
+        slowest = []
+        profiles = {number: stats for _, number, stats in self._profiles}
+        order = sorted(range(len(self.records)),
+                       key=lambda i: self.records[i]['wall_seconds'],
+                       reverse=True)
+        for number in order[:max(self.cprofile_top, 10)]:
+            entry = dict(self.records[number], index=number)
+            if number in profiles:
+                entry['cprofile'] = _format_stats(profiles[number])
+            slowest.append(entry)
+        return {
+            'checks_run': len(self.records),
+            'total_wall_seconds': sum(r['wall_seconds']
+                                      for r in self.records),
+            'total_cpu_seconds': sum(r['cpu_seconds'] for r in self.records),
+            'bq_queries': sum(r['bq_queries'] for r in self.records),
+            'bq_bytes_billed': sum(r['bq_bytes_billed']
+                                   for r in self.records),
+            'checks': self.records,
+            'slowest': slowest,
+        }
+
+    def write_report(self, filename: str) -> None:
+        '''Write the report to a JSON file.'''
+        with open(filename, 'w') as stream:
+            json.dump(self.report(), stream, indent=2)
+
+
+def _format_stats(stats: pstats.Stats) -> str:
+    stream = io.StringIO()
+    stats.stream = stream  # type: ignore
+    stats.sort_stats('cumulative').print_stats(CPROFILE_LINES)
+    return stream.getvalue()
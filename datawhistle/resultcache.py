@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+from typing import List, Optional
+import datawhistle as dw
+
+# A content addressed cache of check results. Results are keyed by a hash
+# of the data file, the normalised rules and the DataWhistle version, so
+# checking the same data against the same rules again returns the stored
+# error messages without loading the data.
+
+DEFAULT_MAX_ENTRIES = 1000
+_READ_BLOCKSIZE = 1 << 20
+
+
+def hash_file(filename: str) -> str:
+    '''Hash the contents of a file, reading it in blocks.'''
+    hasher = hashlib.blake2b()
+    with open(filename, 'rb') as stream:
+        block = stream.read(_READ_BLOCKSIZE)
+        while block:
+            hasher.update(block)
+            block = stream.read(_READ_BLOCKSIZE)
+    return hasher.hexdigest()
+
+
+class ResultCache:
+    '''
+    Check results stored as one small json file per key in a directory.
+    The least recently used results are evicted when the cache holds more
+    than max_entries results.
+    '''
+
+    def __init__(self, cachedir: str,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.cachedir: str = cachedir
+        self.max_entries: int = max_entries
+        self.hits: int = 0
+        self.misses: int = 0
+        os.makedirs(cachedir, exist_ok=True)
+
+    def key(self, datafile: str, rules_fingerprint: str) -> str:
+        '''
+        Cache key for checking a data file against rules, given a
+        fingerprint of the rules (see rule_plan_fingerprint).
+        '''
+        parts = [hash_file(datafile), rules_fingerprint, dw.__version__]
+        return hashlib.blake2b('/'.join(parts).encode('utf-8'),
+                               digest_size=20).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cachedir, f'{key}.json')
+
+    def get(self, key: str) -> Optional[List[str]]:
+        '''Get stored error messages, None if there are none.'''
+        path = self._path(key)
+        try:
+            with open(path, 'r') as stream:
+                messages = json.load(stream)
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        if not isinstance(messages, list):
+            self.misses += 1
+            return None
+        # the modification time records when an entry was last used
+        os.utime(path)
+        self.hits += 1
+        return messages
+
+    def put(self, key: str, messages: List[str]) -> None:
+        '''Store error messages, evicting least recently used results.'''
+        path = self._path(key)
+        tmppath = f'{path}.{os.getpid()}.tmp'
+        with open(tmppath, 'w') as stream:
+            json.dump(messages, stream)
+        os.replace(tmppath, path)
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for entry in os.scandir(self.cachedir):
+            if entry.name.endswith('.json'):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    pass
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
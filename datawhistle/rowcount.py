@@ -0,0 +1,418 @@
+import concurrent.futures
+import mmap
+import os
+import re
+from typing import Any, BinaryIO, List, NamedTuple, Optional, Tuple
+import numpy as np      # type: ignore
+import datawhistle.compressed as dwcz
+
+# Counting the rows of a CSV file without parsing it, for rules that only
+# check the number of rows. The file is memory mapped and scanned in
+# blocks for newlines and double quotes with numpy. A newline ends a line
+# unless it is inside a quoted field. As for pandas.read_csv, a quote
+# starts a quoted field only at the start of a field (the start of a line
+# or just after a comma), and anywhere else is a literal character. In a
+# quoted field a quote ends the field unless it is doubled.
+# Lines with nothing but whitespace are skipped, as pandas.read_csv does.
+# pandas also ends lines at a carriage return not followed by a newline
+# (old Mac line ends), so files with any are parsed rather than counted.
+#
+# Whether a quote starts, ends or is within a quoted field only depends on
+# the state before the run of adjacent quotes it is in, the byte before
+# the run and the length of the run. A run of odd length starting a field
+# flips the state, one of odd length elsewhere leaves (or stays outside)
+# quoted fields and one of even length keeps the state, so the state after
+# each run is found with cumulative sums rather than byte by byte.
+#
+# A block does not know whether it starts inside a quoted field, so it is
+# scanned for both cases and blocks are stitched together in file order.
+# Blocks can therefore start at any byte other than a quote (so that runs
+# of quotes are not split) and large files are scanned in parallel by
+# threads (numpy releases the GIL while scanning).
+#
+# Compressed files are decompressed as they are read and scanned a block at
+# a time in order, carrying the state where the last block ended and
+# whether its last line has started with non-blank bytes.
+
+BLOCK_BYTES = 1 << 24
+# files smaller than this are scanned by a single thread
+PARALLEL_MIN_BYTES = 1 << 26
+_NEWLINE = ord('\n')
+_CR = ord('\r')
+_QUOTE = ord('"')
+_BLANK_BYTES = np.frombuffer(b' \t\r\n', np.uint8)
+# bytes after which a field starts
+_FIELD_ENDS = b',\n\r'
+_STARTS_FIELD = np.zeros(256, dtype=bool)
+_STARTS_FIELD[np.frombuffer(_FIELD_ENDS, np.uint8)] = True
+_BOM = b'\xef\xbb\xbf'
+_CONTENT = re.compile(rb'[^ \t\r\n]')
+_LONE_CR = re.compile(rb'\r(?!\n)')
+_QUOTES = re.compile(rb'"*')
+
+
+class ScanState(NamedTuple):
+    '''
+    Where a scan of CSV data stopped: whether inside a quoted field, at
+    the start of a field (where a quote starts a quoted field), and after
+    a quote in a quoted field, which ends the field unless the next byte
+    is another quote.
+    '''
+    inside: bool = False
+    field_start: bool = True
+    quote: bool = False
+
+    def ends_inside(self) -> bool:
+        '''Whether data ending here ends inside a quoted field.'''
+        return self.inside and not self.quote
+
+
+class _Lines(NamedTuple):
+    # number of non-blank lines between the first and last line end
+    inner: int
+    # offsets of the first and last line end, -1 if there are none
+    first: int
+    last: int
+
+
+class _Block(NamedTuple):
+    # lines if the block starts outside or inside a quoted field
+    outside: _Lines
+    inside: _Lines
+    # whether the block ends inside a quoted field if it starts outside
+    # or inside one
+    ends_inside: Tuple[bool, bool]
+    # whether the block has a carriage return not followed by a newline
+    lone_cr: bool
+
+
+def _end_state(data: np.ndarray, inside: bool) -> ScanState:
+    # the state at the end of data not ending with a run of quotes
+    return ScanState(inside, not inside and bool(_STARTS_FIELD[data[-1]]))
+
+
+class _Runs(NamedTuple):
+    # where each run of adjacent quotes in a block starts, whether it
+    # starts a field and whether it is of odd length
+    starts: np.ndarray
+    starts_field: np.ndarray
+    odd: np.ndarray
+    # the offset just after the last run
+    end: int
+
+
+def _quote_runs(data: np.ndarray, quotes: np.ndarray,
+                state: ScanState) -> _Runs:
+    gaps = np.flatnonzero(np.diff(quotes) != 1) + 1
+    if len(gaps) == len(quotes) - 1:
+        # no quotes are adjacent, as is usual
+        starts = quotes
+        odd = np.ones(len(quotes), dtype=bool)
+    else:
+        firsts = np.concatenate(([0], gaps))
+        starts = quotes[firsts]
+        odd = (np.diff(firsts, append=len(quotes)) & 1).astype(bool)
+    starts_field = _STARTS_FIELD[data[starts - 1]]
+    if starts[0] == 0:
+        # a run continuing one that the data before ended with is within
+        # a quoted field
+        starts_field[0] = state.field_start and not state.quote
+        odd[0] ^= state.quote
+    return _Runs(starts, starts_field, odd, int(quotes[-1]) + 1)
+
+
+def _flipped(runs: _Runs) -> Tuple[np.ndarray, int]:
+    # whether the data is inside a quoted field after each run if it
+    # starts outside one, and the first run after which that does not
+    # depend on the state it starts in. An odd run starting a field flips
+    # the state, any other odd run leaves (or stays outside) quoted fields
+    # and an even run keeps the state.
+    flips = runs.starts_field & runs.odd
+    leaves = runs.odd & ~flips
+    flipped = np.cumsum(flips, dtype=np.int64)
+    # flips up to the last leave, as the count of flips only increases
+    flipped -= np.maximum.accumulate(np.where(leaves, flipped, 0))
+    first_leave = int(np.argmax(leaves)) if leaves.any() else len(leaves)
+    return (flipped & 1).astype(bool), first_leave
+
+
+def _after(flipped: np.ndarray, first_leave: int,
+           inside: bool) -> np.ndarray:
+    # whether the data is inside a quoted field after each run
+    if not inside:
+        return flipped
+    after = flipped.copy()
+    after[:first_leave] ^= True
+    return after
+
+
+def _runs_end_state(data: np.ndarray, runs: _Runs, after: np.ndarray,
+                    inside: bool) -> ScanState:
+    last = len(runs.starts) - 1
+    if runs.end < len(data):
+        return _end_state(data, bool(after[last]))
+    # the data ends with a run of quotes, which leaves a quoted field
+    # after an odd number of quotes within it, unless the next byte is
+    # another quote
+    within = bool(after[last - 1]) if last > 0 else inside
+    if runs.odd[last] if within else \
+            runs.starts_field[last] and not runs.odd[last]:
+        return ScanState(True, False, True)
+    return ScanState(bool(after[last]), False)
+
+
+def _quoted(data: np.ndarray, positions: np.ndarray,
+            state: ScanState) -> Tuple[np.ndarray, ScanState]:
+    # whether the bytes at positions (other than quotes) are inside quoted
+    # fields, given the state the data starts in, with the state it ends in
+    if len(data) == 0:
+        return np.zeros(len(positions), dtype=bool), state
+    # a quote ending the data before and not followed by another ended a
+    # quoted field
+    inside = state.inside and not (state.quote and data[0] != _QUOTE)
+    quotes = np.flatnonzero(data == _QUOTE)
+    if len(quotes) == 0:
+        return (np.full(len(positions), inside, dtype=bool),
+                _end_state(data, inside))
+    runs = _quote_runs(data, quotes, state)
+    after = _after(*_flipped(runs), inside)
+    before = np.searchsorted(runs.starts, positions) - 1
+    return (np.where(before >= 0, after[before], inside),
+            _runs_end_state(data, runs, after, inside))
+
+
+def _is_blank(buffer: Any, start: int, end: int) -> bool:
+    return _CONTENT.search(buffer, start, end) is None
+
+
+def _lines(buffer: Any, data: np.ndarray, offset: int,
+           ends: np.ndarray) -> _Lines:
+    if len(ends) == 0:
+        return _Lines(0, -1, -1)
+    # most lines start with a non-blank byte, only check the others
+    starts = ends[:-1] + 1
+    maybe_blank = np.flatnonzero(np.isin(data[starts], _BLANK_BYTES))
+    blank = sum(_is_blank(buffer, offset + starts[i], offset + ends[i + 1])
+                for i in maybe_blank)
+    return _Lines(len(ends) - 1 - blank, offset + int(ends[0]),
+                  offset + int(ends[-1]))
+
+
+def _has_lone_cr(buffer: Any, data: np.ndarray, start: int,
+                 end: int) -> bool:
+    if buffer.find(b'\r', start, end) < 0:
+        return False
+    following = np.flatnonzero(data == _CR) + 1
+    if following[-1] == len(data):
+        # the last byte, followed by the first byte of the next block
+        if buffer[end:end + 1] != b'\n':
+            return True
+        following = following[:-1]
+    return bool((data[following] != _NEWLINE).any())
+
+
+def _scan_block(buffer: Any, start: int, end: int,
+                field_start: bool) -> _Block:
+    # the byte after the block is not a quote, so a run of quotes ending
+    # the block is whole
+    data = np.frombuffer(buffer, np.uint8, end - start, start)
+    newlines = np.flatnonzero(data == _NEWLINE)
+    lone_cr = _has_lone_cr(buffer, data, start, end)
+    # finding a byte is faster than comparing every byte, so only look for
+    # all quotes in blocks that have any
+    if buffer.find(b'"', start, end) < 0:
+        return _Block(_lines(buffer, data, start, newlines),
+                      _Lines(0, -1, -1), (False, True), lone_cr)
+    quotes = np.flatnonzero(data == _QUOTE)
+    runs = _quote_runs(data, quotes, ScanState(False, field_start))
+    flipped, first_leave = _flipped(runs)
+    before = np.searchsorted(runs.starts, newlines) - 1
+    blocks = []
+    for inside in [False, True]:
+        after = _after(flipped, first_leave, inside)
+        quoted = np.where(before >= 0, after[before], inside)
+        blocks.append((_lines(buffer, data, start, newlines[~quoted]),
+                       _runs_end_state(data, runs, after,
+                                       inside).ends_inside()))
+    (outside, outside_end), (inside_lines, inside_end) = blocks
+    return _Block(outside, inside_lines, (outside_end, inside_end),
+                  lone_cr)
+
+
+def _block_ranges(buffer: Any, start: int,
+                  size: int) -> List[Tuple[int, int]]:
+    # ranges of about BLOCK_BYTES, moved on past any run of quotes so that
+    # no block starts with a quote
+    offsets = []
+    offset = start
+    while offset < size:
+        offsets.append(offset)
+        offset = min(offset + BLOCK_BYTES, size)
+        run = _QUOTES.match(buffer, offset)
+        if run is not None:
+            offset = run.end()
+    return list(zip(offsets, offsets[1:] + [size]))
+
+
+def _count_lines(buffer: Any, size: int,
+                 blocks: List[_Block]) -> Tuple[int, bool]:
+    # stitch blocks together, returning the number of non-blank lines and
+    # whether the file ends inside a quoted field
+    count = 0
+    inside = False
+    last_end = -1
+    for block in blocks:
+        lines = block.inside if inside else block.outside
+        if lines.first >= 0:
+            if not _is_blank(buffer, last_end + 1, lines.first):
+                count += 1
+            count += lines.inner
+            last_end = lines.last
+        inside = block.ends_inside[inside]
+    if not _is_blank(buffer, last_end + 1, size):
+        count += 1
+    return count, inside
+
+
+def _rows(count: int, inside: bool) -> Optional[int]:
+    if inside:
+        return None
+    if count == 0:
+        raise ValueError('No columns to parse from file')
+    return count - 1
+
+
+def line_ends(block: bytes,
+              state: ScanState) -> Tuple[np.ndarray, ScanState]:
+    '''
+    The offsets of the newlines ending lines in a block of CSV data, i.e.
+    not within quoted fields, given the state where the data before the
+    block ended (ScanState() at the start of a line). Returns them with
+    the state where the block ends.
+    '''
+    data = np.frombuffer(block, np.uint8)
+    newlines = np.flatnonzero(data == _NEWLINE)
+    if block.find(b'"') < 0 and not state.quote:
+        if len(data) == 0:
+            return newlines, state
+        return ((newlines[:0] if state.inside else newlines),
+                _end_state(data, state.inside))
+    quoted, state = _quoted(data, newlines, state)
+    return newlines[~quoted], state
+
+
+def count_stream_rows(stream: BinaryIO) -> Optional[int]:
+    '''
+    Count the rows of data (lines after the header line) in CSV data read
+    from a binary stream, e.g. a decompressed file, without parsing it.
+
+    Returns None if the data ends inside a quoted field, or has a carriage
+    return not followed by a newline.
+    '''
+    count = 0
+    state = ScanState()
+    content = False
+    # whether the last block ended with a carriage return
+    cr_end = False
+    first = True
+    while True:
+        block = stream.read(BLOCK_BYTES)
+        if not block:
+            break
+        if first:
+            # the header starts after a byte order mark, if any
+            first = False
+            if block.startswith(_BOM):
+                block = block[len(_BOM):]
+                content = True
+                if not block:
+                    continue
+        if cr_end and not block.startswith(b'\n'):
+            return None
+        match = _LONE_CR.search(block)
+        if match is not None and match.start() < len(block) - 1:
+            return None
+        cr_end = block.endswith(b'\r')
+        data = np.frombuffer(block, np.uint8)
+        ends, state = line_ends(block, state)
+        # whether each line (and the rest of the block) has non-blank bytes
+        starts = np.concatenate(([0], ends + 1))
+        starts = starts[starts < len(data)]
+        nonblank = np.logical_or.reduceat(~np.isin(data, _BLANK_BYTES),
+                                          starts)
+        if len(ends) > 0:
+            count += int(content or nonblank[0])
+            count += int(np.count_nonzero(nonblank[1:len(ends)]))
+            content = len(nonblank) > len(ends) and bool(nonblank[-1])
+        else:
+            content = content or bool(nonblank[0])
+    if cr_end:
+        return None
+    return _rows(count + int(content), state.ends_inside())
+
+
+def count_csv_rows(csvfile: str, workers: Optional[int] = None
+                   ) -> Optional[int]:
+    '''
+    Count the rows of data (lines after the header line) in a CSV file
+    without parsing it. Files of at least PARALLEL_MIN_BYTES are scanned
+    by the given number of threads (by default one per CPU). Compressed
+    files are decompressed as they are scanned.
+
+    Returns None if the file must be parsed to count its rows: if it ends
+    inside a quoted field (a quoted field is not closed) or has a carriage
+    return not followed by a newline.
+    '''
+    if dwcz.detect_compression(csvfile) is not None:
+        with dwcz.open_data_file(csvfile, workers) as stream:
+            return count_stream_rows(stream)
+    with open(csvfile, 'rb') as stream:
+        size = os.fstat(stream.fileno()).st_size
+        if size == 0:
+            raise ValueError('No columns to parse from file')
+        buffer = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+    with buffer:
+        if workers is None:
+            workers = os.cpu_count() or 1
+        # the header starts after a byte order mark, if any
+        origin = len(_BOM) if buffer[:len(_BOM)] == _BOM else 0
+
+        def scan(block_range: Tuple[int, int]) -> _Block:
+            start, end = block_range
+            return _scan_block(buffer, start, end, start == origin or
+                               buffer[start - 1] in _FIELD_ENDS)
+
+        ranges = _block_ranges(buffer, origin, size)
+        if workers <= 1 or size < PARALLEL_MIN_BYTES:
+            blocks = [scan(block_range) for block_range in ranges]
+        else:
+            with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+                blocks = list(pool.map(scan, ranges))
+        if any(block.lone_cr for block in blocks):
+            return None
+        count, inside = _count_lines(buffer, size, blocks)
+    return _rows(count, inside)
+
+
+# Row count checks follow the conventions of the pandas checks in
+# datawhistle.pandaschecks, given the number of rows counted.
+
+
+def tblcheck_row_count(num_rows: int, count: int,
+                       operator: str = '==') -> Tuple[bool, str]:
+    '''
+    Check if the number of rows in a table is equal to, greater
+    than or less than a specified count.
+
+    The operator parameter can be '==', '>=' or '<='.
+    '''
+    if operator == '==' and num_rows == count:
+        return True, ''
+    if operator == '>=' and num_rows >= count:
+        return True, ''
+    if operator == '<=' and num_rows <= count:
+        return True, ''
+    if operator not in ['==', '<=', '>=']:
+        return False, (f'table row count '
+                       f'operator {operator} not recognised')
+    return False, f'want row count {operator} {count}, got {num_rows}'
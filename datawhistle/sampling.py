@@ -0,0 +1,226 @@
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np      # type: ignore
+import pandas as pd     # type: ignore
+import datawhistle.compressed as dwcz
+
+# Functions to draw a random sample of rows from a data file in a single
+# streaming pass, so that checks can be run on a sample of a file that is
+# too large to check quickly (or at all) in memory. Compressed files are
+# decompressed as they are read (see datawhistle.compressed).
+
+DEFAULT_CHUNKSIZE = 100000
+
+
+class Reservoir:
+    '''
+    Uniform random sample of a fixed number of rows from a stream of
+    DataFrame chunks (Vitter's algorithm R, vectorised per chunk).
+    '''
+
+    def __init__(self, size: int, rng: np.random.Generator):
+        self.size: int = size
+        self.seen: int = 0
+        self._rng = rng
+        self._pieces: List[pd.DataFrame] = []
+        self._piece_rows: int = 0
+        # slot -> (piece number, row position within the piece)
+        self._slot_piece = np.full(size, -1, dtype=np.int64)
+        self._slot_row = np.full(size, -1, dtype=np.int64)
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        '''Offer the rows of a chunk to the reservoir.'''
+        num_rows = len(chunk)
+        if num_rows == 0 or self.size == 0:
+            self.seen += num_rows
+            return
+        positions = np.arange(self.seen, self.seen + num_rows)
+        slots = np.empty(num_rows, dtype=np.int64)
+        filling = positions < self.size
+        slots[filling] = positions[filling]
+        replacing = ~filling
+        slots[replacing] = self._rng.integers(0, positions[replacing] + 1)
+        keep = np.flatnonzero(slots < self.size)
+        # a later row replaces an earlier one drawn into the same slot
+        _, last = np.unique(slots[keep][::-1], return_index=True)
+        keep = keep[len(keep) - 1 - last]
+        if len(keep) > 0:
+            piece = chunk.iloc[keep]
+            self._slot_piece[slots[keep]] = len(self._pieces)
+            self._slot_row[slots[keep]] = np.arange(len(keep))
+            self._pieces.append(piece)
+            self._piece_rows += len(piece)
+        self.seen += num_rows
+        if self._piece_rows > 2 * self.size:
+            self._compact()
+
+    def _compact(self) -> None:
+        sample = self.sample()
+        self._pieces = [sample]
+        self._piece_rows = len(sample)
+        filled = min(self.seen, self.size)
+        self._slot_piece[:filled] = 0
+        self._slot_row[:filled] = np.arange(filled)
+
+    def sample(self) -> pd.DataFrame:
+        '''Return the sampled rows in the order they appear in the data.'''
+        if len(self._pieces) == 0:
+            return pd.DataFrame()
+        filled = min(self.seen, self.size)
+        offsets = np.cumsum([0] + [len(p) for p in self._pieces])
+        rows = offsets[self._slot_piece[:filled]] + self._slot_row[:filled]
+        combined = pd.concat(self._pieces)
+        return combined.iloc[rows].sort_index()
+
+
+class StratifiedReservoir:
+    '''
+    Random sample of a fixed number of rows from a stream of DataFrame
+    chunks, stratified by the values of a column (nulls form a stratum of
+    their own), kept in memory of at most 3 * size rows.
+
+    Each row is given a random key and each stratum is sampled by the rows
+    with its smallest keys: the row with the smallest key of each stratum
+    (of the size strata whose smallest keys are smallest) and the 2 * size
+    rows of any stratum with the smallest keys after those. Each stratum
+    is then given a share of the sample in proportion to its rows, at
+    least one row, and the shares are adjusted to add up to size, taking
+    rows by their keys. If there are more strata than rows in the sample,
+    it holds one row from each of size random strata.
+    '''
+
+    def __init__(self, size: int, columnname: str,
+                 rng: np.random.Generator):
+        self.size: int = size
+        self.columnname: str = columnname
+        self.seen: int = 0
+        self._rng = rng
+        self._rows: Optional[pd.DataFrame] = None
+        self._keys = np.empty(0)
+        # rows of each stratum, until there are more strata than size
+        self._counts: Optional[Dict[object, int]] = {}
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        '''Offer the rows of a chunk to the sample.'''
+        if self.columnname not in chunk.columns:
+            raise KeyError(f'column {self.columnname} not found in data')
+        self.seen += len(chunk)
+        rows = chunk if self._rows is None \
+            else pd.concat([self._rows, chunk])
+        keys = np.concatenate([self._keys, self._rng.random(len(chunk))])
+        order = np.argsort(keys, kind='stable')
+        first = ~rows[self.columnname].iloc[order].duplicated().to_numpy()
+        smallest = np.flatnonzero(first)
+        others = np.flatnonzero(~first)[:2 * self.size]
+        if self._counts is not None:
+            for stratum, count in chunk.groupby(
+                    self.columnname, dropna=False, sort=False).size().items():
+                stratum = None if pd.isnull(stratum) else stratum
+                self._counts[stratum] = self._counts.get(stratum, 0) + count
+            if len(self._counts) > self.size:
+                self._counts = None
+        if self._counts is None:
+            # only the size strata with the smallest keys are sampled
+            smallest = smallest[:self.size]
+            others = others[:0]
+        kept = order[np.concatenate([smallest, others])]
+        self._rows = rows.iloc[kept]
+        self._keys = keys[kept]
+
+    def sample(self) -> pd.DataFrame:
+        '''Return the sampled rows in the order they appear in the data.'''
+        if self._rows is None:
+            return pd.DataFrame()
+        if self._counts is None:
+            return self._rows.sort_index()
+        order = np.argsort(self._keys, kind='stable')
+        rows = self._rows.iloc[order]
+        codes, strata = pd.factorize(rows[self.columnname],
+                                     use_na_sentinel=False)
+        shares = np.array([
+                max(1, int(round(self.size * self._counts[
+                    None if pd.isnull(stratum) else stratum] / self.seen)))
+                for stratum in strata], dtype=np.int64)
+        # rows are in key order, so each stratum's rows are ranked
+        ranks = pd.Series(codes).groupby(codes).cumcount().to_numpy()
+        chosen = ranks < shares[codes]
+        excess = int(chosen.sum()) - min(self.size, len(rows))
+        if excess > 0:
+            # drop the rows with the largest keys, keeping one per stratum
+            chosen[np.flatnonzero(chosen & (ranks > 0))[-excess:]] = False
+        elif excess < 0:
+            chosen[np.flatnonzero(~chosen)[:-excess]] = True
+        return rows.iloc[np.flatnonzero(chosen)].sort_index()
+
+
+def _numbered_chunks(chunks: Iterable[pd.DataFrame]
+                     ) -> Iterable[pd.DataFrame]:
+    # Give rows a file wide position as their index so that samples can
+    # be returned in file order.
+    position = 0
+    for chunk in chunks:
+        chunk.index = pd.RangeIndex(position, position + len(chunk))
+        position += len(chunk)
+        yield chunk
+
+
+def reservoir_sample_csv(csvfile: str, size: int,
+                         seed: Optional[int] = None,
+                         chunksize: int = DEFAULT_CHUNKSIZE,
+                         progress: Optional[dwcz.Progress] = None
+                         ) -> Tuple[pd.DataFrame, int]:
+    '''
+    Read a uniform random sample of rows from a CSV file in one pass,
+    calling progress if given with the number of bytes of the file read.
+
+    Returns the sample and the number of rows in the file.
+    '''
+    reservoir = Reservoir(size, np.random.default_rng(seed))
+    columns: Optional[pd.Index] = None
+    with dwcz.open_data_file(csvfile, progress=progress) as stream:
+        reader = pd.read_csv(stream, chunksize=chunksize)
+        for chunk in _numbered_chunks(reader):
+            columns = chunk.columns
+            reservoir.update(chunk)
+    sample = reservoir.sample()
+    if len(sample.columns) == 0 and columns is not None:
+        sample = pd.DataFrame(columns=columns)
+    return sample, reservoir.seen
+
+
+def stratified_sample_csv(csvfile: str, size: int, columnname: str,
+                          seed: Optional[int] = None,
+                          chunksize: int = DEFAULT_CHUNKSIZE,
+                          progress: Optional[dwcz.Progress] = None
+                          ) -> Tuple[pd.DataFrame, int]:
+    '''
+    Read a random sample of rows from a CSV file in one pass, stratified by
+    the values of a column (see StratifiedReservoir). Each stratum is
+    represented in proportion to its share of the file, with at least one
+    row per stratum if there are no more strata than size. If given,
+    progress is called with the number of bytes of the file read.
+
+    Returns the sample (of size rows, or all of them if the file has
+    fewer) and the number of rows in the file.
+    '''
+    reservoir = StratifiedReservoir(size, columnname,
+                                    np.random.default_rng(seed))
+    with dwcz.open_data_file(csvfile, progress=progress) as stream:
+        reader = pd.read_csv(stream, chunksize=chunksize)
+        for chunk in _numbered_chunks(reader):
+            reservoir.update(chunk)
+    if reservoir.seen == 0:
+        with dwcz.open_data_file(csvfile) as stream:
+            return pd.read_csv(stream, nrows=0), 0
+    return reservoir.sample(), reservoir.seen
+
+
+def confidence_bound(sample_size: int, confidence: float = 0.95) -> float:
+    '''
+    Upper bound on the fraction of rows in the full data that break a row
+    level rule which held for every row in a uniform random sample, at the
+    given confidence level (the 'rule of three' generalised).
+    '''
+    if sample_size <= 0:
+        return 1.0
+    return 1 - math.pow(1 - confidence, 1 / sample_size)
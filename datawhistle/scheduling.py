@@ -0,0 +1,144 @@
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Ordering of checks by estimated cost, so that runs which stop on the
+# first failed check reach a failure as cheaply as possible. A check's
+# cost is estimated from the time it took per row in previous runs if
+# known, otherwise from a static estimate of the check's cost per row.
+
+# Estimated seconds per million rows of each check method, from the
+# benchmarks of the pandas checks.
+STATIC_COSTS: Dict[str, float] = {
+    'check_table_exists': 0.0,
+    'check_row_count_max': 0.0,
+    'check_row_count_min': 0.0,
+    'check_row_count': 0.0,
+    'check_col_exists': 0.0,
+    'check_col_type': 0.01,
+    'check_col_non_nulls': 0.02,
+    'check_col_min_val': 0.02,
+    'check_col_max_val': 0.02,
+    'check_col_val': 0.05,
+    'check_col_iqr': 0.2,
+    'check_col_count_distinct_max': 0.1,
+    'check_col_count_distinct_min': 0.1,
+    'check_col_count_distinct': 0.1,
+    'check_col_no_duplicates': 0.3,
+    'check_col_no_blanks': 0.3,
+    'check_col_regex': 1.0,
+    'check_col_regex_rule': 1.0,
+    'check_no_duplicate_rows': 2.0,
+}
+DEFAULT_STATIC_COST = 0.5
+# rows assumed when the size of the data is not known (e.g. BigQuery)
+DEFAULT_ROWS = 1000000
+# weight of the latest timing in the moving average of timings
+HISTORY_WEIGHT = 0.5
+
+# (checksuite, column name or None for table checks, check method)
+ScheduledCheck = Tuple[Any, Optional[str], Callable]
+
+
+def _history_key(checkname: str, columnname: Optional[str]) -> str:
+    return f'{checkname}:{columnname or ""}'
+
+
+class TimingHistory:
+    '''
+    Seconds per row taken by checks in previous runs, by check method and
+    column name, saved to a JSON file between runs.
+    '''
+
+    def __init__(self, filename: str):
+        self.filename: str = filename
+        self.seconds_per_row: Dict[str, float] = {}
+        try:
+            with open(filename) as stream:
+                loaded = json.load(stream)
+            if isinstance(loaded, dict):
+                self.seconds_per_row = {
+                    str(key): float(val) for key, val in loaded.items()}
+        except (OSError, ValueError, TypeError):
+            pass
+
+    def estimate(self, checkname: str, columnname: Optional[str],
+                 rows: int) -> Optional[float]:
+        '''Estimated seconds a check takes, None if never timed.'''
+        key = _history_key(checkname, columnname)
+        if key not in self.seconds_per_row:
+            return None
+        return self.seconds_per_row[key] * max(rows, 1)
+
+    def update(self, records: List[Dict[str, Any]]) -> None:
+        '''Add the timings of checks recorded by a CheckProfiler.'''
+        for record in records:
+            rows = record['rows_scanned'] or DEFAULT_ROWS
+            per_row = record['wall_seconds'] / max(rows, 1)
+            key = _history_key(record['check'], record['column'])
+            if key in self.seconds_per_row:
+                per_row = (HISTORY_WEIGHT * per_row +
+                           (1 - HISTORY_WEIGHT) * self.seconds_per_row[key])
+            self.seconds_per_row[key] = per_row
+
+    def save(self) -> None:
+        '''Save the timings, replacing the file atomically.'''
+        dirname = os.path.dirname(self.filename)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        tmpfile = f'{self.filename}.{os.getpid()}.tmp'
+        with open(tmpfile, 'w') as stream:
+            json.dump(self.seconds_per_row, stream, indent=1, sort_keys=True)
+        os.replace(tmpfile, self.filename)
+
+
+def estimate_cost(checkname: str, columnname: Optional[str], rows: int,
+                  history: Optional[TimingHistory] = None) -> float:
+    '''Estimated seconds a check takes on a number of rows.'''
+    if history is not None:
+        estimate = history.estimate(checkname, columnname, rows)
+        if estimate is not None:
+            return estimate
+    per_million = STATIC_COSTS.get(checkname, DEFAULT_STATIC_COST)
+    return per_million * rows / 1000000
+
+
+def order_checks(scheduled: List[ScheduledCheck],
+                 rows: Optional[int] = None,
+                 history: Optional[TimingHistory] = None
+                 ) -> List[ScheduledCheck]:
+    '''
+    Order checks by estimated cost, cheapest first. Checks of equal cost
+    keep their declared order. Exists checks are treated as free, so a
+    column's exists check always runs before the column's other checks.
+    A column's type check always runs before the column's other checks
+    too, as they reuse the values it derives (e.g. parsed datetimes).
+    '''
+    if rows is None:
+        rows = DEFAULT_ROWS
+
+    def cost(item: ScheduledCheck) -> float:
+        _, columnname, check = item
+        name = check.__name__
+        if name in ['check_table_exists', 'check_col_exists']:
+            return 0.0
+        return estimate_cost(name, columnname, rows, history)
+
+    costs = [cost(item) for item in scheduled]
+    # the cost of each column's type check, by suite and column name
+    type_costs = {(id(suite), columnname): costs[index]
+                  for index, (suite, columnname, check) in
+                  enumerate(scheduled) if check.__name__ == 'check_col_type'}
+
+    def key(index: int) -> Tuple[float, int]:
+        suite, columnname, check = scheduled[index]
+        name = check.__name__
+        column = (id(suite), columnname)
+        if name in ['check_col_exists', 'check_col_type'] or \
+                column not in type_costs:
+            return costs[index], 0
+        # after the column's type check, even if estimated cheaper
+        return max(costs[index], type_costs[column]), 1
+
+    return [scheduled[index] for index in sorted(range(len(scheduled)),
+                                                 key=key)]
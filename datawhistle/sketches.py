@@ -0,0 +1,325 @@
+import math
+import os
+import shutil
+import tempfile
+import weakref
+from typing import (Any, Dict, Iterator, List, Literal, Optional, Sequence,
+                    Union)
+import numpy as np      # type: ignore
+
+# Mergeable summaries of column values that use bounded memory. A
+# sketch can be updated one chunk of data at a time and sketches built
+# over different parts of a dataset (chunks, parallel workers or
+# earlier validation runs) can be merged into a single summary. Exact
+# sets of value hashes can be given a memory limit beyond which they are
+# spilled to disk.
+
+# spilled hashes are partitioned by their top bits into this many files
+SPILL_PARTITIONS = 256
+_PARTITION_STARTS = np.arange(SPILL_PARTITIONS, dtype=np.uint64) << \
+    np.uint64(64 - (SPILL_PARTITIONS - 1).bit_length())
+
+
+class KllSketch:
+    '''
+    KLL quantile sketch (Karnin, Lang and Liberty 2016).
+
+    Values are held in a hierarchy of compactors. Each item held at level h
+    stands in for 2**h input values. When a level grows beyond its capacity
+    it is sorted and every other item is promoted to the next level, so the
+    sketch holds O(k log(n / k)) items regardless of the number of values
+    added. Quantile and rank estimates are within roughly 1.7 / k of the
+    exact normalised rank with high probability.
+    '''
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        self.k: int = k
+        self.count: int = 0
+        self.min_val: Optional[float] = None
+        self.max_val: Optional[float] = None
+        self._levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self._levels):
+                    self._levels.append(np.empty(0))
+                items = np.sort(items)
+                # keep one item back when the level holds an odd number
+                # of items so that weights are preserved exactly
+                keep = items[:1] if len(items) % 2 else items[:0]
+                pairs = items[len(keep):]
+                offset = int(self._rng.integers(2))
+                promoted = pairs[offset::2]
+                self._levels[level] = keep
+                self._levels[level + 1] = np.concatenate(
+                        [self._levels[level + 1], promoted])
+                # adding a level shrinks the capacity of lower levels,
+                # so start again from the bottom
+                level = 0
+                continue
+            level += 1
+
+    def update(self, values: Union[Sequence[float], np.ndarray]) -> None:
+        '''Add values to the sketch, ignoring nulls.'''
+        arr = np.asarray(values, dtype=float)
+        arr = arr[~np.isnan(arr)]
+        if len(arr) == 0:
+            return
+        self.count += len(arr)
+        arr_min, arr_max = float(arr.min()), float(arr.max())
+        if self.min_val is None or arr_min < self.min_val:
+            self.min_val = arr_min
+        if self.max_val is None or arr_max > self.max_val:
+            self.max_val = arr_max
+        self._levels[0] = np.concatenate([self._levels[0], arr])
+        self._compress()
+
+    def merge(self, other: 'KllSketch') -> None:
+        '''Merge another sketch into this one.'''
+        if other.count == 0:
+            return
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0))
+        for level, items in enumerate(other._levels):
+            self._levels[level] = np.concatenate([self._levels[level],
+                                                  items])
+        self.count += other.count
+        if other.min_val is not None and \
+                (self.min_val is None or other.min_val < self.min_val):
+            self.min_val = other.min_val
+        if other.max_val is not None and \
+                (self.max_val is None or other.max_val > self.max_val):
+            self.max_val = other.max_val
+        self._compress()
+
+    def _sorted_items(self):
+        items = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(len(lvl), 2 ** h, dtype=np.int64)
+                                  for h, lvl in enumerate(self._levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    def quantile(self, q: float) -> float:
+        '''Estimate the value at quantile q (between 0 and 1).'''
+        if self.count == 0:
+            return math.nan
+        if q <= 0 and self.min_val is not None:
+            return self.min_val
+        if q >= 1 and self.max_val is not None:
+            return self.max_val
+        if len(self._levels) == 1:
+            # nothing has been compacted yet so the sketch is exact
+            return float(np.percentile(self._levels[0], q * 100))
+        items, cumweights = self._sorted_items()
+        idx = int(np.searchsorted(cumweights, q * cumweights[-1]))
+        return float(items[min(idx, len(items) - 1)])
+
+    def rank(self, value: float, inclusive: bool = True) -> float:
+        '''
+        Estimate the number of values added to the sketch that are less
+        than (or equal to if inclusive is True) a value.
+        '''
+        if self.count == 0:
+            return 0.0
+        items, cumweights = self._sorted_items()
+        side: Literal['left', 'right'] = 'right' if inclusive else 'left'
+        idx = int(np.searchsorted(items, value, side=side))
+        if idx == 0:
+            return 0.0
+        return float(cumweights[idx - 1])
+
+    def get_state(self, arrays: List[np.ndarray]) -> Dict[str, Any]:
+        '''
+        The sketch as JSON data, e.g. to save it without pickling. Its
+        levels are appended to arrays and referred to by index.
+        '''
+        levels = []
+        for items in self._levels:
+            levels.append(len(arrays))
+            arrays.append(items)
+        return {'k': self.k, 'count': self.count, 'min_val': self.min_val,
+                'max_val': self.max_val, 'levels': levels,
+                'rng': self._rng.bit_generator.state}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any],
+                   arrays: List[np.ndarray]) -> 'KllSketch':
+        '''A sketch from the data returned by get_state.'''
+        sketch = cls(int(state['k']))
+        sketch.count = int(state['count'])
+        sketch.min_val = state['min_val']
+        sketch.max_val = state['max_val']
+        sketch._levels = [np.asarray(arrays[index], dtype=float)
+                          for index in state['levels']]
+        sketch._rng.bit_generator.state = state['rng']
+        return sketch
+
+
+class SpillableHashSet:
+    '''
+    Exact set of 64 bit hashes (e.g. of the distinct values of a column).
+    The hashes in memory are held as a few sorted runs, no hash in more
+    than one: the hashes an update adds that are not in the set yet form a
+    new run, and the newest run is merged into the one before it while it
+    is at least half its size. Adding n hashes in chunks so takes
+    O(n log^2 n) time, rather than sorting the whole set again for every
+    chunk, and the number of distinct hashes is known after each update.
+    If a memory limit is given, the hashes in memory are spilled to
+    temporary files whenever they exceed it. Spilled hashes are
+    partitioned by their top bits, so that the set is counted one
+    partition at a time; spilled files are removed when the set is garbage
+    collected.
+    '''
+
+    def __init__(self, max_bytes: Optional[int] = None,
+                 directory: Optional[str] = None):
+        self.max_bytes: Optional[int] = max_bytes
+        # directory to create spill files in (by default the system's)
+        self.directory: Optional[str] = directory
+        # sorted runs of distinct hashes, largest first
+        self._runs: List[np.ndarray] = []
+        self._spilldir: Optional[str] = None
+        # None once hashes are spilled, until they are counted
+        self._count: Optional[int] = 0
+
+    @property
+    def spilled(self) -> bool:
+        '''Whether any hashes have been spilled to disk.'''
+        return self._spilldir is not None
+
+    def update(self, hashes: np.ndarray) -> None:
+        '''Add hashes (in any order, possibly repeated) to the set.'''
+        if len(hashes) == 0:
+            return
+        new = np.unique(hashes.astype(np.uint64, copy=False))
+        for run in self._runs:
+            positions = np.minimum(np.searchsorted(run, new), len(run) - 1)
+            new = new[run[positions] != new]
+        if len(new) == 0:
+            return
+        self._runs.append(new)
+        while len(self._runs) > 1 and \
+                2 * len(self._runs[-1]) >= len(self._runs[-2]):
+            newest = self._runs.pop()
+            self._runs[-1] = np.sort(np.concatenate([self._runs[-1],
+                                                     newest]))
+        if self._spilldir is None and self._count is not None:
+            self._count += len(new)
+        else:
+            # the new hashes may repeat spilled ones
+            self._count = None
+        if self.max_bytes is not None and \
+                sum(run.nbytes for run in self._runs) > self.max_bytes:
+            self._spill()
+
+    def merge(self, other: 'SpillableHashSet') -> None:
+        '''Merge another set into this one.'''
+        if other._spilldir is not None:
+            for partition in range(SPILL_PARTITIONS):
+                filename = other._partition_file(partition)
+                if os.path.exists(filename):
+                    self._append(partition,
+                                 np.fromfile(filename, np.uint64))
+            self._count = None
+        for run in other._runs:
+            self.update(run)
+
+    def __len__(self) -> int:
+        if self._count is None:
+            self._count = sum(len(part) for part in self._partitions())
+        return self._count
+
+    def values(self) -> np.ndarray:
+        '''The hashes in the set, sorted (read back into memory).'''
+        return np.concatenate([np.empty(0, dtype=np.uint64)] +
+                              list(self._partitions()))
+
+    def _partition_file(self, partition: int) -> str:
+        return os.path.join(str(self._spilldir), f'{partition:03d}.u64')
+
+    def _sorted(self) -> np.ndarray:
+        # the hashes in memory as a single sorted run
+        if len(self._runs) > 1:
+            self._runs = [np.sort(np.concatenate(self._runs))]
+        if not self._runs:
+            return np.empty(0, dtype=np.uint64)
+        return self._runs[0]
+
+    def _bounds(self, values: np.ndarray) -> np.ndarray:
+        # the values are sorted, so partitions are slices
+        return np.append(np.searchsorted(values, _PARTITION_STARTS),
+                         len(values))
+
+    def _append(self, partition: int, hashes: np.ndarray) -> None:
+        if self._spilldir is None:
+            self._spilldir = tempfile.mkdtemp(prefix='datawhistle-',
+                                              dir=self.directory)
+            weakref.finalize(self, shutil.rmtree, self._spilldir, True)
+        with open(self._partition_file(partition), 'ab') as stream:
+            hashes.tofile(stream)
+
+    def _spill(self) -> None:
+        values = self._sorted()
+        bounds = self._bounds(values)
+        for partition in range(SPILL_PARTITIONS):
+            if bounds[partition + 1] > bounds[partition]:
+                self._append(partition,
+                             values[bounds[partition]:bounds[partition + 1]])
+        self._runs = []
+        # hashes added later may repeat spilled ones
+        self._count = None
+
+    def _partitions(self) -> Iterator[np.ndarray]:
+        # the distinct hashes of each partition in turn, rewriting spilled
+        # partitions without repeats to speed up counting them again
+        values = self._sorted()
+        if self._spilldir is None:
+            yield values
+            return
+        bounds = self._bounds(values)
+        for partition in range(SPILL_PARTITIONS):
+            part = values[bounds[partition]:bounds[partition + 1]]
+            filename = self._partition_file(partition)
+            if os.path.exists(filename):
+                spilled = np.fromfile(filename, np.uint64)
+                distinct = np.unique(spilled)
+                if len(distinct) < len(spilled):
+                    distinct.tofile(filename)
+                del spilled
+                part = np.union1d(distinct, part)
+            yield part
+
+    def get_state(self, arrays: List[np.ndarray]) -> Dict[str, Any]:
+        '''
+        The set as JSON data, e.g. to save it without pickling. Its
+        hashes are read into memory, as spill files are temporary, and
+        appended to arrays and referred to by index.
+        '''
+        arrays.append(self.values())
+        return {'max_bytes': self.max_bytes, 'directory': self.directory,
+                'values': len(arrays) - 1}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any],
+                   arrays: List[np.ndarray]) -> 'SpillableHashSet':
+        '''A set from the data returned by get_state.'''
+        hashset = cls(state['max_bytes'], state['directory'])
+        hashset.update(arrays[state['values']])
+        return hashset
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # pickled with all hashes in memory, as spill files are temporary
+        state = self.__dict__.copy()
+        values = self.values()
+        state['_runs'] = [values] if len(values) > 0 else []
+        state['_count'] = len(values)
+        state['_spilldir'] = None
+        return state
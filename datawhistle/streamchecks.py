@@ -0,0 +1,571 @@
+from typing import Any, Dict, List, Optional, Tuple, Union
+import numpy as np      # type: ignore
+import pandas as pd     # type: ignore
+import re
+import datawhistle.sketches as dwsk
+
+# Checks of data that is read in chunks rather than loaded into memory
+# in one go. Each chunk is summarised into an accumulator as it is read.
+# Accumulators are mergeable: accumulators built over different parts of
+# a dataset (e.g. an earlier validation run of an append-only file) can
+# be merged to summarise the whole dataset.
+
+# Values pandas parses as booleans rather than strings.
+BOOL_TEXT = ['True', 'TRUE', 'true', 'False', 'FALSE', 'false']
+
+
+def _hash_values(values: pd.Series) -> np.ndarray:
+    # Hash values to 64 bit integers. Numbers are hashed as floats so that
+    # an integer chunk and a float chunk (e.g. with nulls) of the same
+    # column hash equal values equally.
+    if pd.api.types.is_numeric_dtype(values) and \
+            not pd.api.types.is_bool_dtype(values):
+        return pd.util.hash_array(values.to_numpy(dtype=float))
+    return pd.util.hash_array(values.astype(str).to_numpy(dtype=object))
+
+
+class TableAccumulator:
+    '''Mergeable summary of the rows of a table seen so far.'''
+
+    def __init__(self, keep_row_hashes: bool = False,
+                 hash_max_bytes: Optional[int] = None):
+        self.keep_row_hashes: bool = keep_row_hashes
+        self.rows: int = 0
+        self.columns: Optional[List[str]] = None
+        # hashes of the distinct rows, spilled to disk beyond hash_max_bytes
+        self.row_hashes = dwsk.SpillableHashSet(hash_max_bytes)
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        '''Add a chunk of rows to the summary.'''
+        if self.columns is None:
+            self.columns = [str(col) for col in chunk.columns]
+        self.rows += len(chunk)
+        if self.keep_row_hashes and len(chunk) > 0:
+            # the sum of the hashes of a row's values salted with their
+            # column names, with nulls adding nothing, so that a column
+            # missing from a chunk (e.g. a field no JSON record in it has)
+            # hashes the same as a column of nulls
+            rowhashes = np.zeros(len(chunk), dtype=np.uint64)
+            for col in chunk.columns:
+                values = chunk[col]
+                salt = pd.util.hash_array(np.array([str(col)], dtype=object))
+                colhashes = pd.util.hash_array(_hash_values(values) ^ salt)
+                colhashes[values.isna().to_numpy()] = 0
+                rowhashes += colhashes
+            self.row_hashes.update(rowhashes)
+
+    def merge(self, other: 'TableAccumulator') -> None:
+        '''Merge a summary of following rows into this one.'''
+        if self.columns is None:
+            self.columns = other.columns
+        self.rows += other.rows
+        self.row_hashes.merge(other.row_hashes)
+
+    def get_state(self, arrays: List[np.ndarray]) -> Dict[str, Any]:
+        '''
+        The summary as JSON data, e.g. to save it without pickling. The
+        arrays of its hashes are appended to arrays.
+        '''
+        return {'keep_row_hashes': self.keep_row_hashes, 'rows': self.rows,
+                'columns': self.columns,
+                'row_hashes': self.row_hashes.get_state(arrays)}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any],
+                   arrays: List[np.ndarray]) -> 'TableAccumulator':
+        '''A summary from the data returned by get_state.'''
+        acc = cls(bool(state['keep_row_hashes']))
+        acc.rows = int(state['rows'])
+        acc.columns = state['columns']
+        acc.row_hashes = dwsk.SpillableHashSet.from_state(
+                state['row_hashes'], arrays)
+        return acc
+
+    @property
+    def duplicate_rows(self) -> int:
+        return self.rows - len(self.row_hashes)
+
+
+class ColumnAccumulator:
+    '''
+    Mergeable summary of the values of a column seen so far. Only the
+    summaries needed by the column's rules are kept, e.g. value hashes are
+    kept only to count distinct values or duplicates (spilled to disk
+    beyond hash_max_bytes if given).
+    '''
+
+    def __init__(self, columnname: str, coltype: str,
+                 dateformat: Optional[str] = None,
+                 val: Optional[float] = None,
+                 regex_rule: Optional[str] = None,
+                 regex_type: Optional[str] = None,
+                 keep_hashes: bool = False,
+                 keep_sketch: bool = False,
+                 hash_max_bytes: Optional[int] = None,
+                 regex_rules: Tuple[Tuple[str, str], ...] = ()):
+        self.columnname: str = columnname
+        self.type: str = coltype
+        self.dateformat: Optional[str] = dateformat
+        self.val: Optional[float] = val
+        self.regex_rule: Optional[str] = regex_rule
+        self.regex_type: Optional[str] = regex_type
+        # more (regex_rule, regex_type) pairs, matched in one pass
+        self.regex_rules: Tuple[Tuple[str, str], ...] = regex_rules
+        self.present: bool = False
+        # rows of chunks without the column, before it was first found
+        self.absent_rows: int = 0
+        self.rows: int = 0
+        self.nulls: int = 0
+        self.blanks: int = 0
+        self.not_equal: int = 0
+        self.min_val: Optional[Union[int, float]] = None
+        self.max_val: Optional[Union[int, float]] = None
+        self.saw_float: bool = False
+        self.saw_non_numeric: bool = False
+        # text value kinds, used to infer if pandas would load the
+        # column as strings
+        self.saw_numeric_text: bool = False
+        self.saw_bool_text: bool = False
+        self.saw_other_text: bool = False
+        self.datetime_error: Optional[str] = None
+        self.regex_error: Optional[str] = None
+        # the first failure of each of the regex_rules
+        self.regex_rule_errors: List[Optional[str]] = [None] * len(regex_rules)
+        self.hashes: Optional[dwsk.SpillableHashSet] = None
+        if keep_hashes:
+            self.hashes = dwsk.SpillableHashSet(hash_max_bytes)
+        self.sketch: Optional[dwsk.KllSketch] = None
+        if keep_sketch:
+            self.sketch = dwsk.KllSketch()
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        '''Add a chunk of rows to the summary.'''
+        if self.columnname not in chunk.columns:
+            if self.present:
+                self._add_nulls(len(chunk))
+            else:
+                self.absent_rows += len(chunk)
+            return
+        if not self.present:
+            # rows without the column count as nulls once it is found
+            self.present = True
+            self._add_nulls(self.absent_rows)
+        series = chunk[self.columnname]
+        self.rows += len(series)
+        isnull = series.isna()
+        self.nulls += int(isnull.sum())
+        if self.val is not None:
+            self.not_equal += int((series != self.val).sum())
+        values = series[~isnull]
+        if len(values) == 0:
+            return
+        numeric = pd.api.types.is_numeric_dtype(values)
+        if numeric:
+            if pd.api.types.is_float_dtype(values):
+                self.saw_float = True
+            self._update_min_max(values.min(), values.max())
+            if self.sketch is not None:
+                self.sketch.update(values.to_numpy(dtype=float))
+        else:
+            self.saw_non_numeric = True
+            self._update_text_kinds(values)
+            if self.type == 'string':
+                blanks = values.str.isspace().sum() + (values == '').sum()
+                self.blanks += int(blanks)
+                self._update_regex(values)
+                self._update_regex_rules(values)
+        if self.type == 'datetime':
+            self._update_datetime(values)
+        if self.hashes is not None:
+            self.hashes.update(_hash_values(values))
+
+    def _add_nulls(self, count: int) -> None:
+        self.rows += count
+        self.nulls += count
+        if self.val is not None:
+            self.not_equal += count
+
+    def _update_min_max(self, chunk_min: Union[int, float],
+                        chunk_max: Union[int, float]) -> None:
+        if self.min_val is None or chunk_min < self.min_val:
+            self.min_val = chunk_min.item() \
+                if hasattr(chunk_min, 'item') else chunk_min
+        if self.max_val is None or chunk_max > self.max_val:
+            self.max_val = chunk_max.item() \
+                if hasattr(chunk_max, 'item') else chunk_max
+
+    def _update_text_kinds(self, values: pd.Series) -> None:
+        if self.saw_other_text:
+            return
+        numeric = pd.to_numeric(values, errors='coerce').notna()
+        boolean = values.isin(BOOL_TEXT)
+        self.saw_numeric_text |= bool(numeric.any())
+        self.saw_bool_text |= bool(boolean.any())
+        self.saw_other_text |= not bool((numeric | boolean).all())
+
+    def _update_datetime(self, values: pd.Series) -> None:
+        if self.datetime_error is not None:
+            return
+        if self.dateformat is not None:
+            try:
+                pd.to_datetime(values, format=self.dateformat, exact=True)
+            except ValueError:
+                self.datetime_error = (f'column {self.columnname} data does '
+                                       'not match datetime format '
+                                       f'{self.dateformat}')
+        else:
+            try:
+                pd.to_datetime(values)
+            except Exception:
+                self.datetime_error = (f'column {self.columnname} expected '
+                                       'to be datetime type but is not')
+
+    def _update_regex(self, values: pd.Series) -> None:
+        if self.regex_error is not None or not self.regex_rule or \
+                self.regex_type not in ['mandatory', 'exclude']:
+            return
+        try:
+            reg_results = values.str.findall(self.regex_rule)
+        except re.error:
+            self.regex_error = (f'column {self.columnname} invalid '
+                                f'regex_rule {self.regex_rule}')
+            return
+        for row in reg_results.values:
+            if row == [''] or row == []:
+                if self.regex_type == 'mandatory':
+                    self.regex_error = (f'column {self.columnname} found a '
+                                        'non matching regex record with '
+                                        f'rule {self.regex_rule}')
+                    return
+            elif self.regex_type == 'exclude':
+                self.regex_error = (f'column {self.columnname} found invalid '
+                                    f'regex {row[0]} with rule '
+                                    f'{self.regex_rule}')
+                return
+
+    def _update_regex_rules(self, values: pd.Series) -> None:
+        pending = []
+        for index, (regex_rule, regex_type) in enumerate(self.regex_rules):
+            if self.regex_rule_errors[index] is not None or not regex_rule \
+                    or regex_type not in ['mandatory', 'exclude']:
+                continue
+            try:
+                pending.append((index, re.compile(regex_rule).findall))
+            except re.error:
+                self.regex_rule_errors[index] = (
+                        f'column {self.columnname} invalid regex_rule '
+                        f'{regex_rule}')
+        if not pending:
+            return
+        # each distinct value, in the order first found, against all rules
+        for value in pd.unique(values):
+            if not isinstance(value, str):
+                continue
+            for index, findall in pending:
+                if self.regex_rule_errors[index] is not None:
+                    continue
+                regex_rule, regex_type = self.regex_rules[index]
+                row = findall(value)
+                if row == [''] or row == []:
+                    if regex_type == 'mandatory':
+                        self.regex_rule_errors[index] = (
+                                f'column {self.columnname} found a non '
+                                'matching regex record with rule '
+                                f'{regex_rule}')
+                elif regex_type == 'exclude':
+                    self.regex_rule_errors[index] = (
+                            f'column {self.columnname} found invalid regex '
+                            f'{row[0]} with rule {regex_rule}')
+
+    def merge(self, other: 'ColumnAccumulator') -> None:
+        '''Merge a summary of following rows into this one.'''
+        if other.present and not self.present:
+            self._add_nulls(self.absent_rows)
+        elif self.present and not other.present:
+            self._add_nulls(other.absent_rows)
+        elif not other.present:
+            self.absent_rows += other.absent_rows
+        self.present |= other.present
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self.blanks += other.blanks
+        self.not_equal += other.not_equal
+        if other.min_val is not None and other.max_val is not None:
+            self._update_min_max(other.min_val, other.max_val)
+        self.saw_float |= other.saw_float
+        self.saw_non_numeric |= other.saw_non_numeric
+        self.saw_numeric_text |= other.saw_numeric_text
+        self.saw_bool_text |= other.saw_bool_text
+        self.saw_other_text |= other.saw_other_text
+        if self.datetime_error is None:
+            self.datetime_error = other.datetime_error
+        if self.regex_error is None:
+            self.regex_error = other.regex_error
+        self.regex_rule_errors = [
+                other_error if error is None else error
+                for error, other_error in zip(self.regex_rule_errors,
+                                              other.regex_rule_errors)]
+        if self.hashes is not None and other.hashes is not None:
+            self.hashes.merge(other.hashes)
+        if self.sketch is not None and other.sketch is not None:
+            self.sketch.merge(other.sketch)
+
+    def get_state(self, arrays: List[np.ndarray]) -> Dict[str, Any]:
+        '''
+        The summary as JSON data, e.g. to save it without pickling. The
+        arrays of its hashes and sketch are appended to arrays.
+        '''
+        state = {name: value for name, value in vars(self).items()
+                 if name not in ('hashes', 'sketch')}
+        state['hashes'] = None if self.hashes is None \
+            else self.hashes.get_state(arrays)
+        state['sketch'] = None if self.sketch is None \
+            else self.sketch.get_state(arrays)
+        return state
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any],
+                   arrays: List[np.ndarray]) -> 'ColumnAccumulator':
+        '''A summary from the data returned by get_state.'''
+        acc = cls(state['columnname'], state['type'],
+                  regex_rules=tuple(tuple(rule)
+                                    for rule in state['regex_rules']))
+        for name in vars(acc):
+            if name not in ('regex_rules', 'hashes', 'sketch'):
+                setattr(acc, name, state[name])
+        if state['hashes'] is not None:
+            acc.hashes = dwsk.SpillableHashSet.from_state(state['hashes'],
+                                                          arrays)
+        if state['sketch'] is not None:
+            acc.sketch = dwsk.KllSketch.from_state(state['sketch'], arrays)
+        return acc
+
+    def loaded_value(self, value: Union[int, float]) -> Union[int, float]:
+        '''
+        Convert a value to the type pandas would give it when loading all
+        the column's values at once (integer columns with nulls load as
+        floats).
+        '''
+        if isinstance(value, int) and (self.saw_float or self.nulls > 0):
+            return float(value)
+        return value
+
+    @property
+    def count_distinct(self) -> int:
+        if self.hashes is None:
+            return 0
+        return len(self.hashes)
+
+    @property
+    def duplicates(self) -> int:
+        if self.hashes is None:
+            return 0
+        return self.rows - len(self.hashes) - (1 if self.nulls > 0 else 0)
+
+
+# Table level checks are described in functions using the naming
+# convention tblcheck_[some name](acc: TableAccumulator, [inputs])
+# -> Tuple[bool, str]. Column level checks are described in functions
+# using the naming convention colcheck_[some name](acc:
+# ColumnAccumulator, [inputs]) -> Tuple[bool, str]. Return values and
+# error messages follow the conventions of pandaschecks.py so that
+# checking a file in chunks reports the same errors as checking it in
+# memory.
+
+
+def tblcheck_row_count(acc: TableAccumulator, count: int,
+                       operator: str = '==') -> Tuple[bool, str]:
+    '''
+    Check if the number of rows in a table is equal to, greater
+    than or less than a specified count.
+
+    The operator parameter can be '==', '>=' or '<='.
+    '''
+    num_rows = acc.rows
+    if operator == '==' and num_rows == count:
+        return True, ''
+    if operator == '>=' and num_rows >= count:
+        return True, ''
+    if operator == '<=' and num_rows <= count:
+        return True, ''
+    if operator not in ['==', '<=', '>=']:
+        return False, (f'table row count '
+                       f'operator {operator} not recognised')
+    return False, f'want row count {operator} {count}, got {num_rows}'
+
+
+def tblcheck_no_duplicate_rows(acc: TableAccumulator) -> Tuple[bool, str]:
+    '''Check if a table has duplicate rows.'''
+    if not acc.keep_row_hashes:
+        return False, 'duplicate rows were not tracked'
+    if acc.duplicate_rows == 0:
+        return True, ''
+    return False, f'want 0 duplicate rows, got {acc.duplicate_rows}'
+
+
+def colcheck_exists(acc: ColumnAccumulator) -> Tuple[bool, str]:
+    '''Check if a column with the specified name exists in the table.'''
+    if acc.present:
+        return True, ''
+    return False, f'column {acc.columnname} not found in data'
+
+
+def colcheck_count_distinct(acc: ColumnAccumulator, count: int,
+                            operator: str = '==') -> Tuple[bool, str]:
+    '''
+    Check if the count of distinct values in a column is equal to, greater
+    than or less than a specified count.
+
+    The operator parameter can be '==', '>=' or '<='.
+    '''
+    columnname = acc.columnname
+    count_val = acc.count_distinct
+    if operator == '==' and count_val == count:
+        return True, ''
+    if operator == '>=' and count_val >= count:
+        return True, ''
+    if operator == '<=' and count_val <= count:
+        return True, ''
+    if operator not in ['==', '<=', '>=']:
+        return False, (f'column {columnname} count distinct '
+                       f'operator {operator} not recognised')
+    return False, (f'column {columnname} want count distinct {operator} '
+                   f'{count}, got {count_val}')
+
+
+def colcheck_is_numeric(acc: ColumnAccumulator) -> Tuple[bool, str]:
+    '''Check if a column is numeric.'''
+    if not acc.saw_non_numeric:
+        return True, ''
+    return False, f'column {acc.columnname} expected to be numeric but is not'
+
+
+def colcheck_is_str(acc: ColumnAccumulator) -> Tuple[bool, str]:
+    '''Check if a column is string type.'''
+    if acc.saw_other_text or (acc.saw_numeric_text and acc.saw_bool_text):
+        return True, ''
+    return False, (f'column {acc.columnname} expected to be string type '
+                   'but is not')
+
+
+def colcheck_is_datetime(acc: ColumnAccumulator) -> Tuple[bool, str]:
+    '''
+    Check if a column is datetime, optionally using a datetime format
+    format string.
+    '''
+    if acc.datetime_error is None:
+        return True, ''
+    return False, acc.datetime_error
+
+
+def colcheck_no_blanks(acc: ColumnAccumulator) -> Tuple[bool, str]:
+    '''Check if a string column contains blanks or whitespace only values.'''
+    if acc.blanks == 0:
+        return True, ''
+    return False, (f'column {acc.columnname} has blanks or whitesplace only '
+                   'values')
+
+
+def colcheck_no_duplicates(acc: ColumnAccumulator) -> Tuple[bool, str]:
+    '''Check that a column doesn't contain any duplicates.'''
+    if acc.duplicates == 0:
+        return True, ''
+    return False, (f'column {acc.columnname} want 0 duplicate rows, '
+                   f'got {acc.duplicates}')
+
+
+def colcheck_no_nulls(acc: ColumnAccumulator) -> Tuple[bool, str]:
+    '''Check if a column contains null values.'''
+    if acc.nulls == 0:
+        return True, ''
+    return False, f'column {acc.columnname} want 0 nulls, got {acc.nulls}'
+
+
+def colcheck_regex(acc: ColumnAccumulator) -> Tuple[bool, str]:
+    '''
+    Check to see if a column contains all the same regex type, or if the
+    column does not contain a regex type.
+    '''
+    columnname = acc.columnname
+    if acc.regex_rule is None or acc.regex_type is None:
+        return False, f'column {columnname} None regex_rule or regex_type'
+    if acc.regex_rule == '':
+        return False, f'column {columnname} blank regex_rule'
+    if acc.regex_type not in ['mandatory', 'exclude']:
+        return False, (f'column {columnname} regex_type expect mandatory or '
+                       f'exclude, got {acc.regex_type}')
+    if acc.regex_error is None:
+        return True, ''
+    return False, acc.regex_error
+
+
+def colcheck_regex_rules(acc: ColumnAccumulator) -> List[Tuple[bool, str]]:
+    '''Check each of the regex_rules of a column, as colcheck_regex does.'''
+    columnname = acc.columnname
+    results: List[Tuple[bool, str]] = []
+    for (regex_rule, regex_type), error in zip(acc.regex_rules,
+                                               acc.regex_rule_errors):
+        if regex_rule == '':
+            results.append((False, f'column {columnname} blank regex_rule'))
+        elif regex_type not in ['mandatory', 'exclude']:
+            results.append((False, (f'column {columnname} regex_type expect '
+                                    f'mandatory or exclude, got '
+                                    f'{regex_type}')))
+        elif error is not None:
+            results.append((False, error))
+        else:
+            results.append((True, ''))
+    return results
+
+
+def colcheck_val(acc: ColumnAccumulator, val: Union[int, float],
+                 operator: str = '==') -> Tuple[bool, str]:
+    '''
+    Check if the values in a column are equal to, greater than or less than
+    a specified value.
+
+    The operator parameter can be '==', '>=' or '<='.
+    '''
+    columnname = acc.columnname
+    if operator not in ['==', '<=', '>=']:
+        return False, (f'column {columnname} value check '
+                       f'operator {operator} not recognised')
+    if operator == '==':
+        if acc.not_equal == 0:
+            return True, ''
+        return False, (f'column {columnname} want all values = {val}, '
+                       f'got different values')
+    if operator == '>=':
+        if acc.min_val is None or acc.min_val >= val:
+            return True, ''
+        actual_val = acc.loaded_value(acc.min_val)
+    if operator == '<=':
+        if acc.max_val is None or acc.max_val <= val:
+            return True, ''
+        actual_val = acc.loaded_value(acc.max_val)
+    return False, (f'column {columnname} want value {operator} '
+                   f'{val}, got {actual_val}')
+
+
+def colcheck_iqr(acc: ColumnAccumulator) -> Tuple[bool, str]:
+    '''
+    Check if the values in a column are outliers greater than or less than
+    1.5 times the inter-quartile range plus Q3 or Q1 respectively.
+
+    Quartiles are estimated with the accumulator's quantile sketch and the
+    outlier count is estimated from the sketch's ranks of the bounds
+    (both are exact until the sketch first compacts its values).
+    '''
+    sketch = acc.sketch
+    if sketch is None or sketch.min_val is None or sketch.max_val is None:
+        return True, ''
+    q25, q75 = sketch.quantile(0.25), sketch.quantile(0.75)
+    upper = round(q75 + (q75 - q25) * 1.5, 2)
+    lower = round(q25 - (q75 - q25) * 1.5, 2)
+    if sketch.min_val >= lower and sketch.max_val <= upper:
+        return True, ''
+    count = sketch.rank(lower, inclusive=False) + \
+        sketch.count - sketch.rank(upper)
+    count = max(1, int(round(count)))
+    return False, (f'column {acc.columnname} want 0 outliers outside '
+                   f'1.5xIQR {lower} to {upper}, got {count}')
@@ -0,0 +1,347 @@
+import csv
+import io
+import itertools
+import queue
+import threading
+import time
+from typing import (Any, BinaryIO, Dict, Generator, Iterator, List, Optional,
+                    Tuple)
+import pandas as pd     # type: ignore
+import datawhistle.compressed as dwcz
+import datawhistle.rowcount as dwrc
+
+# Functions to read CSV data in chunks (DataFrames of a bounded number of
+# rows) for checking with a StreamingDatasetCheckSuite.
+#
+# Chunks can be read ahead by a reader thread into a bounded queue, so that
+# reading and parsing the next chunks (the pandas parser releases the GIL
+# while tokenizing) overlaps checking the current one. The reader waits
+# when the queue is full, so at most prefetch chunks are held in memory
+# besides the one being read and the one being checked.
+#
+# The data read can be passed on to another file (tee) a chunk at a time,
+# each chunk once it has been checked, so that only rows no check has
+# failed on so far are passed on.
+
+DEFAULT_CHUNKSIZE = 100000
+# chunks read ahead of the chunk being checked
+DEFAULT_PREFETCH = 2
+_READ_BLOCKSIZE = 1 << 20
+
+
+class ByteRangeReader(io.RawIOBase):
+    '''
+    Read-only file object over the bytes of a file from its current
+    position up to an end offset, optionally feeding each byte read to a
+    hashlib hash object.
+    '''
+
+    def __init__(self, fileobj: BinaryIO, end: int, hasher: Any = None):
+        super().__init__()
+        self._fileobj = fileobj
+        self._remaining: int = end - fileobj.tell()
+        self._hasher = hasher
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        data = self._fileobj.read(size)
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        if self._hasher is not None:
+            self._hasher.update(data)
+        return len(data)
+
+
+def read_csv_header(fileobj: BinaryIO, hasher: Any = None) -> List[str]:
+    '''
+    Read column names from the first line of a CSV file, leaving the file
+    positioned at the start of the data.
+    '''
+    line = fileobj.readline()
+    if hasher is not None:
+        hasher.update(line)
+    return parse_csv_header(line)
+
+
+def parse_csv_header(line: bytes) -> List[str]:
+    '''Parse column names from the first line of a CSV file.'''
+    text = line.decode('utf-8-sig').rstrip('\r\n')
+    if text == '':
+        return []
+    return next(csv.reader([text]))
+
+
+def last_line_end(fileobj: BinaryIO, start: int, end: int) -> int:
+    '''
+    Find the offset just after the last line end between start (the start
+    of a line) and end, so that a partly written last line of a growing
+    file is left unread. Newlines within quoted fields do not end lines,
+    so the bytes are scanned from start, following quoted fields.
+    '''
+    last = start
+    state = dwrc.ScanState()
+    position = start
+    fileobj.seek(start)
+    while position < end:
+        block = fileobj.read(min(_READ_BLOCKSIZE, end - position))
+        if not block:
+            break
+        ends, state = dwrc.line_ends(block, state)
+        if len(ends) > 0:
+            last = position + int(ends[-1]) + 1
+        position += len(block)
+    return last
+
+
+def csv_chunks(source: Any, names: List[str],
+               dtypes: Optional[Dict[str, type]] = None,
+               chunksize: int = DEFAULT_CHUNKSIZE
+               ) -> Generator[pd.DataFrame, None, None]:
+    '''
+    Parse CSV data without a header line into DataFrames of at most
+    chunksize rows.
+    '''
+    if dtypes is not None:
+        dtypes = {key: val for key, val in dtypes.items() if key in names}
+    try:
+        reader = pd.read_csv(source, header=None, names=names, dtype=dtypes,
+                             chunksize=chunksize)
+    except pd.errors.EmptyDataError:
+        return
+    with reader:
+        for chunk in reader:
+            yield chunk
+
+
+def csv_blocks(fileobj: BinaryIO,
+               chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator[bytes]:
+    '''
+    Read CSV data in blocks of bytes of at most chunksize whole lines.
+    Newlines within quoted fields do not end lines.
+    '''
+    parts: List[bytes] = []
+    lines = 0
+    state = dwrc.ScanState()
+    while True:
+        block = fileobj.read(_READ_BLOCKSIZE)
+        if not block:
+            break
+        ends, state = dwrc.line_ends(block, state)
+        start = 0
+        used = 0
+        while lines + len(ends) - used >= chunksize:
+            used += chunksize - lines
+            end = int(ends[used - 1]) + 1
+            parts.append(block[start:end])
+            yield b''.join(parts)
+            parts = []
+            lines = 0
+            start = end
+        lines += len(ends) - used
+        parts.append(block[start:])
+    data = b''.join(parts)
+    if data:
+        yield data
+
+
+def csv_chunks_with_data(fileobj: BinaryIO, names: List[str],
+                         dtypes: Optional[Dict[str, type]] = None,
+                         chunksize: int = DEFAULT_CHUNKSIZE
+                         ) -> Generator[Tuple[Optional[pd.DataFrame], bytes],
+                                        None, None]:
+    '''
+    Parse CSV data without a header line into DataFrames of at most
+    chunksize rows, each with the bytes it was parsed from (None for bytes
+    holding no rows, e.g. blank lines).
+    '''
+    if dtypes is not None:
+        dtypes = {key: val for key, val in dtypes.items() if key in names}
+    for data in csv_blocks(fileobj, chunksize):
+        try:
+            chunk = pd.read_csv(io.BytesIO(data), header=None, names=names,
+                                dtype=dtypes)
+        except pd.errors.EmptyDataError:
+            chunk = None
+        yield chunk, data
+
+
+class PipelineStats:
+    '''
+    Time spent by the reader and the checks of chunks read ahead, to tell
+    whether a run is bound by reading or by checking (e.g. to tune the
+    chunk size).
+    '''
+
+    def __init__(self):
+        self.chunks: int = 0
+        # wall time from the first chunk requested to the last checked
+        self.seconds: float = 0.0
+        # time the reader spent reading and parsing chunks
+        self.read_seconds: float = 0.0
+        # time the reader waited for room in the queue (checks are slower)
+        self.read_wait_seconds: float = 0.0
+        # time the checks waited for a chunk (reading is slower)
+        self.check_wait_seconds: float = 0.0
+
+    def read_utilisation(self) -> float:
+        '''Fraction of the time the reader was busy.'''
+        if self.seconds <= 0:
+            return 0.0
+        return min(self.read_seconds / self.seconds, 1.0)
+
+    def check_utilisation(self) -> float:
+        '''Fraction of the time the checks were busy.'''
+        if self.seconds <= 0:
+            return 0.0
+        return max(1.0 - self.check_wait_seconds / self.seconds, 0.0)
+
+    def bound(self) -> str:
+        '''The stage the other waited on most: 'reader' or 'compute'.'''
+        if self.check_wait_seconds >= self.read_wait_seconds:
+            return 'reader'
+        return 'compute'
+
+    def summary(self) -> str:
+        return (f'{self.bound()} bound: reader busy '
+                f'{self.read_utilisation():.0%}, checks busy '
+                f'{self.check_utilisation():.0%} over {self.chunks} chunks')
+
+
+def prefetch_chunks(chunks: Iterator[pd.DataFrame],
+                    prefetch: int = DEFAULT_PREFETCH,
+                    stats: Optional[PipelineStats] = None
+                    ) -> Generator[pd.DataFrame, None, None]:
+    '''
+    Read chunks ahead in a reader thread, holding at most prefetch chunks
+    in a queue. Errors reading chunks are raised when the chunk that
+    failed is requested. Closing the iterator stops the reader.
+    '''
+    if stats is None:
+        stats = PipelineStats()
+    chunkqueue: queue.Queue = queue.Queue(maxsize=max(prefetch, 1))
+    stop = threading.Event()
+    done = object()
+
+    def put(item: Any) -> None:
+        start = time.perf_counter()
+        while not stop.is_set():
+            try:
+                chunkqueue.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        stats.read_wait_seconds += time.perf_counter() - start
+
+    def read() -> None:
+        try:
+            while not stop.is_set():
+                start = time.perf_counter()
+                chunk = next(chunks, done)
+                stats.read_seconds += time.perf_counter() - start
+                put(chunk)
+                if chunk is done:
+                    return
+        except BaseException as ex:
+            put(ex)
+
+    start = time.perf_counter()
+    reader = threading.Thread(target=read, name='datawhistle-reader',
+                              daemon=True)
+    reader.start()
+    try:
+        while True:
+            waited = time.perf_counter()
+            item = chunkqueue.get()
+            stats.check_wait_seconds += time.perf_counter() - waited
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            stats.chunks += 1
+            yield item
+    finally:
+        stop.set()
+        reader.join()
+        stats.seconds += time.perf_counter() - start
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def check_chunks(chunks: Iterator[Any], suite: Any,
+                 tee: Optional[BinaryIO] = None) -> bool:
+    '''
+    Add chunks to a StreamingDatasetCheckSuite. If the suite stops on
+    fail, adding stops at the first chunk after which a check has failed
+    for good. If tee is given, the chunks are pairs of a DataFrame (or
+    None if there are no rows) and the bytes it was read from, and the
+    bytes are written to tee once the chunk has been added, until a check
+    has failed for good.
+
+    Returns True if adding stopped early.
+    '''
+    passing = True
+    for item in chunks:
+        chunk, data = item if tee is not None else (item, b'')
+        if chunk is not None:
+            suite.update(chunk)
+        if suite.stop_on_fail and suite.check_early():
+            return True
+        if tee is not None and passing:
+            if not suite.stop_on_fail:
+                # checked as check_early does, but without reporting the
+                # failure as having stopped reading
+                passing = not suite.check_early()
+                suite.early_failure = None
+            if passing:
+                tee.write(data)
+    return False
+
+
+def check_csv_streaming(csvfile: str, suite: Any,
+                        chunksize: int = DEFAULT_CHUNKSIZE,
+                        prefetch: int = DEFAULT_PREFETCH,
+                        stats: Optional[PipelineStats] = None,
+                        progress: Optional[dwcz.Progress] = None,
+                        tee: Optional[BinaryIO] = None) -> bool:
+    '''
+    Add the rows of a CSV file to a StreamingDatasetCheckSuite a chunk at a
+    time. If the suite stops on fail, reading stops at the first chunk
+    after which a check has failed for good. Chunks are read ahead by a
+    reader thread if prefetch is at least 1, adding the time spent reading
+    and checking to stats if given. Compressed files are decompressed as
+    they are read (see datawhistle.compressed), calling progress if given
+    with the number of bytes of the file read so far. The file can be
+    standard input (-) or a named pipe. If tee is given, the (decompressed)
+    data is written to it a chunk at a time, each chunk once it has been
+    checked, stopping at the first chunk after which a check has failed
+    for good (checks of all rows, e.g. of the row count, can still fail
+    once all the data has been written).
+
+    Returns True if reading stopped early.
+    '''
+    with dwcz.open_data_file(csvfile, progress=progress) as fileobj:
+        header = fileobj.readline()
+        names = parse_csv_header(header)
+        # an empty chunk records the columns present in the file
+        first: Any = pd.DataFrame(columns=names)
+        chunks: Generator[Any, None, None]
+        if tee is not None:
+            first = (first, header)
+            chunks = csv_chunks_with_data(fileobj, names,
+                                          suite.column_dtypes(), chunksize)
+        else:
+            chunks = csv_chunks(fileobj, names, suite.column_dtypes(),
+                                chunksize)
+        if prefetch > 0:
+            # the reader starts once the first chunk has been checked
+            chunks = prefetch_chunks(chunks, prefetch, stats)
+        try:
+            return check_chunks(itertools.chain([first], chunks), suite, tee)
+        finally:
+            chunks.close()
@@ -1,11 +1,18 @@
-import yaml  # type: ignore
-from typing import Any, Dict, List, Union
+import fnmatch
+import hashlib
+import json
+import os
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
 import datawhistle as dw
+from datawhistle.lazyimport import lazy_import
+yaml = lazy_import('yaml')
 
 
-YAML_TOPLEVEL_KEYS = ['table', 'columns']
+YAML_TOPLEVEL_KEYS = ['table', 'columns', 'column_patterns']
 YAML_TABLE_KEYS = [
     'stop_on_fail',
+    'check_order',
     'allow_duplicate_rows',
     'row_count_max',
     'row_count_min',
@@ -23,19 +30,85 @@ YAML_COLUMN_KEYS = [
     'dateformat',
     'min',
     'max',
+    'outlier_method',
     'regex_rule',
     'regex_type',
+    'regex_rules',
     'val']
+# keys choosing the columns a column pattern applies to, as well as the
+# column keys other than name
+YAML_PATTERN_MATCH_KEYS = ['match', 'match_regex', 'match_type']
 YAML_COLUMN_TYPES = ['numeric', 'string', 'datetime']
 TRUE_VALS = [True, 1, 'true', 'True', '1']
 FALSE_VALS = [False, 0, 'false', 'False', '0']
 REGEX_VALS = ['mandatory', 'exclude']
+OUTLIER_METHOD_VALS = ['exact', 'sketch']
+CHECK_ORDER_VALS = ['declared', 'cost']
+# yaml column keys that set a differently named checksuite attribute
+_COLUMN_ATTRIBUTES = {'min': 'min_val', 'max': 'max_val'}
+_TOPLEVEL_KEYSET = frozenset(YAML_TOPLEVEL_KEYS)
+_TABLE_KEYSET = frozenset(YAML_TABLE_KEYS)
+_COLUMN_KEYSET = frozenset(YAML_COLUMN_KEYS)
+_PATTERN_KEYSET = frozenset(YAML_PATTERN_MATCH_KEYS +
+                            [key for key in YAML_COLUMN_KEYS if key != 'name'])
 
 
 class YamlParsingError(Exception):
     pass
 
 
+class ColumnPlan(NamedTuple):
+    '''Validated rules for a column.'''
+    name: str
+    type: str
+    # (checksuite attribute, value) pairs
+    settings: Tuple[Tuple[str, Any], ...]
+
+
+class PatternPlan(NamedTuple):
+    '''
+    Validated rules for the columns matching a pattern: a glob pattern or
+    regular expression matching the column name and an inferred type of
+    the column, any of which can be None to match all columns.
+    '''
+    glob: Optional[str]
+    regex: Optional[str]
+    match_type: Optional[str]
+    type: str
+    # (checksuite attribute, value) pairs
+    settings: Tuple[Tuple[str, Any], ...]
+
+    def matches(self, name: str, inferred_type: Optional[str]) -> bool:
+        '''Check if a column of a schema matches the pattern.'''
+        if self.glob is not None and \
+                not fnmatch.fnmatchcase(name, self.glob):
+            return False
+        if self.regex is not None and re.search(self.regex, name) is None:
+            return False
+        return self.match_type is None or inferred_type == self.match_type
+
+    def description(self) -> str:
+        '''Describe the columns the pattern matches, e.g. in messages.'''
+        if self.glob is not None:
+            return f'matching {self.glob}'
+        if self.regex is not None:
+            return f'matching {self.regex}'
+        return f'of type {self.match_type}'
+
+
+class RulePlan(NamedTuple):
+    '''
+    Validated rules compiled from a yaml rules file, ready to be applied
+    to a checksuite without further validation.
+    '''
+    # (checksuite attribute, value) pairs
+    table: Tuple[Tuple[str, Any], ...]
+    columns: Tuple[ColumnPlan, ...]
+    # rules for the columns matching patterns, resolved against the
+    # schema of the data checked
+    patterns: Tuple[PatternPlan, ...] = ()
+
+
 def _check_bool_val(val: Any) -> bool:
     if val in TRUE_VALS:
         return True
@@ -50,7 +123,7 @@ def _check_yaml_column_keys(colkeys: List[str]) -> None:
     if 'type' not in colkeys:
         raise YamlParsingError('column type missing')
     for key in colkeys:
-        if key not in YAML_COLUMN_KEYS:
+        if key not in _COLUMN_KEYSET:
             raise YamlParsingError(f'unexpected column attribute: {key}')
 
 
@@ -61,13 +134,13 @@ def _check_yaml_column_type(coltype: str) -> None:
 
 def _check_yaml_toplevel_keys(ykeys: List[str]) -> None:
     for key in ykeys:
-        if key not in YAML_TOPLEVEL_KEYS:
+        if key not in _TOPLEVEL_KEYSET:
             raise YamlParsingError(f'unexpected yaml attribute: {key}')
 
 
 def _check_yaml_table_keys(dsdictkeys: List[str]) -> None:
     for key in dsdictkeys:
-        if key not in YAML_TABLE_KEYS:
+        if key not in _TABLE_KEYSET:
             raise YamlParsingError(f'unexpected table attribute: {key}')
 
 
@@ -75,10 +148,200 @@ def _yamlerr(message: str) -> None:
     raise YamlParsingError(message)
 
 
-def apply_yamldict_to_checksuite(ymld: Dict,
-                                 suite: Union[dw.PandasDatsetCheckSuite,
-                                              dw.BqTableCheckSuite]) -> None:
-    '''Apply yaml parsed into dictionary to a checksuite object.'''
+def _compile_patterns(ymld: Dict) -> Tuple[PatternPlan, ...]:
+    patterns: List[PatternPlan] = []
+    for patdict in ymld.get('column_patterns') or []:
+        patkeys = list(patdict.keys())
+        for key in patkeys:
+            if key not in _PATTERN_KEYSET:
+                _yamlerr(f'unexpected column pattern attribute: {key}')
+        glob = patdict.get('match')
+        regex = patdict.get('match_regex')
+        match_type = patdict.get('match_type')
+        if glob is None and regex is None and match_type is None:
+            _yamlerr(('column pattern needs one of '
+                      f'{", ".join(YAML_PATTERN_MATCH_KEYS)}'))
+        if glob is not None and regex is not None:
+            _yamlerr(f'column pattern {glob} has both match and match_regex')
+        if glob is not None and not isinstance(glob, str):
+            _yamlerr(f'column pattern match format error {glob}')
+        if regex is not None:
+            if not isinstance(regex, str):
+                _yamlerr(f'column pattern match_regex format error {regex}')
+            try:
+                re.compile(regex)
+            except re.error:
+                _yamlerr(f'column pattern invalid match_regex {regex}')
+        if match_type is not None:
+            _check_yaml_column_type(match_type)
+        description = PatternPlan(glob, regex, match_type, '',
+                                  ()).description()
+        # the type of columns matched by type defaults to that type
+        coltype = patdict.get('type', match_type)
+        if coltype is None:
+            _yamlerr(f'column pattern {description} type missing')
+        _check_yaml_column_type(coltype)
+        settings = _compile_column_settings(patdict, f'pattern {description}',
+                                            coltype)
+        patterns.append(PatternPlan(glob, regex, match_type, coltype,
+                                    settings))
+    return tuple(patterns)
+
+
+def match_column_patterns(patterns: Tuple[PatternPlan, ...],
+                          schema: List[Tuple[str, Optional[str]]],
+                          named: Optional[List[str]] = None
+                          ) -> List[Tuple[PatternPlan, List[str]]]:
+    '''
+    Match column pattern rules against the columns of a schema of (column
+    name, inferred type) pairs, the type None if not inferred, giving each
+    pattern matching columns with the names of the columns it matches (in
+    schema order). A column matches the first pattern it matches, and
+    columns in named (which have rules of their own) match no patterns.
+    '''
+    taken = frozenset(named or [])
+    matched: List[List[str]] = [[] for _ in patterns]
+    for name, inferred_type in schema:
+        if name in taken:
+            continue
+        for index, pattern in enumerate(patterns):
+            if pattern.matches(name, inferred_type):
+                matched[index].append(name)
+                break
+    return [(pattern, names) for pattern, names in zip(patterns, matched)
+            if names]
+
+
+def resolve_column_patterns(patterns: Tuple[PatternPlan, ...],
+                            schema: List[Tuple[str, Optional[str]]],
+                            named: Optional[List[str]] = None
+                            ) -> List[ColumnPlan]:
+    '''
+    Expand column pattern rules into rules for each of the columns of a
+    schema they match (see match_column_patterns), by pattern.
+    '''
+    return [ColumnPlan(name, pattern.type, pattern.settings)
+            for pattern, names in match_column_patterns(patterns, schema,
+                                                        named)
+            for name in names]
+
+
+def _compile_column_settings(coldict: Dict, colname: str,
+                             coltype: str) -> Tuple[Tuple[str, Any], ...]:
+    # validate the rules of a column (or column pattern) into
+    # (checksuite attribute, value) pairs
+    colkeys = list(coldict.keys())
+    settings: List[Tuple[str, Any]] = []
+    # allow outliers in the column
+    if 'allow_outliers' in colkeys:
+        val = _check_bool_val(coldict['allow_outliers'])
+        settings.append(('allow_outliers', val))
+    if 'outlier_method' in colkeys:
+        val = coldict['outlier_method']
+        if val not in OUTLIER_METHOD_VALS:
+            _yamlerr((f'column {colname} outlier_method must be one of '
+                      f'{", ".join(OUTLIER_METHOD_VALS)}, got {val}'))
+        settings.append(('outlier_method', val))
+    # allow blanks in the column
+    if 'allow_blanks' in colkeys:
+        val = _check_bool_val(coldict['allow_blanks'])
+        settings.append(('allow_blanks', val))
+    # allow null values in the column
+    if 'allow_nulls' in colkeys:
+        val = _check_bool_val(coldict['allow_nulls'])
+        settings.append(('allow_nulls', val))
+    # duplicate rows
+    if 'allow_duplicates' in colkeys:
+        val = _check_bool_val(coldict['allow_duplicates'])
+        settings.append(('allow_duplicates', val))
+    # count distinct checks
+    if 'count_distinct_max' in colkeys:
+        val = coldict['count_distinct_max']
+        if not isinstance(val, int):
+            _yamlerr(f'column {colname} count_distinct_max error {val}')
+        settings.append(('count_distinct_max', val))
+    if 'count_distinct_min' in colkeys:
+        val = coldict['count_distinct_min']
+        if not isinstance(val, int):
+            _yamlerr(f'column {colname} count_distinct_min error {val}')
+        settings.append(('count_distinct_min', val))
+    if 'count_distinct' in colkeys:
+        val = coldict['count_distinct']
+        if not isinstance(val, int):
+            _yamlerr(f'column {colname} count_distinct error {val}')
+        settings.append(('count_distinct', val))
+    if 'dateformat' in colkeys:
+        val = coldict['dateformat']
+        if not isinstance(val, str):
+            _yamlerr(f'column {colname} format error {val}')
+        settings.append(('dateformat', val))
+    # column value checks
+    if 'min' in colkeys:
+        val = coldict['min']
+        if (not isinstance(val, int)) and (not isinstance(val, float)):
+            _yamlerr(f'column {colname} cannot check minimum value of non '
+                     f'numeric column')
+        settings.append((_COLUMN_ATTRIBUTES['min'], val))
+    if 'max' in colkeys:
+        val = coldict['max']
+        if (not isinstance(val, int)) and (not isinstance(val, float)):
+            _yamlerr(f'column {colname} cannot check maximum value of non '
+                     f'numeric column')
+        settings.append((_COLUMN_ATTRIBUTES['max'], val))
+    if 'val' in colkeys:
+        val = coldict['val']
+        if (not isinstance(val, int)) and (not isinstance(val, float)):
+            _yamlerr(f'column {colname} cannot check value of non '
+                     f'numeric column')
+        settings.append(('val', val))
+    if 'regex_rule' in colkeys:
+        val = coldict['regex_rule']
+        if not isinstance(val, str):
+            _yamlerr(f'column {colname} regex_rule format error {val}')
+        elif coltype != 'string':
+            _yamlerr((f'column {colname} is of type {coltype}, but must '
+                      'be of type string for regex_rules'))
+        settings.append(('regex_rule', val))
+    if 'regex_type' in colkeys:
+        val = coldict['regex_type']
+        if not isinstance(val, str):
+            _yamlerr(f'column {colname} format error {val}')
+        elif coltype != 'string':
+            _yamlerr((f'column {colname} is of type {coltype}, but must '
+                      f'be of type string for regex_rules'))
+        elif val not in REGEX_VALS:
+            _yamlerr(('regex type must be of the following types '
+                      f'{".".join(REGEX_VALS)}'))
+        settings.append(('regex_type', val))
+    if 'regex_rules' in colkeys:
+        val = coldict['regex_rules']
+        if not isinstance(val, list) or not val:
+            _yamlerr((f'column {colname} regex_rules want a list of rule and '
+                      f'type entries, got {val}'))
+        elif coltype != 'string':
+            _yamlerr((f'column {colname} is of type {coltype}, but must '
+                      'be of type string for regex_rules'))
+        rules = []
+        for entry in val:
+            if not isinstance(entry, dict) or \
+                    sorted(entry.keys()) != ['rule', 'type']:
+                _yamlerr((f'column {colname} regex_rules entry want rule '
+                          f'and type, got {entry}'))
+            if not isinstance(entry['rule'], str):
+                _yamlerr((f'column {colname} regex_rules rule format error '
+                          f'{entry["rule"]}'))
+            if entry['type'] not in REGEX_VALS:
+                _yamlerr(('regex type must be of the following types '
+                          f'{".".join(REGEX_VALS)}'))
+            rules.append((entry['rule'], entry['type']))
+        settings.append(('regex_rules', tuple(rules)))
+    return tuple(settings)
+
+
+def compile_yamldict(ymld: Dict) -> RulePlan:
+    '''Validate yaml parsed into a dictionary and compile it to a plan.'''
+    table: List[Tuple[str, Any]] = []
+    columns: List[ColumnPlan] = []
     ykeys = list(ymld.keys())
     _check_yaml_toplevel_keys(ykeys)
     #
@@ -89,36 +352,45 @@ def apply_yamldict_to_checksuite(ymld: Dict,
         _check_yaml_table_keys(dsdictkeys)
         # stop on first check fail
         if 'stop_on_fail' in dsdictkeys:
-            suite.stop_on_fail = _check_bool_val(dsdict['stop_on_fail'])
+            val = _check_bool_val(dsdict['stop_on_fail'])
+            table.append(('stop_on_fail', val))
+        # order of checks when stopping on first check fail
+        if 'check_order' in dsdictkeys:
+            val = dsdict['check_order']
+            if val not in CHECK_ORDER_VALS:
+                _yamlerr((f'table: check_order must be one of '
+                          f'{", ".join(CHECK_ORDER_VALS)}, got {val}'))
+            table.append(('check_order', val))
         # allow duplicate rows
         dups = 'allow_duplicate_rows'
         if dups in dsdictkeys:
-            suite.allow_duplicate_rows = _check_bool_val(dsdict[dups])
+            val = _check_bool_val(dsdict[dups])
+            table.append(('allow_duplicate_rows', val))
         #  maximum number of rows
         if 'row_count_max' in dsdictkeys:
             val = dsdict['row_count_max']
             if not isinstance(val, int):
                 _yamlerr((f'table: row_count_max want an integer, '
                           f'got {val}({type(val)})'))
-            suite.row_count_max = val
+            table.append(('row_count_max', val))
         #  minimum number of rows
         if 'row_count_min' in dsdictkeys:
             val = dsdict['row_count_min']
             if not isinstance(val, int):
                 _yamlerr((f'table: row_count_min want an integer, '
                           f'got {val}({type(val)})'))
-            suite.row_count_min = val
+            table.append(('row_count_min', val))
         #  number of rows
         if 'row_count' in dsdictkeys:
             val = dsdict['row_count']
             if not isinstance(val, int):
                 _yamlerr((f'table: row_count want an integer, '
                           f'got {val}({type(val)})'))
-            suite.row_count = val
+            table.append(('row_count', val))
     #
     # Process columns
     if 'columns' not in ykeys:
-        return
+        return RulePlan(tuple(table), (), _compile_patterns(ymld))
     colslist = ymld['columns']
     for coldict in colslist:
         colkeys = list(coldict.keys())
@@ -126,84 +398,130 @@ def apply_yamldict_to_checksuite(ymld: Dict,
         colname = coldict['name']
         coltype = coldict['type']
         _check_yaml_column_type(coltype)
-        col = suite.addcolumn(colname, coltype)
-        # allow outliers in the column
-        if 'allow_outliers' in colkeys:
-            col.allow_outliers = _check_bool_val(coldict['allow_outliers'])
-        # allow blanks in the column
-        if 'allow_blanks' in colkeys:
-            col.allow_blanks = _check_bool_val(coldict['allow_blanks'])
-        # allow null values in the column
-        if 'allow_nulls' in colkeys:
-            col.allow_nulls = _check_bool_val(coldict['allow_nulls'])
-        # duplicate rows
-        if 'allow_duplicates' in colkeys:
-            col.allow_duplicates = _check_bool_val(coldict['allow_duplicates'])
-        # count distinct checks
-        if 'count_distinct_max' in colkeys:
-            val = coldict['count_distinct_max']
-            if not isinstance(val, int):
-                _yamlerr(f'column {colname} count_distinct_max error {val}')
-            col.count_distinct_max = val
-        if 'count_distinct_min' in colkeys:
-            val = coldict['count_distinct_min']
-            if not isinstance(val, int):
-                _yamlerr(f'column {colname} count_distinct_min error {val}')
-            col.count_distinct_min = val
-        if 'count_distinct' in colkeys:
-            val = coldict['count_distinct']
-            if not isinstance(val, int):
-                _yamlerr(f'column {colname} count_distinct error {val}')
-            col.count_distinct = val
-        if 'dateformat' in colkeys:
-            val = coldict['dateformat']
-            if not isinstance(val, str):
-                _yamlerr(f'column {colname} format error {val}')
-            col.dateformat = val
-        # column value checks
-        if 'min' in colkeys:
-            val = coldict['min']
-            if (not isinstance(val, int)) and (not isinstance(val, float)):
-                _yamlerr(f'column {colname} cannot check minimum value of non '
-                         f'numeric column')
-            col.min_val = val
-        if 'max' in colkeys:
-            val = coldict['max']
-            if (not isinstance(val, int)) and (not isinstance(val, float)):
-                _yamlerr(f'column {colname} cannot check maximum value of non '
-                         f'numeric column')
-            col.max_val = val
-        if 'val' in colkeys:
-            val = coldict['val']
-            if (not isinstance(val, int)) and (not isinstance(val, float)):
-                _yamlerr(f'column {colname} cannot check value of non '
-                         f'numeric column')
-            col.val = val
-        if 'regex_rule' in colkeys:
-            val = coldict['regex_rule']
-            if not isinstance(val, str):
-                _yamlerr(f'column {colname} regex_rule format error {val}')
-            elif coltype != 'string':
-                _yamlerr((f'column {colname} is of type {coltype}, but must '
-                          'be of type string for regex_rules'))
-            col.regex_rule = val
-        if 'regex_type' in colkeys:
-            val = coldict['regex_type']
-            if not isinstance(val, str):
-                _yamlerr(f'column {colname} format error {val}')
-            elif coltype != 'string':
-                _yamlerr((f'column {colname} is of type {coltype}, but must '
-                          f'be of type string for regex_rules'))
-            elif val not in REGEX_VALS:
-                _yamlerr(('regex type must be of the following types '
-                          f'{".".join(REGEX_VALS)}'))
-            col.regex_type = val
+        settings = _compile_column_settings(coldict, colname, coltype)
+        columns.append(ColumnPlan(colname, coltype, settings))
+    return RulePlan(tuple(table), tuple(columns), _compile_patterns(ymld))
 
 
-def load_yaml_file_to_dict(filename: str) -> Dict:
-    '''Parse a yaml file into a Dict object.'''
-    with open(filename, 'r') as stream:
-        parsed = yaml.safe_load(stream)
+def apply_rule_plan(plan: RulePlan, suite: dw.TableCheckSuite) -> None:
+    '''Apply rules compiled into a plan to a checksuite object.'''
+    for attribute, val in plan.table:
+        setattr(suite, attribute, val)
+    add_planned_columns(plan.columns, suite)
+    if plan.patterns:
+        suite.column_patterns = plan.patterns
+        suite.resolve_column_patterns()
+
+
+def add_planned_columns(columns: Union[Tuple[ColumnPlan, ...],
+                                       List[ColumnPlan]],
+                        suite: dw.TableCheckSuite) -> None:
+    '''Add columns with rules compiled into plans to a checksuite.'''
+    for colplan in columns:
+        col = suite.addcolumn(colplan.name, colplan.type)
+        for attribute, val in colplan.settings:
+            setattr(col, attribute, val)
+
+
+def apply_yamldict_to_checksuite(ymld: Dict,
+                                 suite: Union[dw.PandasDatsetCheckSuite,
+                                              dw.BqTableCheckSuite,
+                                              dw.StreamingDatasetCheckSuite]
+                                 ) -> None:
+    '''Apply yaml parsed into dictionary to a checksuite object.'''
+    apply_rule_plan(compile_yamldict(ymld), suite)
+
+
+def load_rule_plan(filename: str, cachedir: Optional[str] = None) -> RulePlan:
+    '''
+    Parse and compile a yaml rules file into a plan. If a cache directory
+    is given, compiled plans are cached by a hash of the rules file so that
+    loading the same rules again skips yaml parsing. Plans are cached as
+    JSON, which (unlike pickles) cannot run code when read from a shared
+    cache directory.
+    '''
+    with open(filename, 'rb') as stream:
+        content = stream.read()
+    cachefile = None
+    if cachedir is not None:
+        key = hashlib.blake2b(content + dw.__version__.encode('utf-8'),
+                              digest_size=20).hexdigest()
+        cachefile = os.path.join(cachedir, f'{key}.plan.json')
+        try:
+            with open(cachefile, 'r', encoding='utf-8') as stream:
+                cached = _json_plan(stream.read())
+            if cached is not None:
+                return cached
+        except (OSError, ValueError):
+            pass
+    plan = compile_yamldict(_parse_yaml(content, filename))
+    if cachedir is not None and cachefile is not None:
+        os.makedirs(cachedir, exist_ok=True)
+        tmpfile = f'{cachefile}.{os.getpid()}.tmp'
+        text = _plan_json(plan)
+        # plans holding values JSON cannot keep (dates, ...) are not cached
+        if text is not None and _json_plan(text) == plan:
+            with open(tmpfile, 'w', encoding='utf-8') as stream:
+                stream.write(text)
+            os.replace(tmpfile, cachefile)
+    return plan
+
+
+def _plan_json(plan: RulePlan) -> Optional[str]:
+    # the plan as JSON (tuples as lists), see _json_plan
+    try:
+        return json.dumps([plan.table, plan.columns, plan.patterns])
+    except (TypeError, ValueError):
+        return None
+
+
+def _tuples(value: Any) -> Any:
+    # the lists of a plan read from JSON as the tuples they were
+    if isinstance(value, list):
+        return tuple(_tuples(item) for item in value)
+    return value
+
+
+def _json_plan(text: str) -> Optional[RulePlan]:
+    # read a plan back from JSON, None if it is not a plan
+    try:
+        table, columns, patterns = _tuples(json.loads(text))
+        return RulePlan(table,
+                        tuple(ColumnPlan(*column) for column in columns),
+                        tuple(PatternPlan(*pattern) for pattern in patterns))
+    except (ValueError, TypeError, RecursionError):
+        return None
+
+
+def rule_plan_fingerprint(plan: RulePlan) -> str:
+    '''
+    Hash of compiled rules that does not depend on the order of keys or
+    the formatting of the yaml file they were parsed from.
+    '''
+    return hashlib.blake2b(repr(plan).encode('utf-8'),
+                           digest_size=20).hexdigest()
+
+
+def rule_plan_counts_rows_only(plan: RulePlan) -> bool:
+    '''
+    Check if compiled rules need no values from the data, only the number
+    of rows, so that rows can be counted instead of parsed.
+    '''
+    if plan.columns or plan.patterns:
+        return False
+    return ('allow_duplicate_rows', False) not in plan.table
+
+
+def _parse_yaml(content: Union[str, bytes], filename: str) -> Dict:
+    # use the LibYAML based loader if PyYAML was built with it
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    parsed = yaml.load(content, Loader=loader)
     if not isinstance(parsed, dict):
         raise YamlParsingError(f'error converting YAML markup in {filename}')
     return parsed
+
+
+def load_yaml_file_to_dict(filename: str) -> Dict:
+    '''Parse a yaml file into a Dict object.'''
+    with open(filename, 'r') as stream:
+        return _parse_yaml(stream.read(), filename)
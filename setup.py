@@ -15,5 +15,8 @@ setup(
     entry_points={'console_scripts': [
         'datawhistle = datawhistle.__main__:main'
     ]},
-    install_requires=requirements
+    python_requires='>=3.9',
+    install_requires=requirements,
+    extras_require={'arrow': ['pyarrow'], 'json': ['orjson'],
+                    'zstd': ['zstandard']}
 )
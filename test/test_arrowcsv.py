@@ -0,0 +1,72 @@
+import gzip
+import inspect
+import os
+import sys
+import tempfile
+import unittest
+HDIR = os.path.dirname(os.path.abspath(
+            inspect.getfile(inspect.currentframe())))
+PARENTDIR = os.path.dirname(HDIR)
+sys.path.insert(0, PARENTDIR)
+import pandas as pd     # type: ignore
+import datawhistle as dw  # noqa
+import datawhistle.arrowcsv as dwac  # noqa
+
+
+class TestArrowCsv(unittest.TestCase):
+
+    def setUp(self):
+        self.dfile1 = os.path.join(HDIR, 'data/file1.csv')
+        self.dfile2 = os.path.join(HDIR, 'data/file2.csv')
+        self.yfile1a = os.path.join(HDIR, 'yamls/file1a.yaml')
+
+    @unittest.skipIf(dwac.arrow_available(), 'pyarrow is installed')
+    def test_arrow_not_installed(self):
+        self.assertRaises(ImportError, dwac.read_csv_arrow, self.dfile1)
+
+    @unittest.skipUnless(dwac.arrow_available(), 'pyarrow is not installed')
+    def test_same_as_pandas(self):
+        for csvfile in [self.dfile1, self.dfile2]:
+            for threads in [None, 1, 2]:
+                df = dwac.read_csv_arrow(csvfile, block_size=64,
+                                         threads=threads)
+                pd.testing.assert_frame_equal(df, pd.read_csv(csvfile))
+
+    @unittest.skipUnless(dwac.arrow_available(), 'pyarrow is not installed')
+    def test_compressed(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csvfile = os.path.join(tmpdir, 'file2.csv.gz')
+            with open(self.dfile2, 'rb') as stream:
+                data = stream.read()
+            with gzip.open(csvfile, 'wb') as stream:
+                stream.write(data)
+            positions = []
+            df = dwac.read_csv_arrow(csvfile, progress=positions.append)
+        pd.testing.assert_frame_equal(df, pd.read_csv(self.dfile2))
+        self.assertTrue(len(positions) > 0)
+
+    @unittest.skipUnless(dwac.arrow_available(), 'pyarrow is not installed')
+    def test_declared_types(self):
+        df = dwac.read_csv_arrow(self.dfile2, {'A': 'string',
+                                               'B': 'numeric',
+                                               'H': 'datetime'})
+        self.assertTrue(pd.api.types.is_string_dtype(df['A']))
+        self.assertTrue(pd.api.types.is_numeric_dtype(df['B']))
+        # checks run on the DataFrame as on one read by pandas, except
+        # that columns declared as strings are strings
+        checksuite = dw.PandasDatsetCheckSuite(df)
+        dw.apply_yamldict_to_checksuite(
+            dw.load_yaml_file_to_dict(self.yfile1a), checksuite)
+        checksuite.runchecks()
+        pdcs = dw.PandasDatsetCheckSuite(pd.read_csv(self.dfile2))
+        dw.apply_yamldict_to_checksuite(
+            dw.load_yaml_file_to_dict(self.yfile1a), pdcs)
+        pdcs.runchecks()
+        self.assertEqual(checksuite.error_messages,
+                         [msg for msg in pdcs.error_messages
+                          if msg != ('column A expected to be string type '
+                                     'but is not')])
+
+
+if __name__ == '__main__':
+    unittest.main()
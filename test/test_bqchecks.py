@@ -57,6 +57,33 @@ class TestTableLevelChecks(unittest.TestCase):
 
 class TestColumnLevelChecks(unittest.TestCase):
 
+    def test_inferred_type(self):
+        self.assertEqual(dwbc.inferred_type('INT64'), 'numeric')
+        self.assertEqual(dwbc.inferred_type('STRING'), 'string')
+        self.assertEqual(dwbc.inferred_type('DATE'), 'datetime')
+        self.assertIsNone(dwbc.inferred_type('BOOL'))
+
+    def test_sql_count_regexes(self):
+        # the matches of all rules are counted by one query
+        self.assertEqual(
+                dwbc._sql_count_regexes('datawhistle', 'table1', 'C',
+                                        ['[a]', '[b]'], 10),
+                'SELECT\n'
+                '  SUM(CASE WHEN REGEXP_CONTAINS(C,\n'
+                '                                r"[a]")\n'
+                '           THEN 1 ELSE 0 END) AS matches_0,\n'
+                '  SUM(CASE WHEN REGEXP_CONTAINS(C,\n'
+                '                                r"[b]")\n'
+                '           THEN 1 ELSE 0 END) AS matches_1,\n'
+                '  COUNT(C) AS col_count\n'
+                'FROM datawhistle.table1 TABLESAMPLE SYSTEM (10 PERCENT);\n')
+        self.assertEqual(
+                dwbc.colcheck_regex_rules('datawhistle', 'table1', 'C',
+                                          [('', 'mandatory'), ('[', 'x')]),
+                [(False, 'column C blank regex_rule'),
+                 (False, ('column C regex_type expect mandatory or exclude, '
+                          'got x'))])
+
     def test_colcheck_exists(self):
         passed, message = dwbc.colcheck_exists('datawhistle', 'table1', 'A')
         self.assertTrue(passed)
@@ -8,6 +8,7 @@ PARENTDIR = os.path.dirname(HDIR)
 sys.path.insert(0, PARENTDIR)
 import pandas as pd  # type: ignore
 import datawhistle as dw  # noqa
+import datawhistle.scheduling as dwsc  # noqa
 
 
 class TestPandasTableCheckSuite(unittest.TestCase):
@@ -47,6 +48,12 @@ class TestPandasTableCheckSuite(unittest.TestCase):
         pdcs = dw.PandasColumnCheckSuite(self.df_file1, 'C', 'string')
         pdcs.runchecks(False)
         self.assertEqual(len(pdcs.error_messages), 0)
+        pdcs.allow_outliers = False
+        pdcs.runchecks(False)
+        self.assertEqual(
+                pdcs.error_messages,
+                ['column C cannot check inter-quartile range on a '
+                 'non-numeric column'])
         pdcs = dw.PandasColumnCheckSuite(self.df_file1, 'A', 'string')
         pdcs.runchecks(False)
         self.assertEqual(
@@ -55,6 +62,146 @@ class TestPandasTableCheckSuite(unittest.TestCase):
         pdcs = dw.PandasColumnCheckSuite(self.df_file2, 'B', 'numeric')
         pdcs.runchecks(False)
 
+    def test_runchecks_sample(self):
+        pdcs = dw.PandasDatsetCheckSuite(self.df_file1, 50)
+        pdcs.row_count_min = 10
+        pdcs.runchecks()
+        self.assertEqual(pdcs.error_messages, [])
+        pdcs.row_count = 5
+        pdcs.runchecks()
+        self.assertEqual(pdcs.error_messages,
+                         ['want row count == 5, got 50 (sample of 5 of 50 '
+                          'rows)'])
+        self.assertTrue(pdcs.sample_statement().startswith(
+                'Checks ran on a sample of 5 of 50 rows'))
+        pdcs = dw.PandasDatsetCheckSuite(self.df_file1)
+        self.assertEqual(pdcs.sample_statement(), '')
+
+    def test_runchecks_check_order(self):
+        pdcs = dw.PandasDatsetCheckSuite(self.df_file2)
+        pdcs.stop_on_fail = True
+        pdcs.allow_duplicate_rows = False
+        col = pdcs.addcolumn('D', 'numeric')
+        col.allow_nulls = False
+        # checks run in the declared order by default
+        pdcs.runchecks()
+        self.assertEqual(pdcs.error_messages, ['want 0 duplicate rows, got 2'])
+        pdcs.check_order = 'cost'
+        # the cheap null check fails before the duplicate rows scan
+        pdcs.runchecks()
+        self.assertEqual(pdcs.error_messages, ['column D want 0 nulls, got 3'])
+        self.assertEqual(col.error_messages, ['column D want 0 nulls, got 3'])
+
+    def test_runchecks_cost_order_derived(self):
+        # duplicate datetimes are found in the values the type check
+        # parses, even when the type check was slow in earlier runs
+        df = pd.DataFrame({'T': ['2020-01-01', '2020-1-1', '2020-02-01']})
+        pdcs = dw.PandasDatsetCheckSuite(df)
+        pdcs.stop_on_fail = True
+        pdcs.check_order = 'cost'
+        pdcs.timing_history = dwsc.TimingHistory('')
+        pdcs.timing_history.update([
+                {'check': 'check_col_type', 'column': 'T',
+                 'wall_seconds': 10.0, 'rows_scanned': 3}])
+        col = pdcs.addcolumn('T', 'datetime')
+        col.dateformat = '%Y-%m-%d'
+        col.allow_duplicates = False
+        pdcs.runchecks()
+        self.assertEqual(pdcs.error_messages,
+                         ['column T want 0 duplicate rows, got 1'])
+
+    def test_runchecks_does_not_modify_data(self):
+        df = self.df_file1.copy()
+        pdcs = dw.PandasDatsetCheckSuite(df)
+        pdcs.allow_duplicate_rows = False
+        col = pdcs.addcolumn('J', 'datetime')
+        col.dateformat = '%m/%d/%Y'
+        col.allow_duplicates = False
+        col.count_distinct = 3
+        pdcs.addcolumn('K', 'datetime')
+        for _ in range(2):
+            pdcs.runchecks()
+            pd.testing.assert_frame_equal(df, self.df_file1)
+            # parsed datetimes are kept by the suite and checked as dates
+            self.assertEqual(list(pdcs.derived), ['J'])
+            self.assertEqual(pdcs.error_messages,
+                             ['column J want 0 duplicate rows, got 2',
+                              'column K expected to be datetime type but '
+                              'is not'])
+        pdcs.clearderived()
+        self.assertEqual(pdcs.derived, {})
+
+    def test_runchecks_wide(self):
+        ymld = dw.load_yaml_file_to_dict(os.path.join(HDIR,
+                                                      'yamls/file1a.yaml'))
+        ymld['table']['stop_on_fail'] = False
+        for column in ['B', 'D', 'E', 'X']:
+            ymld['columns'].append({'name': column, 'type': 'numeric',
+                                    'allow_nulls': False, 'min': 2,
+                                    'max': 4, 'val': 2.1})
+        messages = []
+        for wide in [False, True]:
+            pdcs = dw.PandasDatsetCheckSuite(self.df_file2)
+            pdcs.wide = wide
+            dw.apply_yamldict_to_checksuite(ymld, pdcs)
+            pdcs.runchecks()
+            messages.append(pdcs.error_messages)
+            # statistics are computed for each run
+            self.assertEqual(pdcs.batched, {})
+        self.assertEqual(messages[0], messages[1])
+        self.assertIn('column D want 0 nulls, got 3', messages[1])
+        self.assertIn('column E want value <= 4.0, got 5.4', messages[1])
+
+    def test_runchecks_column_patterns(self):
+        # a pattern's columns are checked as a group, with the messages of
+        # a suite per column
+        rules = [{'type': 'numeric', 'allow_nulls': False, 'min': 2,
+                  'max': 4, 'val': 2.1, 'allow_duplicates': False,
+                  'count_distinct_max': 3, 'allow_outliers': False},
+                 {'type': 'string', 'allow_blanks': False,
+                  'count_distinct_min': 4,
+                  'regex_rules': [{'rule': '^[a-d]', 'type': 'mandatory'},
+                                  {'rule': 'e', 'type': 'exclude'}]},
+                 {'type': 'datetime', 'dateformat': '%Y-%m',
+                  'count_distinct': 1}]
+        matches = ['[ABDE]', '[CFG]', 'H']
+        columns = [dict(rule, name=name)
+                   for rule, names in zip(rules, ['ABDE', 'CFG', 'H'])
+                   for name in names]
+        patterns = [dict(rule, match=match)
+                    for rule, match in zip(rules, matches)]
+        for check_order in ['declared', 'cost']:
+            messages = []
+            for stop_on_fail in [False, True]:
+                table = {'stop_on_fail': stop_on_fail,
+                         'check_order': check_order}
+                for ymld in [{'table': table, 'columns': columns},
+                             {'table': table, 'column_patterns': patterns}]:
+                    pdcs = dw.PandasDatsetCheckSuite(self.df_file2)
+                    dw.apply_yamldict_to_checksuite(ymld, pdcs)
+                    pdcs.runchecks()
+                    messages.append(pdcs.error_messages)
+            self.assertEqual(messages[1], messages[0])
+            self.assertEqual(len(messages[3]), 1)
+            self.assertIn(messages[3][0], messages[0])
+        self.assertEqual(len(pdcs.columns), 3)
+        self.assertIn('column D want 0 nulls, got 3', messages[0])
+        self.assertIn('column H data does not match datetime format %Y-%m',
+                      messages[0])
+
+    def test_preflight_runchecks(self):
+        pfcs = dw.PreflightCheckSuite(self.df_file1.astype({'K': str}))
+        pfcs.row_count = 1
+        col = pfcs.addcolumn('A', 'string')
+        col.allow_duplicates = False
+        pfcs.addcolumn('K', 'datetime').dateformat = '%m/%d/%Y'
+        pfcs.addcolumn('X', 'numeric')
+        # only structure checks run: A is not checked for being a string
+        pfcs.runchecks()
+        self.assertEqual(pfcs.error_messages,
+                         ['column K data does not match datetime format '
+                          '%m/%d/%Y'])
+
 
 class TestBqTableCheckSuite(unittest.TestCase):
 
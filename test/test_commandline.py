@@ -1,16 +1,25 @@
+import bz2
+import gzip
 import io
 import inspect
+import json
+import lzma
 import os
+import subprocess
 import sys
+import tempfile
 import unittest
+import zipfile
 HDIR = os.path.dirname(os.path.abspath(
             inspect.getfile(inspect.currentframe())))
 PARENTDIR = os.path.dirname(HDIR)
 sys.path.insert(0, PARENTDIR)
 import datawhistle as dw  # noqa
+import datawhistle.processpool as dwpp  # noqa
 
 
-_ALL_PASSED = '''Reading data file ... done.
+_ALL_PASSED = '''Checking header and first rows ....... done.
+Reading data file ... done.
 Parsing rules file ... done.
 Running checks .......................... done.
 All checks passed.
@@ -31,7 +40,7 @@ column A want count distinct >= 10, got 6
 column A want count distinct == 7, got 6
 column A cannot check minimum value on a non-numeric column
 column A cannot check maximum value on a non-numeric column
-column B outlier above 1.5xIQR 10.35: 12.1
+column B want 0 outliers outside 1.5xIQR -2.85 to 10.35, got 1
 column B want value >= 10.1, got 1.0
 column B want value <= 3.0, got 12.1
 column B want all values = 1.0, got different values
@@ -93,12 +102,264 @@ class TestWhistle(unittest.TestCase):
         self.assertEqual(e.exception.code, 1)
         self.assertEqual(self.capturedStout.getvalue(), _ALL_FAILED)
 
+    def test_processes(self):
+        min_rows = dwpp.PROCESS_MIN_ROWS
+        dwpp.PROCESS_MIN_ROWS = 0
+        try:
+            with self.assertRaises(SystemExit) as e:
+                dw.commandline_check_csv(self.dfile2, self.yfile1a, True,
+                                         processes=2)
+        finally:
+            dwpp.PROCESS_MIN_ROWS = min_rows
+        self.assertEqual(e.exception.code, 1)
+        self.assertEqual(self.capturedStout.getvalue(), _ALL_FAILED)
+
+    def test_compressed(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csvfile = os.path.join(tmpdir, 'file1.csv.gz')
+            with open(self.dfile1, 'rb') as stream:
+                data = stream.read()
+            with gzip.open(csvfile, 'wb') as stream:
+                stream.write(data)
+            stderr = io.StringIO()
+            sys.stderr = stderr
+            try:
+                dw.commandline_check_csv(csvfile, self.yfile1, True,
+                                         progress=True)
+                dw.commandline_check_csv_streaming(csvfile, self.yfile1,
+                                                   False, 2, prefetch=0)
+            finally:
+                sys.stderr = sys.__stderr__
+        self.assertEqual(self.capturedStout.getvalue(), _ALL_PASSED)
+        self.assertTrue(stderr.getvalue().startswith('\rRead '))
+        self.assertTrue(stderr.getvalue().endswith(
+                f'\rRead 100% of {csvfile}\n'))
+
+    def test_compressed_by_name(self):
+        # compressions pandas would infer from the names of the files
+        with open(self.dfile1, 'rb') as stream:
+            data = stream.read()
+        csvfiles = []
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for extension, module in [('bz2', bz2), ('xz', lzma)]:
+                csvfile = os.path.join(tmpdir, 'file1.csv.' + extension)
+                with open(csvfile, 'wb') as stream:
+                    stream.write(module.compress(data))
+                csvfiles.append(csvfile)
+            csvfile = os.path.join(tmpdir, 'file1.csv.zip')
+            with zipfile.ZipFile(csvfile, 'w',
+                                 zipfile.ZIP_DEFLATED) as archive:
+                archive.writestr('file1.csv', data)
+            csvfiles.append(csvfile)
+            for csvfile in csvfiles:
+                dw.commandline_check_csv(csvfile, self.yfile1, False)
+                dw.commandline_check_csv(csvfile, self.yfile1, False,
+                                         sample_size=1000)
+                dw.commandline_check_csv_streaming(csvfile, self.yfile1,
+                                                   False, 2, prefetch=0)
+        self.assertEqual(self.capturedStout.getvalue(), '')
+
     def test_stop_on_fail(self):
         with self.assertRaises(SystemExit):
             dw.commandline_check_csv(self.dfile2, self.yfile1, False)
         self.assertEqual(
                 self.capturedStout.getvalue(),
-                'want row count == 5, got 8\n')
+                'column I not found in data\n')
+
+    def test_preflight(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            rulesfile = os.path.join(tmpdir, 'rules.yaml')
+            with open(rulesfile, 'w') as stream:
+                stream.write('table:\n'
+                             '  stop_on_fail: true\n'
+                             '  row_count: 1\n'
+                             'columns:\n'
+                             '  - name: A\n'
+                             '    type: numeric\n'
+                             '  - name: C\n'
+                             '    type: numeric\n')
+            with self.assertRaises(SystemExit) as e:
+                dw.commandline_check_csv(self.dfile1, rulesfile, True)
+        self.assertEqual(e.exception.code, 1)
+        # the structure of the data fails before row counts are checked
+        self.assertEqual(self.capturedStout.getvalue(),
+                         ('Checking header and first rows ...F done.\n'
+                          'Checks failed (1):\n'
+                          'column C expected to be numeric but is not\n'))
+
+    def test_result_cache(self):
+        with tempfile.TemporaryDirectory() as cachedir:
+            for _ in range(2):
+                with self.assertRaises(SystemExit) as e:
+                    dw.commandline_check_csv(self.dfile2, self.yfile1, False,
+                                             cachedir=cachedir)
+                self.assertEqual(e.exception.code, 1)
+            with self.assertRaises(SystemExit) as e:
+                dw.commandline_check_csv(self.dfile2, self.yfile1, True,
+                                         cachedir=cachedir)
+        self.assertEqual(
+                self.capturedStout.getvalue(),
+                ('column I not found in data\n' * 2 +
+                 'Reading cached results ... done.\nChecks failed (1):\n'
+                 'column I not found in data\n'))
+
+    def test_rules_loaded_once(self):
+        load_rule_plan = dw.load_rule_plan
+        loaded = []
+
+        def counted(*args):
+            loaded.append(args)
+            return load_rule_plan(*args)
+
+        dw.load_rule_plan = counted
+        try:
+            with tempfile.TemporaryDirectory() as cachedir:
+                dw.commandline_check_csv(self.dfile1, self.yfile1, False,
+                                         cachedir=cachedir)
+        finally:
+            dw.load_rule_plan = load_rule_plan
+        self.assertEqual(len(loaded), 1)
+
+    def test_profile_report(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            report = os.path.join(tmpdir, 'report.json')
+            with self.assertRaises(SystemExit) as e:
+                dw.commandline_check_csv(self.dfile2, self.yfile1, False,
+                                         profile=report)
+            self.assertEqual(e.exception.code, 1)
+            with open(report) as stream:
+                checks = json.load(stream)['checks']
+        # stop_on_fail is set so the structure of the data is checked
+        # first, stopping at the missing column I
+        self.assertEqual([c['check'] for c in checks],
+                         ['check_col_exists', 'check_col_type',
+                          'check_col_exists', 'check_col_exists'])
+        self.assertFalse(checks[-1]['passed'])
+        self.assertEqual(checks[-1]['rows_scanned'], 8)
+
+    def test_row_count_only(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            rulesfile = os.path.join(tmpdir, 'rules.yaml')
+            with open(rulesfile, 'w') as stream:
+                stream.write('table:\n  row_count_min: 3\n  row_count: 5\n')
+            dw.commandline_check_csv(self.dfile1, rulesfile, True)
+            with self.assertRaises(SystemExit) as e:
+                dw.commandline_check_csv(self.dfile2, rulesfile, False)
+        self.assertEqual(e.exception.code, 1)
+        self.assertEqual(self.capturedStout.getvalue(),
+                         ('Counting data file rows ... done.\n'
+                          'Parsing rules file ... done.\n'
+                          'Running checks .. done.\n'
+                          'All checks passed.\n'
+                          'want row count == 5, got 8\n'))
+
+    def test_streaming(self):
+        dw.commandline_check_csv_streaming(self.dfile1, self.yfile1, True, 2)
+        self.assertRegex(self.capturedStout.getvalue(),
+                         (r'^Parsing rules file \.\.\. done\.\n'
+                          r'Reading data file \.\.\. done\.\n'
+                          r'Reading ahead was (reader|compute) bound: reader '
+                          r'busy \d+%, checks busy \d+% over 3 chunks\.\n'
+                          r'Running checks \.{26} done\.\n'
+                          r'All checks passed\.\n$'))
+
+    def test_streaming_no_prefetch(self):
+        dw.commandline_check_csv_streaming(self.dfile1, self.yfile1, True, 2,
+                                           prefetch=0)
+        self.assertEqual(self.capturedStout.getvalue(),
+                         ('Parsing rules file ... done.\n'
+                          'Reading data file ... done.\n'
+                          'Running checks .......................... done.\n'
+                          'All checks passed.\n'))
+
+    def test_streaming_tee(self):
+        tee = io.BytesIO()
+        dw.commandline_check_csv_streaming(self.dfile1, self.yfile1, False, 2,
+                                           tee=tee)
+        with open(self.dfile1, 'rb') as stream:
+            self.assertEqual(tee.getvalue(), stream.read())
+        self.assertEqual(self.capturedStout.getvalue(), '')
+
+    def test_stdin_tee(self):
+        for csvfile, returncode, stderr in [
+                (self.dfile1, 0, ''),
+                (self.dfile2, 1, ('column I not found in data (stopped '
+                                  'reading after 0 rows)\n'))]:
+            with open(csvfile, 'rb') as stream:
+                data = stream.read()
+            result = subprocess.run(
+                    [sys.executable, '-m', 'datawhistle', '-s', 'CSV', '-f',
+                     '-', '-r', self.yfile1, '--tee'],
+                    input=data, capture_output=True, cwd=PARENTDIR)
+            self.assertEqual(result.returncode, returncode)
+            self.assertEqual(result.stderr.decode(), stderr)
+            if returncode == 0:
+                self.assertEqual(result.stdout, data)
+
+    def test_jsonl(self):
+        records = [f'{{"A": {i}, "C": "{c}", "I": 1, "J": "1/1/2000"}}\n'
+                   for i, c in enumerate('abcde', 1)]
+        for stdin, returncode in [(records, 0), (records[:3], 1)]:
+            result = subprocess.run(
+                    [sys.executable, '-m', 'datawhistle', '-s', 'JSONL',
+                     '-f', '-', '-r', self.yfile1],
+                    input=''.join(stdin).encode(), capture_output=True,
+                    cwd=PARENTDIR)
+            self.assertEqual(result.returncode, returncode)
+        self.assertEqual(result.stdout.decode(),
+                         'want row count == 5, got 3\n')
+
+    def test_max_memory(self):
+        stderr = io.StringIO()
+        sys.stderr = stderr
+        try:
+            execution = dw.commandline_plan(self.dfile1, self.yfile1, None,
+                                            1 << 40)
+            self.assertFalse(execution.streaming)
+            execution = dw.commandline_plan(self.dfile1, self.yfile1, None,
+                                            1)
+            self.assertTrue(execution.streaming)
+            self.assertIsNotNone(execution.hash_max_bytes)
+            self.assertFalse(execution.fits)
+            dw.commandline_report_memory(execution)
+        finally:
+            sys.stderr = sys.__stderr__
+        lines = stderr.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith('Plan: load the whole file '
+                                            '(about 5 rows)'))
+        self.assertTrue(lines[1].startswith('Plan: stream about 5 rows in '
+                                            'chunks of 1000 rows, 0 read '
+                                            'ahead, spilling hashes'))
+        self.assertRegex(lines[2], r'^Peak memory [0-9.]+ MiB of 1 B\.$')
+        # no plan fits in 1 byte
+        result = subprocess.run(
+                [sys.executable, '-m', 'datawhistle', '-s', 'CSV', '-f',
+                 self.dfile1, '-r', self.yfile1, '--max-memory', '1'],
+                capture_output=True, cwd=PARENTDIR)
+        self.assertEqual(result.returncode, 2)
+        self.assertIn('--max-memory 1 B is too small: ',
+                      result.stderr.decode())
+        outputs = []
+        for hash_max_bytes in [None, 8]:
+            with self.assertRaises(SystemExit) as e:
+                dw.commandline_check_csv_streaming(
+                        self.dfile2, self.yfile1a, False, 2, prefetch=0,
+                        hash_max_bytes=hash_max_bytes)
+            self.assertEqual(e.exception.code, 1)
+            outputs.append(self.capturedStout.getvalue())
+            self.capturedStout.truncate(0)
+            self.capturedStout.seek(0)
+        self.assertEqual(outputs[0], outputs[1])
+
+    def test_streaming_stop_on_fail(self):
+        with self.assertRaises(SystemExit) as e:
+            dw.commandline_check_csv_streaming(self.dfile2, self.yfile1,
+                                               False, 3)
+        self.assertEqual(e.exception.code, 1)
+        self.assertEqual(self.capturedStout.getvalue(),
+                         ('column I not found in data (stopped reading '
+                          'after 0 rows)\n'))
 
 
 if __name__ == '__main__':
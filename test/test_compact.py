@@ -0,0 +1,76 @@
+import inspect
+import os
+import sys
+import unittest
+HDIR = os.path.dirname(os.path.abspath(
+            inspect.getfile(inspect.currentframe())))
+PARENTDIR = os.path.dirname(HDIR)
+sys.path.insert(0, PARENTDIR)
+import numpy as np      # type: ignore
+import pandas as pd     # type: ignore
+import datawhistle as dw  # noqa
+import datawhistle.compact as dwcp  # noqa
+import datawhistle.pandaschecks as dwpc  # noqa
+
+
+class TestCompact(unittest.TestCase):
+
+    def setUp(self):
+        self.dfile1 = os.path.join(HDIR, 'data/file1.csv')
+        self.dfile2 = os.path.join(HDIR, 'data/file2.csv')
+        self.yfile1 = os.path.join(HDIR, 'yamls/file1.yaml')
+        self.yfile1a = os.path.join(HDIR, 'yamls/file1a.yaml')
+
+    def test_compact_column(self):
+        series = dwcp.compact_column(pd.Series([1, 2, 300]))
+        self.assertEqual(series.dtype, np.int16)
+        series = dwcp.compact_column(pd.Series([1.0, np.nan, 3.0]))
+        self.assertEqual(series.dtype, np.float32)
+        series = dwcp.compact_column(pd.Series([1.0, 2.1]))
+        self.assertEqual(series.dtype, np.float64)
+        series = dwcp.compact_column(pd.Series(['a', 'b', 'a', None]))
+        self.assertIsInstance(series.dtype, pd.CategoricalDtype)
+        series = dwcp.compact_column(pd.Series(['a', 'b', 'c']))
+        self.assertNotIsInstance(series.dtype, pd.CategoricalDtype)
+        self.assertTrue(pd.api.types.is_string_dtype(series))
+        series = dwcp.compact_column(pd.Series([True, False]))
+        self.assertEqual(series.dtype, np.bool_)
+
+    def test_checks_on_categories(self):
+        df = pd.DataFrame({'A': ['x1', 'x2', ' ', 'x1', 'y2', None]})
+        cdf = dwcp.compact_dataframe(df.copy(), 1.0)
+        self.assertIsInstance(cdf['A'].dtype, pd.CategoricalDtype)
+        for check, args in [(dwpc.colcheck_is_str, ()),
+                            (dwpc.colcheck_no_blanks, ()),
+                            (dwpc.colcheck_no_duplicates, ()),
+                            (dwpc.colcheck_count_distinct, (4,)),
+                            (dwpc.colcheck_regex, ('x', 'mandatory')),
+                            (dwpc.colcheck_regex, ('y', 'exclude')),
+                            (dwpc.colcheck_regex, ('[xy]', 'exclude'))]:
+            self.assertEqual(check(cdf, 'A', *args), check(df, 'A', *args))
+        # categories of values not in the column do not fail checks
+        cdf = cdf.iloc[[0, 1, 3]]
+        self.assertEqual(dwpc.colcheck_no_blanks(cdf, 'A'), (True, ''))
+        self.assertEqual(dwpc.colcheck_regex(cdf, 'A', 'x', 'mandatory'),
+                         (True, ''))
+
+    def test_same_errors(self):
+        for csvfile, yamlfile in [(self.dfile1, self.yfile1),
+                                  (self.dfile2, self.yfile1),
+                                  (self.dfile2, self.yfile1a)]:
+            ymld = dw.load_yaml_file_to_dict(yamlfile)
+            ymld['table']['stop_on_fail'] = False
+            messages = []
+            for compact in [False, True]:
+                df = pd.read_csv(csvfile)
+                if compact:
+                    df = dwcp.compact_dataframe(df, 1.0)
+                pdcs = dw.PandasDatsetCheckSuite(df)
+                dw.apply_yamldict_to_checksuite(ymld, pdcs)
+                pdcs.runchecks()
+                messages.append(pdcs.error_messages)
+            self.assertEqual(messages[0], messages[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+import bz2
+import gzip
+import inspect
+import io
+import lzma
+import os
+import sys
+import tempfile
+import threading
+import unittest
+import zipfile
+import zlib
+HDIR = os.path.dirname(os.path.abspath(
+            inspect.getfile(inspect.currentframe())))
+PARENTDIR = os.path.dirname(HDIR)
+sys.path.insert(0, PARENTDIR)
+import datawhistle.compressed as dwcz  # noqa
+
+
+_DATA = b''.join(b'%d,value %d,"quoted\nfield"\n' % (number, number % 7)
+                 for number in range(20000))
+# the empty BGZF member bgzip writes at the end of a file
+_BGZF_EOF = bytes.fromhex('1f8b08040000000000ff0600424302001b0003000000000000'
+                          '000000')
+
+
+def _bgzf(data, blocksize=1000):
+    # a BGZF file of members holding blocksize bytes of data each
+    members = []
+    for start in range(0, len(data), blocksize):
+        block = data[start:start + blocksize]
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        deflated = compressor.compress(block) + compressor.flush()
+        size = 18 + len(deflated) + 8
+        members.append(b'\x1f\x8b\x08\x04\0\0\0\0\0\xff\x06\0BC\x02\0' +
+                       (size - 1).to_bytes(2, 'little') + deflated +
+                       zlib.crc32(block).to_bytes(4, 'little') +
+                       len(block).to_bytes(4, 'little'))
+    return b''.join(members) + _BGZF_EOF
+
+
+class TestCompressed(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.datafile = os.path.join(self.tmpdir.name, 'data')
+        self.read_bytes = dwcz.READ_BYTES
+        dwcz.READ_BYTES = 4096
+
+    def tearDown(self):
+        dwcz.READ_BYTES = self.read_bytes
+        self.tmpdir.cleanup()
+
+    def _write(self, data):
+        with open(self.datafile, 'wb') as stream:
+            stream.write(data)
+
+    def _read(self, workers):
+        positions = []
+        with dwcz.open_data_file(self.datafile, workers,
+                                 positions.append) as stream:
+            data = stream.read()
+        self.assertEqual(positions[-1], os.path.getsize(self.datafile))
+        self.assertEqual(positions, sorted(positions))
+        return data
+
+    def test_uncompressed(self):
+        self._write(_DATA)
+        self.assertIsNone(dwcz.detect_compression(self.datafile))
+        with dwcz.open_data_file(self.datafile) as stream:
+            self.assertEqual(stream.read(), _DATA)
+        self.assertEqual(self._read(1), _DATA)
+
+    def test_gzip(self):
+        # members one after another, as written by appending gzip files
+        self._write(gzip.compress(_DATA) + gzip.compress(_DATA[:99]))
+        self.assertEqual(dwcz.detect_compression(self.datafile), 'gzip')
+        for workers in [1, 3]:
+            self.assertEqual(self._read(workers), _DATA + _DATA[:99])
+
+    def test_bgzf(self):
+        self._write(_bgzf(_DATA))
+        self.assertEqual(dwcz.detect_compression(self.datafile), 'gzip')
+        for workers in [1, 3]:
+            self.assertEqual(self._read(workers), _DATA)
+
+    def test_truncated(self):
+        for data in [gzip.compress(_DATA), _bgzf(_DATA)]:
+            self._write(data[:len(data) // 2])
+            for workers in [1, 3]:
+                with self.assertRaises(EOFError):
+                    self._read(workers)
+
+    def test_tee(self):
+        for data in [_DATA, gzip.compress(_DATA), _bgzf(_DATA)]:
+            self._write(data)
+            for workers in [1, 3]:
+                tee = io.BytesIO()
+                with dwcz.open_data_file(self.datafile, workers,
+                                         tee=tee) as stream:
+                    self.assertEqual(stream.read(), _DATA)
+                self.assertEqual(tee.getvalue(), data)
+
+    def test_bz2_xz(self):
+        # streams one after another, as written by appending files
+        for compression, module in [('bz2', bz2), ('xz', lzma)]:
+            self._write(module.compress(_DATA) + module.compress(_DATA[:99]))
+            self.assertEqual(dwcz.detect_compression(self.datafile),
+                             compression)
+            self.assertEqual(self._read(1), _DATA + _DATA[:99])
+            data = module.compress(_DATA)
+            self._write(data[:len(data) // 2])
+            with self.assertRaises(EOFError):
+                self._read(1)
+
+    def test_zip(self):
+        with zipfile.ZipFile(self.datafile, 'w',
+                             zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('data.csv', _DATA)
+        self.assertEqual(dwcz.detect_compression(self.datafile), 'zip')
+        self.assertEqual(self._read(1), _DATA)
+        with zipfile.ZipFile(self.datafile, 'a') as archive:
+            archive.writestr('more.csv', _DATA)
+        with self.assertRaisesRegex(ValueError, 'single file'):
+            self._read(1)
+
+    @unittest.skipUnless(hasattr(os, 'mkfifo'), 'named pipes not supported')
+    def test_named_pipe(self):
+        fifo = os.path.join(self.tmpdir.name, 'fifo')
+        os.mkfifo(fifo)
+        self._write(_DATA)
+        self.assertTrue(dwcz.is_stream(fifo))
+        self.assertTrue(dwcz.is_stream(dwcz.STDIN))
+        self.assertFalse(dwcz.is_stream(self.datafile))
+
+        def write():
+            with open(fifo, 'wb') as stream:
+                stream.write(gzip.compress(_DATA))
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        try:
+            with dwcz.open_data_file(fifo, 3) as stream:
+                self.assertEqual(stream.read(), _DATA)
+        finally:
+            writer.join()
+
+    @unittest.skipUnless(dwcz.zstandard, 'zstandard is not installed')
+    def test_zstd(self):
+        compressor = dwcz.zstandard.ZstdCompressor(write_checksum=True)
+        skippable = b'\x5e\x2a\x4d\x18\x03\0\0\0abc'
+        frames = [compressor.compress(_DATA[start:start + 10000])
+                  for start in range(0, len(_DATA), 10000)]
+        self._write(skippable + b''.join(frames) + skippable)
+        self.assertEqual(dwcz.detect_compression(self.datafile), 'zstd')
+        for workers in [1, 3]:
+            self.assertEqual(self._read(workers), _DATA)
+        # frames too large to decompress whole are streamed
+        max_frame_bytes = dwcz.MAX_FRAME_BYTES
+        dwcz.MAX_FRAME_BYTES = 100
+        try:
+            self.assertEqual(self._read(3), _DATA)
+        finally:
+            dwcz.MAX_FRAME_BYTES = max_frame_bytes
+        self._write(b''.join(frames)[:-100])
+        for workers in [1, 3]:
+            with self.assertRaises(EOFError):
+                self._read(workers)
+
+    @unittest.skipIf(dwcz.zstandard, 'zstandard is installed')
+    def test_zstd_not_installed(self):
+        self._write(b'\x28\xb5\x2f\xfd\0\0\0')
+        with self.assertRaisesRegex(ImportError, 'needs zstandard'):
+            dwcz.open_data_file(self.datafile)
+
+
+if __name__ == '__main__':
+    unittest.main()
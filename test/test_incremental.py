@@ -0,0 +1,160 @@
+import inspect
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import unittest
+import numpy as np
+HDIR = os.path.dirname(os.path.abspath(
+            inspect.getfile(inspect.currentframe())))
+PARENTDIR = os.path.dirname(HDIR)
+sys.path.insert(0, PARENTDIR)
+import datawhistle as dw  # noqa
+import datawhistle.incremental as dwin  # noqa
+
+
+class TestIncremental(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.csvfile = os.path.join(self.tmpdir.name, 'data.csv')
+        self.statefile = os.path.join(self.tmpdir.name, 'data.state')
+        shutil.copy(os.path.join(HDIR, 'data/file1.csv'), self.csvfile)
+        self.ymld = {'table': {'allow_duplicate_rows': False},
+                     'columns': [{'name': 'A', 'type': 'numeric',
+                                  'allow_duplicates': False, 'max': 6}]}
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _check(self):
+        suite = dw.StreamingDatasetCheckSuite()
+        dw.apply_yamldict_to_checksuite(self.ymld, suite)
+        start = dwin.check_csv_incremental(
+                self.csvfile, suite, self.statefile,
+                dw.rule_plan_fingerprint(dw.compile_yamldict(self.ymld)))
+        suite.runchecks()
+        return start, suite
+
+    def _append(self, text):
+        with open(self.csvfile, 'a') as stream:
+            stream.write(text)
+
+    def test_appended_rows_only(self):
+        start, suite = self._check()
+        self.assertEqual(start, 0)
+        self.assertEqual(suite.error_messages, [])
+        size = os.path.getsize(self.csvfile)
+        # a partly written line is left for the next run
+        self._append('6,6.5,f,6,6.5,f,true,txt6,1,1/1/2001,1/1/2001\n7,7')
+        start, suite = self._check()
+        self.assertEqual(start, size)
+        self.assertEqual(suite.accumulator.rows, 6)
+        self.assertEqual(suite.error_messages, [])
+        self._append('.6,g,7,7.6,g,true,txt7,1,1/1/2001,1/1/2001\n'
+                     '1,1.0,a,,,,true,txt1,1,1/1/2000,99/1/200\n')
+        start, suite = self._check()
+        self.assertGreater(start, size)
+        self.assertEqual(suite.accumulator.rows, 8)
+        self.assertEqual(suite.error_messages,
+                         ['want 0 duplicate rows, got 1',
+                          'column A want 0 duplicate rows, got 1',
+                          'column A want value <= 6.0, got 7'])
+
+    def test_quoted_newline_at_end(self):
+        self._check()
+        # the newline in the quoted field does not end the last line, so
+        # the partly written row is left for the next run
+        self._append('6,6.5,"f\nf",6,6.5,f,true,txt6,1,1/1/2001,1/1/2001\n'
+                     '7,7.6,"g\n')
+        start, suite = self._check()
+        self.assertEqual(suite.accumulator.rows, 6)
+        self._append('g",7,7.6,g,true,txt7,1,1/1/2001,1/1/2001\n')
+        start, suite = self._check()
+        self.assertEqual(suite.accumulator.rows, 7)
+        self.assertEqual(suite.error_messages,
+                         ['column A want value <= 6.0, got 7'])
+
+    def test_quote_within_field(self):
+        # a quote within an unquoted field does not start a quoted field,
+        # so the lines after it end where they appear to
+        with open(self.csvfile, 'w') as stream:
+            stream.write('a,b\n5"6,x\n1,2\n3,4\n7,y\n')
+        self.ymld = {'table': {'row_count': 4},
+                     'columns': [{'name': 'a', 'type': 'string'}]}
+        start, suite = self._check()
+        self.assertEqual(start, 0)
+        self.assertEqual(suite.error_messages, [])
+        size = os.path.getsize(self.csvfile)
+        self._append('8"9,z\n')
+        start, suite = self._check()
+        self.assertEqual(start, size)
+        self.assertEqual(suite.error_messages,
+                         ['want row count == 4, got 5'])
+
+    def test_full_pass_when_state_version_changes(self):
+        self._check()
+        state = dwin.load_state(self.statefile)
+        state.version -= 1
+        dwin.save_state(self.statefile, state)
+        self.assertIsNone(dwin.load_state(self.statefile))
+        self._append('1,1.0,a,,,,true,txt1,1,1/1/2000,99/1/200\n')
+        start, suite = self._check()
+        self.assertEqual(start, 0)
+        self.assertEqual(suite.error_messages,
+                         ['want 0 duplicate rows, got 1',
+                          'column A want 0 duplicate rows, got 1'])
+
+    def test_state_round_trip(self):
+        # hashes, sketches and regex rules are saved without pickling
+        self.ymld = dw.load_yaml_file_to_dict(
+                os.path.join(HDIR, 'yamls/file1.yaml'))
+        self.ymld['columns'][1]['regex_rules'] = [
+                {'rule': '[a-m]', 'type': 'mandatory'}]
+        _, suite = self._check()
+        state = dwin.load_state(self.statefile)
+        table, columns = suite.get_accumulators()
+        saved_table, saved_columns = state.accumulators
+        arrays, saved_arrays = [], []
+        self.assertEqual(saved_table.get_state(saved_arrays),
+                         table.get_state(arrays))
+        for column, saved in zip(columns, saved_columns):
+            self.assertEqual(saved.get_state(saved_arrays),
+                             column.get_state(arrays))
+        self.assertEqual(len(saved_arrays), len(arrays))
+        for array, saved_array in zip(arrays, saved_arrays):
+            self.assertTrue(np.array_equal(saved_array, array))
+        self.assertIsNotNone(saved_columns[0].sketch)
+        self.assertEqual(saved_columns[0].count_distinct, 5)
+
+    def test_pickled_state_is_not_loaded(self):
+        self._check()
+        with open(self.statefile, 'wb') as stream:
+            pickle.dump(dwin.load_state(self.statefile), stream)
+        self.assertIsNone(dwin.load_state(self.statefile))
+        start, _ = self._check()
+        self.assertEqual(start, 0)
+
+    def test_full_pass_when_prefix_changes(self):
+        self._check()
+        with open(self.csvfile, 'r+') as stream:
+            stream.seek(22)
+            stream.write('9')
+        start, suite = self._check()
+        self.assertEqual(start, 0)
+        self.assertEqual(suite.accumulator.rows, 5)
+        self.assertEqual(suite.error_messages,
+                         ['column A want value <= 6.0, got 9'])
+
+    def test_full_pass_when_rules_change(self):
+        self._check()
+        self.ymld['columns'][0]['max'] = 4
+        start, suite = self._check()
+        self.assertEqual(start, 0)
+        self.assertEqual(suite.error_messages,
+                         ['column A want value <= 4.0, got 5'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import gzip
+import inspect
+import io
+import os
+import sys
+import tempfile
+import unittest
+HDIR = os.path.dirname(os.path.abspath(
+            inspect.getfile(inspect.currentframe())))
+PARENTDIR = os.path.dirname(HDIR)
+sys.path.insert(0, PARENTDIR)
+import pandas as pd     # type: ignore
+import datawhistle as dw  # noqa
+import datawhistle.jsonlines as dwjl  # noqa
+
+
+def _suite(ymld):
+    suite = dw.StreamingDatasetCheckSuite()
+    dw.apply_yamldict_to_checksuite(ymld, suite)
+    return suite
+
+
+class TestJsonLines(unittest.TestCase):
+
+    def setUp(self):
+        self.dfile1 = os.path.join(HDIR, 'data/file1.csv')
+        self.dfile2 = os.path.join(HDIR, 'data/file2.csv')
+        self.yfile1 = os.path.join(HDIR, 'yamls/file1.yaml')
+        self.yfile1a = os.path.join(HDIR, 'yamls/file1a.yaml')
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write_jsonl(self, name, text):
+        jsonlfile = os.path.join(self.tmpdir.name, name)
+        opener = gzip.open if name.endswith('.gz') else open
+        with opener(jsonlfile, 'wt') as stream:
+            stream.write(text)
+        return jsonlfile
+
+    def test_records_to_chunk(self):
+        records = [{'a': 1, 'b': {'c': 'x', 'd': [1, 2]}, 'e.f': True},
+                   {'a': None, 'b': {'c': 'y'}},
+                   {'b': 'flat'}]
+        chunk = dwjl.records_to_chunk(
+                records, ['a', 'b.c', 'b.d', 'e.f', 'g'],
+                {'b.d': str, 'e.f': str})
+        self.assertEqual(list(chunk.columns), ['a', 'b.c', 'b.d', 'e.f'])
+        self.assertEqual(len(chunk), 3)
+        self.assertEqual(chunk['a'].isnull().tolist(), [False, True, True])
+        self.assertEqual(chunk['b.c'].fillna('').tolist(), ['x', 'y', ''])
+        self.assertEqual(chunk['b.d'].fillna('').tolist(), ['[1, 2]', '', ''])
+        self.assertEqual(chunk['e.f'].fillna('').tolist(), ['true', '', ''])
+
+    def test_jsonl_chunks(self):
+        data = b'{"a": 1}\n\n{"a": 2}\n{"a": 3}\n'
+        chunks = list(dwjl.jsonl_chunks(io.BytesIO(data), ['a'],
+                                        chunksize=2))
+        self.assertEqual([chunk['a'].tolist() for chunk in chunks],
+                         [[1], [2, 3]])
+        with self.assertRaisesRegex(ValueError, 'invalid JSON on line 3'):
+            list(dwjl.jsonl_chunks(io.BytesIO(b'{}\n{}\n{"a"\n'), ['a']))
+        with self.assertRaisesRegex(ValueError,
+                                    'line 2 is not a JSON object'):
+            list(dwjl.jsonl_chunks(io.BytesIO(b'{}\n[1]\n'), ['a']))
+
+    def test_same_errors_as_csv(self):
+        for csvfile, yamlfile in [(self.dfile1, self.yfile1),
+                                  (self.dfile2, self.yfile1a)]:
+            ymld = dw.load_yaml_file_to_dict(yamlfile)
+            ymld['table']['stop_on_fail'] = False
+            df = pd.read_csv(csvfile)
+            pdcs = dw.PandasDatsetCheckSuite(df)
+            dw.apply_yamldict_to_checksuite(ymld, pdcs)
+            pdcs.runchecks()
+            jsonlfile = self.write_jsonl(
+                    'data.jsonl.gz', df.to_json(orient='records', lines=True))
+            for chunksize in [1, 2, 100]:
+                suite = _suite(ymld)
+                self.assertFalse(dwjl.check_jsonl_streaming(
+                        jsonlfile, suite, chunksize))
+                suite.runchecks()
+                self.assertEqual(suite.error_messages, pdcs.error_messages)
+
+    def test_fields_found_later(self):
+        # a field first found after the first chunk is not missing, and
+        # the records before it count as nulls
+        jsonlfile = self.write_jsonl(
+                'data.jsonl', '{"a": 1}\n{"a": 2}\n{"a": 3, "u": {"v": 4}}\n')
+        ymld = {'table': {'stop_on_fail': True},
+                'columns': [{'name': 'u.v', 'type': 'numeric',
+                             'allow_nulls': True},
+                            {'name': 'w', 'type': 'numeric'}]}
+        suite = _suite(ymld)
+        self.assertFalse(dwjl.check_jsonl_streaming(jsonlfile, suite, 1))
+        suite.runchecks()
+        self.assertEqual(suite.error_messages,
+                         ['column w not found in data'])
+        ymld['columns'][0]['allow_nulls'] = False
+        suite = _suite(ymld)
+        self.assertTrue(dwjl.check_jsonl_streaming(jsonlfile, suite, 1))
+        self.assertEqual(suite.early_failure,
+                         'column u.v want 0 nulls, got 2')
+
+    def test_tee(self):
+        # compressed data is passed on decompressed, up to the first chunk
+        # a check fails on
+        text = '{"a": 1}\n\n{"a": 2}\n{"a": -3}\n{"a": 4}\n'
+        jsonlfile = self.write_jsonl('data.jsonl.gz', text)
+        ymld = {'table': {'stop_on_fail': False},
+                'columns': [{'name': 'a', 'type': 'numeric', 'min': 0}]}
+        suite = _suite(ymld)
+        tee = io.BytesIO()
+        self.assertFalse(dwjl.check_jsonl_streaming(jsonlfile, suite, 2,
+                                                    tee=tee))
+        self.assertEqual(tee.getvalue(), b'{"a": 1}\n\n')
+        suite.runchecks()
+        self.assertEqual(suite.error_messages,
+                         ['column a want value >= 0.0, got -3'])
+
+
+if __name__ == '__main__':
+    unittest.main()
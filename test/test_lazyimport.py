@@ -0,0 +1,34 @@
+import inspect
+import os
+import subprocess
+import sys
+import unittest
+HDIR = os.path.dirname(os.path.abspath(
+            inspect.getfile(inspect.currentframe())))
+PARENTDIR = os.path.dirname(HDIR)
+sys.path.insert(0, PARENTDIR)
+import datawhistle.lazyimport as dwli  # noqa
+
+
+class TestLazyImport(unittest.TestCase):
+
+    def test_import_datawhistle_defers_heavy_modules(self):
+        # run in a fresh interpreter as other tests import pandas directly
+        code = ('import sys, datawhistle; '
+                'print(",".join(m for m in ["pandas.core", "numpy.linalg", '
+                '"yaml.loader"] if m in sys.modules))')
+        result = subprocess.run([sys.executable, '-c', code], cwd=PARENTDIR,
+                                check=True, capture_output=True, text=True)
+        self.assertEqual(result.stdout.strip(), '')
+
+    def test_lazy_module_loads_on_use(self):
+        module = dwli.lazy_import('json')
+        self.assertEqual(module.dumps([1]), '[1]')
+
+    def test_missing_module(self):
+        with self.assertRaises(ImportError):
+            dwli.lazy_import('datawhistle_no_such_module')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import inspect
+import os
+import sys
+import tempfile
+import unittest
+import urllib.request
+HDIR = os.path.dirname(os.path.abspath(
+            inspect.getfile(inspect.currentframe())))
+PARENTDIR = os.path.dirname(HDIR)
+sys.path.insert(0, PARENTDIR)
+import pandas as pd     # type: ignore # noqa
+import datawhistle as dw  # noqa
+import datawhistle.metrics as dwme  # noqa
+import datawhistle.profiling as dwpr  # noqa
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_histogram(self):
+        histogram = dwme.Histogram('test_seconds', 'Test.', [0.1, 1.0])
+        histogram.observe(0.05, check='a')
+        histogram.observe(0.5, check='a')
+        histogram.observe(2, check='a')
+        self.assertEqual(histogram.lines(), [
+            '# HELP test_seconds Test.',
+            '# TYPE test_seconds histogram',
+            'test_seconds_bucket{check="a",le="0.1"} 1',
+            'test_seconds_bucket{check="a",le="1"} 2',
+            'test_seconds_bucket{check="a",le="+Inf"} 3',
+            'test_seconds_sum{check="a"} 2.55',
+            'test_seconds_count{check="a"} 3'])
+
+    def test_label_escaping(self):
+        counter = dwme.Counter('test_total', 'Test.')
+        counter.inc(column='a "quoted"\nname')
+        self.assertEqual(counter.lines()[-1],
+                         'test_total{column="a \\"quoted\\"\\nname"} 1')
+
+    def test_record_run(self):
+        df = pd.DataFrame({'A': [1, 2, 2, 4]})
+        suite = dw.PandasDatsetCheckSuite(df)
+        col = suite.addcolumn('A', 'numeric')
+        col.allow_duplicates = False
+        suite.profiler = dwpr.CheckProfiler(trace_memory=False)
+        suite.runchecks()
+        registry = dwme.MetricsRegistry()
+        registry.record_run('CSV', suite, 0.5, 100, cache_used=True)
+        registry.record_run('CSV', cached_messages=[])
+        text = registry.render()
+        self.assertIn('datawhistle_checks_total{'
+                      'check="check_col_no_duplicates",column="A",'
+                      'result="failed"} 1\n', text)
+        self.assertIn('datawhistle_check_duration_seconds_count{'
+                      'check="check_col_type",column="A"} 1\n', text)
+        self.assertIn('datawhistle_rows_processed_total{source="CSV"} 4\n',
+                      text)
+        self.assertIn('datawhistle_rows_per_second{source="CSV"} 8\n', text)
+        self.assertIn('datawhistle_cache_requests_total{result="hit"} 1\n',
+                      text)
+        self.assertIn('datawhistle_cache_requests_total{result="miss"} 1\n',
+                      text)
+        self.assertIn('datawhistle_runs_total{result="failed",source="CSV"} '
+                      '1\n', text)
+        self.assertIn('datawhistle_last_run_success{source="CSV"} 1\n', text)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, 'datawhistle.prom')
+            registry.write_textfile(filename)
+            with open(filename) as stream:
+                self.assertEqual(stream.read(), text)
+
+    def test_serve(self):
+        registry = dwme.MetricsRegistry()
+        registry.record_run('BQ', cached_messages=['failed'])
+        server = registry.serve(0)
+        try:
+            url = f'http://127.0.0.1:{server.server_address[1]}/metrics'
+            with urllib.request.urlopen(url) as response:
+                body = response.read().decode('utf-8')
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(body, registry.render())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -35,6 +35,32 @@ class TestDFChecks(unittest.TestCase):
         self.assertFalse(passed)
         self.assertEqual(message, 'want 0 duplicate rows, got 2')
 
+    def test_column_statistics(self):
+        df = self.df_file2
+        self.assertEqual(dwpc.dfcount_nulls(df, ['A', 'D']),
+                         {'A': 0, 'D': 3})
+        self.assertEqual(dwpc.dfcolumn_extremes(df, ['A', 'B'], 'min'),
+                         {'A': 1, 'B': 1.0})
+        # integers stay integers
+        self.assertEqual(
+                [str(value) for value in
+                 dwpc.dfcolumn_extremes(df, ['A', 'B'], 'max').values()],
+                ['6', '12.1'])
+        self.assertEqual(dwpc.dfcolumns_differ(df, {'A': 1, 'B': 1.0}),
+                         {'A': True, 'B': True})
+        self.assertEqual(dwpc.dfcolumns_differ(df.iloc[:1],
+                                               {'A': 1, 'B': 1.0}),
+                         {'A': False, 'B': False})
+        columns = list(df.columns)
+        for dropna in [True, False]:
+            self.assertEqual(dwpc.dfcount_distinct(df, columns, dropna),
+                             df.nunique(dropna=dropna).to_dict())
+        self.assertEqual(dwpc.dfcount_duplicates(df, columns),
+                         {name: df[name].duplicated().sum()
+                          for name in columns})
+        self.assertEqual(dwpc.dfcount_distinct(df.iloc[:0], ['A', 'B']),
+                         {'A': 0, 'B': 0})
+
 
 class TestColChecks(unittest.TestCase):
 
@@ -113,6 +139,14 @@ class TestColChecks(unittest.TestCase):
         passed, message = dwpc.colcheck_is_datetime(self.df_file1, 'J',
                                                     '%m/%d/%Y')
         self.assertTrue(passed)
+        # parsed datetimes go to the derived columns, not the DataFrame
+        self.assertFalse(pd.api.types.is_datetime64_any_dtype(
+            self.df_file1['J']))
+        derived = {}
+        passed, message = dwpc.colcheck_is_datetime(self.df_file1, 'J',
+                                                    '%m/%d/%Y', derived)
+        self.assertTrue(passed)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(derived['J']))
 
     def test_col_regex(self):
         # Fails
@@ -161,6 +195,29 @@ class TestColChecks(unittest.TestCase):
                          ('column C regex_type expect mandatory or exclude, '
                           'got excludedx'))
 
+    def test_col_regex_rules(self):
+        rules = [('[a]', 'mandatory'), ('[b-c]', 'exclude'), ('', 'exclude'),
+                 ('[', 'mandatory'), ('[z]', 'exclude'), ('.', 'mandatory'),
+                 ('[z]', 'excludedx')]
+        want = [dwpc.colcheck_regex(self.df_file1, 'C', regex_rule,
+                                    regex_type)
+                for regex_rule, regex_type in rules]
+        self.assertEqual(want[1],
+                         (False, 'column C found invalid regex b with rule '
+                                 '[b-c]'))
+        self.assertEqual(dwpc.colcheck_regex_rules(self.df_file1, 'C', rules),
+                         want)
+        categorical = self.df_file1.astype({'C': 'category'})
+        self.assertEqual(dwpc.colcheck_regex_rules(categorical, 'C', rules),
+                         want)
+        # rows failing each rule, and the matches in the first of them
+        df = pd.DataFrame({'C': ['b', 'a', None, 'b', 'c']})
+        self.assertEqual(
+                dwpc.colregex_rule_failures(df, 'C', [('[a]', 'mandatory'),
+                                                      ('[bc]', 'exclude'),
+                                                      ('.', 'mandatory')]),
+                [(3, []), (3, ['b']), (0, None)])
+
     def test_col_no_duplicates(self):
         passed, message = dwpc.colcheck_no_duplicates(self.df_file1, 'I')
         self.assertFalse(passed)
@@ -198,7 +255,7 @@ class TestColChecks(unittest.TestCase):
         self.assertEqual(message, '')
         passed, message = dwpc.colcheck_val(self.df_file1, 'A', 1, '==')
         self.assertFalse(passed)
-        self.assertEqual(message, (f'column A want all values = 1,'
+        self.assertEqual(message, ('column A want all values = 1,'
                                    ' got different values'))
         # Incorrect operator
         passed, message = dwpc.colcheck_val(self.df_file1, 'I', 1, 'x=')
@@ -207,13 +264,41 @@ class TestColChecks(unittest.TestCase):
                 message,
                 'column I value check operator x= not recognised')
 
+    def test_block_boundaries(self):
+        checks = [(dwpc.colcheck_no_blanks, ('C',)),
+                  (dwpc.colcheck_no_blanks, ('H',)),
+                  (dwpc.colcheck_regex, ('C', '[a-c]', 'mandatory')),
+                  (dwpc.colcheck_regex, ('C', '[d-e]', 'exclude')),
+                  (dwpc.colcheck_val, ('I', 1, '==')),
+                  (dwpc.colcheck_val, ('A', 1, '=='))]
+        expected = [check(self.df_file1, *args) for check, args in checks]
+        block_size = dwpc.BLOCK_SIZE
+        try:
+            for size in [1, 2, 3]:
+                dwpc.BLOCK_SIZE = size
+                for (check, args), want in zip(checks, expected):
+                    self.assertEqual(check(self.df_file1, *args), want)
+                self.assertFalse(
+                    dwpc.colcheck_no_blanks(self.df_file2, 'G')[0])
+        finally:
+            dwpc.BLOCK_SIZE = block_size
+
     def test_col_iqr(self):
         passed, message = dwpc.colcheck_iqr(self.df_file2, 'A')
         self.assertTrue(passed)
         self.assertEqual(message, '')
         passed, message = dwpc.colcheck_iqr(self.df_file2, 'B')
         self.assertFalse(passed)
-        self.assertEqual(message, 'column B outlier above 1.5xIQR 10.35: 12.1')
+        self.assertEqual(message, ('column B want 0 outliers outside 1.5xIQR '
+                                   '-2.85 to 10.35, got 1'))
+        passed, message = dwpc.colcheck_iqr(self.df_file2, 'B', 'sketch')
+        self.assertFalse(passed)
+        self.assertEqual(message, ('column B want 0 outliers outside 1.5xIQR '
+                                   '-2.85 to 10.35, got 1'))
+        passed, message = dwpc.colcheck_iqr(self.df_file2, 'B', 'x')
+        self.assertFalse(passed)
+        self.assertEqual(message,
+                         'column B outlier check method x not recognised')
 
 
 if __name__ == '__main__':
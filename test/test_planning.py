@@ -0,0 +1,100 @@
+import gzip
+import inspect
+import os
+import sys
+import tempfile
+import unittest
+HDIR = os.path.dirname(os.path.abspath(
+            inspect.getfile(inspect.currentframe())))
+PARENTDIR = os.path.dirname(HDIR)
+sys.path.insert(0, PARENTDIR)
+import datawhistle as dw  # noqa
+import datawhistle.planning as dwpl  # noqa
+
+
+class TestPlanning(unittest.TestCase):
+
+    def setUp(self):
+        self.dfile1 = os.path.join(HDIR, 'data/file1.csv')
+        self.yfile1 = os.path.join(HDIR, 'yamls/file1.yaml')
+        self.suite = dw.StreamingDatasetCheckSuite()
+        dw.apply_yamldict_to_checksuite(
+                dw.load_yaml_file_to_dict(self.yfile1), self.suite)
+
+    def test_memory_size(self):
+        self.assertEqual(dwpl.parse_memory_size('512'), 512)
+        self.assertEqual(dwpl.parse_memory_size('4K'), 4096)
+        self.assertEqual(dwpl.parse_memory_size('1.5GiB'), 3 << 29)
+        self.assertEqual(dwpl.parse_memory_size('2 mb'), 2 << 20)
+        with self.assertRaises(ValueError):
+            dwpl.parse_memory_size('lots')
+        self.assertEqual(dwpl.format_memory_size(3 << 29), '1.5 GiB')
+        self.assertEqual(dwpl.format_memory_size(100), '100 B')
+
+    def test_estimate(self):
+        estimate = dwpl.estimate_data(self.dfile1)
+        self.assertEqual(estimate.rows, 5)
+        self.assertGreater(estimate.row_bytes, 0)
+        self.assertGreater(estimate.string_bytes, 0)
+        self.assertIsNone(dwpl.estimate_data('-').rows)
+        with open(self.dfile1, 'rb') as stream:
+            lines = stream.read().split(b'\n', 1)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csvfile = os.path.join(tmpdir, 'data.csv.gz')
+            with gzip.open(csvfile, 'wb') as stream:
+                stream.write(lines[0] + b'\n' + lines[1] * 100000)
+            estimate = dwpl.estimate_data(csvfile)
+        self.assertGreater(estimate.compression_ratio, 10)
+        self.assertAlmostEqual(estimate.rows, 500000, delta=50000)
+
+    def test_plan_load(self):
+        estimate = dwpl.DataEstimate(100.0, 1000, 20.0)
+        plan = dwpl.plan_execution(estimate, self.suite, 1 << 20, 4,
+                                   baseline=0)
+        self.assertFalse(plan.streaming)
+        self.assertEqual(plan.processes, 4)
+        self.assertLessEqual(plan.memory, 1 << 20)
+        self.assertTrue(plan.summary().startswith(
+                'load the whole file (about 1000 rows), checking string '
+                'columns in 4 processes;'))
+        plan = dwpl.plan_execution(estimate, self.suite, 1 << 20, 4,
+                                   streaming=True, baseline=0)
+        self.assertTrue(plan.streaming)
+
+    def test_plan_streaming(self):
+        estimate = dwpl.DataEstimate(100.0, 1000000)
+        # duplicate and distinct checks of columns A and D keep hashes
+        self.assertEqual(sum(column.keeps_hashes()
+                             for column in self.suite.columns), 2)
+        plan = dwpl.plan_execution(estimate, self.suite, 100 << 20,
+                                   baseline=0)
+        self.assertTrue(plan.streaming)
+        self.assertIsNone(plan.hash_max_bytes)
+        self.assertEqual(plan.prefetch, 2)
+        self.assertLessEqual(plan.memory, 100 << 20)
+        plan = dwpl.plan_execution(estimate, self.suite, 20 << 20,
+                                   baseline=0)
+        self.assertEqual(plan.hash_max_bytes, (10 << 20) // 6)
+        self.assertLessEqual(plan.memory, 20 << 20)
+        self.assertIn('spilling hashes of distinct values to disk beyond '
+                      '1.7 MiB each', plan.summary())
+        # chunks too small to read ahead
+        plan = dwpl.plan_execution(estimate, self.suite, 1 << 20,
+                                   baseline=0)
+        self.assertEqual(plan.prefetch, 0)
+        self.assertEqual(plan.chunksize, 1747)
+        # data of unknown size
+        plan = dwpl.plan_execution(dwpl.DataEstimate(), self.suite, 1 << 30,
+                                   baseline=0)
+        self.assertTrue(plan.streaming)
+        self.assertIsNotNone(plan.hash_max_bytes)
+
+    def test_peak_memory(self):
+        if dwpl.resource is None:
+            self.assertIsNone(dwpl.peak_memory())
+        else:
+            self.assertGreater(dwpl.peak_memory(), 1 << 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import inspect
+import os
+import sys
+import unittest
+HDIR = os.path.dirname(os.path.abspath(
+            inspect.getfile(inspect.currentframe())))
+PARENTDIR = os.path.dirname(HDIR)
+sys.path.insert(0, PARENTDIR)
+import pandas as pd     # type: ignore
+import datawhistle as dw  # noqa
+import datawhistle.pandaschecks as dwpc  # noqa
+import datawhistle.processpool as dwpp  # noqa
+
+
+class TestProcessPool(unittest.TestCase):
+
+    def setUp(self):
+        self.dfile1 = os.path.join(HDIR, 'data/file1.csv')
+        self.dfile2 = os.path.join(HDIR, 'data/file2.csv')
+        self.yfile1 = os.path.join(HDIR, 'yamls/file1.yaml')
+        self.yfile1a = os.path.join(HDIR, 'yamls/file1a.yaml')
+        self.min_rows = dwpp.PROCESS_MIN_ROWS
+        dwpp.PROCESS_MIN_ROWS = 0
+
+    def tearDown(self):
+        dwpp.PROCESS_MIN_ROWS = self.min_rows
+
+    def test_shared_strings(self):
+        for values in [['a', None, '', 'bc', ' d'] * 5,
+                       ['ä', None, 'b€c', '', 'x'] * 5,
+                       [None, None], []]:
+            shared = dwpp.SharedStrings(pd.Series(values, dtype=object))
+            try:
+                self.assertEqual(
+                        dwpp._values(shared.layout, 0, len(values)), values)
+                if len(values) > 5:
+                    self.assertEqual(
+                            dwpp._values(shared.layout, 3, len(values) - 2),
+                            values[3:-2])
+            finally:
+                shared.close()
+
+    def test_same_results(self):
+        df = pd.DataFrame({'A': ['x1', None, 'ü2', 'x3', ' ', 'y4', 'z'],
+                           'B': ['x1', 'x2', 'ä3', None, 'x5', 'x6', 'x7']})
+        with dwpp.StringCheckPool(2) as pool:
+            for columnname in ['A', 'B']:
+                for check, args in [
+                        (dwpc.colcheck_no_blanks, ()),
+                        (dwpc.colcheck_regex, ('x', 'mandatory')),
+                        (dwpc.colcheck_regex, ('[0-9]', 'exclude')),
+                        (dwpc.colcheck_regex, ('[a-z]', 'exclude')),
+                        (dwpc.colcheck_regex, ('q', 'exclude'))]:
+                    self.assertEqual(check(df, columnname, *args, pool),
+                                     check(df, columnname, *args))
+
+    def test_accepts(self):
+        pool = dwpp.StringCheckPool(1, min_rows=3)
+        try:
+            self.assertTrue(pool.accepts(pd.Series(['a', None, 'b'])))
+            self.assertFalse(pool.accepts(pd.Series(['a', 'b'])))
+            self.assertFalse(pool.accepts(pd.Series([1, 2, 3])))
+            self.assertFalse(pool.accepts(pd.Series(['a', 2, 'b'],
+                                                    dtype=object)))
+        finally:
+            pool.shutdown()
+
+    def test_suite_processes(self):
+        for csvfile, yamlfile in [(self.dfile1, self.yfile1),
+                                  (self.dfile2, self.yfile1),
+                                  (self.dfile2, self.yfile1a)]:
+            ymld = dw.load_yaml_file_to_dict(yamlfile)
+            ymld['table']['stop_on_fail'] = False
+            messages = []
+            for processes in [1, 2]:
+                pdcs = dw.PandasDatsetCheckSuite(pd.read_csv(csvfile))
+                pdcs.processes = processes
+                dw.apply_yamldict_to_checksuite(ymld, pdcs)
+                pdcs.runchecks()
+                messages.append(pdcs.error_messages)
+                self.assertTrue(all(column.pool is None
+                                    for column in pdcs.columns))
+            self.assertEqual(messages[0], messages[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import inspect
+import json
+import os
+import sys
+import tempfile
+import unittest
+HDIR = os.path.dirname(os.path.abspath(
+            inspect.getfile(inspect.currentframe())))
+PARENTDIR = os.path.dirname(HDIR)
+sys.path.insert(0, PARENTDIR)
+import pandas as pd     # type: ignore # noqa
+import datawhistle as dw  # noqa
+import datawhistle.bqchecks as dwbc  # noqa
+import datawhistle.profiling as dwpr  # noqa
+
+
+class TestCheckProfiler(unittest.TestCase):
+
+    def setUp(self):
+        df = pd.DataFrame({'A': [1, 2, 2, 4], 'B': ['a', 'b', 'c', 'd']})
+        self.suite = dw.PandasDatsetCheckSuite(df)
+        self.suite.row_count = 4
+        col = self.suite.addcolumn('A', 'numeric')
+        col.allow_duplicates = False
+        col = self.suite.addcolumn('B', 'string')
+        col.allow_blanks = False
+
+    def test_records(self):
+        self.suite.profiler = dwpr.CheckProfiler()
+        self.suite.runchecks()
+        records = self.suite.profiler.records
+        self.assertEqual(
+                [(r['check'], r['column'], r['passed']) for r in records],
+                [('check_row_count', None, True),
+                 ('check_col_exists', 'A', True),
+                 ('check_col_type', 'A', True),
+                 ('check_col_no_duplicates', 'A', False),
+                 ('check_col_exists', 'B', True),
+                 ('check_col_type', 'B', True),
+                 ('check_col_no_blanks', 'B', True)])
+        for record in records:
+            self.assertEqual(record['rows_scanned'], 4)
+            self.assertGreaterEqual(record['wall_seconds'], 0)
+            self.assertGreaterEqual(record['peak_memory_bytes'], 0)
+            self.assertEqual(record['bq_queries'], 0)
+        self.assertEqual(self.suite.error_messages,
+                         ['column A want 0 duplicate rows, got 1'])
+
+    def test_report_cprofile(self):
+        self.suite.profiler = dwpr.CheckProfiler(cprofile_top=2)
+        self.suite.runchecks()
+        report = self.suite.profiler.report()
+        self.assertEqual(report['checks_run'], 7)
+        walls = [entry['wall_seconds'] for entry in report['slowest']]
+        self.assertEqual(walls, sorted(walls, reverse=True))
+        self.assertEqual(['cprofile' in entry for entry in report['slowest']],
+                         [True, True] + [False] * 5)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, 'report.json')
+            self.suite.profiler.write_report(filename)
+            with open(filename) as stream:
+                self.assertEqual(json.load(stream)['checks_run'], 7)
+
+    def test_bq_job_bytes(self):
+        jsontxt = ('{"statistics": {"totalBytesProcessed": "2048", '
+                   '"query": {"totalBytesBilled": "10485760"}}}')
+        self.assertEqual(dwbc._job_bytes(jsontxt), (10485760, 2048))
+        self.assertEqual(dwbc._job_bytes('{}'), (0, 0))
+        self.assertEqual(dwbc._job_bytes('not json'), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
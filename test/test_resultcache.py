@@ -0,0 +1,65 @@
+import inspect
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+HDIR = os.path.dirname(os.path.abspath(
+            inspect.getfile(inspect.currentframe())))
+PARENTDIR = os.path.dirname(HDIR)
+sys.path.insert(0, PARENTDIR)
+import datawhistle as dw  # noqa
+import datawhistle.resultcache as dwrc  # noqa
+
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cachedir = os.path.join(self.tmpdir.name, 'cache')
+        self.csvfile = os.path.join(self.tmpdir.name, 'data.csv')
+        shutil.copy(os.path.join(HDIR, 'data/file1.csv'), self.csvfile)
+        self.ymld = dw.load_yaml_file_to_dict(
+                os.path.join(HDIR, 'yamls/file1.yaml'))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_key(self):
+        cache = dwrc.ResultCache(self.cachedir)
+        rules = dw.rule_plan_fingerprint(dw.compile_yamldict(self.ymld))
+        key = cache.key(self.csvfile, rules)
+        self.assertEqual(key, cache.key(self.csvfile, rules))
+        self.ymld['table']['row_count'] = 6
+        rules6 = dw.rule_plan_fingerprint(dw.compile_yamldict(self.ymld))
+        self.assertNotEqual(key, cache.key(self.csvfile, rules6))
+        with open(self.csvfile, 'a') as stream:
+            stream.write('6,6.5,f,6,6.5,f,true,txt6,1,1/1/2001,1/1/2001\n')
+        self.assertNotEqual(key, cache.key(self.csvfile, rules))
+
+    def test_get_put(self):
+        cache = dwrc.ResultCache(self.cachedir)
+        self.assertIsNone(cache.get('abc'))
+        cache.put('abc', ['want row count == 5, got 8'])
+        cache.put('def', [])
+        self.assertEqual(cache.get('abc'), ['want row count == 5, got 8'])
+        self.assertEqual(cache.get('def'), [])
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_lru_eviction(self):
+        cache = dwrc.ResultCache(self.cachedir, max_entries=2)
+        cache.put('a', [])
+        time.sleep(0.01)
+        cache.put('b', [])
+        time.sleep(0.01)
+        cache.get('a')
+        time.sleep(0.01)
+        cache.put('c', [])
+        self.assertEqual(cache.get('a'), [])
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
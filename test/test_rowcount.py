@@ -0,0 +1,140 @@
+import gzip
+import inspect
+import io
+import os
+import sys
+import tempfile
+import unittest
+HDIR = os.path.dirname(os.path.abspath(
+            inspect.getfile(inspect.currentframe())))
+PARENTDIR = os.path.dirname(HDIR)
+sys.path.insert(0, PARENTDIR)
+import pandas as pd     # type: ignore
+import datawhistle as dw  # noqa
+import datawhistle.rowcount as dwrn  # noqa
+
+
+_CSV_TEXTS = [
+    'A,B\n1,2\n3,4\n',
+    'A,B\n1,2\n3,4',
+    'A,B\r\n1,2\r\n\r\n3,4\r\n',
+    '\n\nA,B\n1,2\n  \n\t\n3,4\n\n',
+    'A,B\n"x\ny",2\n"p""q",3\n"\n\n",4\n',
+    'A,B\n"a,""b\n""",1\n \n"",2\n',
+    'A,B\n',
+    'A,B',
+    # quotes within unquoted fields are literal characters
+    'a,b\n5"6,x\n1,2\n3,4\n7"8,y\n',
+    'a,b\n"x"y",1\n"p""",2\n""""q,3\n",""\n",4\n',
+    '\ufeff"A","B"\n1,2\n']
+
+
+class TestRowCount(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.csvfile = os.path.join(self.tmpdir.name, 'data.csv')
+        self.block_bytes = dwrn.BLOCK_BYTES
+        self.parallel_min_bytes = dwrn.PARALLEL_MIN_BYTES
+
+    def tearDown(self):
+        dwrn.BLOCK_BYTES = self.block_bytes
+        dwrn.PARALLEL_MIN_BYTES = self.parallel_min_bytes
+        self.tmpdir.cleanup()
+
+    def _write(self, text):
+        with open(self.csvfile, 'w', newline='') as stream:
+            stream.write(text)
+
+    def test_same_count_as_pandas(self):
+        for text in _CSV_TEXTS:
+            self._write(text)
+            want = len(pd.read_csv(self.csvfile))
+            self.assertEqual(dwrn.count_csv_rows(self.csvfile), want)
+
+    def test_blocks_and_workers(self):
+        # blocks and parallel ranges can start anywhere, including inside
+        # quoted fields and between the bytes of a line end
+        dwrn.PARALLEL_MIN_BYTES = 0
+        for text in _CSV_TEXTS:
+            self._write(text)
+            want = len(pd.read_csv(self.csvfile))
+            for block_bytes in [1, 2, 3, 5]:
+                dwrn.BLOCK_BYTES = block_bytes
+                for workers in [1, 2, 3]:
+                    self.assertEqual(
+                        dwrn.count_csv_rows(self.csvfile, workers), want)
+
+    def test_stream_blocks(self):
+        for text in _CSV_TEXTS:
+            self._write(text)
+            want = len(pd.read_csv(self.csvfile))
+            for block_bytes in [1, 2, 3, 5, self.block_bytes]:
+                dwrn.BLOCK_BYTES = block_bytes
+                self.assertEqual(
+                    dwrn.count_stream_rows(io.BytesIO(text.encode())), want)
+        self.assertIsNone(dwrn.count_stream_rows(io.BytesIO(b'A\n"x\n')))
+        self.assertRaises(ValueError, dwrn.count_stream_rows,
+                          io.BytesIO(b'\n \n'))
+
+    def test_compressed_file(self):
+        with gzip.open(self.csvfile, 'wt', newline='') as stream:
+            stream.write(_CSV_TEXTS[4])
+        self.assertEqual(dwrn.count_csv_rows(self.csvfile), 3)
+
+    def test_unbalanced_quotes(self):
+        self._write('A,B\n"x,1\n2,3\n')
+        self.assertIsNone(dwrn.count_csv_rows(self.csvfile))
+
+    def test_mid_field_quotes(self):
+        # a quote starts a quoted field only at the start of a field
+        self._write('a,b\n5"6,x\n1,2\n3,4\n7"8,y\n')
+        self.assertEqual(dwrn.count_csv_rows(self.csvfile), 4)
+        self.assertEqual(dwrn.count_stream_rows(
+            io.BytesIO(b'a,b\n5"6,x\n1,2\n3,4\n7"8,y\n')), 4)
+        ends, state = dwrn.line_ends(b'a,"b\n"c\nd', dwrn.ScanState())
+        self.assertEqual(ends.tolist(), [7])
+        self.assertEqual(state, dwrn.ScanState(False, False))
+        # a quote ending a block is only known to end a quoted field once
+        # the next byte is read
+        ends, state = dwrn.line_ends(b'"a"', dwrn.ScanState())
+        self.assertEqual(state, dwrn.ScanState(True, False, True))
+        self.assertFalse(state.ends_inside())
+        ends, state = dwrn.line_ends(b'"\n', state)
+        self.assertEqual(ends.tolist(), [])
+        self.assertTrue(state.ends_inside())
+
+    def test_carriage_return_line_ends(self):
+        # pandas ends lines at lone carriage returns, so such files are
+        # parsed rather than counted
+        dwrn.PARALLEL_MIN_BYTES = 0
+        for text in ['A,B\r1,2\r3,4\r', 'A,B\n1,2\r3,4\n', 'A,B\r']:
+            self._write(text)
+            for block_bytes in [1, 2, 3, self.block_bytes]:
+                dwrn.BLOCK_BYTES = block_bytes
+                for workers in [1, 2]:
+                    self.assertIsNone(
+                        dwrn.count_csv_rows(self.csvfile, workers))
+                self.assertIsNone(
+                    dwrn.count_stream_rows(io.BytesIO(text.encode())))
+
+    def test_empty_file(self):
+        for text in ['', '\n \n']:
+            self._write(text)
+            self.assertRaises(ValueError, dwrn.count_csv_rows, self.csvfile)
+
+    def test_row_count_checksuite(self):
+        suite = dw.RowCountCheckSuite(
+            dwrn.count_csv_rows(os.path.join(HDIR, 'data/file1.csv')))
+        suite.row_count = 5
+        suite.row_count_min = 6
+        suite.row_count_max = 4
+        suite.runchecks()
+        self.assertEqual(suite.error_messages,
+                         ['want row count <= 4, got 5',
+                          'want row count >= 6, got 5'])
+        self.assertEqual(suite.rows_scanned(), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import inspect
+import os
+import sys
+import tempfile
+import unittest
+HDIR = os.path.dirname(os.path.abspath(
+            inspect.getfile(inspect.currentframe())))
+PARENTDIR = os.path.dirname(HDIR)
+sys.path.insert(0, PARENTDIR)
+import numpy as np      # type: ignore
+import pandas as pd     # type: ignore
+import datawhistle.sampling as dwsa  # noqa
+
+
+class TestSampling(unittest.TestCase):
+
+    def setUp(self):
+        self.dfile1 = os.path.join(HDIR, 'data/file1.csv')
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.bigfile = os.path.join(self.tmpdir.name, 'big.csv')
+        num_rows = 20000
+        pd.DataFrame({'A': np.arange(num_rows),
+                      'B': np.where(np.arange(num_rows) % 10 == 0, 'x', 'y')}
+                     ).to_csv(self.bigfile, index=False)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_reservoir_sample_csv(self):
+        sample, num_rows = dwsa.reservoir_sample_csv(self.bigfile, 500,
+                                                     seed=1, chunksize=3000)
+        self.assertEqual(num_rows, 20000)
+        self.assertEqual(len(sample), 500)
+        self.assertTrue(sample['A'].is_unique)
+        self.assertTrue(sample['A'].is_monotonic_increasing)
+        self.assertAlmostEqual(sample['A'].mean(), 10000, delta=1500)
+        # a sample larger than the file holds the whole file
+        sample, num_rows = dwsa.reservoir_sample_csv(self.dfile1, 100)
+        self.assertEqual(num_rows, 5)
+        self.assertEqual(list(sample['A']), [1, 2, 3, 4, 5])
+
+    def test_stratified_sample_csv(self):
+        sample, num_rows = dwsa.stratified_sample_csv(self.bigfile, 500, 'B',
+                                                      seed=1, chunksize=3000)
+        self.assertEqual(num_rows, 20000)
+        self.assertEqual(dict(sample['B'].value_counts()),
+                         {'y': 450, 'x': 50})
+        self.assertRaises(KeyError, dwsa.stratified_sample_csv,
+                          self.bigfile, 500, 'Z')
+
+    def test_stratified_sample_many_strata(self):
+        # 400 strata of 50 rows each
+        reservoir = dwsa.StratifiedReservoir(
+                500, 'S', np.random.default_rng(1))
+        for start in range(0, 20000, 1000):
+            positions = np.arange(start, start + 1000)
+            reservoir.update(pd.DataFrame({'A': positions,
+                                           'S': positions % 400},
+                                          index=positions))
+            self.assertLessEqual(len(reservoir._rows), 1500)
+        sample = reservoir.sample()
+        self.assertEqual(len(sample), 500)
+        self.assertTrue(sample['A'].is_monotonic_increasing)
+        self.assertEqual(sample['S'].nunique(), 400)
+        # more strata than rows in the sample: one row each of 100
+        sample, num_rows = dwsa.stratified_sample_csv(
+                self.bigfile, 100, 'A', seed=1, chunksize=3000)
+        self.assertEqual(num_rows, 20000)
+        self.assertEqual(len(sample), 100)
+        self.assertTrue(sample['A'].is_unique)
+        # a sample larger than the file holds the whole file
+        sample, num_rows = dwsa.stratified_sample_csv(self.dfile1, 100, 'C')
+        self.assertEqual(list(sample['A']), [1, 2, 3, 4, 5])
+
+    def test_compressed_file(self):
+        gzfile = os.path.join(self.tmpdir.name, 'big.csv.gz')
+        pd.read_csv(self.bigfile).to_csv(gzfile, index=False)
+        for sample_csv, args in [(dwsa.reservoir_sample_csv, ()),
+                                 (dwsa.stratified_sample_csv, ('B',))]:
+            plain = sample_csv(self.bigfile, 100, *args, seed=2)
+            compressed = sample_csv(gzfile, 100, *args, seed=2)
+            pd.testing.assert_frame_equal(compressed[0], plain[0])
+            self.assertEqual(compressed[1], plain[1])
+
+    def test_confidence_bound(self):
+        self.assertAlmostEqual(dwsa.confidence_bound(1000), 0.003, places=4)
+        self.assertEqual(dwsa.confidence_bound(0), 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import inspect
+import os
+import sys
+import tempfile
+import unittest
+HDIR = os.path.dirname(os.path.abspath(
+            inspect.getfile(inspect.currentframe())))
+PARENTDIR = os.path.dirname(HDIR)
+sys.path.insert(0, PARENTDIR)
+import datawhistle.scheduling as dwsc  # noqa
+
+
+def check_col_exists():
+    return True, ''
+
+
+def check_col_regex():
+    return True, ''
+
+
+def check_col_non_nulls():
+    return True, ''
+
+
+def check_col_type():
+    return True, ''
+
+
+def check_row_count():
+    return True, ''
+
+
+class TestScheduling(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduled = [
+            (None, None, check_row_count),
+            (None, 'A', check_col_exists),
+            (None, 'A', check_col_regex),
+            (None, 'A', check_col_non_nulls),
+            (None, 'B', check_col_exists),
+            (None, 'B', check_col_non_nulls)]
+
+    def _names(self, ordered):
+        return [(item[1], item[2].__name__) for item in ordered]
+
+    def test_static_order(self):
+        self.assertEqual(self._names(dwsc.order_checks(self.scheduled)),
+                         [(None, 'check_row_count'),
+                          ('A', 'check_col_exists'),
+                          ('B', 'check_col_exists'),
+                          ('A', 'check_col_non_nulls'),
+                          ('B', 'check_col_non_nulls'),
+                          ('A', 'check_col_regex')])
+
+    def test_history(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, 'timings.json')
+            history = dwsc.TimingHistory(filename)
+            # nulls in column B were slow last time, regex in A was fast
+            history.update([
+                {'check': 'check_col_non_nulls', 'column': 'B',
+                 'wall_seconds': 10.0, 'rows_scanned': 1000},
+                {'check': 'check_col_regex', 'column': 'A',
+                 'wall_seconds': 0.0, 'rows_scanned': 1000}])
+            history.save()
+            history = dwsc.TimingHistory(filename)
+            self.assertAlmostEqual(
+                    history.estimate('check_col_non_nulls', 'B', 2000), 20.0)
+            self.assertIsNone(history.estimate('check_col_non_nulls', 'A',
+                                               2000))
+            ordered = dwsc.order_checks(self.scheduled, 1000, history)
+        self.assertEqual(self._names(ordered),
+                         [(None, 'check_row_count'),
+                          ('A', 'check_col_exists'),
+                          ('A', 'check_col_regex'),
+                          ('B', 'check_col_exists'),
+                          ('A', 'check_col_non_nulls'),
+                          ('B', 'check_col_non_nulls')])
+
+    def test_type_check_first(self):
+        # a column's other checks reuse the values its type check derives
+        scheduled = [(None, 'A', check_col_exists),
+                     (None, 'A', check_col_non_nulls),
+                     (None, 'A', check_col_type),
+                     (None, 'B', check_col_non_nulls)]
+        history = dwsc.TimingHistory('')
+        history.update([{'check': 'check_col_type', 'column': 'A',
+                         'wall_seconds': 5.0, 'rows_scanned': 1000}])
+        self.assertEqual(self._names(dwsc.order_checks(scheduled)),
+                         [('A', 'check_col_exists'),
+                          ('A', 'check_col_type'),
+                          ('B', 'check_col_non_nulls'),
+                          ('A', 'check_col_non_nulls')])
+        # a slow type check holds back the column's cheaper checks
+        self.assertEqual(
+                self._names(dwsc.order_checks(scheduled, 1000, history)),
+                [('A', 'check_col_exists'),
+                 ('B', 'check_col_non_nulls'),
+                 ('A', 'check_col_type'),
+                 ('A', 'check_col_non_nulls')])
+
+    def test_history_average(self):
+        history = dwsc.TimingHistory('')
+        for seconds in [4.0, 2.0]:
+            history.update([{'check': 'check_col_iqr', 'column': 'A',
+                             'wall_seconds': seconds, 'rows_scanned': 1}])
+        self.assertAlmostEqual(history.estimate('check_col_iqr', 'A', 1), 3.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
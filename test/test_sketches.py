@@ -0,0 +1,110 @@
+import inspect
+import os
+import pickle
+import sys
+import tempfile
+import unittest
+HDIR = os.path.dirname(os.path.abspath(
+            inspect.getfile(inspect.currentframe())))
+PARENTDIR = os.path.dirname(HDIR)
+sys.path.insert(0, PARENTDIR)
+import numpy as np      # type: ignore
+import datawhistle.sketches as dwsk  # noqa
+
+
+class TestKllSketch(unittest.TestCase):
+
+    def setUp(self):
+        self.values = np.random.default_rng(42).normal(size=100000)
+
+    def test_small_input_is_exact(self):
+        sketch = dwsk.KllSketch()
+        sketch.update([1.0, 2.1, 2.1, 3.2, 4.3, 5.4, 5.4, 12.1, np.nan])
+        self.assertEqual(sketch.count, 8)
+        self.assertEqual(sketch.quantile(0.25), 2.1)
+        self.assertEqual(sketch.quantile(0.75), 5.4)
+        self.assertEqual(sketch.quantile(1), 12.1)
+        self.assertEqual(sketch.rank(2.1), 3)
+
+    def test_quantile_error_bounded(self):
+        sketch = dwsk.KllSketch(seed=1)
+        for chunk in np.array_split(self.values, 20):
+            sketch.update(chunk)
+        self.assertEqual(sketch.count, len(self.values))
+        for q in [0.25, 0.5, 0.75]:
+            estimate = sketch.quantile(q)
+            actual_rank = np.mean(self.values <= estimate)
+            self.assertAlmostEqual(actual_rank, q, delta=0.02)
+        self.assertLess(sum(len(lvl) for lvl in sketch._levels), 1000)
+
+    def test_merge(self):
+        sketch1 = dwsk.KllSketch(seed=1)
+        sketch2 = dwsk.KllSketch(seed=2)
+        sketch1.update(self.values[:50000])
+        sketch2.update(self.values[50000:])
+        sketch1.merge(sketch2)
+        self.assertEqual(sketch1.count, len(self.values))
+        self.assertEqual(sketch1.max_val, self.values.max())
+        self.assertEqual(sketch1.min_val, self.values.min())
+        estimate = sketch1.rank(0.0) / sketch1.count
+        self.assertAlmostEqual(estimate, np.mean(self.values <= 0), delta=0.02)
+
+
+class TestSpillableHashSet(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.hashes = rng.integers(0, 2 ** 63, 5000, dtype=np.uint64)
+        self.hashes = self.hashes[rng.integers(0, 5000, 20000)]
+        self.distinct = len(np.unique(self.hashes))
+
+    def _filled(self, max_bytes, directory=None):
+        hashset = dwsk.SpillableHashSet(max_bytes, directory)
+        for chunk in np.array_split(self.hashes, 20):
+            hashset.update(chunk)
+        return hashset
+
+    def test_in_memory(self):
+        hashset = self._filled(None)
+        self.assertFalse(hashset.spilled)
+        self.assertEqual(len(hashset), self.distinct)
+        np.testing.assert_array_equal(hashset.values(),
+                                      np.unique(self.hashes))
+
+    def test_counted_after_each_update(self):
+        hashset = dwsk.SpillableHashSet()
+        for end in range(1000, len(self.hashes) + 1, 1000):
+            hashset.update(self.hashes[end - 1000:end])
+            self.assertEqual(len(hashset), len(np.unique(self.hashes[:end])))
+        self.assertLess(len(hashset._runs), 16)
+
+    def test_spilled(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            hashset = self._filled(8000, tmpdir)
+            self.assertTrue(hashset.spilled)
+            self.assertEqual(len(hashset), self.distinct)
+            # counted again from partitions rewritten without repeats
+            hashset.update(self.hashes[:10])
+            self.assertEqual(len(hashset), self.distinct)
+            np.testing.assert_array_equal(hashset.values(),
+                                          np.unique(self.hashes))
+            del hashset
+            self.assertEqual(os.listdir(tmpdir), [])
+
+    def test_merge(self):
+        for max_bytes in [None, 8000]:
+            hashset1 = dwsk.SpillableHashSet(max_bytes)
+            hashset2 = dwsk.SpillableHashSet(max_bytes)
+            hashset1.update(self.hashes[:12000])
+            hashset2.update(self.hashes[8000:])
+            hashset1.merge(hashset2)
+            self.assertEqual(len(hashset1), self.distinct)
+
+    def test_pickle(self):
+        hashset = pickle.loads(pickle.dumps(self._filled(8000)))
+        self.assertFalse(hashset.spilled)
+        self.assertEqual(len(hashset), self.distinct)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,252 @@
+import inspect
+import io
+import os
+import sys
+import unittest
+HDIR = os.path.dirname(os.path.abspath(
+            inspect.getfile(inspect.currentframe())))
+PARENTDIR = os.path.dirname(HDIR)
+sys.path.insert(0, PARENTDIR)
+import pandas as pd     # type: ignore
+import datawhistle as dw  # noqa
+import datawhistle.streaming as dwsm  # noqa
+
+
+def _run_chunked(csvfile, ymld, chunksize, hash_max_bytes=None):
+    suite = dw.StreamingDatasetCheckSuite()
+    suite.hash_max_bytes = hash_max_bytes
+    dw.apply_yamldict_to_checksuite(ymld, suite)
+    with open(csvfile, 'rb') as stream:
+        names = dwsm.read_csv_header(stream)
+        for chunk in dwsm.csv_chunks(stream, names, suite.column_dtypes(),
+                                     chunksize):
+            suite.update(chunk)
+    suite.runchecks()
+    return suite.error_messages
+
+
+class TestStreamingCheckSuite(unittest.TestCase):
+
+    def setUp(self):
+        self.dfile1 = os.path.join(HDIR, 'data/file1.csv')
+        self.dfile2 = os.path.join(HDIR, 'data/file2.csv')
+        self.yfile1 = os.path.join(HDIR, 'yamls/file1.yaml')
+        self.yfile1a = os.path.join(HDIR, 'yamls/file1a.yaml')
+
+    def test_same_errors_as_pandas(self):
+        for csvfile, yamlfile in [(self.dfile1, self.yfile1),
+                                  (self.dfile2, self.yfile1a)]:
+            ymld = dw.load_yaml_file_to_dict(yamlfile)
+            ymld['table']['stop_on_fail'] = False
+            pdcs = dw.PandasDatsetCheckSuite(pd.read_csv(csvfile))
+            dw.apply_yamldict_to_checksuite(ymld, pdcs)
+            pdcs.runchecks()
+            for chunksize in [1, 3, 100]:
+                self.assertEqual(_run_chunked(csvfile, ymld, chunksize),
+                                 pdcs.error_messages)
+            # hashes of distinct values spilled to disk after every chunk
+            self.assertEqual(_run_chunked(csvfile, ymld, 2, 8),
+                             pdcs.error_messages)
+
+    def test_column_patterns(self):
+        ymld = {'column_patterns': [{'match_type': 'numeric',
+                                     'allow_nulls': False},
+                                    {'match': '[CF]', 'type': 'string',
+                                     'allow_duplicates': False}]}
+        pdcs = dw.PandasDatsetCheckSuite(pd.read_csv(self.dfile2))
+        dw.apply_yamldict_to_checksuite(ymld, pdcs)
+        pdcs.runchecks()
+        self.assertIn('column D want 0 nulls, got 3', pdcs.error_messages)
+        # patterns are resolved against the first chunk with rows
+        self.assertEqual(_run_chunked(self.dfile2, ymld, 3),
+                         pdcs.error_messages)
+
+    def test_regex_rules(self):
+        ymld = {'table': {'stop_on_fail': False},
+                'columns': [{'name': 'C', 'type': 'string',
+                             'regex_rules': [
+                                 {'rule': '[a-c]', 'type': 'mandatory'},
+                                 {'rule': '[d]', 'type': 'exclude'},
+                                 {'rule': '[', 'type': 'exclude'},
+                                 {'rule': '.', 'type': 'mandatory'}]}]}
+        pdcs = dw.PandasDatsetCheckSuite(pd.read_csv(self.dfile1))
+        dw.apply_yamldict_to_checksuite(ymld, pdcs)
+        pdcs.runchecks()
+        self.assertEqual(pdcs.error_messages,
+                         ['column C found a non matching regex record with '
+                          'rule [a-c]',
+                          'column C found invalid regex d with rule [d]',
+                          'column C invalid regex_rule ['])
+        for chunksize in [1, 2, 100]:
+            self.assertEqual(_run_chunked(self.dfile1, ymld, chunksize),
+                             pdcs.error_messages)
+
+    def test_merge_accumulators(self):
+        df = pd.read_csv(self.dfile2)
+        suite1 = dw.StreamingDatasetCheckSuite()
+        suite2 = dw.StreamingDatasetCheckSuite()
+        for suite in [suite1, suite2]:
+            suite.allow_duplicate_rows = False
+            column = suite.addcolumn('A', 'numeric')
+            column.allow_duplicates = False
+            column.allow_outliers = False
+        suite1.update(df.iloc[:4])
+        suite2.update(df.iloc[4:])
+        table_acc, column_accs = suite1.get_accumulators()
+        table_acc.merge(suite2.accumulator)
+        column_accs[0].merge(suite2.columns[0].accumulator)
+        suite1.runchecks()
+        self.assertEqual(suite1.error_messages,
+                         ['want 0 duplicate rows, got 2',
+                          'column A want 0 duplicate rows, got 2'])
+
+    def test_check_csv_streaming(self):
+        ymld = dw.load_yaml_file_to_dict(self.yfile1a)
+        ymld['table']['stop_on_fail'] = False
+        suite = dw.StreamingDatasetCheckSuite()
+        dw.apply_yamldict_to_checksuite(ymld, suite)
+        self.assertFalse(dwsm.check_csv_streaming(self.dfile2, suite, 2))
+        suite.runchecks()
+        self.assertEqual(suite.error_messages,
+                         _run_chunked(self.dfile2, ymld, 100))
+
+    def test_check_csv_streaming_stops_early(self):
+        suite = dw.StreamingDatasetCheckSuite()
+        suite.stop_on_fail = True
+        suite.row_count_max = 1
+        self.assertTrue(dwsm.check_csv_streaming(self.dfile1, suite, 2))
+        self.assertEqual(suite.rows_scanned(), 2)
+        suite.runchecks()
+        self.assertEqual(suite.error_messages,
+                         ['want row count <= 1, got 2 (stopped reading '
+                          'after 2 rows)'])
+        suite = dw.StreamingDatasetCheckSuite()
+        suite.stop_on_fail = True
+        suite.addcolumn('x', 'numeric')
+        column = suite.addcolumn('D', 'numeric')
+        column.allow_nulls = False
+        self.assertTrue(dwsm.check_csv_streaming(self.dfile1, suite, 2))
+        self.assertEqual(suite.rows_scanned(), 0)
+        suite.runchecks()
+        self.assertEqual(suite.error_messages,
+                         ['column x not found in data (stopped reading '
+                          'after 0 rows)'])
+        suite = dw.StreamingDatasetCheckSuite()
+        suite.stop_on_fail = True
+        column = suite.addcolumn('D', 'numeric')
+        column.allow_nulls = False
+        self.assertTrue(dwsm.check_csv_streaming(self.dfile1, suite, 2))
+        suite.runchecks()
+        self.assertEqual(suite.error_messages,
+                         ['column D want 0 nulls, got 1 (stopped reading '
+                          'after 2 rows)'])
+
+    def test_check_csv_streaming_tee(self):
+        with open(self.dfile1, 'rb') as stream:
+            lines = stream.read().splitlines(keepends=True)
+        for stop_on_fail in [False, True]:
+            for prefetch in [0, 2]:
+                # only the header and the chunk of rows 1 and 2 pass
+                suite = dw.StreamingDatasetCheckSuite()
+                suite.stop_on_fail = stop_on_fail
+                suite.row_count_max = 3
+                tee = io.BytesIO()
+                stopped = dwsm.check_csv_streaming(self.dfile1, suite, 2,
+                                                   prefetch, tee=tee)
+                self.assertEqual(stopped, stop_on_fail)
+                self.assertEqual(tee.getvalue(), b''.join(lines[:3]))
+                suite.runchecks()
+                self.assertEqual(len(suite.error_messages), 1)
+        # all rows pass
+        suite = dw.StreamingDatasetCheckSuite()
+        tee = io.BytesIO()
+        self.assertFalse(dwsm.check_csv_streaming(self.dfile1, suite, 3,
+                                                  tee=tee))
+        self.assertEqual(tee.getvalue(), b''.join(lines))
+
+    def test_csv_blocks(self):
+        data = b'1,"a\nb"\n2,c\n\n3,"d\n"\n4,e'
+        self.assertEqual(list(dwsm.csv_blocks(io.BytesIO(data), 2)),
+                         [b'1,"a\nb"\n2,c\n', b'\n3,"d\n"\n', b'4,e'])
+        read_blocksize = dwsm._READ_BLOCKSIZE
+        dwsm._READ_BLOCKSIZE = 3
+        try:
+            self.assertEqual(list(dwsm.csv_blocks(io.BytesIO(data), 1)),
+                             [b'1,"a\nb"\n', b'2,c\n', b'\n',
+                              b'3,"d\n"\n', b'4,e'])
+        finally:
+            dwsm._READ_BLOCKSIZE = read_blocksize
+
+    def test_csv_blocks_mid_field_quotes(self):
+        # a quote within an unquoted field does not start a quoted field,
+        # so blocks stay chunksize lines long
+        data = b'5"6,x\n' + b'1,2\n' * 1000
+        blocks = list(dwsm.csv_blocks(io.BytesIO(data), 10))
+        self.assertEqual(len(blocks), 101)
+        self.assertLessEqual(max(len(block) for block in blocks), 50)
+        self.assertEqual(b''.join(blocks), data)
+
+
+class TestPrefetch(unittest.TestCase):
+
+    def test_prefetch_chunks(self):
+        read = []
+
+        def chunks():
+            for number in range(10):
+                read.append(number)
+                yield number
+
+        stats = dwsm.PipelineStats()
+        prefetched = dwsm.prefetch_chunks(chunks(), 2, stats)
+        self.assertEqual(next(prefetched), 0)
+        # the reader holds at most 2 chunks in the queue and one to put
+        self.assertLessEqual(len(read), 4)
+        self.assertEqual(list(prefetched), list(range(1, 10)))
+        self.assertEqual(stats.chunks, 10)
+        self.assertGreater(stats.seconds, 0)
+        self.assertIn(stats.bound(), ['reader', 'compute'])
+        self.assertTrue(0 <= stats.read_utilisation() <= 1)
+        self.assertTrue(0 <= stats.check_utilisation() <= 1)
+
+    def test_prefetch_stops_reader(self):
+        def chunks():
+            number = 0
+            while True:
+                yield number
+                number += 1
+
+        prefetched = dwsm.prefetch_chunks(chunks(), 1)
+        self.assertEqual(next(prefetched), 0)
+        prefetched.close()
+
+    def test_prefetch_errors(self):
+        def chunks():
+            yield 0
+            raise ValueError('bad chunk')
+
+        prefetched = dwsm.prefetch_chunks(chunks())
+        self.assertEqual(next(prefetched), 0)
+        with self.assertRaisesRegex(ValueError, 'bad chunk'):
+            next(prefetched)
+
+    def test_check_csv_streaming_prefetch(self):
+        ymld = dw.load_yaml_file_to_dict(
+                os.path.join(HDIR, 'yamls/file1a.yaml'))
+        ymld['table']['stop_on_fail'] = False
+        messages = []
+        for prefetch in [0, 1, 3]:
+            suite = dw.StreamingDatasetCheckSuite()
+            dw.apply_yamldict_to_checksuite(ymld, suite)
+            stats = dwsm.PipelineStats()
+            dwsm.check_csv_streaming(os.path.join(HDIR, 'data/file2.csv'),
+                                     suite, 3, prefetch, stats)
+            self.assertEqual(stats.chunks, 0 if prefetch == 0 else 3)
+            suite.runchecks()
+            messages.append(suite.error_messages)
+        self.assertEqual(messages[0], messages[1])
+        self.assertEqual(messages[0], messages[2])
+
+
+if __name__ == '__main__':
+    unittest.main()
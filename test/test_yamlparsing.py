@@ -1,6 +1,7 @@
 import inspect
 import os
 import sys
+import tempfile
 import unittest
 HDIR = os.path.dirname(os.path.abspath(
             inspect.getfile(inspect.currentframe())))
@@ -8,6 +9,7 @@ PARENTDIR = os.path.dirname(HDIR)
 sys.path.insert(0, PARENTDIR)
 import pandas as pd  # type: ignore
 import datawhistle as dw  # noqa
+import datawhistle.pandaschecks as dwpc  # noqa
 
 
 class TestYamlParsing(unittest.TestCase):
@@ -113,6 +115,133 @@ class TestYamlParsing(unittest.TestCase):
         self.assertEqual(col9.allow_nulls, False)
         self.assertEqual(col9.dateformat, '%m/%d/%Y')
 
+    def test_rule_plan(self):
+        plan = dw.load_rule_plan(self.file1path)
+        ymld = dw.load_yaml_file_to_dict(self.file1path)
+        self.assertEqual(plan, dw.compile_yamldict(ymld))
+        self.assertEqual(plan.table[0], ('stop_on_fail', True))
+        self.assertEqual(plan.columns[0].name, 'A')
+        self.assertIn(('min_val', 0), plan.columns[0].settings)
+        with self.assertRaises(AttributeError):
+            plan.columns[0].name = 'B'
+        self.assertRaises(dw.YamlParsingError, dw.load_rule_plan,
+                          self.file3path)
+        checksuite = dw.PandasDatsetCheckSuite(self.df_file1)
+        dw.apply_rule_plan(plan, checksuite)
+        self.assertEqual(checksuite.row_count, 5)
+        self.assertEqual(len(checksuite.columns), 4)
+        self.assertEqual(checksuite.columns[0].min_val, 0)
+        self.assertEqual(checksuite.columns[1].regex_rule, '[a-m]')
+
+    def test_rule_plan_cache(self):
+        with tempfile.TemporaryDirectory() as cachedir:
+            plan = dw.load_rule_plan(self.file1path, cachedir)
+            cached = [name for name in os.listdir(cachedir)
+                      if name.endswith('.plan.json')]
+            self.assertEqual(len(cached), 1)
+            self.assertEqual(dw.load_rule_plan(self.file1path, cachedir),
+                             plan)
+            # cached plans are data, a corrupt one is compiled again
+            with open(os.path.join(cachedir, cached[0]), 'w') as stream:
+                stream.write('[[["stop_on_fail"]]]')
+            self.assertEqual(dw.load_rule_plan(self.file1path, cachedir),
+                             plan)
+        self.assertEqual(dw.rule_plan_fingerprint(plan),
+                         dw.rule_plan_fingerprint(
+                             dw.load_rule_plan(self.file1path)))
+
+    def test_check_order(self):
+        plan = dw.compile_yamldict({'table': {'check_order': 'declared'}})
+        self.assertEqual(plan.table, (('check_order', 'declared'),))
+        self.assertRaises(dw.YamlParsingError, dw.compile_yamldict,
+                          {'table': {'check_order': 'fastest'}})
+
+    def test_column_patterns(self):
+        ymld = {'columns': [{'name': 'A', 'type': 'numeric', 'min': 0}],
+                'column_patterns': [
+                    {'match': '[A-C]', 'type': 'numeric',
+                     'allow_nulls': False},
+                    {'match_regex': '^[DE]$', 'type': 'numeric'},
+                    {'match_type': 'string', 'allow_blanks': False}]}
+        plan = dw.compile_yamldict(ymld)
+        self.assertEqual(len(plan.columns), 1)
+        self.assertEqual(plan.patterns[2].type, 'string')
+        self.assertEqual(plan.patterns[0].settings, (('allow_nulls', False),))
+        checksuite = dw.PandasDatsetCheckSuite(self.df_file1)
+        dw.apply_rule_plan(plan, checksuite)
+        # columns with rules of their own and columns matched by an earlier
+        # pattern are not matched again, and the columns a pattern matches
+        # are checked as a group
+        self.assertEqual([(col.columnname, col.type)
+                          for col in checksuite.columns],
+                         [('A', 'numeric'),
+                          ('columns matching [A-C]', 'numeric'),
+                          ('columns matching ^[DE]$', 'numeric'),
+                          ('columns of type string', 'string')])
+        self.assertEqual([col.columnnames for col in checksuite.columns[1:]],
+                         [['B', 'C'], ['D', 'E'], ['F', 'H', 'J', 'K']])
+        self.assertFalse(checksuite.columns[1].allow_nulls)
+        self.assertFalse(checksuite.columns[3].allow_blanks)
+        self.assertEqual(checksuite.column_patterns, ())
+        # other suites get a suite per column
+        checksuite = dw.StreamingDatasetCheckSuite()
+        dw.apply_rule_plan(plan, checksuite)
+        checksuite.resolve_column_patterns(dwpc.dfschema(self.df_file1))
+        self.assertEqual([col.columnname for col in checksuite.columns],
+                         ['A', 'B', 'C', 'D', 'E', 'F', 'H', 'J', 'K'])
+        self.assertFalse(checksuite.columns[2].allow_nulls)
+        self.assertEqual(
+                dw.resolve_column_patterns(plan.patterns,
+                                           [('B1', None), ('x', 'string')]),
+                [dw.ColumnPlan('x', 'string', (('allow_blanks', False),))])
+        for patterns in [[{'type': 'numeric'}],
+                         [{'name': 'A', 'match': 'A', 'type': 'numeric'}],
+                         [{'match': 'A', 'match_regex': 'A',
+                           'type': 'numeric'}],
+                         [{'match_regex': '(', 'type': 'numeric'}],
+                         [{'match_type': 'boolean'}],
+                         [{'match': 'A*'}],
+                         [{'match': 'A*', 'type': 'numeric', 'min': 'x'}]]:
+            self.assertRaises(dw.YamlParsingError, dw.compile_yamldict,
+                              {'column_patterns': patterns})
+
+    def test_regex_rules(self):
+        ymld = {'columns': [{'name': 'C', 'type': 'string',
+                             'regex_rules': [
+                                 {'rule': '[a-m]', 'type': 'mandatory'},
+                                 {'rule': '[0-9]', 'type': 'exclude'}]}]}
+        checksuite = dw.PandasDatsetCheckSuite(self.df_file1)
+        dw.apply_yamldict_to_checksuite(ymld, checksuite)
+        self.assertEqual(checksuite.columns[0].regex_rules,
+                         (('[a-m]', 'mandatory'), ('[0-9]', 'exclude')))
+        for coldict in [{'name': 'A', 'type': 'numeric',
+                         'regex_rules': [{'rule': 'a', 'type': 'exclude'}]},
+                        {'name': 'C', 'type': 'string', 'regex_rules': []},
+                        {'name': 'C', 'type': 'string',
+                         'regex_rules': [{'rule': 'a'}]},
+                        {'name': 'C', 'type': 'string',
+                         'regex_rules': [{'rule': 1, 'type': 'exclude'}]},
+                        {'name': 'C', 'type': 'string',
+                         'regex_rules': [{'rule': 'a', 'type': 'x'}]}]:
+            self.assertRaises(dw.YamlParsingError, dw.compile_yamldict,
+                              {'columns': [coldict]})
+
+    def test_rule_plan_counts_rows_only(self):
+        for ymld, want in [({'table': {'row_count': 5}}, True),
+                           ({'table': {'row_count_max': 5,
+                                       'stop_on_fail': True,
+                                       'allow_duplicate_rows': True}}, True),
+                           ({'table': {'row_count': 5,
+                                       'allow_duplicate_rows': False}},
+                            False),
+                           ({'table': {'row_count': 5},
+                             'columns': [{'name': 'A',
+                                          'type': 'numeric'}]}, False),
+                           ({'table': {'row_count': 5},
+                             'column_patterns': [{'match_type': 'numeric'}]},
+                            False)]:
+            plan = dw.compile_yamldict(ymld)
+            self.assertEqual(dw.rule_plan_counts_rows_only(plan), want)
 
 
 if __name__ == '__main__':